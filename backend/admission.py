@@ -0,0 +1,234 @@
+import asyncio
+import importlib
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from config import settings
+from rate_limit import TokenBucket
+from shared_state import SQLiteRateLimitBackend
+
+
+class RateLimitedError(Exception):
+    """A client exceeded one of its rate limits"""
+
+    def __init__(self, retry_after: float, limit: str):
+        super().__init__(f"Rate limit exceeded ({limit}), retry in {retry_after:.1f}s")
+        self.limit = limit
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class GenerationBusyError(Exception):
+    """Every upstream generation slot is taken and the wait list is full"""
+
+    def __init__(self, retry_after: int = 5):
+        super().__init__("Video generation is at capacity, please retry")
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Take `cost` tokens from the bucket `key` refilling at `rate`/s up to `burst`"""
+
+    key: str
+    rate: float
+    burst: float
+    cost: float = 1.0
+
+
+class MemoryRateLimitBackend:
+    """
+    Token buckets in process memory.
+
+    All limits of one request are admitted or rejected together, so a
+    request refused by its IP bucket does not also drain its user bucket.
+    Idle buckets are dropped once there are more than `max_keys`.
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _bucket(self, limit: Limit) -> TokenBucket:
+        bucket = self._buckets.get(limit.key)
+        if bucket is None:
+            bucket = self._buckets[limit.key] = TokenBucket(
+                limit.rate, limit.burst, clock=self.clock
+            )
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(limit.key)
+        return bucket
+
+    async def acquire(self, limits: Sequence[Limit]) -> Dict[str, float]:
+        """Take every limit's tokens and return {}, or return the wait per exceeded limit"""
+        buckets = [(limit, self._bucket(limit)) for limit in limits]
+        waits = {}
+        for limit, bucket in buckets:
+            wait = bucket.wait_time(limit.cost)
+            if wait > 0:
+                waits[limit.key] = wait
+        if not waits:
+            for limit, bucket in buckets:
+                bucket.try_acquire(limit.cost)
+        return waits
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+BACKENDS = {"memory": MemoryRateLimitBackend, "sqlite": SQLiteRateLimitBackend}
+
+
+def load_backend(spec: str):
+    """Build a rate limit backend from a registered name or a "module:factory" path"""
+    if spec in BACKENDS:
+        return BACKENDS[spec]()
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+class GenerationGate:
+    """
+    Per-process cap on concurrent upstream generations.
+
+    At most `max_concurrent` renders run at once; up to `max_waiting` more
+    wait for a slot in arrival order, and beyond that callers are refused
+    with GenerationBusyError instead of queueing without bound. The limits
+    are for the whole deployment and split evenly between its `workers`
+    processes (at least one render each), so together they stay within them.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_waiting: Optional[int] = None,
+        workers: Optional[int] = None,
+    ):
+        workers = max(1, workers or settings.WEB_CONCURRENCY)
+        max_concurrent = max_concurrent or settings.PIXVERSE_MAX_CONCURRENT_RENDERS
+        if max_waiting is None:
+            max_waiting = settings.PIXVERSE_MAX_WAITING_RENDERS
+        self.workers = workers
+        self.max_concurrent = max(1, max_concurrent // workers)
+        self.max_waiting = max_waiting // workers
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the running loop (Python 3.9)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def __aenter__(self):
+        if self.active >= self.max_concurrent and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise GenerationBusyError()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.active -= 1
+        self.semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "workers": self.workers,
+        }
+
+
+class AdmissionController:
+    """
+    Per-client admission for the generation endpoints.
+
+    Every request spends one token from its IP bucket and, when signed in,
+    its user bucket. Work that needs new upstream renders also spends one
+    token per render from a much slower generation bucket (per user, or per
+    IP for anonymous callers). Requests answered entirely from the asset
+    index or the translation cache cost no generation tokens, so they keep
+    flowing while a client's generation budget is exhausted.
+    """
+
+    def __init__(self, backend: Any = None, trusted_proxy_hops: Optional[int] = None):
+        if backend is None:
+            backend = load_backend(settings.RATE_LIMIT_BACKEND)
+        self.backend = backend
+        self.trusted_proxy_hops = (
+            settings.TRUSTED_PROXY_HOPS if trusted_proxy_hops is None else trusted_proxy_hops
+        )
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+
+    def client_ip(self, request) -> str:
+        """Peer address, or the address the trusted proxies saw when behind some"""
+        if self.trusted_proxy_hops > 0:
+            forwarded = [
+                hop.strip()
+                for hop in request.headers.get("x-forwarded-for", "").split(",")
+                if hop.strip()
+            ]
+            if len(forwarded) >= self.trusted_proxy_hops:
+                return forwarded[-self.trusted_proxy_hops]
+        return request.client.host if request.client else "unknown"
+
+    def limits(self, ip: str, user_id: Optional[str], generations: int) -> List[Limit]:
+        limits = [Limit(f"ip:{ip}", settings.RATE_LIMIT_IP_RPS, settings.RATE_LIMIT_IP_BURST)]
+        if user_id is not None:
+            limits.append(
+                Limit(
+                    f"user:{user_id}", settings.RATE_LIMIT_USER_RPS, settings.RATE_LIMIT_USER_BURST
+                )
+            )
+        if generations > 0:
+            burst = settings.RATE_LIMIT_GENERATION_BURST
+            owner = f"user:{user_id}" if user_id is not None else f"ip:{ip}"
+            # A job bigger than the burst drains the bucket instead of never fitting
+            limits.append(
+                Limit(
+                    f"{owner}:generations",
+                    settings.RATE_LIMIT_GENERATIONS_PER_MINUTE / 60,
+                    burst,
+                    min(generations, burst),
+                )
+            )
+        return limits
+
+    async def admit(self, request, user_id: Optional[str] = None, generations: int = 0):
+        """Spend the request's tokens or raise RateLimitedError"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        limits = self.limits(self.client_ip(request), user_id, generations)
+        waits = await self.backend.acquire(limits)
+        if waits:
+            key, wait = max(waits.items(), key=lambda item: item[1])
+            # "ip", "user" or "generations"
+            kind = "generations" if key.endswith(":generations") else key.split(":", 1)[0]
+            self.rejected[kind] = self.rejected.get(kind, 0) + 1
+            raise RateLimitedError(wait, kind)
+        self.admitted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"admitted": self.admitted, "rejected": dict(self.rejected)}
+
+
+# Create global instances
+generation_gate = GenerationGate()
+admission = AdmissionController()
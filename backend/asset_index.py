@@ -0,0 +1,320 @@
+import asyncio
+import json
+import os
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from config import settings
+from translation_cache import normalize_text
+
+VIDEO_EXTENSIONS = {".mp4", ".m4v", ".mov", ".webm"}
+MANIFEST_NAME = "manifest.json"
+_CLIP = "$clip"
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized match tokens; apostrophes and punctuation are dropped so
+    "wasn't" and "wasnt" are the same token"""
+    return [t for t in (_NON_WORD.sub("", w) for w in normalize_text(text).split()) if t]
+
+
+def mp4_duration(path: str) -> Optional[float]:
+    """Read the duration from an MP4's mvhd box without loading the file"""
+    try:
+        with open(path, "rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            offset = 0
+            while offset < end:
+                f.seek(offset)
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                size, box = struct.unpack(">I4s", header)
+                if size == 1:
+                    size = struct.unpack(">Q", f.read(8))[0]
+                elif size == 0:
+                    size = end - offset
+                if box == b"moov":
+                    # Descend into moov: mvhd is one of its first children
+                    end = offset + size
+                    offset += 8
+                    continue
+                if box == b"mvhd":
+                    version = f.read(1)[0]
+                    f.read(3)
+                    if version == 1:
+                        f.read(16)
+                        timescale, duration = struct.unpack(">IQ", f.read(12))
+                    else:
+                        f.read(8)
+                        timescale, duration = struct.unpack(">II", f.read(8))
+                    return duration / timescale if timescale else None
+                if size < 8:
+                    return None
+                offset += size
+    except (OSError, struct.error, IndexError):
+        return None
+    return None
+
+
+@dataclass
+class Clip:
+    phrase: str
+    url: str
+    duration: Optional[float] = None
+
+
+@dataclass
+class _Scan:
+    """Assets directory changes read by a scan, applied to the trie later"""
+
+    dir_mtime: float
+    manifest_mtime: Optional[float]
+    seen: Set[str] = field(default_factory=set)
+    # (file name, mtime, phrases, url, duration) of added or changed files
+    changed: List[Tuple[str, float, List[str], str, Optional[float]]] = field(
+        default_factory=list
+    )
+
+
+@dataclass
+class Span:
+    """A run of input words, either covered by a local clip or not"""
+
+    text: str
+    clip: Optional[Clip] = None
+
+
+class AssetIndex:
+    """
+    Phrase -> clip lookup over the pre-rendered sign clips in the assets directory.
+
+    Clips are keyed by their normalized phrase, taken from the file name
+    ("what's your name.mp4") or from an optional manifest.json mapping phrases
+    to files. Phrases are stored in a token trie, so finding the longest clip
+    starting at a word costs one dict lookup per word of that clip, whatever
+    the library size.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        url_prefix: str = "/assets",
+        refresh_interval: float = settings.ASSET_INDEX_REFRESH_INTERVAL,
+    ):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.refresh_interval = refresh_interval
+        self._trie: Dict[str, Any] = {}
+        self._files: Dict[str, Tuple[float, List[str]]] = {}
+        self._manifest_mtime: Optional[float] = None
+        self._dir_mtime: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.clip_count = 0
+
+    def __len__(self) -> int:
+        return self.clip_count
+
+    def add(self, phrase: str, url: str, duration: Optional[float] = None) -> bool:
+        """Index a clip under a phrase; returns False if the phrase has no words"""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return False
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _CLIP not in node:
+            self.clip_count += 1
+        node[_CLIP] = Clip(phrase=phrase, url=url, duration=duration)
+        return True
+
+    def remove(self, phrase: str) -> bool:
+        """Drop a phrase, pruning trie branches that become empty"""
+        tokens = tokenize(phrase)
+        path = [self._trie]
+        for token in tokens:
+            node = path[-1].get(token)
+            if node is None:
+                return False
+            path.append(node)
+        if _CLIP not in path[-1]:
+            return False
+
+        del path[-1][_CLIP]
+        self.clip_count -= 1
+        for token, parent, node in zip(reversed(tokens), reversed(path[:-1]), reversed(path[1:])):
+            if node:
+                break
+            del parent[token]
+        return True
+
+    def lookup(self, phrase: str) -> Optional[Clip]:
+        """Exact phrase lookup"""
+        node = self._trie
+        for token in tokenize(phrase):
+            node = node.get(token)
+            if node is None:
+                return None
+        return node.get(_CLIP)
+
+    def clips(self) -> Iterator[Clip]:
+        """Every indexed clip, in no particular order"""
+        stack = [self._trie]
+        while stack:
+            node = stack.pop()
+            for token, child in node.items():
+                if token == _CLIP:
+                    yield child
+                else:
+                    stack.append(child)
+
+    def cover(self, text: str) -> List[Span]:
+        """
+        Split text into spans, greedily matching the longest local clip at each
+        word. Words with no clip are grouped into uncovered spans (clip=None).
+        Pure lookup: the directory is rescanned by start()'s background task.
+        """
+        words = text.split()
+        tokens = ["".join(tokenize(word)) for word in words]
+
+        spans: List[Span] = []
+        uncovered: List[str] = []
+        i = 0
+        while i < len(words):
+            node = self._trie
+            match_end, match = i, None
+            j = i
+            while j < len(words):
+                if tokens[j]:
+                    node = node.get(tokens[j])
+                    if node is None:
+                        break
+                    if _CLIP in node:
+                        match_end, match = j + 1, node[_CLIP]
+                elif j == i:
+                    break
+                j += 1
+
+            if match is None:
+                uncovered.append(words[i])
+                i += 1
+                continue
+
+            if uncovered:
+                spans.append(Span(text=" ".join(uncovered)))
+                uncovered = []
+            spans.append(Span(text=" ".join(words[i:match_end]), clip=match))
+            i = match_end
+
+        if uncovered:
+            spans.append(Span(text=" ".join(uncovered)))
+        return spans
+
+    def start(self):
+        """Rescan the directory every refresh_interval seconds, off the event loop"""
+        if not self.directory or self.refresh_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_async()
+            except OSError as e:
+                print(f"Error refreshing asset index: {e}")
+
+    def refresh(self) -> int:
+        """
+        Incrementally sync the index with the assets directory. Only files that
+        were added, changed or removed since the last scan are (re)indexed.
+        Returns the number of files indexed or removed.
+        """
+        return self._apply(self._scan())
+
+    async def refresh_async(self) -> int:
+        """refresh(), with the directory scan and mp4 parsing in a thread"""
+        return self._apply(await asyncio.to_thread(self._scan))
+
+    def _scan(self) -> Optional[_Scan]:
+        """Read what changed on disk; None when nothing did. Leaves the index alone"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return None
+
+        dir_mtime = os.stat(self.directory).st_mtime
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        manifest_mtime = (
+            os.stat(manifest_path).st_mtime if os.path.exists(manifest_path) else None
+        )
+        if dir_mtime == self._dir_mtime and manifest_mtime == self._manifest_mtime:
+            return None
+
+        manifest: Dict[str, str] = {}
+        if manifest_mtime is not None:
+            try:
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading asset manifest: {e}")
+
+        # Files named by the manifest are indexed under the manifest phrase(s)
+        phrases_by_file: Dict[str, List[str]] = {}
+        for phrase, filename in manifest.items():
+            phrases_by_file.setdefault(filename, []).append(phrase)
+
+        scan = _Scan(dir_mtime=dir_mtime, manifest_mtime=manifest_mtime)
+        files = dict(self._files)
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() not in VIDEO_EXTENSIONS or not entry.is_file():
+                    continue
+                scan.seen.add(entry.name)
+                mtime = entry.stat().st_mtime
+                phrases = phrases_by_file.get(entry.name, [stem])
+                if files.get(entry.name) == (mtime, phrases):
+                    continue
+                url = f"{self.url_prefix}/{entry.name}"
+                scan.changed.append((entry.name, mtime, phrases, url, mp4_duration(entry.path)))
+        return scan
+
+    def _apply(self, scan: Optional[_Scan]) -> int:
+        """Update the trie from a scan; cheap, so it runs on the event loop"""
+        if scan is None:
+            return 0
+        changes = 0
+        for name, mtime, phrases, url, duration in scan.changed:
+            known = self._files.get(name)
+            if known is not None:
+                for phrase in known[1]:
+                    self.remove(phrase)
+            for phrase in phrases:
+                self.add(phrase, url, duration)
+            self._files[name] = (mtime, phrases)
+            changes += 1
+
+        for name in set(self._files) - scan.seen:
+            for phrase in self._files.pop(name)[1]:
+                self.remove(phrase)
+            changes += 1
+
+        self._dir_mtime = scan.dir_mtime
+        self._manifest_mtime = scan.manifest_mtime
+        return changes
+
+
+# Create a global instance
+asset_index = AssetIndex(settings.ASSETS_DIR)
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+import jwt
+
+from config import settings
+from metrics import AUTH_TOKEN_CACHE, stage
+from translation_cache import MemoryCacheTier
+
+
+class TokenVerifier:
+    """
+    Issues and verifies access tokens.
+
+    Tokens are HS* signed with the shared secret by default. With an
+    asymmetric algorithm (RS256, ES256, EdDSA), tokens are signed with a
+    local PEM private key and verified against a local JWKS file picked by
+    the token's "kid", so other services can verify tokens without the secret.
+
+    Successfully verified tokens are kept in a bounded LRU keyed by the
+    SHA-256 of the token (the raw token is never stored) until their "exp",
+    so a client polling with the same token pays for one signature check.
+    Rejected tokens are never cached. Key files are read by `load_keys()` at
+    startup, so a broken key setup stops the worker instead of failing every
+    authenticated request.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        algorithm: Optional[str] = None,
+        jwks_path: Optional[str] = None,
+        private_key_path: Optional[str] = None,
+        key_id: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_ttl: Optional[float] = None,
+    ):
+        self.secret = secret or settings.JWT_SECRET_KEY
+        self.algorithm = algorithm or settings.JWT_ALGORITHM
+        self.jwks_path = jwks_path if jwks_path is not None else settings.JWT_JWKS_PATH
+        self.private_key_path = (
+            private_key_path if private_key_path is not None else settings.JWT_PRIVATE_KEY_PATH
+        )
+        self.key_id = key_id if key_id is not None else settings.JWT_KEY_ID
+        self.max_ttl = max_ttl if max_ttl is not None else settings.AUTH_TOKEN_CACHE_MAX_TTL
+        self.cache = MemoryCacheTier(
+            max_entries if max_entries is not None else settings.AUTH_TOKEN_CACHE_SIZE,
+            self.max_ttl,
+        )
+        self.hits = 0
+        self.misses = 0
+        self._jwks: Optional[Dict[str, jwt.PyJWK]] = None
+        self._private_key: Any = None
+
+    @property
+    def symmetric(self) -> bool:
+        return self.algorithm.startswith("HS")
+
+    @property
+    def jwks(self) -> Dict[str, jwt.PyJWK]:
+        """Verification keys by kid, loaded from the JWKS file on first use"""
+        if self._jwks is None:
+            if not self.jwks_path:
+                raise jwt.InvalidKeyError(f"JWT_JWKS_PATH is required for {self.algorithm}")
+            with open(self.jwks_path) as f:
+                key_set = jwt.PyJWKSet.from_dict(json.load(f))
+            self._jwks = {key.key_id or "": key for key in key_set.keys}
+        return self._jwks
+
+    @property
+    def private_key(self) -> Any:
+        """Signing key, loaded from the PEM file on first use"""
+        if self._private_key is None:
+            if not self.private_key_path:
+                raise jwt.InvalidKeyError(
+                    f"JWT_PRIVATE_KEY_PATH is required to sign {self.algorithm} tokens"
+                )
+            with open(self.private_key_path) as f:
+                pem = f.read()
+            self._private_key = jwt.get_algorithm_by_name(self.algorithm).prepare_key(pem)
+        return self._private_key
+
+    def load_keys(self, signing: bool = True):
+        """
+        Load and check the keys now rather than on the first request. Raises
+        ValueError naming the problem. With `signing`, the private key (and
+        its kid in the JWKS) is required too.
+        """
+        if self.symmetric:
+            if not self.secret:
+                raise ValueError(f"JWT_SECRET_KEY is required for {self.algorithm}")
+            return
+        try:
+            keys = self.jwks
+            if signing:
+                self.private_key
+        except (OSError, ValueError, jwt.PyJWTError) as e:
+            raise ValueError(f"Cannot load {self.algorithm} token keys: {e}") from e
+        # Tokens we sign must verify: their kid (or, without one, the only key)
+        if signing and (self.key_id or "") not in keys and (self.key_id or len(keys) > 1):
+            raise ValueError(f"JWT_KEY_ID {self.key_id!r} is not in {self.jwks_path}")
+
+    def _verification_key(self, token: str) -> Any:
+        if self.symmetric:
+            return self.secret
+        kid = jwt.get_unverified_header(token).get("kid")
+        keys = self.jwks
+        if kid is None and len(keys) == 1:
+            return next(iter(keys.values()))
+        key = keys.get(kid or "")
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return key
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Claims of a valid token. Raises jwt.ExpiredSignatureError or another
+        jwt.InvalidTokenError when the token is rejected.
+        """
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self.cache.get(digest)
+        if claims is not None:
+            self.hits += 1
+            AUTH_TOKEN_CACHE.labels("hit").inc()
+            return claims
+
+        self.misses += 1
+        AUTH_TOKEN_CACHE.labels("miss").inc()
+        with stage("jwt_verify"):
+            claims = jwt.decode(
+                token, self._verification_key(token), algorithms=[self.algorithm]
+            )
+
+        expires_at = time.time() + self.max_ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        self.cache.set(digest, claims, expires_at)
+        return claims
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        if self.symmetric:
+            return jwt.encode(claims, self.secret, algorithm=self.algorithm)
+        headers = {"kid": self.key_id} if self.key_id else None
+        return jwt.encode(claims, self.private_key, algorithm=self.algorithm, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "algorithm": self.algorithm,
+            "cached_tokens": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.cache.evictions,
+        }
+
+
+# Create a global instance
+token_verifier = TokenVerifier()
@@ -0,0 +1,124 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config import settings
+from pipeline import SegmentedTranslation, TranslationPipeline
+from translation_cache import normalize_text
+
+UNAVAILABLE = "Sign video generation is unavailable, try again later"
+
+
+class BatchTranslator:
+    """
+    Translates many texts (e.g. every sentence of a book) in one request.
+
+    Inputs are deduplicated on their normalized text and each distinct text
+    goes through the translation pipeline once, with a bounded number of
+    texts in flight. Results are yielded as soon as each text completes, in
+    completion order; duplicates are reported together with their original.
+    When a store and user are given, one text_translations row per distinct
+    text is written with a single bulk insert at the end. As in /api/translate,
+    texts without a rendered video are reported as "fallback" (with the local
+    stand-in clip, if any) and are not saved. Passages of several clips are
+    not saved either: a row holds one video, and none covers the whole text.
+    """
+
+    def __init__(
+        self,
+        pipeline: TranslationPipeline,
+        store: Any = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.pipeline = pipeline
+        self.store = store
+        self.concurrency = concurrency or settings.BATCH_CONCURRENCY
+
+    async def run(
+        self, texts: List[str], user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        # normalized text -> indices of every input that shares it
+        groups: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            key = normalize_text(text)
+            if key:
+                groups.setdefault(key, []).append(index)
+            else:
+                yield self._item(index, text, error="Empty text")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def resolve(indices: List[int]):
+            async with semaphore:
+                try:
+                    translation = await self.pipeline.translate(texts[indices[0]])
+                    return indices, translation, None
+                except Exception as e:
+                    return indices, None, str(e)
+
+        tasks = [asyncio.ensure_future(resolve(indices)) for indices in groups.values()]
+        rows = []
+        row_indices = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, translation, error = await next_done
+                for index in indices:
+                    yield self._item(index, texts[index], translation, error)
+                if translation is not None and translation.single_video_url:
+                    rows.append(
+                        {
+                            "user_id": user_id,
+                            "text": texts[indices[0]],
+                            "video_url": translation.single_video_url,
+                        }
+                    )
+                    row_indices.append(indices)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        summary: Dict[str, Any] = {
+            "status": "complete",
+            "count": len(texts),
+            "unique": len(groups),
+            "saved": 0,
+            "translation_ids": None,
+        }
+        if self.store is not None and user_id and rows:
+            try:
+                saved = await self.store.create_text_translations(rows)
+                ids: List[Optional[str]] = [None] * len(texts)
+                for indices, row in zip(row_indices, saved):
+                    for index in indices:
+                        ids[index] = row["id"]
+                summary.update(saved=len(saved), translation_ids=ids)
+            except Exception as e:
+                summary.update(status="error", error_details=str(e))
+        yield summary
+
+    @staticmethod
+    def _item(
+        index: int,
+        text: str,
+        translation: Optional[SegmentedTranslation] = None,
+        error: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        if translation is None:
+            return {
+                "index": index,
+                "text": text,
+                "video_url": None,
+                "segments": [],
+                "total_duration": 0.0,
+                "status": "error",
+                "error_details": error,
+            }
+        rendered = translation.video_url and not translation.fallback
+        return {
+            "index": index,
+            "text": text,
+            "video_url": translation.video_url,
+            "segments": translation.playlist(),
+            "total_duration": translation.total_duration,
+            "status": "success" if rendered else "fallback",
+            "error_details": None if rendered else UNAVAILABLE,
+        }
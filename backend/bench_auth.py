@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark: auth overhead per request, decoding every token in a sync dependency
+(before) versus the async dependency with the verified-token cache (after).
+
+Usage: cd backend && python bench_auth.py [--requests 3000] [--verifications 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from auth import TokenVerifier
+
+SECRET = "bench-secret"
+
+
+def claims() -> dict:
+    return {"sub": "bench-user", "exp": int(time.time()) + 3600}
+
+
+def build_app(mode: str, verifier: TokenVerifier) -> FastAPI:
+    app = FastAPI()
+    security = HTTPBearer()
+
+    def sync_decode(credentials: HTTPAuthorizationCredentials = Depends(security)):
+        try:
+            payload = jwt.decode(credentials.credentials, SECRET, algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401)
+        return payload["sub"]
+
+    async def cached(credentials: HTTPAuthorizationCredentials = Depends(security)):
+        try:
+            payload = verifier.verify(credentials.credentials)
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401)
+        return payload["sub"]
+
+    async def anonymous():
+        return "anonymous"
+
+    dependency = {"none": anonymous, "before": sync_decode, "after": cached}[mode]
+
+    @app.get("/texts")
+    async def texts(user_id: str = Depends(dependency)):
+        return {"user": user_id}
+
+    return app
+
+
+async def drive(app: FastAPI, token: str, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(100):
+            await client.get("/texts", headers=headers)
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/texts", headers=headers)
+            assert response.status_code == 200
+        return (time.perf_counter() - start) / requests
+
+
+def verification_costs(verifications: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [("HS256", TokenVerifier(secret=SECRET, algorithm="HS256"), None)]
+        for algorithm, key in (
+            ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+            ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+        ):
+            pem_path = os.path.join(tmp, f"{algorithm}.pem")
+            with open(pem_path, "wb") as f:
+                f.write(key.private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption(),
+                ))
+            algo = jwt.get_algorithm_by_name(algorithm)
+            jwks_path = os.path.join(tmp, f"{algorithm}.json")
+            with open(jwks_path, "w") as f:
+                f.write('{"keys": [%s]}' % algo.to_jwk(key.public_key()))
+            issuer = TokenVerifier(algorithm=algorithm, private_key_path=pem_path, key_id="")
+            verifier = TokenVerifier(algorithm=algorithm, jwks_path=jwks_path)
+            rows.append((algorithm, verifier, issuer))
+
+        for algorithm, verifier, issuer in rows:
+            token = (issuer or verifier).sign(claims())
+            n = verifications if algorithm != "RS256" else verifications // 5
+            start = time.perf_counter()
+            for _ in range(n):
+                verifier.cache.clear()
+                verifier.verify(token)
+            cold = (time.perf_counter() - start) / n
+            start = time.perf_counter()
+            for _ in range(verifications):
+                verifier.verify(token)
+            warm = (time.perf_counter() - start) / verifications
+            print(f"{algorithm:6} verify {cold * 1e6:8.1f} µs   cached {warm * 1e6:6.2f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--verifications", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print("🔑 Auth overhead benchmark")
+    print("=" * 50)
+    verification_costs(args.verifications)
+
+    print(f"\n🔁 {args.requests} in-process requests to an authenticated route, "
+          f"best of {args.rounds}")
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    best = {}
+    for _ in range(args.rounds):
+        for mode in ("none", "before", "after"):
+            verifier = TokenVerifier(secret=SECRET, algorithm="HS256")
+            seconds = asyncio.run(drive(build_app(mode, verifier), token, args.requests))
+            best[mode] = min(best.get(mode, seconds), seconds)
+    for mode, label in (("none", "no auth"), ("before", "sync decode"), ("after", "cached async")):
+        overhead = best[mode] - best["none"]
+        print(f"{label:13} {best[mode] * 1e6:8.1f} µs/request   "
+              f"auth overhead {overhead * 1e6:7.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /health latency during a login storm, with bcrypt run inline on
+the event loop (before) and on the bounded PasswordHasher pool (after).
+
+Usage: cd backend && python bench_bcrypt.py [--logins 40] [--rounds 12]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import bcrypt
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from password_hasher import HasherBusyError, PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def build_app(mode: str, rounds: int, workers: int, max_queue: int) -> FastAPI:
+    app = FastAPI()
+    stored_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+    hasher = PasswordHasher(workers=workers, max_queue=max_queue, rounds=rounds)
+    app.state.hasher = hasher
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.post("/login")
+    async def login(payload: dict):
+        if mode == "inline":
+            ok = bcrypt.checkpw(payload["password"].encode(), stored_hash.encode())
+        else:
+            try:
+                ok = await hasher.verify(payload["password"], stored_hash)
+            except HasherBusyError:
+                raise HTTPException(status_code=503, headers={"Retry-After": "1"})
+        if not ok:
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    return app
+
+
+async def storm(app: FastAPI, logins: int, probe_interval: float) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        done = asyncio.Event()
+        latencies = []
+
+        async def probe():
+            # Latency is measured from when each probe was *due*, so time the
+            # probe spent waiting for a blocked event loop is counted too
+            origin = time.perf_counter()
+            k = 0
+            while not done.is_set():
+                due = origin + k * probe_interval
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/health")
+                latencies.append(time.perf_counter() - due)
+                k += 1
+
+        prober = asyncio.create_task(probe())
+        await asyncio.sleep(probe_interval * 5)
+        responses = await asyncio.gather(
+            *(client.post("/login", json={"password": PASSWORD}) for _ in range(logins))
+        )
+        done.set()
+        await prober
+
+    statuses = {}
+    for response in responses:
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    latencies.sort()
+    return {
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "max": latencies[-1],
+        "probes": len(latencies),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print("🔐 bcrypt login storm benchmark")
+    print("=" * 50)
+    print(f"👥 {args.logins} concurrent logins, bcrypt rounds={args.rounds}\n")
+    for mode in ("inline", "pool"):
+        app = build_app(mode, args.rounds, args.workers, args.max_queue)
+        start = time.perf_counter()
+        r = asyncio.run(storm(app, args.logins, args.probe_interval))
+        elapsed = time.perf_counter() - start
+        app.state.hasher.shutdown()
+        print(f"{mode:7} /health p50 {r['p50'] * 1000:8.1f}ms  p99 {r['p99'] * 1000:8.1f}ms  "
+              f"max {r['max'] * 1000:8.1f}ms  probes {r['probes']:4}  "
+              f"storm {elapsed:5.1f}s  logins {r['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: plain StaticFiles mount vs MediaFiles for serving sign clips.
+
+Each server runs in its own uvicorn process over a directory holding one
+large clip. The client replays a reader's traffic (full plays, seeks as byte
+ranges and revalidations with If-None-Match) and reports requests/s, MB/s,
+bytes sent and the server's peak RSS (Linux /proc).
+
+Usage: cd backend && python bench_media.py [--size-mb 50] [--requests 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+BENCH_DIR = os.environ.get("BENCH_MEDIA_DIR", tempfile.gettempdir())
+CLIP_NAME = "bench clip.mp4"
+
+
+def _static_app():
+    return Starlette(routes=[Mount("/assets", StaticFiles(directory=BENCH_DIR))])
+
+
+def _media_app():
+    from media import MediaFiles
+
+    return Starlette(routes=[Mount("/assets", MediaFiles(directory=BENCH_DIR))])
+
+
+def peak_rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def replay(base_url: str, size: int, requests: int, concurrency: int) -> dict:
+    rng = random.Random(42)
+    sent = 0
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        etag = (await client.head(f"/assets/{CLIP_NAME}")).headers.get("etag")
+
+        async def one(i: int):
+            nonlocal sent
+            kind = i % 4
+            headers = {}
+            if kind == 1 or kind == 2:
+                # Seek: a 1 MiB window somewhere in the clip
+                start = rng.randrange(0, max(size - 2**20, 1))
+                headers["Range"] = f"bytes={start}-{start + 2**20 - 1}"
+            elif kind == 3 and etag:
+                headers["If-None-Match"] = etag
+            async with semaphore:
+                async with client.stream("GET", f"/assets/{CLIP_NAME}", headers=headers) as r:
+                    async for chunk in r.aiter_raw():
+                        sent += len(chunk)
+                    statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {"elapsed": elapsed, "bytes": sent, "statuses": statuses}
+
+
+def run_server(app_name: str, size: int, requests: int, concurrency: int) -> dict:
+    port = free_port()
+    env = dict(os.environ, BENCH_MEDIA_DIR=BENCH_DIR)
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", f"bench_media:{app_name}", "--factory",
+            "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/assets/missing", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        result = asyncio.run(replay(base_url, size, requests, concurrency))
+        result["rss_mb"] = peak_rss_mb(proc.pid)
+        return result
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    global BENCH_DIR
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        BENCH_DIR = tmp
+        size = args.size_mb * 2**20
+        with open(os.path.join(tmp, CLIP_NAME), "wb") as f:
+            f.write(os.urandom(size))
+
+        print("🎬 Media serving benchmark")
+        print("=" * 50)
+        print(f"📦 Clip: {args.size_mb} MiB, {args.requests} requests, concurrency {args.concurrency}")
+        print("   Mix: 25% full plays, 50% 1 MiB seeks, 25% revalidations\n")
+        for label, app_name in (("StaticFiles", "_static_app"), ("MediaFiles", "_media_app")):
+            r = run_server(app_name, size, args.requests, args.concurrency)
+            mb = r["bytes"] / 2**20
+            print(f"{label:12} {args.requests / r['elapsed']:8.1f} req/s "
+                  f"{mb / r['elapsed']:8.1f} MB/s  sent {mb:8.1f} MiB  "
+                  f"peak RSS {r['rss_mb']:6.1f} MiB  statuses {r['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
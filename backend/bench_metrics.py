@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of the metrics instrumentation, per recorded sample and per request.
+
+Usage: cd backend && python bench_metrics.py [--requests 5000] [--samples 200000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import FastAPI
+
+from metrics import MetricsMiddleware, Registry, registry, stage
+
+
+def per_call_ns(fn, samples: int) -> float:
+    start = time.perf_counter()
+    for _ in range(samples):
+        fn()
+    return (time.perf_counter() - start) / samples * 1e9
+
+
+def primitives(samples: int):
+    reg = Registry()
+    counter = reg.counter("bench_total", "Bench counter", ["route"])
+    histogram = reg.histogram("bench_seconds", "Bench histogram", ["route"])
+    child = histogram.labels("/x")
+
+    def timed_stage():
+        with stage("bench"):
+            pass
+
+    rows = [
+        ("counter.labels().inc()", lambda: counter.labels("/x").inc()),
+        ("histogram.labels().observe()", lambda: histogram.labels("/x").observe(0.012)),
+        ("child.observe()", lambda: child.observe(0.012)),
+        ("with stage(...)", timed_stage),
+    ]
+    for name, fn in rows:
+        print(f"{name:32} {per_call_ns(fn, samples):8.0f} ns")
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(200):
+            await client.get(f"/items/{i}")
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/items/{i}")
+        return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--samples", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print("📈 Metrics overhead benchmark")
+    print("=" * 50)
+    primitives(args.samples)
+
+    print(f"\n🔁 {args.requests} in-process requests, best of {args.rounds}")
+    best = {}
+    for _ in range(args.rounds):
+        for instrumented in (False, True):
+            seconds = asyncio.run(drive(build_app(instrumented), args.requests))
+            best[instrumented] = min(best.get(instrumented, seconds), seconds)
+    plain, instrumented = best[False], best[True]
+    overhead = instrumented - plain
+    print(f"plain        {plain * 1e6:8.1f} µs/request")
+    print(f"instrumented {instrumented * 1e6:8.1f} µs/request")
+    print(f"overhead     {overhead * 1e6:8.1f} µs/request ({overhead / plain:+.1%})")
+
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"\n/metrics render {(time.perf_counter() - start) * 1000:.2f} ms "
+          f"for {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
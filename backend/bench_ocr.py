@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server-side OCR throughput on sample page images.
+
+Reports the per-stage preprocessing cost for each sample, then the pool's
+throughput (images/s) and latency at several worker counts. Engine load time
+is measured separately by warming the pool, since it is paid once per worker.
+If the configured engine cannot load (e.g. no tesseract binary), the pool is
+benchmarked with a no-op engine so the preprocessing path is still measured.
+
+Usage: cd backend && python bench_ocr.py [--workers 1,2,4] [--images 64]
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from ocr import OCRPool, OCRUnavailableError
+from ocr_image import preprocess
+
+NULL_ENGINE = "bench_ocr:NullEngine"
+
+
+class NullEngine:
+    def recognize(self, pixels):
+        return "", 0.0
+
+
+def sample_images(pattern: str):
+    paths = sorted(glob.glob(pattern))
+    return [(os.path.basename(path), open(path, "rb").read()) for path in paths]
+
+
+async def run_pool(engine: str, workers: int, images, count: int) -> dict:
+    pool = OCRPool(engine=engine, workers=workers, max_queue=count)
+    try:
+        start = time.perf_counter()
+        await pool.warm()
+        warm = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(pool.recognize(images[i % len(images)][1]) for i in range(count))
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+    latencies = sorted(r.timings["total"] for r in results)
+    return {
+        "warm": warm,
+        "throughput": count / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engine", default=settings.OCR_ENGINE)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument(
+        "--samples", default=os.path.join(settings.ASSETS_DIR, "*.png")
+    )
+    args = parser.parse_args()
+
+    images = sample_images(args.samples)
+    if not images:
+        print(f"❌ No sample images match {args.samples}")
+        return
+
+    print("🔤 Server-side OCR benchmark")
+    print("=" * 50)
+    for name, data in images:
+        _, timings = preprocess(data, settings.OCR_MAX_SIDE, settings.OCR_MAX_SKEW)
+        stages = "  ".join(f"{stage} {seconds * 1000:6.1f}ms" for stage, seconds in timings.items())
+        print(f"🖼️  {name[:32]:32} {len(data) / 1024:7.0f} KiB  {stages}")
+
+    engine = args.engine
+    try:
+        asyncio.run(run_pool(engine, 1, images, 1))
+    except OCRUnavailableError as e:
+        print(f"\n⚠️  {e}\n   Falling back to a no-op engine (preprocessing only)")
+        engine = NULL_ENGINE
+
+    print(f"\n⚙️  Engine: {engine}, {args.images} images per run, CPUs: {os.cpu_count()}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        r = asyncio.run(run_pool(engine, workers, images, args.images))
+        print(f"{workers:2} workers  {r['throughput']:7.1f} images/s  "
+              f"p50 {r['p50'] * 1000:8.1f}ms  p95 {r['p95'] * 1000:8.1f}ms  "
+              f"warm-up {r['warm'] * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming OCR session vs one /api/ocr upload per frame.
+
+Replays a recorded camera sequence at the live scanner's 2 frames/s and
+compares the current client, which PNG-encodes every frame and reads the
+whole of it, with a streaming session, which receives JPEG frames, skips
+unchanged ones, reads only changed bands and sends stable text deltas.
+Reports upstream/downstream bytes, OCR calls, area read and OCR time.
+
+Without --frames, a synthetic recording is generated: a page held with hand
+jitter, sensor noise and exposure drift, a pan to a second page, a finger
+entering the frame, and a third page. --record DIR saves it as JPEG files,
+which --frames DIR replays (any sorted sequence of image files works).
+If the configured engine cannot load (e.g. no tesseract binary), a no-op
+engine is used, so only preprocessing time is compared.
+
+Usage: cd backend && python bench_ocr_stream.py [--seconds 60] [--frames DIR]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+from typing import List, Tuple
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from bench_ocr import NULL_ENGINE
+from config import settings
+from ocr import OCRPool, OCRUnavailableError
+from ocr_stream import OCRSession
+
+FPS = 2
+FRAME_SIZE = (640, 480)
+PAGES = [
+    ["I wasn't hungry any more.", "What's your name?", "The cat sat on the mat.",
+     "We went to the park after school.", "Thank you very much."],
+    ["Where is the library?", "My sister likes to read books.", "See you tomorrow morning.",
+     "The dog ran after the red ball.", "It is time for lunch."],
+    ["Good morning, everyone.", "Can you help me, please?", "The bus is late today.",
+     "I like apples and bread.", "Let's play outside again."],
+]
+
+
+def render_page(lines: List[str]) -> np.ndarray:
+    page = Image.new("L", (FRAME_SIZE[0] + 80, FRAME_SIZE[1] + 80), 232)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=30)
+    for i, line in enumerate(lines):
+        draw.text((70, 80 + i * 80), line, fill=35, font=font)
+    return np.asarray(page, dtype=np.float32)
+
+
+def synthetic_recording(seconds: float, seed: int) -> List[bytes]:
+    """JPEG frames of a hand-held camera reading three pages"""
+    rng = np.random.default_rng(seed)
+    pages = [render_page(lines) for lines in PAGES]
+    count = int(seconds * FPS)
+    frames = []
+    for i in range(count):
+        t = i / count
+        # Which page is in view, and how far the camera has panned off it
+        if t < 0.35:
+            page, pan = 0, 0
+        elif t < 0.40:
+            page, pan = 1, int((0.40 - t) / 0.05 * 300)
+        elif t < 0.75:
+            page, pan = 1, 0
+        else:
+            page, pan = 2, max(0, int((0.78 - t) / 0.03 * 300))
+        dx, dy = rng.integers(38, 43, size=2)
+        pixels = pages[page][dy:dy + FRAME_SIZE[1], dx:dx + FRAME_SIZE[0]]
+        if pan:
+            pixels = np.roll(pixels, pan, axis=1)
+        pixels = pixels.copy()
+        if 0.55 <= t < 0.62:
+            # A finger pointing at the bottom line
+            pixels[380:, 420:500] = 120
+        pixels += rng.normal(0, 2.5, pixels.shape) + 6 * np.sin(i / 7)
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=75)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def load_frames(directory: str) -> List[bytes]:
+    names = sorted(os.listdir(directory))
+    return [open(os.path.join(directory, name), "rb").read() for name in names]
+
+
+def as_png(frame: bytes) -> bytes:
+    """What CameraOCR uploads: the canvas as PNG"""
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(frame)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def per_frame_uploads(pool: OCRPool, frames: List[bytes]) -> dict:
+    sent = received = 0
+    seconds = 0.0
+    for frame in frames:
+        png = as_png(frame)
+        result = await pool.recognize(png)
+        sent += len(png)
+        received += len(json.dumps(result.to_dict(), separators=(",", ":")))
+        seconds += result.timings["total"]
+    return {"sent": sent, "received": received, "calls": len(frames),
+            "area": float(len(frames)), "seconds": seconds, "messages": len(frames)}
+
+
+async def streaming_session(pool: OCRPool, frames: List[bytes]) -> Tuple[dict, str]:
+    session = OCRSession(pool)
+    received = messages = 0
+    for frame in frames:
+        message = await session.process(frame)
+        if message is not None:
+            received += len(json.dumps(message, separators=(",", ":")))
+            messages += 1
+    stats = {"sent": sum(len(frame) for frame in frames), "received": received,
+             "calls": session.ocr_calls, "area": session.ocr_area,
+             "seconds": session.ocr_seconds + session.diff_seconds, "messages": messages}
+    return stats, session.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engine", default=settings.OCR_ENGINE)
+    parser.add_argument("--seconds", type=float, default=60, help="synthetic recording length")
+    parser.add_argument("--frames", default=None, help="directory of recorded frames to replay")
+    parser.add_argument("--record", default=None, help="save the synthetic recording here")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    print("🎥 Streaming OCR benchmark")
+    print("=" * 50)
+
+    if args.frames:
+        frames = load_frames(args.frames)
+    else:
+        frames = synthetic_recording(args.seconds, args.seed)
+        if args.record:
+            os.makedirs(args.record, exist_ok=True)
+            for i, frame in enumerate(frames):
+                with open(os.path.join(args.record, f"frame_{i:05d}.jpg"), "wb") as f:
+                    f.write(frame)
+    print(f"{len(frames)} frames ({len(frames) / FPS:.0f}s at {FPS} frames/s)")
+
+    engine = args.engine
+    pool = OCRPool(engine=engine, workers=1, max_queue=1)
+    try:
+        asyncio.run(pool.recognize(frames[0]))
+    except OCRUnavailableError as e:
+        print(f"\n⚠️  {e}\n   Falling back to a no-op engine (preprocessing only)")
+        pool.shutdown()
+        engine = NULL_ENGINE
+        pool = OCRPool(engine=engine, workers=1, max_queue=1)
+    print(f"⚙️  Engine: {engine}")
+
+    async def run():
+        await pool.warm()
+        baseline = await per_frame_uploads(pool, frames)
+        stream, text = await streaming_session(pool, frames)
+        return baseline, stream, text
+
+    try:
+        baseline, stream, text = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    rows = [
+        ("upstream", "sent", lambda v: f"{v / 1024:9.0f} KiB"),
+        ("downstream", "received", lambda v: f"{v / 1024:9.1f} KiB"),
+        ("messages", "messages", lambda v: f"{v:9d}    "),
+        ("OCR calls", "calls", lambda v: f"{v:9d}    "),
+        ("area read", "area", lambda v: f"{v:9.1f} fr "),
+        ("OCR time", "seconds", lambda v: f"{v:9.2f} s  "),
+    ]
+    print(f"\n{'':12}{'per-frame /api/ocr':>18}{'/ws/ocr session':>18}{'ratio':>9}")
+    for label, key, fmt in rows:
+        ratio = stream[key] / baseline[key] if baseline[key] else 0.0
+        print(f"{label:12}{fmt(baseline[key]):>18}{fmt(stream[key]):>18}{ratio:8.1%}")
+    if text:
+        print(f"\n📝 Final stable text:\n{text}")
+
+
+if __name__ == "__main__":
+    main()
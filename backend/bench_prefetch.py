@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tap-to-play latency on book pages, with and without prefetch plans.
+
+Simulates a reader paging through a synthetic book and tapping phrases.
+Today every tap is an /api/translate round trip followed by the clip
+download. With prefetching, the page's plan (/api/prefetch) is fetched when
+the page opens, its clips are downloaded in plan order up to a per-page
+byte budget, and missing phrases start rendering; a tap on a downloaded
+clip plays at once, and a tap on any other ready phrase skips the translate
+round trip because the plan already gave its URL.
+
+Plans come from the real Prefetcher (asset clips, cached phrases, tap
+history); the network and render times are modelled: one round trip per
+request, downloads one at a time at the given bandwidth (prefetch traffic
+does not slow down taps), and playback starting after --start-kib of a clip.
+The prefetch plan is compared ranked by reading position alone and by
+reading position plus tap history.
+
+Usage: cd backend && python bench_prefetch.py [--pages 200] [--rtt-ms 80] [--mbps 8]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from asset_index import AssetIndex
+from pipeline import TranslationPipeline
+from prefetch import STATUS_MISSING, STATUS_READY, PrefetchPlan, Prefetcher
+from translation_cache import normalize_text
+
+WORDS = (
+    "the a my your little big old new red blue green happy sleepy hungry cat dog "
+    "bird fish bear duck frog mouse girl boy mum dad friend teacher ran sat jumped "
+    "ate saw found liked wanted looked played slept went came on under in by near "
+    "over the mat tree house park school garden river hill box bed table ball "
+    "apple cake hat boat kite"
+).split()
+# Phrases so common in children's books that the asset library has clips for them
+ASSET_PHRASES = [
+    "once upon a time", "the end", "thank you", "good night", "good morning",
+    "what's your name", "i wasn't hungry any more", "see you soon", "oh no",
+    "said the cat", "said the dog", "one day",
+]
+TAP_INSTANT = 0.05
+
+
+def sentence(rng: random.Random) -> str:
+    if rng.random() < 0.25:
+        return rng.choice(ASSET_PHRASES).capitalize() + "."
+    return " ".join(rng.choices(WORDS, k=rng.randint(3, 6))).capitalize() + "."
+
+
+class HistoryStore:
+    """text_translations as (text -> count), answering like SupabaseDB"""
+
+    def __init__(self, counts: Dict[str, int]):
+        self.counts = counts
+
+    async def get_translations_of_texts(self, texts: List[str], limit: int):
+        rows = []
+        for text in texts:
+            rows += [{"text": text}] * min(self.counts.get(text, 0), limit - len(rows))
+        return rows
+
+
+class ModelClient:
+    """PixVerse client of the simulation: `cached` phrases have mirrored blobs"""
+
+    def __init__(self, cached: Dict[str, str]):
+        self.cached = cached
+
+    async def cached_sign_language_video(self, text, duration=5):
+        return self.cached.get(normalize_text(text))
+
+
+def sparse_file(path: str, size: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+
+def build_book(args, rng: random.Random, root: str):
+    """Pages, the library behind them, phrase popularity and tap history"""
+    pages = [
+        " ".join(sentence(rng) for _ in range(rng.randint(4, 7))) for _ in range(args.pages)
+    ]
+    index = AssetIndex()
+    sizes: Dict[str, int] = {}
+
+    def clip_size() -> int:
+        return int(rng.uniform(0.5, 1.5) * args.clip_kib * 1024)
+
+    for i, phrase in enumerate(ASSET_PHRASES):
+        url = f"/assets/clips/{i:03d}.mp4"
+        sizes[url] = clip_size()
+        sparse_file(os.path.join(root, "clips", f"{i:03d}.mp4"), sizes[url])
+        index.add(phrase, url)
+
+    pipeline = TranslationPipeline(None, asset_index=index)
+    # Sorted, so a seed gives the same book whatever the string hash seed
+    phrases = sorted(
+        {normalize_text(segment.text) for page in pages for segment in pipeline.plan(page)}
+    )
+    cached: Dict[str, str] = {}
+    for i, key in enumerate(phrases):
+        if key in ASSET_PHRASES or rng.random() >= args.cached:
+            continue
+        url = f"/assets/blobs/{i % 256:02x}/{i:08x}.mp4"
+        sizes[url] = clip_size()
+        sparse_file(os.path.join(root, "blobs", url.split("/", 3)[3]), sizes[url])
+        cached[key] = url
+
+    # Some phrases are tapped far more than others; history reflects that
+    popularity = {key: rng.paretovariate(1.2) for key in phrases}
+    history = {
+        key: int(rng.random() < 0.6) * int(popularity[key] * args.history)
+        for key in phrases
+    }
+    pipeline.client = ModelClient(cached)
+    return pages, pipeline, popularity, history, sizes
+
+
+def reader_taps(
+    page: str, plan: PrefetchPlan, popularity: Dict[str, float], args, rng: random.Random
+) -> Tuple[float, List[Tuple[float, str]]]:
+    """How long the page is read, and (time, phrase key) of each tap"""
+    dwell = len(page.split()) / args.words_per_second
+    taps = []
+    for _ in range(rng.randint(0, 2 * args.taps_per_page)):
+        at = rng.uniform(0, dwell)
+        position = at * args.words_per_second
+        # Near where the reader is, and popular phrases more often
+        weights = [
+            popularity[normalize_text(item.text)] * math.exp(-abs(item.word - position) / 8)
+            for item in plan.items
+        ]
+        item = rng.choices(plan.items, weights=weights)[0]
+        taps.append((at, normalize_text(item.text)))
+    return dwell, taps
+
+
+def simulate(pages, prefetcher: Prefetcher, popularity, sizes, args, prefetch: bool, seed: int):
+    """Tap latencies over the book, and bytes prefetched / prefetched and tapped"""
+    rng = random.Random(seed)
+    rtt = args.rtt_ms / 1000
+    server = args.server_ms / 1000
+    bandwidth = args.mbps * 1e6 / 8
+    start_bytes = args.start_kib * 1024
+    latencies: List[float] = []
+    prefetched_bytes = used_bytes = 0
+    rendered: Dict[str, float] = {}
+    clock = 0.0
+
+    for page in pages:
+        started = time.perf_counter()
+        plan = asyncio.run(prefetcher.plan(page, position=0, use_pixverse=True))
+        plan_seconds = time.perf_counter() - started
+        by_key = {normalize_text(item.text): item for item in plan.items}
+        dwell, taps = reader_taps(page, plan, popularity, args, rng)
+
+        # Clip downloads in plan order, within the page's budget
+        downloaded: Dict[str, float] = {}
+        if prefetch:
+            at = rtt + server + plan_seconds
+            budget = args.budget_kib * 1024
+            for item in plan.items:
+                size = item.size or 0
+                if item.status != STATUS_READY or size > budget:
+                    continue
+                budget -= size
+                at += size / bandwidth
+                downloaded[normalize_text(item.text)] = at
+                prefetched_bytes += size
+            for key, item in by_key.items():
+                if item.status == STATUS_MISSING and key not in rendered:
+                    rendered[key] = clock + rtt + args.render_s
+
+        tapped = set()
+        for at, key in taps:
+            item = by_key[key]
+            size = sizes.get(item.video_url) or int(args.clip_kib * 1024)
+            fetch = rtt + min(size, start_bytes) / bandwidth
+            if item.status == STATUS_READY:
+                if prefetch and key in downloaded:
+                    latency = max(0.0, downloaded[key] - at)
+                    if key not in tapped:
+                        used_bytes += size
+                else:
+                    # With a plan the URL is known: the clip is fetched directly
+                    latency = fetch if prefetch else rtt + server + fetch
+                latency = min(latency, fetch) if prefetch else latency
+            else:
+                ready_at = rendered.get(key)
+                if ready_at is None:
+                    # Rendered on the tap, then cached for later taps
+                    ready_at = rendered[key] = clock + at + rtt + args.render_s
+                latency = max(0.0, ready_at - clock - at) + rtt + server + fetch
+            tapped.add(key)
+            latencies.append(latency)
+        clock += dwell
+    return latencies, prefetched_bytes, used_bytes
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=80, help="network round trip")
+    parser.add_argument("--mbps", type=float, default=8, help="download bandwidth")
+    parser.add_argument("--server-ms", type=float, default=15, help="/api/translate cache hit")
+    parser.add_argument("--render-s", type=float, default=30, help="new PixVerse render")
+    parser.add_argument("--clip-kib", type=float, default=400, help="average clip size")
+    parser.add_argument("--start-kib", type=float, default=128, help="bytes before playback")
+    parser.add_argument("--budget-kib", type=float, default=2048, help="prefetch per page")
+    parser.add_argument("--cached", type=float, default=0.8, help="phrases already rendered")
+    parser.add_argument("--history", type=float, default=20, help="tap history scale")
+    parser.add_argument("--words-per-second", type=float, default=2.0)
+    parser.add_argument("--taps-per-page", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    print("📖 Prefetch tap latency benchmark")
+    print("=" * 50)
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as root:
+        pages, pipeline, popularity, history, sizes = build_book(args, rng, root)
+        print(f"{len(pages)} pages, {len(popularity)} distinct phrases, "
+              f"{len(pipeline.client.cached)} rendered, {len(ASSET_PHRASES)} asset clips")
+        print(f"RTT {args.rtt_ms:.0f} ms, {args.mbps:.0f} Mbit/s, "
+              f"prefetch budget {args.budget_kib:.0f} KiB per page")
+
+        def make_prefetcher(tap_weight: float) -> Prefetcher:
+            return Prefetcher(
+                pipeline,
+                store=HistoryStore(history),
+                assets_dir=root,
+                blobs_dir=os.path.join(root, "blobs"),
+                tap_weight=tap_weight,
+                max_pending=0,
+            )
+
+        runs = [
+            ("per-tap /api/translate", make_prefetcher(0.0), False),
+            ("prefetch, reading order", make_prefetcher(0.0), True),
+            ("prefetch, + tap history", make_prefetcher(1.0), True),
+        ]
+        print(f"\n{'':26}{'taps':>6}{'instant':>9}{'p50':>9}{'p90':>9}{'p99':>9}"
+              f"{'prefetched':>12}{'used':>7}")
+        for label, prefetcher, prefetch in runs:
+            latencies, prefetched, used = simulate(
+                pages, prefetcher, popularity, sizes, args, prefetch, args.seed
+            )
+            instant = sum(latency <= TAP_INSTANT for latency in latencies) / max(1, len(latencies))
+            per_page = prefetched / len(pages) / 1024
+            print(
+                f"{label:26}{len(latencies):6d}{instant:9.1%}"
+                f"{percentile(latencies, 0.50) * 1000:7.0f}ms"
+                f"{percentile(latencies, 0.90) * 1000:7.0f}ms"
+                f"{percentile(latencies, 0.99) * 1000:7.0f}ms"
+                f"{per_page:8.0f} KiB{used / prefetched if prefetched else 0:7.0%}"
+            )
+        stats = runs[-1][1].stats()
+        print(f"\nPlans: {stats['plans']}, phrases planned {stats['phrases']}, "
+              f"ready {stats['ready']}")
+
+
+if __name__ == "__main__":
+    main()
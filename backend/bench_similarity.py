@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: near-duplicate text lookup over a large similarity index.
+
+Builds an index of synthetic sentences (default one million), then reports
+bulk load throughput, memory per entry, and lookup latency for noisy
+variants of indexed sentences (OCR-style letter swaps, dropped punctuation,
+split or joined words) and for unrelated sentences. Recall is the share of
+noisy variants that find their original; false positives are unrelated
+sentences that match anything.
+
+Usage: cd backend && python bench_similarity.py [--entries 1000000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from similarity_index import SimilarityIndex
+
+WORDS = (
+    "i you we they he she it the a an my your our is are was wasnt am not very "
+    "hungry thirsty tired happy sad cat dog bird mat hat park school library home "
+    "teacher friend mother father sister brother today tomorrow yesterday morning "
+    "evening night please thank sorry where what when why how can go come see eat "
+    "drink play read write help like love want need any more anymore again still "
+    "big small red blue green book ball car bus train water apple bread milk"
+).split()
+# Letters OCR commonly confuses
+CONFUSIONS = {"y": "v", "l": "1", "o": "0", "m": "rn", "e": "c", "i": "l", "a": "o", "s": "5"}
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(5, 9)))
+
+
+def ocr_noise(text: str, rng: random.Random) -> str:
+    """One misread letter, plus a word split or join and some punctuation"""
+    positions = [i for i, char in enumerate(text) if char in CONFUSIONS]
+    if positions:
+        i = rng.choice(positions)
+        text = text[:i] + CONFUSIONS[text[i]] + text[i + 1:]
+    words = text.split()
+    if len(words) > 2 and rng.random() < 0.5:
+        i = rng.randrange(len(words) - 1)
+        words[i:i + 2] = [words[i] + words[i + 1]]
+    return " ".join(words).capitalize() + rng.choice([".", "!", "?", ""])
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def timed_lookups(index: SimilarityIndex, queries):
+    latencies, matches = [], []
+    for query in queries:
+        start = time.perf_counter()
+        matches.append(index.match(query))
+        latencies.append(time.perf_counter() - start)
+    return latencies, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--candidates", type=int, default=None,
+                        help="closest fingerprints verified by exact cosine")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print("🔎 Similarity index benchmark")
+    print("=" * 50)
+
+    rng = random.Random(args.seed)
+    corpus = [(sentence(rng), f"/assets/blobs/{i:07d}.mp4") for i in range(args.entries)]
+    index = SimilarityIndex(threshold=args.threshold, candidates=args.candidates)
+
+    start = time.perf_counter()
+    added = index.add_many(corpus)
+    load_seconds = time.perf_counter() - start
+    stats = index.stats()
+    print(f"Loaded {added} distinct texts in {load_seconds:.1f}s "
+          f"({load_seconds / max(added, 1) * 1e6:.0f} µs each)")
+    print(f"Memory: {stats['memory_bytes'] / 2**20:.1f} MiB "
+          f"({stats['memory_bytes'] / max(added, 1):.0f} bytes per entry)")
+    print(f"Threshold {index.threshold}, Hamming radius {index.radius} of 64 bits, "
+          f"{index.candidates} candidates verified")
+
+    originals = rng.sample(corpus, min(args.queries, len(corpus)))
+    noisy = [ocr_noise(text, rng) for text, _ in originals]
+    # Warm up the lazy NumPy import and scratch buffers
+    index.match(noisy[0])
+
+    latencies, matches = timed_lookups(index, noisy)
+    found = sum(
+        1 for (_, url), match in zip(originals, matches) if match and match.video_url == url
+    )
+    print(f"\nNoisy variants ({len(noisy)}), e.g. {originals[0][0]!r} -> {noisy[0]!r}")
+    print(f"  recall {found / len(noisy):6.1%}   "
+          f"p50 {percentile(latencies, 0.50) * 1000:.2f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+    known = {text for text, _ in corpus}
+    unrelated = []
+    while len(unrelated) < len(noisy):
+        text = sentence(rng)
+        if text not in known:
+            unrelated.append(text)
+    latencies, matches = timed_lookups(index, unrelated)
+    false_positives = sum(1 for match in matches if match)
+    print(f"\nUnrelated sentences ({len(unrelated)})")
+    print(f"  false positives {false_positives / len(unrelated):6.2%}   "
+          f"p50 {percentile(latencies, 0.50) * 1000:.2f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start, i.e. import time of main and time to first response.
+
+Imports main in fresh interpreters under `python -X importtime` and reports
+the median import time plus a startup profile: the slowest third-party
+imports and the slowest of our own modules. Then starts uvicorn and
+measures how long the process takes to answer its first request, and how
+long the first /api/translate takes compared with a warm one.
+
+With --budget-ms the script exits non-zero when the median import time is
+over budget, so a cold-start regression fails a CI step.
+
+Usage: cd backend && python bench_startup.py [--runs 5] [--budget-ms 1500]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_MODULES = {
+    name[:-3] for name in os.listdir(BACKEND_DIR) if name.endswith(".py")
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_profile() -> Tuple[float, List[Tuple[str, int, float, float]]]:
+    """Seconds to import main, and (module, depth, self, cumulative) seconds per import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        modules.append((name, depth, int(own) / 1e6, int(cumulative) / 1e6))
+        if name == "main":
+            total = int(cumulative) / 1e6
+    return total, modules
+
+
+def first_response() -> Dict[str, float]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                httpx.get(f"{base_url}/", timeout=1).raise_for_status()
+                break
+            except httpx.TransportError:
+                if time.perf_counter() - started > 60:
+                    raise RuntimeError("Server did not start within 60s")
+                time.sleep(0.02)
+        ready = time.perf_counter() - started
+
+        timings = {"process start to first response": ready}
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            for label in ("first /api/translate", "warm /api/translate"):
+                start = time.perf_counter()
+                client.post("/api/translate", json={"text": "hello"}).raise_for_status()
+                timings[label] = time.perf_counter() - start
+            metrics = client.get("/metrics").text
+        for line in metrics.splitlines():
+            if line.startswith("startup_seconds{"):
+                phase = line.split('"')[1]
+                timings[f"in-process {phase}"] = float(line.split()[-1])
+        return timings
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail when the median import of main exceeds this")
+    args = parser.parse_args()
+
+    print("🧊 Cold start benchmark")
+    print("=" * 50)
+
+    runs = [import_profile() for _ in range(args.runs)]
+    totals = [total for total, _ in runs]
+    median = statistics.median(totals)
+    print(f"import main: median {median * 1000:.0f} ms "
+          f"(min {min(totals) * 1000:.0f}, max {max(totals) * 1000:.0f}, {args.runs} runs)")
+
+    # Profile of the median run
+    _, modules = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    # Top-level packages at any depth: each module is listed where it was first imported
+    packages = [
+        m for m in modules
+        if "." not in m[0] and not m[0].startswith("_") and m[0] not in LOCAL_MODULES
+    ]
+    print("\n📦 Slowest packages (cumulative, nested ones included)")
+    for name, _, _, cumulative in sorted(packages, key=lambda m: -m[3])[:args.top]:
+        print(f"  {cumulative * 1000:7.1f} ms  {name}")
+
+    local = [m for m in modules if m[0] in LOCAL_MODULES and m[0] != "main"]
+    print("\n🏠 Slowest backend modules (own code, excluding their imports)")
+    for name, _, own, _ in sorted(local, key=lambda m: -m[2])[:args.top]:
+        print(f"  {own * 1000:7.1f} ms  {name}")
+    deferred = [name for name in ("numpy", "PIL", "postgrest", "pytesseract")
+                if name not in {m[0] for m in modules}]
+    print(f"  deferred until first use: {', '.join(deferred) or 'none'}")
+
+    print("\n⏱️  Time to first response")
+    for label, seconds in first_response().items():
+        print(f"  {seconds * 1000:7.1f} ms  {label}")
+
+    if args.budget_ms is not None and median * 1000 > args.budget_ms:
+        print(f"\n❌ Import time {median * 1000:.0f} ms is over the "
+              f"{args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
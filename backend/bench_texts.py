@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full /texts history vs keyset-paginated, projected pages.
+
+A local SQLite table stands in for Postgres, with 100k rows for the measured
+user among other users' rows. The benchmark compares:
+  * the old listing: every row, validated through TextResponse and encoded
+  * the first keyset page, full rows and projected to (id, text)
+  * a deep page, addressed by OFFSET and by keyset, with and without the
+    (user_id, created_at DESC, id DESC) index
+
+Usage: cd backend && python bench_texts.py [--rows 100000] [--page-size 50]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pydantic import TypeAdapter
+
+from main import TextResponse
+from pagination import decode_cursor, encode_cursor, project
+
+COLUMNS = ("id", "user_id", "text", "video_url", "created_at", "updated_at")
+
+
+def build(rows: int, other_users: int) -> Tuple[sqlite3.Connection, str]:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        "CREATE TABLE text_translations (id TEXT PRIMARY KEY, user_id TEXT, "
+        "text TEXT, video_url TEXT, created_at TEXT, updated_at TEXT)"
+    )
+    user_id = str(uuid.uuid4())
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    owners = [user_id] + [str(uuid.uuid4()) for _ in range(other_users)]
+    batch = []
+    for i in range(rows * len(owners)):
+        created_at = (start + timedelta(seconds=i // len(owners))).isoformat()
+        batch.append(
+            (str(uuid.uuid4()), owners[i % len(owners)], f"the quick brown fox {i}",
+             f"/assets/{i}.mp4", created_at, created_at)
+        )
+    conn.executemany("INSERT INTO text_translations VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.execute("CREATE INDEX idx_user_id ON text_translations(user_id)")
+    conn.commit()
+    return conn, user_id
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def full_history(conn, user_id):
+    rows = conn.execute(
+        "SELECT * FROM text_translations WHERE user_id = ? ORDER BY created_at DESC",
+        (user_id,),
+    ).fetchall()
+    validated = TypeAdapter(List[TextResponse]).validate_python([dict(r) for r in rows])
+    return TypeAdapter(List[TextResponse]).dump_json(validated)
+
+
+def keyset_page(conn, user_id, limit, cursor=None, fields=None):
+    columns = ", ".join(dict.fromkeys([*(fields or COLUMNS), "created_at", "id"]))
+    sql = f"SELECT {columns} FROM text_translations WHERE user_id = ?"
+    params = [user_id]
+    if cursor:
+        created_at, translation_id = decode_cursor(cursor)
+        sql += " AND created_at <= ? AND (created_at < ? OR id < ?)"
+        params += [created_at, created_at, translation_id]
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    rows = [dict(r) for r in conn.execute(sql, params + [limit]).fetchall()]
+    body = json.dumps([project(row, fields) for row in rows], separators=(",", ":"))
+    return body.encode(), encode_cursor(rows[-1]) if rows else None
+
+
+def offset_page(conn, user_id, limit, offset):
+    rows = conn.execute(
+        "SELECT * FROM text_translations WHERE user_id = ? "
+        "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+        (user_id, limit, offset),
+    ).fetchall()
+    return json.dumps([dict(r) for r in rows], separators=(",", ":")).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--other-users", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--deep-page", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("📜 /texts history benchmark")
+    print("=" * 50)
+    print(f"🗄️  {args.rows} rows for the user, {args.other_users} other users alike\n")
+    conn, user_id = build(args.rows, args.other_users)
+    deep_offset = args.page_size * args.deep_page
+
+    # A cursor at the start of the deep page, as a client would hold it
+    (cursor,) = conn.execute(
+        "SELECT created_at, id FROM text_translations WHERE user_id = ? "
+        "ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+        (user_id, deep_offset - 1),
+    ).fetchall()
+    cursor = encode_cursor(dict(cursor))
+
+    def report(label, seconds, body):
+        print(f"{label:42} {seconds * 1000:9.2f}ms  {len(body) / 1024:9.1f} KiB")
+
+    for indexed in (False, True):
+        if indexed:
+            conn.execute(
+                "CREATE INDEX idx_text_translations_user_created_at "
+                "ON text_translations(user_id, created_at DESC, id DESC)"
+            )
+            print("\n+ composite (user_id, created_at DESC, id DESC) index")
+        else:
+            print("user_id index only")
+
+        seconds, body = timed(lambda: full_history(conn, user_id), max(1, args.repeat // 2))
+        report("full history (old /texts)", seconds, body)
+        seconds, (body, _) = timed(lambda: keyset_page(conn, user_id, args.page_size), args.repeat)
+        report("first page", seconds, body)
+        seconds, (body, _) = timed(
+            lambda: keyset_page(conn, user_id, args.page_size, fields=["id", "text"]), args.repeat
+        )
+        report("first page, fields=id,text", seconds, body)
+        seconds, body = timed(lambda: offset_page(conn, user_id, args.page_size, deep_offset), args.repeat)
+        report(f"page {args.deep_page} by OFFSET", seconds, body)
+        seconds, (body, _) = timed(
+            lambda: keyset_page(conn, user_id, args.page_size, cursor=cursor), args.repeat
+        )
+        report(f"page {args.deep_page} by keyset cursor", seconds, body)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API throughput with 1, 2, 4 and 8 gunicorn worker processes.
+
+Each round starts the app with gunicorn.conf.py and WEB_CONCURRENCY set to
+the worker count, then drives /api/translate (asset-index planning and the
+admission check, no upstream calls) from several client processes for a
+fixed time. Rate limits stay on with high budgets, so every request also
+pays for the shared SQLite token buckets once more than one worker runs.
+Reports requests/s and p50/p99 latency per worker count.
+
+Usage: cd backend && python bench_workers.py [--workers 1 2 4 8] [--seconds 10]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TEXTS = ["hello", "thank you", "good morning", "the cat sat on the mat", "wasnt hungry anymore"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def drive(base_url: str, seconds: float, concurrency: int, client_id: int) -> list:
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency)
+    # Distinct client addresses so per-IP buckets do not throttle the load
+    headers = {"X-Forwarded-For": f"198.51.100.{client_id}"}
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def loop(i: int):
+            n = i
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/translate", json={"text": TEXTS[n % len(TEXTS)]}, headers=headers
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                n += 1
+
+        await asyncio.gather(*(loop(i) for i in range(concurrency)))
+    return latencies
+
+
+def client_process(args) -> list:
+    return asyncio.run(drive(*args))
+
+
+def run_round(workers: int, seconds: float, clients: int, concurrency: int, state_dir: str):
+    port = free_port()
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        PORT=str(port),
+        SHARED_STATE_PATH=os.path.join(state_dir, f"shared_state_{workers}.db"),
+        TRUSTED_PROXY_HOPS="1",
+        RATE_LIMIT_IP_RPS="100000",
+        RATE_LIMIT_IP_BURST="100000",
+        BLOB_MIRROR_ENABLED="false",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        for _ in range(300):
+            try:
+                httpx.get(f"{base_url}/", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        # Let every worker finish its startup before measuring
+        time.sleep(1 + 0.25 * workers)
+
+        jobs = [(base_url, seconds, concurrency, i) for i in range(clients)]
+        with multiprocessing.get_context("spawn").Pool(clients) as pool:
+            latencies = [sample for part in pool.map(client_process, jobs) for sample in part]
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "rps": len(latencies) / seconds,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client")
+    args = parser.parse_args()
+
+    print("🏭 Multi-worker throughput benchmark")
+    print("=" * 50)
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes x "
+          f"{args.concurrency} connections, {args.seconds:.0f}s per round")
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as state_dir:
+        for workers in args.workers:
+            result = run_round(workers, args.seconds, args.clients, args.concurrency, state_dir)
+            baseline = baseline or result["rps"]
+            print(f"{workers} worker{'s' if workers > 1 else ' '}  "
+                  f"{result['rps']:8.1f} req/s  x{result['rps'] / baseline:4.2f}   "
+                  f"p50 {result['p50'] * 1000:6.1f} ms   p99 {result['p99'] * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
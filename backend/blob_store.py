@@ -0,0 +1,417 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from starlette.exceptions import HTTPException
+from starlette.types import Scope
+
+from config import settings
+from media import MediaFiles
+from singleflight import SingleFlight
+
+_DIGEST_NAME = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,5})$")
+_EXTENSIONS = {".mp4", ".webm", ".mov", ".m4v"}
+_CHUNK_SIZE = 1024 * 1024
+# Sidecar next to each blob holding the URL it was mirrored from; kept on eviction
+_SOURCE_SUFFIX = ".source"
+
+
+class BlobTooLargeError(Exception):
+    """A download exceeded the per-file size limit"""
+
+
+@dataclass
+class Blob:
+    digest: str
+    size: int
+    path: str
+    url: str
+
+
+class BlobStore:
+    """
+    Content-addressed store for generated videos.
+
+    Remote results are streamed to disk in chunks while being hashed, then
+    renamed to <root>/<aa>/<sha256><ext>, so identical videos are stored once
+    however many translations point at them and a file name always says what
+    its bytes must hash to. Total size is bounded by evicting the least
+    recently served blobs, and reads are verified against the name (once per
+    file version) so a corrupted blob is dropped instead of served. Each blob
+    remembers the URL it came from, so one that was evicted or dropped while
+    translations still point at it is mirrored again on the next request.
+    File I/O runs in worker threads; only the download itself is on the loop.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        url_prefix: str = "/assets/blobs",
+        max_bytes: Optional[int] = None,
+        max_file_bytes: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.root = root or settings.BLOB_STORE_DIR
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_bytes = max_bytes if max_bytes is not None else settings.BLOB_STORE_MAX_BYTES
+        self.max_file_bytes = (
+            max_file_bytes if max_file_bytes is not None else settings.BLOB_MAX_FILE_BYTES
+        )
+        self.transport = transport
+        self.inflight = SingleFlight()
+
+        # digest -> (size, name), least recently used first
+        self._blobs: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._verified: Dict[str, Tuple[int, int]] = {}
+        self._mirrored: Dict[str, str] = {}
+        self._sources: Dict[str, str] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+        self.size = 0
+        self.downloads = 0
+        self.deduplicated = 0
+        self.evictions = 0
+        self.corrupt = 0
+        self.restored = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=settings.PIXVERSE_REQUEST_TIMEOUT,
+                follow_redirects=True,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _load(self):
+        """Index blobs left by earlier runs, oldest access first"""
+        if self._loaded:
+            return
+        found = []
+        if os.path.isdir(self.root):
+            for shard in os.scandir(self.root):
+                if not shard.is_dir() or len(shard.name) != 2:
+                    continue
+                for entry in os.scandir(shard.path):
+                    match = _DIGEST_NAME.match(entry.name)
+                    if match and entry.is_file():
+                        st = entry.stat()
+                        used = max(st.st_atime, st.st_mtime)
+                        found.append((used, match.group(1), st.st_size, entry.name))
+        found.sort()
+        with self._lock:
+            for _, digest, size, name in found:
+                self._blobs[digest] = (size, name)
+                self.size += size
+            self._loaded = True
+
+    def path_for(self, digest: str, name: str) -> str:
+        return os.path.join(self.root, digest[:2], name)
+
+    def url_for(self, digest: str, name: str) -> str:
+        return f"{self.url_prefix}/{digest[:2]}/{name}"
+
+    def get(self, digest: str) -> Optional[Blob]:
+        self._load()
+        with self._lock:
+            entry = self._blobs.get(digest)
+        if entry is None:
+            return None
+        size, name = entry
+        return Blob(digest, size, self.path_for(digest, name), self.url_for(digest, name))
+
+    async def mirror(self, url: str) -> Optional[str]:
+        """
+        Local URL of a remote video, downloading it at most once per URL.
+        Returns None when it cannot be mirrored so callers keep the remote URL.
+        """
+        local = self._mirrored.get(url)
+        if local is not None:
+            return local
+        try:
+            blob = await self.inflight.do(url, lambda: self.put_url(url))
+        except Exception as e:
+            print(f"Error mirroring {url}: {e}")
+            return None
+        self._mirrored[url] = blob.url
+        return blob.url
+
+    async def restore(self, digest: str) -> bool:
+        """
+        Mirror a missing blob again from the URL it was first downloaded from.
+        False when there is no record of it, the download fails, or the source
+        no longer serves the same bytes.
+        """
+        source = await asyncio.to_thread(self.source_of, digest)
+        if source is None:
+            return False
+        try:
+            blob = await self.inflight.do(source, lambda: self.put_url(source))
+        except Exception as e:
+            print(f"Error restoring blob {digest} from {source}: {e}")
+            return False
+        if blob.digest != digest:
+            print(f"⚠️  {source} no longer serves blob {digest}")
+            return False
+        self._mirrored[source] = blob.url
+        self.restored += 1
+        return True
+
+    async def put_url(self, url: str) -> Blob:
+        """Stream a URL into the store without holding the body in memory"""
+        await asyncio.to_thread(self._load)
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        if ext not in _EXTENSIONS:
+            ext = ".mp4"
+
+        fd, tmp_path = await asyncio.to_thread(self._tempfile)
+        f = os.fdopen(fd, "wb")
+        try:
+            sha = hashlib.sha256()
+            size = 0
+            async with self.client.stream("GET", url) as response:
+                response.raise_for_status()
+                expected = response.headers.get("content-length")
+                if expected is not None and int(expected) > self.max_file_bytes:
+                    raise BlobTooLargeError(f"{url} is {expected} bytes")
+                async for chunk in response.aiter_bytes(_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_file_bytes:
+                        raise BlobTooLargeError(
+                            f"{url} exceeds {self.max_file_bytes} bytes"
+                        )
+                    await asyncio.to_thread(_write, f, sha, chunk)
+            await asyncio.to_thread(_sync, f)
+            self.downloads += 1
+            return await asyncio.to_thread(
+                self._commit, tmp_path, sha.hexdigest(), size, ext, url
+            )
+        finally:
+            f.close()
+            await asyncio.to_thread(self._discard, tmp_path)
+
+    def _tempfile(self) -> Tuple[int, str]:
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkstemp(prefix=".download-", dir=self.root)
+
+    def _discard(self, tmp_path: str):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    def _commit(self, tmp_path: str, digest: str, size: int, ext: str, url: str) -> Blob:
+        name = digest + ext
+        path = self.path_for(digest, name)
+        self._record_source(digest, url)
+        with self._lock:
+            existing = self._blobs.get(digest)
+        if existing is not None and os.path.exists(self.path_for(digest, existing[1])):
+            self.deduplicated += 1
+            self.touch(digest)
+            return self.get(digest)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        with self._lock:
+            previous = self._blobs.pop(digest, None)
+            if previous is not None:
+                self.size -= previous[0]
+            self._blobs[digest] = (size, name)
+            self.size += size
+            # Just hashed while downloading
+            st = os.stat(path)
+            self._verified[digest] = (st.st_size, st.st_mtime_ns)
+        self.gc(keep=digest)
+        return Blob(digest, size, path, self.url_for(digest, name))
+
+    def _record_source(self, digest: str, url: str):
+        """Remember where a blob came from; the latest URL wins"""
+        with self._lock:
+            if self._sources.get(digest) == url:
+                return
+            self._sources[digest] = url
+        path = self.path_for(digest, digest + _SOURCE_SUFFIX)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(url)
+
+    def source_of(self, digest: str) -> Optional[str]:
+        """URL a blob was mirrored from, even after it was evicted"""
+        with self._lock:
+            source = self._sources.get(digest)
+        if source is not None:
+            return source
+        try:
+            with open(self.path_for(digest, digest + _SOURCE_SUFFIX)) as f:
+                source = f.read().strip()
+        except OSError:
+            return None
+        with self._lock:
+            self._sources[digest] = source
+        return source or None
+
+    def touch(self, digest: str):
+        """Mark a blob as recently used"""
+        with self._lock:
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+
+    def gc(self, keep: Optional[str] = None) -> int:
+        """Evict least recently used blobs until the store fits max_bytes"""
+        self._load()
+        freed = 0
+        while True:
+            with self._lock:
+                if self.size <= self.max_bytes:
+                    break
+                victim = next((d for d in self._blobs if d != keep), None)
+                if victim is None:
+                    break
+                size, name = self._blobs.pop(victim)
+                self._verified.pop(victim, None)
+                self.size -= size
+            self._forget_mirrors(victim)
+            self._remove(self.path_for(victim, name))
+            freed += size
+            self.evictions += 1
+        return freed
+
+    def verify(self, digest: str) -> bool:
+        """
+        Check a blob's bytes against its digest, once per size/mtime. A
+        mismatching or missing blob is removed from the store.
+        """
+        blob = self.get(digest)
+        if blob is None:
+            return False
+        try:
+            st = os.stat(blob.path)
+        except FileNotFoundError:
+            self._drop(digest)
+            return False
+        version = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            if self._verified.get(digest) == version:
+                return True
+
+        sha = hashlib.sha256()
+        with open(blob.path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                sha.update(chunk)
+        if sha.hexdigest() != digest:
+            print(f"⚠️  Blob {digest} is corrupt, removing it")
+            self.corrupt += 1
+            self._drop(digest)
+            self._remove(blob.path)
+            return False
+        with self._lock:
+            self._verified[digest] = version
+        return True
+
+    def _drop(self, digest: str):
+        with self._lock:
+            entry = self._blobs.pop(digest, None)
+            self._verified.pop(digest, None)
+            if entry is not None:
+                self.size -= entry[0]
+        self._forget_mirrors(digest)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            # Already gone, or the shard still holds other blobs
+            pass
+
+    def _forget_mirrors(self, digest: str):
+        prefix = f"{self.url_prefix}/{digest[:2]}/{digest}"
+        for url, local in list(self._mirrored.items()):
+            if local.startswith(prefix):
+                del self._mirrored[url]
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for /blobs/stats; scans the store on first use, so call it off the loop"""
+        self._load()
+        return {
+            "blobs": len(self._blobs),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "downloads": self.downloads,
+            "deduplicated": self.deduplicated,
+            "evictions": self.evictions,
+            "corrupt": self.corrupt,
+            "restored": self.restored,
+            "mirroring": len(self.inflight),
+        }
+
+
+def _write(f, sha, chunk: bytes):
+    sha.update(chunk)
+    f.write(chunk)
+
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+class BlobFiles(MediaFiles):
+    """
+    Serves a BlobStore: every read is integrity checked and counts as a use for
+    LRU, and a blob that is gone is mirrored again from its source
+    """
+
+    def __init__(self, store: BlobStore, **kwargs):
+        # The store creates its root on the first download
+        super().__init__(directory=store.root, check_dir=False, **kwargs)
+        self.store = store
+
+    async def get_response(self, path: str, scope: Scope):
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            match = _DIGEST_NAME.match(os.path.basename(path))
+            if e.status_code != 404 or match is None:
+                raise
+            if not await self.store.restore(match.group(1)):
+                raise
+        return await super().get_response(path, scope)
+
+    def lookup_path(self, path: str):
+        # Runs in a worker thread, so hashing here does not block the event loop
+        match = _DIGEST_NAME.match(os.path.basename(path))
+        if match is None:
+            return "", None
+        digest = match.group(1)
+        if not self.store.verify(digest):
+            return "", None
+        self.store.touch(digest)
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None:
+            # Keep the access time current for LRU order across restarts
+            try:
+                os.utime(full_path, ns=(time.time_ns(), stat_result.st_mtime_ns))
+            except OSError:
+                pass
+        return full_path, stat_result
+
+
+# Create a global instance
+blob_store = BlobStore()
@@ -10,6 +10,11 @@ class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_ANON_KEY: str = os.getenv("SUPABASE_ANON_KEY", "")
     SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+    DB_MAX_KEEPALIVE: int = int(os.getenv("DB_MAX_KEEPALIVE", "10"))
+    DB_REQUEST_TIMEOUT: float = float(os.getenv("DB_REQUEST_TIMEOUT", "10"))
+    # Values per "in" filter; longer lists are split to keep GET URLs short
+    DB_IN_CHUNK_SIZE: int = int(os.getenv("DB_IN_CHUNK_SIZE", "50"))
 
     # JWT Configuration
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key-here")
@@ -17,19 +22,217 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
     )
+    # Asymmetric tokens (RS256/ES256/EdDSA): verify against a local JWKS file,
+    # sign with a PEM private key whose JWKS entry has JWT_KEY_ID as its "kid"
+    JWT_JWKS_PATH: str = os.getenv("JWT_JWKS_PATH", "")
+    JWT_PRIVATE_KEY_PATH: str = os.getenv("JWT_PRIVATE_KEY_PATH", "")
+    JWT_KEY_ID: str = os.getenv("JWT_KEY_ID", "")
+    # Verified tokens are cached until their exp (at most AUTH_TOKEN_CACHE_MAX_TTL)
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    AUTH_TOKEN_CACHE_MAX_TTL: float = float(os.getenv("AUTH_TOKEN_CACHE_MAX_TTL", "3600"))
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "1000"))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "30"))
 
     # PixVerse API Configuration
     PIXVERSE_API_KEY: str = os.getenv(
         "PIXVERSE_API_KEY", ""
     )
+    PIXVERSE_BASE_URL: str = os.getenv(
+        "PIXVERSE_BASE_URL", "https://app-api.pixverse.ai/openapi/v2"
+    )
+    USE_PIXVERSE: bool = os.getenv("USE_PIXVERSE", "false").lower() == "true"
+    PIXVERSE_MAX_CONNECTIONS: int = int(os.getenv("PIXVERSE_MAX_CONNECTIONS", "20"))
+    PIXVERSE_MAX_KEEPALIVE: int = int(os.getenv("PIXVERSE_MAX_KEEPALIVE", "10"))
+    PIXVERSE_REQUEST_TIMEOUT: float = float(
+        os.getenv("PIXVERSE_REQUEST_TIMEOUT", "30")
+    )
+    PIXVERSE_POLL_TIMEOUT: float = float(os.getenv("PIXVERSE_POLL_TIMEOUT", "300"))
+    # Deadlines per upstream attempt; transient failures are retried with
+    # jittered backoff while the retry budget (a share of recent calls) lasts
+    PIXVERSE_GENERATE_TIMEOUT: float = float(os.getenv("PIXVERSE_GENERATE_TIMEOUT", "20"))
+    PIXVERSE_STATUS_TIMEOUT: float = float(os.getenv("PIXVERSE_STATUS_TIMEOUT", "5"))
+    PIXVERSE_RETRIES: int = int(os.getenv("PIXVERSE_RETRIES", "2"))
+    PIXVERSE_RETRY_BASE_DELAY: float = float(os.getenv("PIXVERSE_RETRY_BASE_DELAY", "0.2"))
+    PIXVERSE_RETRY_MAX_DELAY: float = float(os.getenv("PIXVERSE_RETRY_MAX_DELAY", "5"))
+    PIXVERSE_RETRY_BUDGET_RATIO: float = float(os.getenv("PIXVERSE_RETRY_BUDGET_RATIO", "0.2"))
+    PIXVERSE_RETRY_BUDGET_MIN_PER_SECOND: float = float(
+        os.getenv("PIXVERSE_RETRY_BUDGET_MIN_PER_SECOND", "1")
+    )
+    # Consecutive transient failures that open the circuit, and seconds it stays open
+    PIXVERSE_BREAKER_FAILURES: int = int(os.getenv("PIXVERSE_BREAKER_FAILURES", "5"))
+    PIXVERSE_BREAKER_RESET: float = float(os.getenv("PIXVERSE_BREAKER_RESET", "30"))
+    # A status check unanswered this long gets a second, parallel request (0 disables)
+    PIXVERSE_HEDGE_DELAY: float = float(os.getenv("PIXVERSE_HEDGE_DELAY", "1"))
+
+    # Shared status polling scheduler
+    POLL_MAX_CONCURRENCY: int = int(os.getenv("POLL_MAX_CONCURRENCY", "10"))
+    POLL_INITIAL_INTERVAL: float = float(os.getenv("POLL_INITIAL_INTERVAL", "1"))
+    POLL_MAX_INTERVAL: float = float(os.getenv("POLL_MAX_INTERVAL", "10"))
+    POLL_BACKOFF: float = float(os.getenv("POLL_BACKOFF", "1.5"))
+    POLL_JITTER: float = float(os.getenv("POLL_JITTER", "0.2"))
+
+    # Translation cache ("" disables the persistent SQLite tier)
+    TRANSLATION_CACHE_MAX_ENTRIES: int = int(
+        os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "10000")
+    )
+    TRANSLATION_CACHE_TTL: float = float(
+        os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600))
+    )
+    TRANSLATION_CACHE_PATH: str = os.getenv(
+        "TRANSLATION_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "translation_cache.db"),
+    )
+    # Rows kept in the persistent tier (oldest dropped first), pruned at startup
+    # and then every TRANSLATION_CACHE_PRUNE_INTERVAL seconds
+    TRANSLATION_CACHE_MAX_ROWS: int = int(os.getenv("TRANSLATION_CACHE_MAX_ROWS", "200000"))
+    TRANSLATION_CACHE_PRUNE_INTERVAL: float = float(
+        os.getenv("TRANSLATION_CACHE_PRUNE_INTERVAL", "3600")
+    )
+
+    # Fuzzy reuse: texts at least this similar (trigram cosine) to an already
+    # translated text or asset clip reuse its video instead of a new render
+    SIMILARITY_ENABLED: bool = os.getenv("SIMILARITY_ENABLED", "true").lower() == "true"
+    SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))
+    SIMILARITY_MIN_CHARS: int = int(os.getenv("SIMILARITY_MIN_CHARS", "8"))
+    SIMILARITY_CANDIDATES: int = int(os.getenv("SIMILARITY_CANDIDATES", "32"))
+    # ...and differ in at most this many words, each by a typo or two
+    SIMILARITY_MAX_CHANGED_WORDS: int = int(os.getenv("SIMILARITY_MAX_CHANGED_WORDS", "2"))
+    # When PixVerse fails, the closest local clip at least this similar is served
+    SIMILARITY_FALLBACK_THRESHOLD: float = float(
+        os.getenv("SIMILARITY_FALLBACK_THRESHOLD", "0.5")
+    )
+    # text_translations rows loaded into the index at startup (0 disables)
+    SIMILARITY_PRELOAD_LIMIT: int = int(os.getenv("SIMILARITY_PRELOAD_LIMIT", "1000000"))
+    SIMILARITY_PRELOAD_PAGE_SIZE: int = int(os.getenv("SIMILARITY_PRELOAD_PAGE_SIZE", "1000"))
+
+    # Phrase segmentation of long passages
+    SEGMENT_MAX_WORDS: int = int(os.getenv("SEGMENT_MAX_WORDS", "6"))
+    SEGMENT_CONCURRENCY: int = int(os.getenv("SEGMENT_CONCURRENCY", "4"))
+
+    # Batch translation (/api/translate/batch)
+    BATCH_MAX_TEXTS: int = int(os.getenv("BATCH_MAX_TEXTS", "1000"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+    # Prefetch plans for book pages (/api/prefetch): phrases are ranked by how
+    # soon the reader reaches them plus PREFETCH_TAP_WEIGHT times how often
+    # their text was translated before (text_translations, counted up to
+    # PREFETCH_TAP_ROWS rows per plan and cached for PREFETCH_TAP_TTL seconds)
+    PREFETCH_MAX_CHARS: int = int(os.getenv("PREFETCH_MAX_CHARS", "20000"))
+    PREFETCH_TAP_WEIGHT: float = float(os.getenv("PREFETCH_TAP_WEIGHT", "1.0"))
+    PREFETCH_TAP_ROWS: int = int(os.getenv("PREFETCH_TAP_ROWS", "5000"))
+    PREFETCH_TAP_TTL: float = float(os.getenv("PREFETCH_TAP_TTL", "300"))
+    # Top ready clips announced as Link: rel=preload headers
+    PREFETCH_PRELOAD_LINKS: int = int(os.getenv("PREFETCH_PRELOAD_LINKS", "4"))
+    # Missing phrases generated in the background at once, per worker (0 disables)
+    PREFETCH_MAX_PENDING: int = int(os.getenv("PREFETCH_MAX_PENDING", "16"))
+
+    # Pre-render CLI (prerender.py)
+    PRERENDER_CONCURRENCY: int = int(os.getenv("PRERENDER_CONCURRENCY", "4"))
+    PRERENDER_RATE: float = float(os.getenv("PRERENDER_RATE", "0.5"))
+
+    # Background video generation jobs
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+    JOB_RETENTION: int = int(os.getenv("JOB_RETENTION", "1000"))
+    JOB_EVENT_HEARTBEAT: float = float(os.getenv("JOB_EVENT_HEARTBEAT", "15"))
+
+    # Static assets
+    ASSETS_DIR: str = os.getenv(
+        "ASSETS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+    )
+    MEDIA_CACHE_CONTROL: str = os.getenv("MEDIA_CACHE_CONTROL", "public, max-age=3600")
+    ASSET_INDEX_REFRESH_INTERVAL: float = float(
+        os.getenv("ASSET_INDEX_REFRESH_INTERVAL", "30")
+    )
+
+    # Local mirror of generated videos (content-addressed blob store)
+    BLOB_MIRROR_ENABLED: bool = os.getenv("BLOB_MIRROR_ENABLED", "true").lower() == "true"
+    BLOB_STORE_DIR: str = os.getenv("BLOB_STORE_DIR", os.path.join(ASSETS_DIR, "blobs"))
+    BLOB_STORE_MAX_BYTES: int = int(os.getenv("BLOB_STORE_MAX_BYTES", str(2 * 1024**3)))
+    BLOB_MAX_FILE_BYTES: int = int(os.getenv("BLOB_MAX_FILE_BYTES", str(256 * 1024**2)))
+
+    # /texts history listing
+    TEXTS_PAGE_SIZE: int = int(os.getenv("TEXTS_PAGE_SIZE", "50"))
+    TEXTS_PAGE_MAX: int = int(os.getenv("TEXTS_PAGE_MAX", "200"))
+    TEXTS_EXPORT_BATCH: int = int(os.getenv("TEXTS_EXPORT_BATCH", "1000"))
+
+    # Server-side OCR ("tesseract" or a "module:factory" engine path)
+    OCR_ENGINE: str = os.getenv("OCR_ENGINE", "tesseract")
+    OCR_LANG: str = os.getenv("OCR_LANG", "eng")
+    OCR_WORKERS: int = int(os.getenv("OCR_WORKERS", str(min(2, os.cpu_count() or 1))))
+    OCR_MAX_QUEUE: int = int(os.getenv("OCR_MAX_QUEUE", "8"))
+    OCR_MAX_UPLOAD_BYTES: int = int(os.getenv("OCR_MAX_UPLOAD_BYTES", str(8 * 1024 * 1024)))
+    OCR_MAX_SIDE: int = int(os.getenv("OCR_MAX_SIDE", "1600"))
+    OCR_MAX_SKEW: float = float(os.getenv("OCR_MAX_SKEW", "10"))
+    # Spawn the workers and load their engines in the background at startup
+    OCR_WARM_ON_STARTUP: bool = os.getenv("OCR_WARM_ON_STARTUP", "true").lower() == "true"
+
+    # Streaming OCR sessions (/ws/ocr): a frame cell counts as changed when its
+    # mean brightness moves by more than the threshold (0-255); text is sent once
+    # it reads the same for OCR_STREAM_STABLE_FRAMES frames
+    OCR_STREAM_MAX_SESSIONS: int = int(os.getenv("OCR_STREAM_MAX_SESSIONS", "32"))
+    OCR_STREAM_DIFF_THRESHOLD: float = float(os.getenv("OCR_STREAM_DIFF_THRESHOLD", "12"))
+    OCR_STREAM_FULL_FRAME_RATIO: float = float(os.getenv("OCR_STREAM_FULL_FRAME_RATIO", "0.6"))
+    OCR_STREAM_STABLE_FRAMES: int = int(os.getenv("OCR_STREAM_STABLE_FRAMES", "3"))
+
+    # Adaptive streaming (HLS ladder transcoded from finished clips)
+    TRANSCODE_ENABLED: bool = os.getenv("TRANSCODE_ENABLED", "false").lower() == "true"
+    FFMPEG_PATH: str = os.getenv("FFMPEG_PATH", "ffmpeg")
+    TRANSCODE_WORKERS: int = int(os.getenv("TRANSCODE_WORKERS", "1"))
+    TRANSCODE_TIMEOUT: float = float(os.getenv("TRANSCODE_TIMEOUT", "300"))
+    # Rendition records and recent failures kept in memory (LRU)
+    TRANSCODE_CACHE_SIZE: int = int(os.getenv("TRANSCODE_CACHE_SIZE", "10000"))
+
+    # Multi-worker deployment (gunicorn.conf.py). State every worker must agree
+    # on (rate limits, job status) lives in the shared state backend: "memory"
+    # for one worker, "sqlite" for several workers on one host, or "module:factory"
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    SHARED_STATE_BACKEND: str = os.getenv("SHARED_STATE_BACKEND", "memory")
+    SHARED_STATE_PATH: str = os.getenv(
+        "SHARED_STATE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "shared_state.db"),
+    )
+    SHARED_STATE_TTL: float = float(os.getenv("SHARED_STATE_TTL", str(24 * 3600)))
+    # Entries kept by either backend; the SQLite tables (state and rate limits)
+    # are pruned every SHARED_STATE_PRUNE_INTERVAL seconds
+    SHARED_STATE_MAX_ENTRIES: int = int(os.getenv("SHARED_STATE_MAX_ENTRIES", "10000"))
+    SHARED_STATE_PRUNE_INTERVAL: float = float(os.getenv("SHARED_STATE_PRUNE_INTERVAL", "600"))
+    # How often a worker checks on a job another worker is running (/jobs/{id}/events)
+    JOB_SHARED_POLL_INTERVAL: float = float(os.getenv("JOB_SHARED_POLL_INTERVAL", "0.5"))
+
+    # Admission control for the generation endpoints (token buckets per client)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    # "memory", "sqlite" or a "module:factory" path; follows SHARED_STATE_BACKEND
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", SHARED_STATE_BACKEND)
+    RATE_LIMIT_IP_RPS: float = float(os.getenv("RATE_LIMIT_IP_RPS", "10"))
+    RATE_LIMIT_IP_BURST: float = float(os.getenv("RATE_LIMIT_IP_BURST", "40"))
+    RATE_LIMIT_USER_RPS: float = float(os.getenv("RATE_LIMIT_USER_RPS", "5"))
+    RATE_LIMIT_USER_BURST: float = float(os.getenv("RATE_LIMIT_USER_BURST", "20"))
+    RATE_LIMIT_GENERATIONS_PER_MINUTE: float = float(
+        os.getenv("RATE_LIMIT_GENERATIONS_PER_MINUTE", "12")
+    )
+    RATE_LIMIT_GENERATION_BURST: float = float(os.getenv("RATE_LIMIT_GENERATION_BURST", "10"))
+    # Proxies in front of the app that append to X-Forwarded-For (1 on Render)
+    TRUSTED_PROXY_HOPS: int = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+    # For the whole deployment; each of the WEB_CONCURRENCY workers enforces its share
+    PIXVERSE_MAX_CONCURRENT_RENDERS: int = int(os.getenv("PIXVERSE_MAX_CONCURRENT_RENDERS", "8"))
+    PIXVERSE_MAX_WAITING_RENDERS: int = int(os.getenv("PIXVERSE_MAX_WAITING_RENDERS", "32"))
+
+    # Observability (/metrics, /health)
+    LOOP_LAG_INTERVAL: float = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+    HEALTH_DB_TIMEOUT: float = float(os.getenv("HEALTH_DB_TIMEOUT", "2"))
+    # Bearer token required by /metrics and the /*/stats endpoints ("" leaves them open)
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
 
     # Security
     BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    BCRYPT_WORKERS: int = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    BCRYPT_MAX_QUEUE: int = int(os.getenv("BCRYPT_MAX_QUEUE", "32"))
 
     @classmethod
     def validate(cls):
         """Validate that required environment variables are set"""
-        required_vars = ["SUPABASE_URL", "SUPABASE_ANON_KEY"]
+        required_vars = ["SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY"]
         missing_vars = [var for var in required_vars if not getattr(cls, var)]
 
         if missing_vars:
@@ -1,24 +1,140 @@
-from supabase import create_client, Client
-from typing import Optional, List, Dict, Any
+import asyncio
+import time
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Sequence, Tuple
+
+import httpx
+
 from config import settings
-import bcrypt
+from metrics import DB_QUERY_ERRORS, DB_QUERY_SECONDS
+from password_hasher import HasherBusyError, password_hasher
+from translation_cache import MemoryCacheTier
+
+if TYPE_CHECKING:
+    from postgrest import AsyncPostgrestClient
+    from postgrest._async.request_builder import AsyncRequestBuilder
 
 
 class SupabaseDB:
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY
+    """
+    Async data layer over Supabase's PostgREST API.
+
+    Queries are awaited on a shared, bounded httpx connection pool instead of
+    blocking the event loop in the synchronous supabase-py client. Every query
+    is timed per method in the db_query_* metrics; see `stats()`.
+
+    Job rows go through a second pool on the service-role key: the backend
+    authenticates users itself, so it has no auth.uid() that RLS could admit.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        service_key: Optional[str] = None,
+    ):
+        self.url = url
+        self.key = key
+        self.service_key = service_key
+        self.transport = transport
+        # Short-lived cache of existing users by email, without their password
+        # hash. Misses are not cached: the user may sign up on another worker
+        self.users = MemoryCacheTier(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+        self._client: Optional["AsyncPostgrestClient"] = None
+        self._service_client: Optional["AsyncPostgrestClient"] = None
+
+    def _connect(self, key: str) -> "AsyncPostgrestClient":
+        # Deferred: postgrest and its pydantic models add ~50 ms to startup
+        from postgrest import AsyncPostgrestClient
+
+        url = (self.url or settings.SUPABASE_URL).rstrip("/")
+        http_client = httpx.AsyncClient(
+            transport=self.transport,
+            timeout=settings.DB_REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.DB_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DB_MAX_KEEPALIVE,
+            ),
+            http2=True,
+        )
+        return AsyncPostgrestClient(
+            f"{url}/rest/v1",
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            http_client=http_client,
         )
 
-    def hash_password(self, password: str) -> str:
-        """Hash a password using bcrypt"""
-        salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
-        hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
-        return hashed.decode("utf-8")
+    @property
+    def client(self) -> "AsyncPostgrestClient":
+        """PostgREST client on a keep-alive connection pool, created on first use"""
+        if self._client is None or self._client.session.is_closed:
+            self._client = self._connect(self.key or settings.SUPABASE_ANON_KEY)
+        return self._client
+
+    @property
+    def service_client(self) -> "AsyncPostgrestClient":
+        """PostgREST client on the service-role key, which bypasses RLS"""
+        if self._service_client is None or self._service_client.session.is_closed:
+            self._service_client = self._connect(
+                self.service_key or settings.SUPABASE_SERVICE_ROLE_KEY
+            )
+        return self._service_client
+
+    def table(self, name: str) -> "AsyncRequestBuilder":
+        return self.client.from_(name)
 
-    def verify_password(self, password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash"""
-        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    def service_table(self, name: str) -> "AsyncRequestBuilder":
+        return self.service_client.from_(name)
+
+    async def aclose(self):
+        """Close the underlying connection pools"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._service_client is not None:
+            await self._service_client.aclose()
+            self._service_client = None
+
+    async def _execute(self, name: str, query: Any) -> Any:
+        """Run a query, recording its latency under the calling method's name"""
+        try:
+            with DB_QUERY_SECONDS.labels(name).time():
+                return await query.execute()
+        except Exception:
+            DB_QUERY_ERRORS.labels(name).inc()
+            raise
+
+    async def ping(self) -> float:
+        """Round trip of the cheapest possible query, in seconds"""
+        start = time.perf_counter()
+        await self._execute("ping", self.table("users").select("id").limit(1))
+        return time.perf_counter() - start
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Count, errors and latency (ms) per method, read from the db_query_*
+        metrics; percentiles are estimated from the histogram buckets
+        """
+        result = {}
+        for (name,), timings in sorted(DB_QUERY_SECONDS.children().items()):
+            if not timings.count:
+                continue
+            result[name] = {
+                "count": timings.count,
+                "errors": int(DB_QUERY_ERRORS.labels(name).value),
+                "mean_ms": timings.sum / timings.count * 1000,
+                "p50_ms": timings.quantile(0.5) * 1000,
+                "p95_ms": timings.quantile(0.95) * 1000,
+                "p99_ms": timings.quantile(0.99) * 1000,
+            }
+        return result
+
+    async def hash_password(self, password: str) -> str:
+        """Hash a password using bcrypt on the bounded hashing pool"""
+        return await password_hasher.hash(password)
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash on the bounded hashing pool"""
+        return await password_hasher.verify(password, hashed_password)
 
     async def create_user(
         self, username: str, email: str, password: str
@@ -26,21 +142,22 @@ class SupabaseDB:
         """Create a new user in Supabase"""
         try:
             # Hash the password
-            hashed_password = self.hash_password(password)
+            hashed_password = await self.hash_password(password)
 
             # Insert user into the users table
-            response = (
-                self.supabase.table("users")
+            response = await self._execute(
+                "create_user",
+                self.table("users")
                 .insert(
                     {
                         "username": username,
                         "email": email,
                         "password_hash": hashed_password,
                     }
-                )
-                .execute()
+                ),
             )
 
+            self.users.delete(email)
             if response.data:
                 user = response.data[0]
                 # Don't return the password hash
@@ -53,19 +170,34 @@ class SupabaseDB:
             else:
                 raise Exception("Failed to create user")
 
+        except HasherBusyError:
+            raise
         except Exception as e:
             raise Exception(f"Error creating user: {str(e)}")
 
+    async def _user_row(self, name: str, email: str) -> Optional[Dict[str, Any]]:
+        """The full users row of an email, password hash included, read uncached"""
+        response = await self._execute(
+            name, self.table("users").select("*").eq("email", email)
+        )
+        return response.data[0] if response.data else None
+
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Get user by email"""
-        try:
-            response = (
-                self.supabase.table("users").select("*").eq("email", email).execute()
-            )
+        """
+        Get user by email, without the password hash. Existing users are
+        served from a cache for USER_CACHE_TTL seconds
+        """
+        cached = self.users.get(email)
+        if cached is not None:
+            return cached
 
-            if response.data:
-                return response.data[0]
-            return None
+        try:
+            user = await self._user_row("get_user_by_email", email)
+            if user is None:
+                return None
+            user = {k: v for k, v in user.items() if k != "password_hash"}
+            self.users.set(email, user)
+            return user
 
         except Exception as e:
             raise Exception(f"Error getting user: {str(e)}")
@@ -73,13 +205,13 @@ class SupabaseDB:
     async def authenticate_user(
         self, email: str, password: str
     ) -> Optional[Dict[str, Any]]:
-        """Authenticate a user with email and password"""
+        """Authenticate a user with email and password, against the stored hash"""
         try:
-            user = await self.get_user_by_email(email)
+            user = await self._user_row("authenticate_user", email)
             if not user:
                 return None
 
-            if self.verify_password(password, user["password_hash"]):
+            if await self.verify_password(password, user["password_hash"]):
                 # Don't return the password hash
                 return {
                     "id": user["id"],
@@ -89,6 +221,8 @@ class SupabaseDB:
                 }
             return None
 
+        except HasherBusyError:
+            raise
         except Exception as e:
             raise Exception(f"Error authenticating user: {str(e)}")
 
@@ -97,10 +231,10 @@ class SupabaseDB:
     ) -> Dict[str, Any]:
         """Create a new text translation record"""
         try:
-            response = (
-                self.supabase.table("text_translations")
-                .insert({"user_id": user_id, "text": text, "video_url": video_url})
-                .execute()
+            response = await self._execute(
+                "create_text_translation",
+                self.table("text_translations")
+                .insert({"user_id": user_id, "text": text, "video_url": video_url}),
             )
 
             if response.data:
@@ -111,15 +245,70 @@ class SupabaseDB:
         except Exception as e:
             raise Exception(f"Error creating text translation: {str(e)}")
 
+    async def create_text_translations(
+        self, translations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Create many text translation records with a single bulk insert"""
+        try:
+            response = await self._execute(
+                "create_text_translations",
+                self.table("text_translations").insert(translations),
+            )
+
+            if response.data:
+                return response.data
+            else:
+                raise Exception("Failed to create text translations")
+
+        except Exception as e:
+            raise Exception(f"Error creating text translations: {str(e)}")
+
     async def get_user_translations(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all translations for a specific user"""
         try:
-            response = (
-                self.supabase.table("text_translations")
+            response = await self._execute(
+                "get_user_translations",
+                self.table("text_translations")
                 .select("*")
                 .eq("user_id", user_id)
-                .order("created_at", desc=True)
-                .execute()
+                .order("created_at", desc=True),
+            )
+
+            return response.data or []
+
+        except Exception as e:
+            raise Exception(f"Error getting user translations: {str(e)}")
+
+    async def get_user_translations_page(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get one page of a user's translations, newest first.
+
+        Pages are addressed by keyset: `after` is the (created_at, id) of the
+        last row of the previous page, so every page is an index range scan
+        on (user_id, created_at DESC, id DESC) regardless of depth.
+        """
+        try:
+            query = (
+                self.table("text_translations")
+                .select(*(columns or ["*"]))
+                .eq("user_id", user_id)
+            )
+            if after:
+                # (created_at, id) < after, spelled so the created_at bound
+                # can seed the index range scan
+                created_at, translation_id = after
+                query = query.lte("created_at", created_at).or_(
+                    f'created_at.lt."{created_at}",id.lt.{translation_id}'
+                )
+            response = await self._execute(
+                "get_user_translations_page",
+                query.order("created_at", desc=True).order("id", desc=True).limit(limit),
             )
 
             return response.data or []
@@ -127,16 +316,66 @@ class SupabaseDB:
         except Exception as e:
             raise Exception(f"Error getting user translations: {str(e)}")
 
+    async def get_translation_texts_page(
+        self, limit: int, after_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get one page of (id, text, video_url) across all users, in id order.
+
+        Keyset on the primary key, so walking the whole table (similarity
+        index preload) is one index range scan per page.
+        """
+        try:
+            query = self.table("text_translations").select("id", "text", "video_url")
+            if after_id is not None:
+                query = query.gt("id", after_id)
+            response = await self._execute(
+                "get_translation_texts_page", query.order("id").limit(limit)
+            )
+
+            return response.data or []
+
+        except Exception as e:
+            raise Exception(f"Error getting translation texts: {str(e)}")
+
+    async def get_translations_of_texts(
+        self, texts: List[str], limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Get up to `limit` (text) rows, across all users, whose text is one of
+        `texts`. The texts are queried DB_IN_CHUNK_SIZE at a time, concurrently,
+        each chunk an index lookup on text.
+        """
+        size = settings.DB_IN_CHUNK_SIZE
+        try:
+            responses = await asyncio.gather(
+                *(
+                    self._execute(
+                        "get_translations_of_texts",
+                        self.table("text_translations")
+                        .select("text")
+                        .in_("text", texts[start:start + size])
+                        .limit(limit),
+                    )
+                    for start in range(0, len(texts), size)
+                )
+            )
+
+            return [row for response in responses for row in response.data or []][:limit]
+
+        except Exception as e:
+            raise Exception(f"Error getting translations of texts: {str(e)}")
+
     async def get_translation_by_id(
         self, translation_id: str
     ) -> Optional[Dict[str, Any]]:
         """Get a specific translation by ID"""
         try:
-            response = (
-                self.supabase.table("text_translations")
+            response = await self._execute(
+                "get_translation_by_id",
+                self.table("text_translations")
                 .select("*")
-                .eq("id", translation_id)
-                .execute()
+                .eq("id", translation_id),
             )
 
             if response.data:
@@ -146,6 +385,62 @@ class SupabaseDB:
         except Exception as e:
             raise Exception(f"Error getting translation: {str(e)}")
 
+    async def create_job(
+        self, job_id: str, text: str, user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create a queued video generation job record"""
+        try:
+            response = await self._execute(
+                "create_job",
+                self.service_table("translation_jobs")
+                .insert(
+                    {"id": job_id, "user_id": user_id, "text": text, "status": "queued"}
+                ),
+            )
+
+            if response.data:
+                return response.data[0]
+            else:
+                raise Exception("Failed to create job")
+
+        except Exception as e:
+            raise Exception(f"Error creating job: {str(e)}")
+
+    async def update_job(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        """Update the status, video URL or error of a job"""
+        try:
+            response = await self._execute(
+                "update_job",
+                self.service_table("translation_jobs")
+                .update(fields)
+                .eq("id", job_id),
+            )
+
+            if response.data:
+                return response.data[0]
+            else:
+                raise Exception("Failed to update job")
+
+        except Exception as e:
+            raise Exception(f"Error updating job: {str(e)}")
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a video generation job by ID"""
+        try:
+            response = await self._execute(
+                "get_job",
+                self.service_table("translation_jobs")
+                .select("*")
+                .eq("id", job_id),
+            )
+
+            if response.data:
+                return response.data[0]
+            return None
+
+        except Exception as e:
+            raise Exception(f"Error getting job: {str(e)}")
+
 
 # Create database instance
 db = SupabaseDB()
@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for the multi-worker deployment:
+
+    cd backend && gunicorn -c gunicorn.conf.py main:app
+
+Each worker is a separate process with its own event loop, connection pools
+and executors, created in the app's lifespan. Rate limits and job status
+go through the shared state backend, which defaults to SQLite (one file
+shared by every worker on the host) when more than one worker runs.
+"""
+
+import multiprocessing
+import os
+
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+# Workers split deployment-wide limits (PixVerse renders) by this count
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Import the app in every worker rather than once in the master: thread pools,
+# SQLite connections and asyncio primitives must not be inherited across fork
+preload_app = False
+
+# Long renders are awaited on the event loop, so a worker is only killed if it
+# stops answering the arbiter altogether
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+if workers > 1:
+    # Workers inherit the master's environment, read by config.Settings on import
+    os.environ.setdefault("SHARED_STATE_BACKEND", "sqlite")
+    os.environ.setdefault("RATE_LIMIT_BACKEND", os.environ["SHARED_STATE_BACKEND"])
+    for name in ("SHARED_STATE_BACKEND", "RATE_LIMIT_BACKEND"):
+        if os.environ[name] == "memory":
+            raise SystemExit(f"{name}=memory cannot be shared by {workers} workers")
@@ -0,0 +1,302 @@
+import asyncio
+import math
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from config import settings
+from pixverse_api import FallbackVideo
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+# Finished with a local clip standing in for a failed render (not saved to history)
+JOB_FALLBACK = "fallback"
+TERMINAL_STATUSES = {JOB_COMPLETED, JOB_FAILED, JOB_FALLBACK}
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    id: str
+    text: str
+    user_id: Optional[str] = None
+    status: str = JOB_QUEUED
+    video_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "text": self.text,
+            "status": self.status,
+            "video_url": self.video_url,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+class JobManager:
+    """
+    Bounded queue of video generation jobs drained by a pool of workers.
+
+    Job state lives in memory for fast polling and streaming, and is mirrored
+    to the translation_jobs table through the optional store (SupabaseDB).
+    With several worker processes, the optional shared state store lets any
+    worker answer for (and stream) a job running in another one.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], Awaitable[Optional[str]]],
+        store: Any = None,
+        workers: int = settings.JOB_WORKERS,
+        queue_size: int = settings.JOB_QUEUE_SIZE,
+        retention: int = settings.JOB_RETENTION,
+        shared: Any = None,
+    ):
+        self.generate = generate
+        self.store = store
+        self.shared = shared
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: Dict[str, Job] = {}
+        self._finished: deque = deque()
+        self._retention = retention
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._created: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._avg_duration: Optional[float] = None
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        """Bounded job queue, created inside the running event loop"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    def start(self):
+        """Spawn the worker pool on the running event loop"""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def stop(self):
+        """Cancel the worker pool"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait, estimated from recent job durations"""
+        avg = self._avg_duration or settings.POLL_MAX_INTERVAL
+        backlog = self.queue.qsize() + 1
+        return max(1, math.ceil(avg * backlog / max(self.workers, 1)))
+
+    async def submit(self, text: str, user_id: Optional[str] = None) -> Job:
+        """Queue a job, raising QueueFullError instead of waiting for space"""
+        job = Job(id=str(uuid.uuid4()), text=text, user_id=user_id)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(self.retry_after())
+
+        self._jobs[job.id] = job
+        await self._share(job)
+        if self.store is not None:
+            self._created[job.id] = asyncio.ensure_future(
+                self._persist(self.store.create_job, job.id, text, user_id)
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def lookup(
+        self, job_id: str, user_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Job state from memory or the shared store, falling back to the persisted
+        record. A signed-in user's job is None for anyone but that user;
+        anonymous jobs are visible to whoever holds their id.
+        """
+        state = await self._lookup(job_id)
+        if state is None or state.get("user_id") not in (None, user_id):
+            return None
+        return state
+
+    async def _lookup(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.shared is not None:
+            state = await self.shared.get(self._shared_key(job_id))
+            if state is not None:
+                return state
+        if self.store is None:
+            return None
+
+        record = await self.store.get_job(job_id)
+        if record is None:
+            return None
+        return {
+            key: record.get(key)
+            for key in (
+                "id", "user_id", "text", "status", "video_url", "error", "created_at", "updated_at"
+            )
+        }
+
+    async def watch(
+        self, job_id: str, heartbeat: float = settings.JOB_EVENT_HEARTBEAT
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the job state now and on every status change until it finishes.
+        Yields None as a heartbeat when nothing changed for `heartbeat` seconds.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            record = await self._lookup(job_id)
+            if record is not None:
+                yield record
+                # Running in another worker: follow it through the shared store
+                if self.shared is not None:
+                    async for state in self._follow_shared(job_id, record, heartbeat):
+                        yield state
+            return
+
+        updates: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(updates)
+        try:
+            state = job.to_dict()
+            yield state
+            while state["status"] not in TERMINAL_STATUSES:
+                try:
+                    state = await asyncio.wait_for(updates.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield state
+        finally:
+            self._subscribers[job_id].remove(updates)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    async def _follow_shared(
+        self, job_id: str, state: Dict[str, Any], heartbeat: float
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        idle = 0.0
+        while state["status"] not in TERMINAL_STATUSES:
+            await asyncio.sleep(settings.JOB_SHARED_POLL_INTERVAL)
+            latest = await self.shared.get(self._shared_key(job_id))
+            if latest is None:
+                return
+            if latest != state:
+                state, idle = latest, 0.0
+                yield state
+                continue
+            idle += settings.JOB_SHARED_POLL_INTERVAL
+            if idle >= heartbeat:
+                idle = 0.0
+                yield None
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        started = time.monotonic()
+        await self._update(job, status=JOB_RUNNING)
+        try:
+            video_url = await self.generate(job.text)
+        except asyncio.CancelledError:
+            await self._update(job, status=JOB_FAILED, error="Job cancelled")
+            raise
+        except Exception as e:
+            await self._update(job, status=JOB_FAILED, error=str(e))
+            return
+
+        if not video_url:
+            await self._update(job, status=JOB_FAILED, error="Video generation failed")
+            return
+        if isinstance(video_url, FallbackVideo):
+            await self._update(
+                job,
+                status=JOB_FALLBACK,
+                video_url=video_url,
+                error="Sign video generation is unavailable, showing the closest local clip",
+            )
+            return
+
+        duration = time.monotonic() - started
+        self._avg_duration = (
+            duration
+            if self._avg_duration is None
+            else 0.8 * self._avg_duration + 0.2 * duration
+        )
+        await self._update(job, status=JOB_COMPLETED, video_url=video_url)
+        if job.user_id and self.store is not None:
+            await self._persist(
+                self.store.create_text_translation,
+                user_id=job.user_id,
+                text=job.text,
+                video_url=video_url,
+            )
+
+    async def _update(self, job: Job, **fields: Any):
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.updated_at = datetime.now(timezone.utc)
+
+        state = job.to_dict()
+        for updates in self._subscribers.get(job.id, []):
+            updates.put_nowait(state)
+        await self._share(job)
+
+        if self.store is not None:
+            created = self._created.get(job.id)
+            if created is not None:
+                await created
+            await self._persist(self.store.update_job, job.id, **fields)
+
+        if job.status in TERMINAL_STATUSES:
+            self._created.pop(job.id, None)
+            self._finished.append(job.id)
+            while len(self._finished) > self._retention:
+                self._jobs.pop(self._finished.popleft(), None)
+
+    @staticmethod
+    def _shared_key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    async def _share(self, job: Job):
+        if self.shared is not None:
+            await self._persist(self.shared.set, self._shared_key(job.id), job.to_dict())
+
+    async def _persist(self, operation: Callable[..., Awaitable[Any]], *args, **kwargs):
+        """Best-effort write to the store; in-memory state stays authoritative"""
+        try:
+            await operation(*args, **kwargs)
+        except Exception as e:
+            print(f"Error persisting job state: {e}")
@@ -1,34 +1,156 @@
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File
+import time
+
+# Cold start profile, exported as startup_seconds (see bench_startup.py)
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.formparsers import MultiPartException
 from pydantic import BaseModel
 from typing import List, Optional
 import jwt
 from datetime import datetime, timedelta
+import json
 import uuid
+import secrets
 import os
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
 
 # Import our custom modules
 from config import settings
 from database import db
-from pixverse_api import pixverse_client
-
-app = FastAPI(title="Sign Language Translator API", version="1.0.0")
-
-# Mount static files directory
-app.mount("/assets", StaticFiles(directory="assets"), name="assets")
+from pixverse_api import FallbackVideo, pixverse_client
+from translation_cache import normalize_text, translation_cache
+from jobs import JobManager, QueueFullError
+from pipeline import TranslationPipeline
+from batch import BatchTranslator
+from prefetch import Prefetcher
+from asset_index import asset_index
+from media import MediaFiles
+from password_hasher import HasherBusyError, password_hasher
+from pagination import decode_cursor, encode_cursor, parse_fields, project, select_columns
+from ocr import OCRBusyError, OCRUnavailableError, ocr_pool
+from ocr_stream import ocr_sessions
+from uploads import UploadTooLargeError, read_upload
+from transcoder import transcoder
+from blob_store import BlobFiles, blob_store
+from auth import token_verifier
+from shared_state import StatePruner, shared_state
+from similarity_index import SimilarityLoader, similarity_index
+from admission import GenerationBusyError, RateLimitedError, admission, generation_gate
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    STARTUP_SECONDS,
+    WORK_IN_FLIGHT,
+    MetricsMiddleware,
+    loop_lag_monitor,
+    registry as metrics_registry,
+)
 
 
-# Validate environment variables on startup
-@app.on_event("startup")
-async def startup_event():
+# Per-worker startup and shutdown. Every worker process imports the app on its
+# own (gunicorn.conf.py), so pools and connections are created in the worker
+async def startup():
+    started = time.perf_counter()
     try:
         settings.validate()
         print("✅ Environment variables validated successfully")
     except ValueError as e:
         print(f"❌ Environment validation failed: {e}")
         print("Please check your .env file configuration")
+    # Unlike the checks above this is fatal: without its keys the worker
+    # would answer every authenticated request with a 500
+    token_verifier.load_keys()
+
+    await asset_index.refresh_async()
+    asset_index.start()
+    print(f"📚 Indexed {len(asset_index)} local sign clips")
+    job_manager.start()
+    translation_cache.start()
+    state_pruner.start()
+    if settings.OCR_WARM_ON_STARTUP:
+        ocr_pool.start_warming()
+    loop_lag_monitor.start()
+    if settings.SIMILARITY_ENABLED:
+        similarity_loader.start()
+
+    startup_seconds = time.perf_counter() - started
+    STARTUP_SECONDS.labels("lifespan").set(startup_seconds)
+    print(
+        f"🚀 Worker ready: import {IMPORT_SECONDS * 1000:.0f} ms, "
+        f"startup {startup_seconds * 1000:.0f} ms"
+    )
+
+
+# Release pooled PixVerse and database connections on shutdown
+async def shutdown():
+    await loop_lag_monitor.stop()
+    await translation_cache.stop()
+    await state_pruner.stop()
+    await asset_index.stop()
+    await similarity_loader.stop()
+    await job_manager.stop()
+    await prefetcher.stop()
+    await pixverse_client.aclose()
+    await db.aclose()
+    password_hasher.shutdown()
+    ocr_pool.shutdown()
+    await transcoder.aclose()
+    await blob_store.aclose()
+    shared_state.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+
+app = FastAPI(title="Sign Language Translator API", version="1.0.0", lifespan=lifespan)
+
+# Mirrored PixVerse results, integrity checked on read; mounted ahead of /assets
+app.mount("/assets/blobs", BlobFiles(blob_store), name="blobs")
+
+# Mount static files directory (range requests, content ETags, cache headers)
+app.mount("/assets", MediaFiles(directory=settings.ASSETS_DIR), name="assets")
+
+
+async def generate_video_for_text(text: str) -> Optional[str]:
+    return await pixverse_client.generate_sign_language_video(
+        text, usePixverse=settings.USE_PIXVERSE
+    )
+
+
+# Background generation jobs and the phrase-level translation pipeline
+job_manager = JobManager(generate=generate_video_for_text, store=db, shared=shared_state)
+translation_pipeline = TranslationPipeline(
+    pixverse_client,
+    asset_index=asset_index,
+    transcoder=transcoder if settings.TRANSCODE_ENABLED else None,
+)
+batch_translator = BatchTranslator(translation_pipeline, store=db)
+# Book pages: which clips to prefetch, and background renders of missing phrases
+prefetcher = Prefetcher(translation_pipeline, store=db)
+# Near-duplicate reuse: the asset library and past translations, loaded after startup
+similarity_loader = SimilarityLoader(similarity_index, store=db, assets=asset_index)
+# Expired and surplus shared state and refilled rate limit rows, pruned in the background
+state_pruner = StatePruner([shared_state, admission.backend])
+
+# Work admitted to each pool, read at scrape time
+WORK_IN_FLIGHT.labels("bcrypt").set_function(lambda: password_hasher.in_flight)
+WORK_IN_FLIGHT.labels("ocr").set_function(lambda: ocr_pool.in_flight)
+WORK_IN_FLIGHT.labels("pixverse_render").set_function(lambda: len(pixverse_client.inflight))
+WORK_IN_FLIGHT.labels("pixverse_poll").set_function(lambda: len(pixverse_client.poller))
+WORK_IN_FLIGHT.labels("pixverse_gate_waiting").set_function(lambda: generation_gate.waiting)
+WORK_IN_FLIGHT.labels("ocr_sessions").set_function(lambda: ocr_sessions.active)
+WORK_IN_FLIGHT.labels("jobs_queued").set_function(lambda: job_manager.queue.qsize())
 
 
 # CORS middleware
@@ -40,8 +162,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request count, latency and in-flight gauge per route (outermost, so it times everything)
+app.add_middleware(MetricsMiddleware)
+
 # Security
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 # Models
@@ -67,6 +193,16 @@ class TextInput(BaseModel):
     text: str
 
 
+class BatchTextInput(BaseModel):
+    texts: List[str]
+
+
+class PrefetchInput(BaseModel):
+    text: str
+    # Word of the page the reader is at
+    position: int = 0
+
+
 class TextResponse(BaseModel):
     id: str
     text: str
@@ -80,29 +216,72 @@ def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
-    )
-    return encoded_jwt
+    return token_verifier.sign(to_encode)
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# Async so that FastAPI runs it on the event loop rather than a threadpool
+# hop; repeat tokens are answered from the verified-token cache
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM],
-        )
+        payload = token_verifier.verify(credentials.credentials)
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         return user_id
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+async def optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> Optional[str]:
+    """User id from the bearer token if one was sent, else None"""
+    if credentials is None:
+        return None
+    return await verify_token(credentials)
+
+
+async def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    """Guards /metrics and the /*/stats endpoints once METRICS_TOKEN is set"""
+    if not settings.METRICS_TOKEN:
+        return
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+
+async def admit(request: Request, user_id: Optional[str], generations: int = 0):
+    """Per-client rate limits for generation endpoints, rejected as 429 with Retry-After"""
+    try:
+        await admission.admit(request, user_id, generations)
+    except RateLimitedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def generation_busy(e: GenerationBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+async def whole_text_generation_cost(text: str) -> int:
+    """1 if generating a video for the whole text would start a new upstream render"""
+    if not settings.USE_PIXVERSE:
+        return 0
+    return 0 if await pixverse_client.cached_sign_language_video(text) else 1
+
+
 # Routes
 @app.get("/")
 async def root():
@@ -111,7 +290,91 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "connected"}
+    """Readiness: the database answers a trivial query within HEALTH_DB_TIMEOUT"""
+    result = {"event_loop_lag_ms": round(loop_lag_monitor.last * 1000, 2)}
+    try:
+        latency = await asyncio.wait_for(db.ping(), timeout=settings.HEALTH_DB_TIMEOUT)
+    except asyncio.TimeoutError:
+        error = f"no response within {settings.HEALTH_DB_TIMEOUT}s"
+    except Exception as e:
+        error = str(e)
+    else:
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "database_latency_ms": round(latency * 1000, 2),
+            **result,
+        }
+    return JSONResponse(
+        status_code=503,
+        content={"status": "unhealthy", "database": "unreachable", "error": error, **result},
+    )
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    """Prometheus text exposition of request, stage and pool metrics"""
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/cache/stats", dependencies=[Depends(require_metrics_token)])
+async def cache_stats():
+    return translation_cache.stats()
+
+
+@app.get("/poller/stats", dependencies=[Depends(require_metrics_token)])
+async def poller_stats():
+    return pixverse_client.poller.stats()
+
+
+@app.get("/pixverse/stats", dependencies=[Depends(require_metrics_token)])
+async def pixverse_stats():
+    return pixverse_client.stats()
+
+
+@app.get("/auth/stats", dependencies=[Depends(require_metrics_token)])
+async def auth_stats():
+    return token_verifier.stats()
+
+
+@app.get("/admission/stats", dependencies=[Depends(require_metrics_token)])
+async def admission_stats():
+    return {**admission.stats(), "generation": generation_gate.stats()}
+
+
+@app.get("/similarity/stats", dependencies=[Depends(require_metrics_token)])
+async def similarity_stats():
+    return {**similarity_index.stats(), "preload": similarity_loader.stats()}
+
+
+@app.get("/prefetch/stats", dependencies=[Depends(require_metrics_token)])
+async def prefetch_stats():
+    return prefetcher.stats()
+
+
+@app.get("/ocr/stats", dependencies=[Depends(require_metrics_token)])
+async def ocr_stats():
+    return {
+        "in_flight": ocr_pool.in_flight,
+        "rejected": ocr_pool.rejected,
+        "warmed": ocr_pool.warmed,
+        "sessions": ocr_sessions.stats(),
+    }
+
+
+@app.get("/db/stats", dependencies=[Depends(require_metrics_token)])
+async def db_stats():
+    return db.stats()
+
+
+@app.get("/blobs/stats", dependencies=[Depends(require_metrics_token)])
+async def blob_stats():
+    return await asyncio.to_thread(blob_store.stats)
+
+
+@app.get("/transcoder/stats", dependencies=[Depends(require_metrics_token)])
+async def transcoder_stats():
+    return transcoder.stats()
 
 
 @app.post("/signup", response_model=User)
@@ -126,6 +389,14 @@ async def signup(user: UserCreate):
         new_user = await db.create_user(user.username, user.email, user.password)
         return new_user
 
+    except HTTPException:
+        raise
+    except HasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -146,21 +417,51 @@ async def login(user: UserLogin):
             "user": authenticated_user,
         }
 
+    except HTTPException:
+        raise
+    except HasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/translate", response_model=TextResponse)
-async def translate_text(text_input: TextInput, user_id: str = Depends(verify_token)):
+async def translate_text(
+    text_input: TextInput, request: Request, user_id: str = Depends(verify_token)
+):
+    await admit(request, user_id, await whole_text_generation_cost(text_input.text))
     try:
-        # Generate sign language video using PixVerse API (disabled by default)
-        video_url = pixverse_client.generate_sign_language_video(
-            text_input.text, usePixverse=False
+        # Generate sign language video using PixVerse API (USE_PIXVERSE, off by default)
+        video_url = await pixverse_client.generate_sign_language_video(
+            text_input.text, usePixverse=settings.USE_PIXVERSE
         )
 
         if not video_url:
-            # Fallback to demo video if PixVerse API fails
-            video_url = "/assets/wasnt hungry anymore.mp4"
+            # PixVerse failed and nothing local is close: save no unrelated video
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Sign video generation is unavailable, try again later",
+                headers={"Retry-After": str(int(settings.PIXVERSE_BREAKER_RESET))},
+            )
+
+        if isinstance(video_url, FallbackVideo):
+            # A stand-in clip to play now; saving it would make it this text's video
+            return JSONResponse(
+                {
+                    "id": None,
+                    "text": text_input.text,
+                    "video_url": video_url,
+                    "user_id": user_id,
+                    "created_at": None,
+                    "message": "Showing the closest local sign clip",
+                    "status": "fallback",
+                    "error_details": "Sign video generation is unavailable, try again later",
+                }
+            )
 
         # Create translation record in database
         translation = await db.create_text_translation(
@@ -169,77 +470,319 @@ async def translate_text(text_input: TextInput, user_id: str = Depends(verify_to
 
         return translation
 
+    except GenerationBusyError as e:
+        raise generation_busy(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/translate")
-async def translate_text_demo(text_input: TextInput):
+async def translate_text_demo(text_input: TextInput, request: Request):
     """
     Demo endpoint for translating text to sign language without authentication.
     This is used by the live OCR frontend for testing purposes.
     """
+    # Asset and cache hits cost no generation tokens
+    await admit(request, None, await translation_pipeline.generation_cost(text_input.text))
 
     try:
-        # Generate sign language video using PixVerse API (disabled by default)
-        video_url = pixverse_client.generate_sign_language_video(
-            text_input.text, usePixverse=False
-        )
+        # Use local clips where they match, generate the rest per phrase (USE_PIXVERSE, off by default)
+        translation = await translation_pipeline.translate(text_input.text)
+        video_url = translation.video_url
+        manifest_url, poster_url = translation.manifest_url, translation.poster_url
 
         if not video_url:
-            # Fallback to demo video if PixVerse API fails
-            video_url = "/assets/wasnt hungry anymore.mp4"
+            # PixVerse failed and no local clip is close enough to stand in
+            return {
+                "text": text_input.text,
+                "video_url": None,
+                "manifest_url": None,
+                "manifest_urls": [],
+                "poster_url": None,
+                "segments": [],
+                "total_duration": 0.0,
+                "message": "No sign video available right now",
+                "status": "fallback",
+                "error_details": "Sign video generation is unavailable, try again later",
+            }
 
         response_data = {
             "text": text_input.text,
             "video_url": video_url,
+            "manifest_url": manifest_url,
+            "manifest_urls": translation.manifest_urls,
+            "poster_url": poster_url,
+            "segments": translation.playlist(),
+            "total_duration": translation.total_duration,
             "message": "Demo translation successful",
             "status": "success",
             "error_details": None,
         }
+        if translation.fallback:
+            response_data.update(
+                message="Showing the closest local sign clips",
+                status="fallback",
+                error_details="Sign video generation is unavailable, try again later",
+            )
 
         return response_data
 
+    except GenerationBusyError as e:
+        raise generation_busy(e)
     except Exception as e:
-        # Return fallback response on error
+        # Return an error response rather than an unrelated clip
         fallback_response = {
             "text": text_input.text,
-            "video_url": "/assets/wasnt hungry anymore.mp4",
-            "message": "Demo translation successful (fallback)",
+            "video_url": None,
+            "manifest_url": None,
+            "manifest_urls": [],
+            "poster_url": None,
+            "segments": [],
+            "total_duration": 0.0,
+            "message": "Translation failed",
             "status": "error",
             "error_details": str(e),
         }
         return fallback_response
 
 
-@app.post("/api/ocr")
-async def process_ocr(file: UploadFile = File(...)):
+@app.post("/api/translate/batch")
+async def translate_batch(
+    batch_input: BatchTextInput,
+    request: Request,
+    user_id: Optional[str] = Depends(optional_user),
+):
     """
-    Process OCR on uploaded image file.
-    This endpoint is prepared for future OCR implementation.
+    Translate many texts at once (e.g. a whole book) and stream the results
+    as NDJSON, one line per input as it completes, then a summary line.
+    Duplicate texts are resolved once; signed-in users get their
+    translations saved with one bulk insert.
     """
+    if len(batch_input.texts) > settings.BATCH_MAX_TEXTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BATCH_MAX_TEXTS} texts per batch",
+        )
+    distinct = {normalize_text(text): text for text in batch_input.texts}
+    costs = await asyncio.gather(
+        *(translation_pipeline.generation_cost(text) for text in distinct.values())
+    )
+    await admit(request, user_id, sum(costs))
+
+    async def lines():
+        async for item in batch_translator.run(batch_input.texts, user_id=user_id):
+            yield json.dumps(item, separators=(",", ":")) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/api/prefetch")
+async def prefetch_page(
+    prefetch_input: PrefetchInput,
+    request: Request,
+    user_id: Optional[str] = Depends(optional_user),
+):
+    """
+    Prefetch plan for a book page: its phrases, likeliest taps first, with
+    the URL and size of every clip that already exists. The first ready
+    clips are also sent as Link: rel=preload headers, and missing phrases
+    start rendering in the background (when the client's generation budget
+    allows; otherwise they are left "missing" for a later plan).
+    """
+    if len(prefetch_input.text) > settings.PREFETCH_MAX_CHARS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.PREFETCH_MAX_CHARS} characters per page",
+        )
+    plan = await prefetcher.plan(prefetch_input.text, prefetch_input.position)
+
+    missing = plan.missing if settings.USE_PIXVERSE else []
     try:
-        # For now, return a placeholder response
-        # In production, this would use EasyOCR or similar library
-        return {
-            "text": "OCR processing not yet implemented. This is a placeholder response.",
-            "confidence": 0.0,
-            "message": "OCR endpoint ready for implementation",
-        }
+        await admission.admit(request, user_id, len(missing))
+    except RateLimitedError as e:
+        if e.limit != "generations":
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        # Out of generation tokens: the plan is still served, without renders
+        await admit(request, user_id)
+        missing = []
+    prefetcher.generate(missing)
+
+    links = plan.preload_links(settings.PREFETCH_PRELOAD_LINKS)
+    return JSONResponse(plan.to_dict(), headers={"Link": ", ".join(links)} if links else None)
+
+
+@app.post("/jobs/translate", status_code=status.HTTP_202_ACCEPTED)
+async def submit_translation_job(
+    text_input: TextInput,
+    request: Request,
+    user_id: Optional[str] = Depends(optional_user),
+):
+    """
+    Queue a sign language video generation and return its job id immediately.
+    Poll GET /jobs/{id} or stream GET /jobs/{id}/events for the result.
+    """
+    await admit(request, user_id, await whole_text_generation_cost(text_input.text))
+    try:
+        job = await job_manager.submit(text_input.text, user_id=user_id)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Job queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return job.to_dict()
+
 
+@app.get("/jobs/{job_id}")
+async def get_translation_job(job_id: str, user_id: Optional[str] = Depends(optional_user)):
+    try:
+        job = await job_manager.lookup(job_id, user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_translation_job(
+    job_id: str, user_id: Optional[str] = Depends(optional_user)
+):
+    """Server-sent events stream of job status changes"""
+    if not await job_manager.lookup(job_id, user_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for state in job_manager.watch(job_id):
+            if state is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {json.dumps(state, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@app.get("/texts", response_model=List[TextResponse])
-async def get_user_texts(user_id: str = Depends(verify_token)):
+@app.post("/api/ocr")
+async def process_ocr(request: Request):
+    """
+    Recognise text in an uploaded image.
+
+    Accepts a multipart upload in the `file` field (as sent by CameraOCR) or
+    a raw image body. The image is preprocessed (grayscale, downscale,
+    deskew, binarize) and read by a pre-loaded engine in a worker process;
+    the response includes per-stage timings.
+    """
     try:
-        translations = await db.get_user_translations(user_id)
-        return translations
+        data = await read_upload(request, settings.OCR_MAX_UPLOAD_BYTES)
+        result = await ocr_pool.recognize(data)
+        return result.to_dict()
+
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except (ValueError, MultiPartException) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OCRBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except OCRUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
+@app.websocket("/ws/ocr")
+async def ocr_stream(websocket: WebSocket):
+    """
+    Streaming OCR for the live scanner.
+
+    Send compressed camera frames (JPEG or WebP) as binary messages, at any
+    rate. Frames that barely differ from the last processed one skip OCR,
+    only changed bands of the others are read, and the text is sent as line
+    deltas once it has been stable for a few frames. See ocr_stream.OCRSessions
+    for the message format.
+    """
+    await ocr_sessions.serve(websocket, ocr_pool)
+
+
+def parse_page_request(cursor: Optional[str], fields: Optional[str]):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        return after, parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/texts")
+async def get_user_texts(
+    limit: int = Query(settings.TEXTS_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    user_id: str = Depends(verify_token),
+):
+    """
+    One page of the user's translations, newest first. The next page's
+    cursor is returned in the X-Next-Cursor header (and a Link rel="next");
+    `fields` projects a comma-separated subset of columns.
+    """
+    after, projection = parse_page_request(cursor, fields)
+    limit = min(limit, settings.TEXTS_PAGE_MAX)
+    try:
+        rows = await db.get_user_translations_page(
+            user_id, limit, after=after, columns=select_columns(projection)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    headers = {}
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1])
+        query = urlencode(
+            {"limit": limit, "cursor": next_cursor, **({"fields": fields} if fields else {})}
+        )
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'</texts?{query}>; rel="next"'
+    return JSONResponse([project(row, projection) for row in rows], headers=headers)
+
+
+@app.get("/texts/export")
+async def export_user_texts(
+    fields: Optional[str] = None, user_id: str = Depends(verify_token)
+):
+    """Stream the user's whole history as NDJSON, one keyset page at a time"""
+    _, projection = parse_page_request(None, fields)
+    columns = select_columns(projection)
+    batch = settings.TEXTS_EXPORT_BATCH
+
+    async def rows():
+        after = None
+        while True:
+            page = await db.get_user_translations_page(
+                user_id, batch, after=after, columns=columns
+            )
+            if page:
+                yield "".join(
+                    json.dumps(project(row, projection), separators=(",", ":")) + "\n"
+                    for row in page
+                )
+            if len(page) < batch:
+                return
+            after = (page[-1]["created_at"], page[-1]["id"])
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
 
 @app.get("/texts/{translation_id}", response_model=TextResponse)
 async def get_text_by_id(translation_id: str, user_id: str = Depends(verify_token)):
@@ -258,6 +801,10 @@ async def get_text_by_id(translation_id: str, user_id: str = Depends(verify_toke
         raise HTTPException(status_code=500, detail=str(e))
 
 
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+STARTUP_SECONDS.labels("import").set(IMPORT_SECONDS)
+
+
 if __name__ == "__main__":
     import uvicorn
     import os
@@ -265,4 +812,16 @@ if __name__ == "__main__":
     # Get port from environment variable (Render sets this)
     port = int(os.environ.get("PORT", 8000))
 
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = settings.WEB_CONCURRENCY
+    if workers > 1:
+        # As in gunicorn.conf.py: the workers import the app afresh from this
+        # environment, and per-process memory state would split between them
+        os.environ.setdefault("SHARED_STATE_BACKEND", "sqlite")
+        os.environ.setdefault("RATE_LIMIT_BACKEND", os.environ["SHARED_STATE_BACKEND"])
+        for name in ("SHARED_STATE_BACKEND", "RATE_LIMIT_BACKEND"):
+            if os.environ[name] == "memory":
+                raise SystemExit(f"{name}=memory cannot be shared by {workers} workers")
+
+    # Several workers need the app as an import string; gunicorn.conf.py is the
+    # production entry point
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
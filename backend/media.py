@@ -0,0 +1,111 @@
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import threading
+from typing import Dict, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from config import settings
+
+# Files whose name embeds a content hash (e.g. "<sha256>.mp4" or "clip.3f9a0c1d2b4e5f60.mp4")
+# never change, so clients may cache them forever
+_CONTENT_ADDRESSED = re.compile(r"(?:^|[._-])([0-9a-f]{16,64})$")
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Streaming formats produced by the transcoder; the platform tables get .ts wrong
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/iso.segment", ".m4s")
+mimetypes.add_type("video/mp2t", ".ts")
+
+
+class MediaFiles(StaticFiles):
+    """
+    Static file server for sign clips.
+
+    On top of Starlette's StaticFiles (byte ranges with 206/416, If-Range, 304
+    on If-None-Match/If-Modified-Since, and chunked or `pathsend` streaming so
+    files are never loaded whole into memory), this adds strong ETags derived
+    from the file content and long-lived immutable caching for content-addressed
+    file names.
+    """
+
+    def __init__(
+        self,
+        *args,
+        cache_control: str = settings.MEDIA_CACHE_CONTROL,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+        self._etags: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def lookup_path(self, path: str):
+        # Runs in a worker thread, so this is where the content hash is computed
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+            self.content_etag(full_path, stat_result)
+        return full_path, stat_result
+
+    def content_etag(self, full_path: str, stat_result: os.stat_result) -> str:
+        """Strong ETag from the SHA-256 of the file, cached until size/mtime change"""
+        version = (stat_result.st_size, stat_result.st_mtime_ns)
+        with self._lock:
+            cached = self._etags.get(full_path)
+        if cached is not None and cached[:2] == version:
+            return cached[2]
+
+        match = _CONTENT_ADDRESSED.search(os.path.splitext(os.path.basename(full_path))[0])
+        if match:
+            digest = match.group(1)
+        else:
+            sha = hashlib.sha256()
+            with open(full_path, "rb") as f:
+                for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+
+        etag = f'"{digest}"'
+        with self._lock:
+            self._etags[full_path] = (*version, etag)
+        return etag
+
+    def cache_control_for(self, full_path: str) -> str:
+        stem = os.path.splitext(os.path.basename(full_path))[0]
+        if _CONTENT_ADDRESSED.search(stem):
+            return IMMUTABLE_CACHE_CONTROL
+        # Transcoded renditions live in a directory named by a hash and are
+        # only published once complete
+        parent = os.path.basename(os.path.dirname(full_path))
+        if _CONTENT_ADDRESSED.fullmatch(parent):
+            return IMMUTABLE_CACHE_CONTROL
+        return self.cache_control
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers={
+                "etag": self.content_etag(str(full_path), stat_result),
+                "cache-control": self.cache_control_for(str(full_path)),
+            },
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,235 @@
+import asyncio
+import importlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import settings
+
+
+class OCRBusyError(Exception):
+    """Raised when every OCR worker is busy and the queue is full"""
+
+
+class OCRUnavailableError(Exception):
+    """Raised when the configured OCR engine cannot be loaded"""
+
+
+@dataclass
+class OCRResult:
+    text: str
+    confidence: float
+    timings: Dict[str, float] = field(default_factory=dict)
+    # (top, bottom, text) per line, as fractions of the image height; only
+    # filled for band reads by engines that report line positions
+    lines: List[Tuple[float, float, str]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "confidence": self.confidence,
+            "timings_ms": {
+                stage: round(seconds * 1000, 2) for stage, seconds in self.timings.items()
+            },
+        }
+
+
+# OCR engines ---------------------------------------------------------------
+
+# Registered engines, imported only inside the worker processes
+ENGINES = {"tesseract": "ocr_image:TesseractEngine"}
+
+
+def load_engine(spec: str):
+    """Build an engine from a registered name or a "module:factory" path"""
+    module_name, _, attribute = ENGINES.get(spec, spec).partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+# Worker processes ----------------------------------------------------------
+
+# Engine loaded once per worker process by the pool initializer
+_engine = None
+_engine_error: Optional[str] = None
+
+
+def _init_worker(spec: str):
+    global _engine, _engine_error
+    try:
+        _engine = load_engine(spec)
+    except Exception as e:
+        _engine_error = f"OCR engine {spec!r} unavailable: {e}"
+
+
+def _ping() -> bool:
+    return _engine is not None
+
+
+def _recognize(data: bytes, max_side: int, max_skew: float, submitted: float) -> OCRResult:
+    started = time.monotonic()
+    if _engine is None:
+        raise OCRUnavailableError(_engine_error or "OCR engine not loaded")
+    from ocr_image import preprocess
+
+    pixels, timings = preprocess(data, max_side, max_skew)
+    stage_start = time.perf_counter()
+    text, confidence = _engine.recognize(pixels)
+    timings["recognize"] = time.perf_counter() - stage_start
+    # CLOCK_MONOTONIC is shared by all processes on the host
+    timings = {"queue": max(0.0, started - submitted), **timings}
+    return OCRResult(text=text.strip(), confidence=confidence, timings=timings)
+
+
+def _recognize_bands(
+    data: bytes,
+    bands: Sequence[Tuple[float, float]],
+    max_side: int,
+    max_skew: float,
+    submitted: float,
+) -> List[OCRResult]:
+    """Decode a frame once and read each (top, bottom) band of it separately"""
+    started = time.monotonic()
+    if _engine is None:
+        raise OCRUnavailableError(_engine_error or "OCR engine not loaded")
+    from ocr_image import crop_band, decode_image, preprocess_image
+
+    stage_start = time.perf_counter()
+    image = decode_image(data)
+    shared = {
+        "queue": max(0.0, started - submitted),
+        "decode": time.perf_counter() - stage_start,
+    }
+    results = []
+    for top, bottom in bands:
+        pixels, timings = preprocess_image(crop_band(image, (top, bottom)), max_side, max_skew)
+        stage_start = time.perf_counter()
+        lines = []
+        if hasattr(_engine, "recognize_lines"):
+            positioned, confidence = _engine.recognize_lines(pixels)
+            height = bottom - top
+            lines = [
+                (top + line_top * height, top + line_bottom * height, text)
+                for line_top, line_bottom, text in positioned
+            ]
+            text = "\n".join(text for _, _, text in positioned)
+        else:
+            text, confidence = _engine.recognize(pixels)
+        timings["recognize"] = time.perf_counter() - stage_start
+        results.append(
+            OCRResult(
+                text=text.strip(),
+                confidence=confidence,
+                timings={**shared, **timings},
+                lines=lines,
+            )
+        )
+        shared = {}
+    return results
+
+
+class OCRPool:
+    """
+    Pool of worker processes, each holding one pre-loaded OCR engine.
+
+    The engine (and its model) is loaded once per process by the pool
+    initializer, and preprocessing runs in the workers too, so the event loop
+    only ships image bytes back and forth. At most `workers + max_queue`
+    images are admitted at once; further calls fail fast with OCRBusyError.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[str] = None,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_side: Optional[int] = None,
+        max_skew: Optional[float] = None,
+    ):
+        self.engine = engine or settings.OCR_ENGINE
+        self.workers = workers or settings.OCR_WORKERS
+        self.max_queue = settings.OCR_MAX_QUEUE if max_queue is None else max_queue
+        self.max_side = max_side or settings.OCR_MAX_SIDE
+        self.max_skew = settings.OCR_MAX_SKEW if max_skew is None else max_skew
+        self.in_flight = 0
+        self.rejected = 0
+        # None until a warm-up finished, then whether every engine loaded
+        self.warmed: Optional[bool] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._warming: Optional[asyncio.Task] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.engine,),
+            )
+        return self._executor
+
+    async def warm(self) -> bool:
+        """Start every worker and load its engine ahead of the first image"""
+        loop = asyncio.get_running_loop()
+        ready = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, _ping) for _ in range(self.workers))
+        )
+        self.warmed = all(ready)
+        return self.warmed
+
+    def start_warming(self):
+        """warm() in the background, so startup does not wait for the workers"""
+        if self._warming is None or self._warming.done():
+            self._warming = asyncio.create_task(self._warm_in_background())
+
+    async def _warm_in_background(self):
+        try:
+            if not await self.warm():
+                print("⚠️ OCR engine unavailable; /api/ocr will answer 503")
+        except Exception as e:
+            print(f"⚠️ OCR warm-up failed: {e}")
+
+    async def _submit(self, function, *args) -> Any:
+        """Run `function` in a worker, failing fast when the pool is at capacity"""
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise OCRBusyError("OCR workers are at capacity, please retry")
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, function, *args, self.max_side, self.max_skew, time.monotonic()
+            )
+        finally:
+            self.in_flight -= 1
+
+    async def recognize(self, data: bytes) -> OCRResult:
+        start = time.perf_counter()
+        result = await self._submit(_recognize, data)
+        result.timings["total"] = time.perf_counter() - start
+        return result
+
+    async def recognize_bands(
+        self, data: bytes, bands: Sequence[Tuple[float, float]]
+    ) -> List[OCRResult]:
+        """Read only some horizontal bands of an image, in one worker call"""
+        start = time.perf_counter()
+        results = await self._submit(_recognize_bands, data, list(bands))
+        if results:
+            results[0].timings["total"] = time.perf_counter() - start
+        return results
+
+    def shutdown(self):
+        if self._warming is not None:
+            self._warming.cancel()
+            self._warming = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Create a global instance
+ocr_pool = OCRPool()
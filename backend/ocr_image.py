@@ -0,0 +1,273 @@
+# Image preprocessing, frame differencing and the Tesseract engine. The OCR
+# worker processes import this module; the API process only imports it on the
+# first streamed frame, which keeps NumPy and Pillow out of cold starts.
+import io
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from config import settings
+
+
+# Image preprocessing -------------------------------------------------------
+
+
+def decode_image(data: bytes) -> Image.Image:
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError(f"Unsupported image: {e}")
+    # Camera frames carry their orientation in EXIF
+    return ImageOps.exif_transpose(image)
+
+
+def to_grayscale(image: Image.Image) -> Image.Image:
+    if image.mode in ("RGBA", "LA", "P"):
+        # Flatten transparency onto white so it does not read as ink
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image.convert("RGBA"), mask=image.convert("RGBA").split()[-1])
+        image = background
+    return image.convert("L")
+
+
+def downscale(image: Image.Image, max_side: int) -> Image.Image:
+    if max(image.size) <= max_side:
+        return image
+    scale = max_side / max(image.size)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    # reducing_gap does most of the work with a cheap box filter first
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def otsu_threshold(pixels: np.ndarray) -> int:
+    """Threshold that maximises between-class variance of a uint8 image"""
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * levels)
+    total, total_mass = weight[-1], mass[-1]
+    background = weight
+    foreground = total - weight
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = mass / background
+        mean_fg = (total_mass - mass) / foreground
+        variance = background * foreground * (mean_bg - mean_fg) ** 2
+    return int(np.nanargmax(np.nan_to_num(variance, nan=-1.0)))
+
+
+def _projection_scores(ys: np.ndarray, xs: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    slopes = np.tan(np.deg2rad(angles))
+    # Row each dark pixel falls on once the image is rotated back by `angle`
+    rows = ys[None, :] + xs[None, :] * slopes[:, None]
+    rows = np.rint(rows - rows.min()).astype(np.intp)
+    span = int(rows.max()) + 1
+    rows += np.arange(len(angles))[:, None] * span
+    counts = np.bincount(rows.ravel(), minlength=span * len(angles))
+    return (counts.reshape(len(angles), span).astype(np.float64) ** 2).sum(axis=1)
+
+
+def estimate_skew(
+    pixels: np.ndarray,
+    max_angle: float = 10.0,
+    step: float = 0.25,
+    max_points: int = 10000,
+) -> float:
+    """
+    Skew angle in degrees (counter-clockwise) of the text lines in `pixels`.
+
+    Dark pixels are projected onto the vertical axis along every candidate
+    angle at once; the angle whose row histogram is most sharply peaked is
+    the one that lines the text rows up. A 1 degree sweep is refined around
+    its best angle down to `step`.
+    """
+    ys, xs = np.nonzero(pixels <= otsu_threshold(pixels))
+    if len(ys) < 2:
+        return 0.0
+    if len(ys) > max_points:
+        keep = np.linspace(0, len(ys) - 1, max_points).astype(np.intp)
+        ys, xs = ys[keep], xs[keep]
+
+    coarse = np.arange(-max_angle, max_angle + 0.5, 1.0)
+    best = coarse[int(np.argmax(_projection_scores(ys, xs, coarse)))]
+    fine = np.arange(best - 1.0, best + 1.0 + step / 2, step)
+    fine = fine[np.abs(fine) <= max_angle]
+    return float(fine[int(np.argmax(_projection_scores(ys, xs, fine)))])
+
+
+def deskew(image: Image.Image, max_angle: float) -> Image.Image:
+    angle = estimate_skew(np.asarray(image), max_angle=max_angle)
+    if abs(angle) < 0.1:
+        return image
+    return image.rotate(-angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=255)
+
+
+def binarize(image: Image.Image) -> np.ndarray:
+    pixels = np.asarray(image)
+    binary = np.where(pixels > otsu_threshold(pixels), 255, 0).astype(np.uint8)
+    # Light text on a dark background: invert so text is always dark
+    if binary.mean() < 127:
+        binary = 255 - binary
+    return binary
+
+
+def preprocess(
+    data: bytes, max_side: int, max_skew: float
+) -> Tuple[np.ndarray, Dict[str, float]]:
+    """Decode, grayscale, downscale, deskew and binarize an uploaded image"""
+    stage_start = time.perf_counter()
+    image = decode_image(data)
+    timings = {"decode": time.perf_counter() - stage_start}
+    pixels, image_timings = preprocess_image(image, max_side, max_skew)
+    return pixels, {**timings, **image_timings}
+
+
+def preprocess_image(
+    image: Image.Image, max_side: int, max_skew: float
+) -> Tuple[np.ndarray, Dict[str, float]]:
+    """Grayscale, downscale, deskew and binarize a decoded image"""
+    timings = {}
+    stage_start = time.perf_counter()
+
+    def lap(stage: str):
+        nonlocal stage_start
+        now = time.perf_counter()
+        timings[stage] = now - stage_start
+        stage_start = now
+
+    image = to_grayscale(image)
+    lap("grayscale")
+    image = downscale(image, max_side)
+    lap("downscale")
+    image = deskew(image, max_skew)
+    lap("deskew")
+    pixels = binarize(image)
+    lap("binarize")
+    return pixels, timings
+
+
+def crop_band(image: Image.Image, band: Tuple[float, float]) -> Image.Image:
+    """Horizontal strip of an image, given as (top, bottom) fractions of its height"""
+    top, bottom = band
+    return image.crop(
+        (0, int(top * image.height), image.width, max(1, round(bottom * image.height)))
+    )
+
+
+# Frame differencing --------------------------------------------------------
+
+# Streamed frames are compared as small grayscale thumbnails split into cells
+THUMBNAIL_SIZE = (64, 48)
+CELL_SIZE = 4
+
+
+def frame_thumbnail(data: bytes) -> np.ndarray:
+    """
+    Grayscale thumbnail of a compressed frame with its mean brightness
+    removed, so camera auto-exposure does not read as change. JPEG frames
+    are decoded at reduced scale, which makes this far cheaper than a full
+    decode.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft("L", (THUMBNAIL_SIZE[0] * 2, THUMBNAIL_SIZE[1] * 2))
+        image = ImageOps.exif_transpose(image)
+        image = to_grayscale(image).resize(THUMBNAIL_SIZE, Image.Resampling.BOX)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError(f"Unsupported image: {e}")
+    pixels = np.asarray(image, dtype=np.float32)
+    return pixels - pixels.mean()
+
+
+def changed_bands(
+    previous: Optional[np.ndarray],
+    current: np.ndarray,
+    threshold: float,
+    full_frame_ratio: float,
+) -> List[Tuple[float, float]]:
+    """
+    Horizontal bands, as (top, bottom) fractions of the frame height, that
+    differ between two thumbnails. A cell changes when its average brightness
+    moved by more than `threshold` (0-255): averaging before differencing
+    ignores the edge shimmer of hand jitter and sensor noise. Rows with a
+    changed cell are grown by one row, since text lines straddle cell
+    borders, and merged into bands spanning the frame width. Returns [] for an unchanged frame and the
+    whole frame when most of it changed (a new page, a camera pan).
+    """
+    if previous is None or previous.shape != current.shape:
+        return [(0.0, 1.0)]
+
+    rows, columns = current.shape[0] // CELL_SIZE, current.shape[1] // CELL_SIZE
+    difference = (current - previous)[: rows * CELL_SIZE, : columns * CELL_SIZE]
+    cells = np.abs(difference.reshape(rows, CELL_SIZE, columns, CELL_SIZE).mean(axis=(1, 3)))
+    changed = (cells > threshold).any(axis=1)
+    if not changed.any():
+        return []
+
+    grown = changed.copy()
+    grown[1:] |= changed[:-1]
+    grown[:-1] |= changed[1:]
+    if grown.mean() >= full_frame_ratio:
+        return [(0.0, 1.0)]
+
+    bands = []
+    start = None
+    for row, is_changed in enumerate(list(grown) + [False]):
+        if is_changed and start is None:
+            start = row
+        elif not is_changed and start is not None:
+            bands.append((start / rows, row / rows))
+            start = None
+    return bands
+
+
+# OCR engines ---------------------------------------------------------------
+
+
+class TesseractEngine:
+    """Tesseract via pytesseract; requires the tesseract binary on PATH"""
+
+    def __init__(self, lang: Optional[str] = None):
+        import pytesseract
+
+        self.pytesseract = pytesseract
+        self.lang = lang or settings.OCR_LANG
+        # Fails fast when the binary is missing
+        pytesseract.get_tesseract_version()
+
+    def recognize(self, pixels: np.ndarray) -> Tuple[str, float]:
+        lines, confidence = self.recognize_lines(pixels)
+        return "\n".join(text for _, _, text in lines), confidence
+
+    def recognize_lines(
+        self, pixels: np.ndarray
+    ) -> Tuple[List[Tuple[float, float, str]], float]:
+        """Text lines as (top, bottom, text), top and bottom as fractions of the height"""
+        data = self.pytesseract.image_to_data(
+            Image.fromarray(pixels),
+            lang=self.lang,
+            output_type=self.pytesseract.Output.DICT,
+        )
+        lines: Dict[Tuple[int, int, int], list] = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            confidence = float(data["conf"][i])
+            if not word.strip() or confidence < 0:
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            top, bottom = data["top"][i], data["top"][i] + data["height"][i]
+            lines.setdefault(key, []).append((word, top, bottom))
+            confidences.append(confidence)
+        height = pixels.shape[0]
+        positioned = [
+            (
+                min(top for _, top, _ in words) / height,
+                max(bottom for _, _, bottom in words) / height,
+                " ".join(word for word, _, _ in words),
+            )
+            for _, words in sorted(lines.items())
+        ]
+        confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+        return positioned, confidence
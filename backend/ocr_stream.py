@@ -0,0 +1,304 @@
+import asyncio
+import difflib
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import anyio
+from starlette.websockets import WebSocket
+
+from config import settings
+from ocr import OCRBusyError, OCRPool, OCRResult, OCRUnavailableError
+
+Band = Tuple[float, float]
+
+
+def text_delta(old: List[str], new: List[str]) -> List[Dict[str, Any]]:
+    """
+    Line edits turning `old` into `new`. Applied in order, each op deletes
+    `delete` lines at index `at` and inserts `insert` there; indexes refer to
+    the list as already edited by the previous ops.
+    """
+    ops = []
+    matcher = difflib.SequenceMatcher(a=old, b=new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            ops.append({"at": j1, "delete": i2 - i1, "insert": new[j1:j2]})
+    return ops
+
+
+class TextStabilizer:
+    """
+    Holds back OCR text until the same text has been read from `frames`
+    consecutive frames, then reports it once, so flicker while the camera
+    moves never reaches the client.
+    """
+
+    def __init__(self, frames: int):
+        self.frames = frames
+        self.candidate: Optional[str] = None
+        self.seen = 0
+        self.emitted = ""
+
+    def observe(self, text: str) -> Optional[str]:
+        """The newly stable text, or None if nothing changed"""
+        if text == self.candidate:
+            self.seen += 1
+        else:
+            self.candidate, self.seen = text, 1
+        if self.seen >= self.frames and text != self.emitted:
+            self.emitted = text
+            return text
+        return None
+
+
+class OCRSession:
+    """
+    Server side of one streamed camera: decides which frames and which parts
+    of them need OCR, and turns the results into stable text deltas.
+
+    Each frame is compared with the last processed one as a small thumbnail
+    (see ocr_image.changed_bands). Unchanged frames skip OCR entirely; changed
+    frames have only their changed horizontal bands read. The page is kept as
+    positioned lines, so re-reading a band replaces just the lines inside it.
+    """
+
+    def __init__(
+        self,
+        pool: OCRPool,
+        diff_threshold: Optional[float] = None,
+        full_frame_ratio: Optional[float] = None,
+        stable_frames: Optional[int] = None,
+    ):
+        self.pool = pool
+        self.diff_threshold = diff_threshold or settings.OCR_STREAM_DIFF_THRESHOLD
+        self.full_frame_ratio = full_frame_ratio or settings.OCR_STREAM_FULL_FRAME_RATIO
+        self.stabilizer = TextStabilizer(stable_frames or settings.OCR_STREAM_STABLE_FRAMES)
+        # (top, bottom, text), as fractions of the frame height, top to bottom
+        self.lines: List[Tuple[float, float, str]] = []
+        self.version = 0
+        self._reference = None
+        self.frames = 0
+        self.skipped = 0
+        self.busy = 0
+        self.ocr_calls = 0
+        self.ocr_area = 0.0
+        self.diff_seconds = 0.0
+        self.ocr_seconds = 0.0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(text for _, _, text in self.lines)
+
+    def _whole_lines(self, bands: List[Band]) -> List[Band]:
+        """Grow bands over known lines they would cut through, merging overlaps"""
+        grown: List[Band] = []
+        for top, bottom in bands:
+            for line_top, line_bottom, _ in self.lines:
+                if line_top < top < line_bottom:
+                    top = line_top
+                if line_top < bottom < line_bottom:
+                    bottom = line_bottom
+            while grown and top <= grown[-1][1]:
+                previous_top, previous_bottom = grown.pop()
+                top, bottom = min(top, previous_top), max(bottom, previous_bottom)
+            grown.append((top, bottom))
+        return grown
+
+    def _store(self, band: Band, result: OCRResult):
+        """Replace the lines centred in a band with the ones just read from it"""
+        top, bottom = band
+
+        def inside(line):
+            return top <= (line[0] + line[1]) / 2 < bottom
+
+        kept = [line for line in self.lines if not inside(line)]
+        if result.lines:
+            kept += [line for line in result.lines if inside(line)]
+        elif result.text:
+            # Engine without line positions: the band's text is one block
+            kept.append((top, bottom, result.text))
+        self.lines = sorted(kept)
+
+    async def process(self, frame: bytes) -> Optional[Dict[str, Any]]:
+        """Handle one frame; returns a delta message when the stable text changed"""
+        try:
+            return await self._process(frame)
+        finally:
+            self.frames += 1
+
+    async def _process(self, frame: bytes) -> Optional[Dict[str, Any]]:
+        from ocr_image import changed_bands, frame_thumbnail
+
+        start = time.perf_counter()
+        thumbnail = await asyncio.to_thread(frame_thumbnail, frame)
+        bands = changed_bands(
+            self._reference, thumbnail, self.diff_threshold, self.full_frame_ratio
+        )
+        self.diff_seconds += time.perf_counter() - start
+
+        if not bands:
+            self.skipped += 1
+        else:
+            bands = self._whole_lines(bands)
+            start = time.perf_counter()
+            try:
+                results = await self.pool.recognize_bands(frame, bands)
+            except OCRBusyError:
+                # Dropped, not skipped: the next frame is compared against the same reference
+                self.busy += 1
+                return None
+            self.ocr_seconds += time.perf_counter() - start
+            self.ocr_calls += 1
+            self.ocr_area += sum(bottom - top for top, bottom in bands)
+            for band, result in zip(bands, results):
+                self._store(band, result)
+            self._reference = thumbnail
+
+        previous = self.stabilizer.emitted
+        stable = self.stabilizer.observe(self.text)
+        if stable is None:
+            return None
+        self.version += 1
+        return {
+            "type": "delta",
+            "version": self.version,
+            "ops": text_delta(previous.splitlines(), stable.splitlines()),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "busy": self.busy,
+            "ocr_calls": self.ocr_calls,
+            "ocr_area_frames": round(self.ocr_area, 3),
+            "diff_ms": round(self.diff_seconds * 1000, 2),
+            "ocr_ms": round(self.ocr_seconds * 1000, 2),
+            "version": self.version,
+        }
+
+
+class OCRSessions:
+    """
+    Streaming OCR over WebSockets (/ws/ocr).
+
+    The client sends compressed frames (JPEG or WebP) as binary messages and
+    receives JSON messages: "ready" on connect, then a "delta" whenever the
+    stable text changes. A text message {"type": "stats"} asks for the
+    session counters. Frames that arrive while one is being processed
+    replace each other, so a slow server reads the newest frame instead of
+    falling behind.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None):
+        self.max_sessions = max_sessions or settings.OCR_STREAM_MAX_SESSIONS
+        self.active = 0
+        self.opened = 0
+        self.rejected = 0
+        self.frames = 0
+        self.superseded = 0
+        self.skipped = 0
+        self.ocr_calls = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def _send(self, websocket: WebSocket, message: Dict[str, Any]):
+        text = json.dumps(message, separators=(",", ":"))
+        self.bytes_out += len(text)
+        await websocket.send_text(text)
+
+    async def serve(self, websocket: WebSocket, pool: OCRPool):
+        if self.active >= self.max_sessions:
+            self.rejected += 1
+            # 1013: try again later
+            await websocket.close(code=1013, reason="Too many OCR sessions")
+            return
+
+        await websocket.accept()
+        self.active += 1
+        self.opened += 1
+        session = OCRSession(pool)
+        latest: Optional[bytes] = None
+        stats_requested = False
+        ready = asyncio.Event()
+
+        async def receive():
+            nonlocal latest, stats_requested
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                data = message.get("bytes")
+                if data is not None:
+                    self.bytes_in += len(data)
+                    if len(data) > settings.OCR_MAX_UPLOAD_BYTES:
+                        await self._send(websocket, {"type": "error", "detail": "Frame too large"})
+                        continue
+                    if latest is not None:
+                        self.superseded += 1
+                    latest = data
+                elif message.get("text") is not None:
+                    self.bytes_in += len(message["text"])
+                    stats_requested = True
+                ready.set()
+
+        async def process(scope: anyio.CancelScope):
+            nonlocal latest, stats_requested
+            while True:
+                await ready.wait()
+                ready.clear()
+                if latest is not None:
+                    frame, latest = latest, None
+                    skipped, calls = session.skipped, session.ocr_calls
+                    try:
+                        message = await session.process(frame)
+                    except ValueError as e:
+                        message = {"type": "error", "detail": str(e)}
+                    except OCRUnavailableError as e:
+                        await self._send(websocket, {"type": "error", "detail": str(e)})
+                        await websocket.close(code=1011)
+                        scope.cancel()
+                        return
+                    self.frames += 1
+                    self.skipped += session.skipped - skipped
+                    self.ocr_calls += session.ocr_calls - calls
+                    if message is not None:
+                        await self._send(websocket, message)
+                # Answered after the frame received before the request
+                if stats_requested:
+                    stats_requested = False
+                    await self._send(websocket, {"type": "stats", **session.stats()})
+
+        try:
+            await self._send(
+                websocket,
+                {
+                    "type": "ready",
+                    "max_side": pool.max_side,
+                    "stable_frames": session.stabilizer.frames,
+                },
+            )
+            async with anyio.create_task_group() as tasks:
+                tasks.start_soon(process, tasks.cancel_scope)
+                await receive()
+                tasks.cancel_scope.cancel()
+        finally:
+            self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "frames": self.frames,
+            "superseded": self.superseded,
+            "skipped": self.skipped,
+            "ocr_calls": self.ocr_calls,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+# Create a global instance
+ocr_sessions = OCRSessions()
@@ -0,0 +1,63 @@
+import base64
+import json
+import re
+import uuid
+from typing import List, Optional, Tuple
+
+# Columns of text_translations a client may project with ?fields=
+TEXT_FIELDS = ("id", "text", "video_url", "user_id", "created_at", "updated_at")
+
+# Cursor columns are always fetched so the next page can be addressed
+CURSOR_FIELDS = ("created_at", "id")
+
+_TIMESTAMP = re.compile(
+    r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,9})?(Z|[+-]\d{2}(:?\d{2})?)?$"
+)
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque cursor pointing just past `row` in (created_at, id) order"""
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor back to (created_at, id).
+
+    Both values end up inside a PostgREST filter expression, so they are
+    checked to be a timestamp and a UUID. Raises ValueError otherwise.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, translation_id = json.loads(base64.urlsafe_b64decode(padded))
+        uuid.UUID(translation_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(created_at, str) or not _TIMESTAMP.match(created_at):
+        raise ValueError("Invalid cursor")
+    return created_at, translation_id
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a ?fields=a,b projection; None means every column"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in TEXT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(requested))
+
+
+def select_columns(fields: Optional[List[str]]) -> List[str]:
+    """Columns to fetch for a projection, including the cursor columns"""
+    if fields is None:
+        return ["*"]
+    return list(dict.fromkeys([*fields, *CURSOR_FIELDS]))
+
+
+def project(row: dict, fields: Optional[List[str]]) -> dict:
+    if fields is None:
+        return row
+    return {field: row.get(field) for field in fields}
@@ -0,0 +1,82 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import bcrypt
+
+from config import settings
+from metrics import stage
+
+
+class HasherBusyError(Exception):
+    """Raised when the hashing pool and its queue are full"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool.
+
+    bcrypt releases the GIL, so worker threads hash in parallel while the
+    event loop keeps serving other requests. At most `workers + max_queue`
+    operations are admitted at once; further calls fail fast with
+    HasherBusyError instead of piling up behind a login burst.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.BCRYPT_WORKERS,
+        max_queue: int = settings.BCRYPT_MAX_QUEUE,
+        rounds: int = settings.BCRYPT_ROUNDS,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        """Hash a password using bcrypt"""
+        return await self._run("bcrypt_hash", self._hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash"""
+        return await self._run("bcrypt_verify", self._verify, password, hashed_password)
+
+    async def _run(self, stage_name: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HasherBusyError("Password hashing is at capacity, please retry")
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            with stage(stage_name):
+                return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def _hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+    @staticmethod
+    def _verify(password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+# Create a global instance
+password_hasher = PasswordHasher()
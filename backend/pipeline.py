@@ -0,0 +1,205 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from asset_index import AssetIndex, Span
+from config import settings
+from pixverse_api import FallbackVideo
+from segmentation import split_phrases
+from translation_cache import normalize_text
+
+SOURCE_ASSET = "asset"
+SOURCE_GENERATED = "generated"
+
+
+@dataclass
+class Segment:
+    index: int
+    text: str
+    video_url: Optional[str] = None
+    start: float = 0.0
+    duration: float = 0.0
+    source: str = SOURCE_GENERATED
+    manifest_url: Optional[str] = None
+    poster_url: Optional[str] = None
+    # A local clip standing in for a failed render
+    fallback: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "text": self.text,
+            "video_url": self.video_url,
+            "manifest_url": self.manifest_url,
+            "poster_url": self.poster_url,
+            "start": self.start,
+            "duration": self.duration,
+            "source": self.source,
+            "fallback": self.fallback,
+        }
+
+
+@dataclass
+class SegmentedTranslation:
+    text: str
+    segments: List[Segment] = field(default_factory=list)
+
+    @property
+    def video_url(self) -> Optional[str]:
+        """First playable clip, kept for clients that expect a single video"""
+        for segment in self.segments:
+            if segment.video_url:
+                return segment.video_url
+        return None
+
+    @property
+    def manifest_url(self) -> Optional[str]:
+        """
+        HLS master playlist of the passage, once transcoded. Only a passage
+        of one clip has one; longer ones carry a manifest per segment.
+        """
+        playable = [segment for segment in self.segments if segment.video_url]
+        return playable[0].manifest_url if len(playable) == 1 else None
+
+    @property
+    def manifest_urls(self) -> List[Optional[str]]:
+        """HLS master playlist of each playable clip in order, None while not transcoded"""
+        return [segment.manifest_url for segment in self.segments if segment.video_url]
+
+    @property
+    def poster_url(self) -> Optional[str]:
+        for segment in self.segments:
+            if segment.video_url:
+                return segment.poster_url
+        return None
+
+    @property
+    def fallback(self) -> bool:
+        """Whether any clip is a local stand-in for a failed render; never saved as the translation"""
+        return any(segment.fallback for segment in self.segments)
+
+    @property
+    def single_video_url(self) -> Optional[str]:
+        """
+        The rendered clip of a passage that is one segment, the only URL that
+        can be saved as its translation. None for longer passages, whose first
+        clip covers only their opening phrase, and for stand-ins.
+        """
+        if len(self.segments) != 1 or self.fallback:
+            return None
+        return self.segments[0].video_url
+
+    @property
+    def total_duration(self) -> float:
+        return sum(segment.duration for segment in self.segments)
+
+    def playlist(self) -> List[Dict[str, Any]]:
+        """Ordered segment URLs with start offsets and durations"""
+        return [segment.to_dict() for segment in self.segments]
+
+
+class TranslationPipeline:
+    """
+    Turns a passage of text into an ordered playlist of sign language clips.
+
+    Spans of the text that match pre-rendered clips in the asset index are
+    served locally. The remaining spans are split into sign-sized phrases whose
+    clips are generated (or served from the translation cache) concurrently,
+    and all clips are laid out back to back with start offsets. With a
+    transcoder, clips that already have an HLS ladder also carry its manifest
+    and poster; the others are queued for transcoding.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        asset_index: Optional[AssetIndex] = None,
+        concurrency: int = settings.SEGMENT_CONCURRENCY,
+        clip_duration: int = 5,
+        transcoder: Any = None,
+    ):
+        self.client = client
+        self.asset_index = asset_index
+        self.concurrency = concurrency
+        self.clip_duration = clip_duration
+        self.transcoder = transcoder
+
+    def plan(self, text: str) -> List[Segment]:
+        """Segments for text: local clips where available, phrases to generate elsewhere"""
+        spans = self.asset_index.cover(text) if self.asset_index else [Span(text=text)]
+        segments: List[Segment] = []
+        for span in spans:
+            if span.clip is not None:
+                segments.append(
+                    Segment(
+                        index=len(segments),
+                        text=span.text,
+                        video_url=span.clip.url,
+                        duration=span.clip.duration or self.clip_duration,
+                        source=SOURCE_ASSET,
+                    )
+                )
+                continue
+            for phrase in split_phrases(span.text):
+                segments.append(
+                    Segment(index=len(segments), text=phrase, duration=self.clip_duration)
+                )
+        return segments
+
+    async def generation_cost(self, text: str, use_pixverse: Optional[bool] = None) -> int:
+        """Number of new upstream renders translating text would start"""
+        if use_pixverse is None:
+            use_pixverse = settings.USE_PIXVERSE
+        if not use_pixverse:
+            return 0
+        phrases = {
+            normalize_text(segment.text): segment.text
+            for segment in self.plan(text)
+            if segment.source == SOURCE_GENERATED
+        }
+        cached = await asyncio.gather(
+            *(
+                self.client.cached_sign_language_video(phrase, duration=self.clip_duration)
+                for phrase in phrases.values()
+            )
+        )
+        return sum(url is None for url in cached)
+
+    async def translate(
+        self, text: str, use_pixverse: Optional[bool] = None
+    ) -> SegmentedTranslation:
+        if use_pixverse is None:
+            use_pixverse = settings.USE_PIXVERSE
+
+        result = SegmentedTranslation(text=text, segments=self.plan(text))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def render(segment: Segment):
+            async with semaphore:
+                segment.video_url = await self.client.generate_sign_language_video(
+                    segment.text,
+                    duration=self.clip_duration,
+                    usePixverse=use_pixverse,
+                )
+                segment.fallback = isinstance(segment.video_url, FallbackVideo)
+
+        await asyncio.gather(
+            *(
+                render(segment)
+                for segment in result.segments
+                if segment.source == SOURCE_GENERATED
+            )
+        )
+
+        start = 0.0
+        for segment in result.segments:
+            if not segment.video_url:
+                segment.duration = 0.0
+            segment.start = start
+            start += segment.duration
+            if segment.video_url and self.transcoder is not None:
+                renditions = await self.transcoder.resolve(segment.video_url)
+                if renditions is not None:
+                    segment.manifest_url = renditions.manifest_url
+                    segment.poster_url = renditions.poster_url
+        return result
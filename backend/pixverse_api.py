@@ -1,19 +1,96 @@
-import requests
-import uuid
-import time
+import asyncio
 from typing import Optional, Dict, Any
+
+import httpx
+
+from admission import GenerationGate, generation_gate
+from asset_index import AssetIndex, asset_index
+from blob_store import BlobStore, blob_store
 from config import settings
+from metrics import stage
+from resilience import CircuitOpenError, Resilience, is_unsent
+from similarity_index import SimilarityIndex, similarity_index
+from singleflight import SingleFlight
+from status_poller import RenderFailedError, StatusPoller
+from translation_cache import TranslationCache, cache_key, translation_cache
+
+# Prompt used for sign language generation; part of the translation cache key
+SIGN_LANGUAGE_PROMPT = "An avatar doing hand signing asking '{text}' in Auslan sign language"
+SIGN_LANGUAGE_NEGATIVE_PROMPT = "text, words, letters, writing, bad quality, blurry, distorted"
+
+
+class PixVerseError(Exception):
+    """PixVerse answered, but refused or failed the request"""
+
+
+# Failures after which a translation falls back to the closest local video
+UPSTREAM_ERRORS = (
+    PixVerseError,
+    RenderFailedError,
+    CircuitOpenError,
+    httpx.HTTPError,
+    asyncio.TimeoutError,
+)
+
+
+class FallbackVideo(str):
+    """
+    URL of a local clip standing in for a render that failed. Play it, but do
+    not save, cache, index or checkpoint it as the text's translation.
+    """
 
 
 class PixVerseAPI:
-    """Client for interacting with PixVerse API for video generation"""
+    """Async client for interacting with PixVerse API for video generation"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache: Optional[TranslationCache] = None,
+        blobs: Optional[BlobStore] = None,
+        gate: Optional[GenerationGate] = None,
+        similar: Optional[SimilarityIndex] = None,
+        assets: Optional[AssetIndex] = None,
+        resilience: Optional[Resilience] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         self.api_key = settings.PIXVERSE_API_KEY
-        self.base_url = "https://app-api.pixverse.ai/openapi/v2"
+        self.base_url = base_url or settings.PIXVERSE_BASE_URL
         self.headers = {"API-KEY": self.api_key, "Content-Type": "application/json"}
-
-    def generate_video(
+        self.cache = cache
+        self.blobs = blobs
+        self.gate = gate
+        self.similar = similar
+        self.assets = assets
+        self.resilience = resilience or Resilience()
+        self.transport = transport
+        self.fallbacks = 0
+        self.inflight = SingleFlight()
+        self.poller = StatusPoller(self.check_status)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive connection pool, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                transport=self.transport,
+                timeout=settings.PIXVERSE_REQUEST_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.PIXVERSE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.PIXVERSE_MAX_KEEPALIVE,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the underlying connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def generate_video(
         self,
         prompt: str,
         duration: int = 5,
@@ -23,10 +100,14 @@ class PixVerseAPI:
         seed: int = 0,
         negative_prompt: str = "",
         watermark: bool = False,
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Dict[str, Any]:
         """
         Generate a video from text using PixVerse API.
 
+        Each attempt has a PIXVERSE_GENERATE_TIMEOUT deadline. Only failures
+        where PixVerse surely did not start a job (refused connection, 429,
+        503) are retried, so a retry never pays for a second render.
+
         Args:
             prompt: Text prompt for video generation
             duration: Duration of the video in seconds
@@ -38,7 +119,12 @@ class PixVerseAPI:
             watermark: Whether to add watermark (boolean)
 
         Returns:
-            Response JSON from API or None if error
+            Response JSON from API
+
+        Raises:
+            PixVerseError: PixVerse refused the request
+            CircuitOpenError: PixVerse has been failing; not called
+            httpx.HTTPError, asyncio.TimeoutError: PixVerse failed or timed out
         """
 
         if not self.api_key:
@@ -57,22 +143,28 @@ class PixVerseAPI:
             "water_mark": watermark,
         }
 
-        try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
+        async def post() -> httpx.Response:
+            response = await self.client.post(endpoint, json=payload)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP error: {e}")
-            print(f"Response content: {response.text}")
-            return None
-        except Exception as e:
-            print(f"Error generating video: {e}")
-            return None
-
-    def check_status(self, video_id: str) -> tuple[int, Optional[str]]:
+            return response
+
+        with stage("pixverse_generate"):
+            response = await self.resilience.call(
+                post, timeout=settings.PIXVERSE_GENERATE_TIMEOUT, retryable=is_unsent
+            )
+        data = response.json()
+        if data.get("ErrCode") != 0 or not (data.get("Resp") or {}).get("video_id"):
+            raise PixVerseError(f"Error generating video: {data.get('ErrMsg')}")
+        return data
+
+    async def check_status(self, video_id: str) -> tuple[int, Optional[str]]:
         """
         Check the status of a video generation request.
 
+        Each check has a PIXVERSE_STATUS_TIMEOUT deadline and is retried on
+        transient failures; a check unanswered after PIXVERSE_HEDGE_DELAY is
+        hedged with a second request, and the first answer wins.
+
         Args:
             video_id: The video ID returned from generate_video
 
@@ -81,102 +173,209 @@ class PixVerseAPI:
         """
         endpoint = f"{self.base_url}/video/result/{video_id}"
 
-        try:
-            response = requests.get(endpoint, headers=self.headers)
+        async def get() -> httpx.Response:
+            response = await self.client.get(endpoint)
             response.raise_for_status()
-            data = response.json()
-
-            if data.get("ErrCode") == 0:
-                return data["Resp"]["status"], data["Resp"].get("url")
-            else:
-                raise RuntimeError(f"Error checking status: {data.get('ErrMsg')}")
+            return response
 
-        except Exception as e:
-            print(f"Error checking video status: {e}")
-            raise
+        response = await self.resilience.call(
+            get,
+            timeout=settings.PIXVERSE_STATUS_TIMEOUT,
+            hedge_after=settings.PIXVERSE_HEDGE_DELAY or None,
+        )
+        data = response.json()
+        if data.get("ErrCode") != 0:
+            raise PixVerseError(f"Error checking status: {data.get('ErrMsg')}")
+        return data["Resp"]["status"], data["Resp"].get("url")
 
-    def wait_for_completion(
-        self, video_id: str, check_interval: int = 5, timeout: int = 300
+    async def wait_for_completion(
+        self,
+        video_id: str,
+        check_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
     ) -> Optional[str]:
         """
-        Wait for video generation to complete.
+        Wait for video generation to complete without blocking the event loop.
+
+        The video is handed to the shared StatusPoller, which polls all pending
+        videos on adaptive, jittered intervals over the pooled connection.
 
         Args:
             video_id: The video ID returned from generate_video
-            check_interval: Seconds between status checks
-            timeout: Maximum time to wait in seconds
+            check_interval: Initial seconds between status checks (defaults to POLL_INITIAL_INTERVAL)
+            timeout: Maximum time to wait in seconds (defaults to PIXVERSE_POLL_TIMEOUT)
 
         Returns:
-            Video URL if successful, None if timeout or error
+            Video URL if successful, None on timeout; a failed render or status check raises
         """
-        start_time = time.time()
-
-        while True:
-            if time.time() - start_time > timeout:
-                return None
-
-            try:
-                status, url = self.check_status(video_id)
-
-                if status == 1:  # Completed
-                    return url
-                elif status == 5:  # Processing
-                    pass  # Continue waiting
-                else:
-                    pass  # Continue waiting
+        return await self.poller.wait(
+            video_id, timeout=timeout, initial_interval=check_interval
+        )
 
-            except Exception as e:
-                return None
+    @staticmethod
+    def sign_language_cache_key(
+        text: str, duration: int = 5, model: str = "v5", quality: str = "360p"
+    ) -> str:
+        """Translation cache key of a sign language video"""
+        return cache_key(
+            text,
+            duration=duration,
+            model=model,
+            quality=quality,
+            prompt=SIGN_LANGUAGE_PROMPT,
+            negative_prompt=SIGN_LANGUAGE_NEGATIVE_PROMPT,
+        )
 
-            time.sleep(check_interval)
+    async def cached_sign_language_video(
+        self,
+        text: str,
+        duration: int = 5,
+        model: str = "v5",
+        quality: str = "360p",
+        similar: bool = True,
+    ) -> Optional[str]:
+        """
+        URL of an already generated sign language video, without generating
+        one. With similar=False only this exact text's own video counts, not
+        a near-duplicate's.
+        """
+        video_url = None
+        if self.cache is not None:
+            video_url = await self.cache.get(
+                self.sign_language_cache_key(text, duration, model, quality)
+            )
+        if video_url is None and similar:
+            # A lookup, not a request: generating the text counts the match
+            video_url = self.near_duplicate_video(text, record=False)
+        return video_url
+
+    def near_duplicate_video(self, text: str, record: bool = True) -> Optional[str]:
+        """Video of an indexed text similar enough to stand in for this one"""
+        if self.similar is None:
+            return None
+        match = self.similar.match(text, record=record)
+        return match.video_url if match else None
 
-    def generate_sign_language_video(
-        self, text: str, duration: int = 5, usePixverse: bool = False
+    def local_fallback(self, text: str) -> Optional[FallbackVideo]:
+        """
+        The closest local video to play when PixVerse cannot render this text:
+        a loosely similar past translation, else the asset clip covering the
+        most of its words. None when nothing local is related.
+        """
+        if self.similar is not None:
+            match = self.similar.match(text, threshold=settings.SIMILARITY_FALLBACK_THRESHOLD)
+            if match:
+                return FallbackVideo(match.video_url)
+        if self.assets is not None:
+            spans = [span for span in self.assets.cover(text) if span.clip is not None]
+            if spans:
+                return FallbackVideo(max(spans, key=lambda span: len(span.text.split())).clip.url)
+        return None
+
+    async def generate_sign_language_video(
+        self,
+        text: str,
+        duration: int = 5,
+        usePixverse: bool = False,
+        model: str = "v5",
+        quality: str = "360p",  # Lower quality for faster generation
+        similar: bool = True,
     ) -> Optional[str]:
         """
         Generate a sign language video for the given text.
 
+        Results are cached by normalized text and generation parameters, so a
+        repeated sentence skips the generate/poll round trips entirely, and
+        concurrent calls for the same text await a single in-flight job. On a
+        cache miss, a near-duplicate of a previously generated text (OCR noise,
+        punctuation) reuses that video instead of rendering a new one. When
+        PixVerse fails or times out, the closest local video is returned as a
+        FallbackVideo.
+
         Args:
             text: The text to translate to sign language
             duration: Duration of the video in seconds
             usePixverse: Whether to use PixVerse API (False = use local asset)
+            model: PixVerse model version
+            quality: Video resolution
+            similar: Whether a near-duplicate's video may stand in for a render
 
         Returns:
-            Video URL if successful, None if error
+            Video URL; a FallbackVideo if PixVerse failed, or None if nothing local matches
         """
         if not usePixverse:
             # Return local asset instead of calling PixVerse API
             return "/assets/wasnt hungry anymore.mp4"
 
+        key = self.sign_language_cache_key(text, duration, model, quality)
+        if self.cache is not None:
+            cached_url = await self.cache.get(key)
+            if cached_url is not None:
+                return cached_url
+
+        similar_url = self.near_duplicate_video(text) if similar else None
+        if similar_url is not None:
+            return similar_url
+
+        # Concurrent requests for the same text share one PixVerse job
+        try:
+            video_url = await self.inflight.do(
+                key,
+                lambda: self._render_gated(key, text, duration, model, quality),
+            )
+        except UPSTREAM_ERRORS:
+            video_url = None
+        if video_url is None:
+            self.fallbacks += 1
+            video_url = self.local_fallback(text)
+        return video_url
+
+    async def _render_gated(
+        self, key: str, text: str, duration: int, model: str, quality: str
+    ) -> Optional[str]:
+        """Render under the global cap on concurrent upstream generations"""
+        if self.gate is None:
+            return await self._render_sign_language_video(key, text, duration, model, quality)
+        async with self.gate:
+            return await self._render_sign_language_video(key, text, duration, model, quality)
+
+    async def _render_sign_language_video(
+        self, key: str, text: str, duration: int, model: str, quality: str
+    ) -> Optional[str]:
+        """Run one PixVerse generation and cache the resulting URL"""
         # Create a prompt optimized for sign language generation
-        prompt = f"An avatar doing hand signing asking '{text}' in Auslan sign language"
-        negative_prompt = (
-            "text, words, letters, writing, bad quality, blurry, distorted"
-        )
+        prompt = SIGN_LANGUAGE_PROMPT.format(text=text)
 
         # Generate the video
-        result = self.generate_video(
+        result = await self.generate_video(
             prompt=prompt,
             duration=duration,
-            negative_prompt=negative_prompt,
-            quality="360p",  # Lower quality for faster generation
+            model=model,
+            negative_prompt=SIGN_LANGUAGE_NEGATIVE_PROMPT,
+            quality=quality,
         )
 
-        if not result:
-            return None
+        video_url = await self.wait_for_completion(result["Resp"]["video_id"])
 
-        try:
-            video_id = result["Resp"]["video_id"]
+        if video_url and self.blobs is not None:
+            # Serve a local copy: PixVerse CDN links are third-party and may expire
+            video_url = await self.blobs.mirror(video_url) or video_url
 
-            # Wait for completion
-            video_url = self.wait_for_completion(video_id)
-            return video_url
+        if video_url and self.cache is not None:
+            await self.cache.set(key, text, video_url)
+        if video_url and self.similar is not None:
+            self.similar.add(text, video_url)
+        return video_url
 
-        except KeyError as e:
-            return None
-        except Exception as e:
-            return None
+    def stats(self) -> Dict[str, Any]:
+        return {**self.resilience.stats(), "fallbacks": self.fallbacks}
 
 
 # Create a global instance
-pixverse_client = PixVerseAPI()
+pixverse_client = PixVerseAPI(
+    cache=translation_cache,
+    blobs=blob_store if settings.BLOB_MIRROR_ENABLED else None,
+    gate=generation_gate,
+    similar=similarity_index if settings.SIMILARITY_ENABLED else None,
+    assets=asset_index,
+)
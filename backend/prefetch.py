@@ -0,0 +1,305 @@
+import asyncio
+import math
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, unquote, urlsplit
+
+from admission import GenerationBusyError
+from config import settings
+from pipeline import SOURCE_GENERATED, TranslationPipeline
+from pixverse_api import FallbackVideo
+from translation_cache import MemoryCacheTier, normalize_text
+
+STATUS_READY = "ready"
+STATUS_GENERATING = "generating"
+STATUS_MISSING = "missing"
+
+# Characters left alone when a clip URL is put in a Link header
+_LINK_SAFE = ":/?#[]@!$&'()*+,;=%"
+
+
+@dataclass
+class PrefetchItem:
+    text: str
+    word: int
+    source: str
+    video_url: Optional[str] = None
+    size: Optional[int] = None
+    taps: int = 0
+    score: float = 0.0
+    status: str = STATUS_MISSING
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "word": self.word,
+            "source": self.source,
+            "status": self.status,
+            "video_url": self.video_url,
+            "bytes": self.size,
+            "taps": self.taps,
+            "score": round(self.score, 4),
+        }
+
+
+@dataclass
+class PrefetchPlan:
+    """A page's distinct phrases, most likely to be tapped first"""
+
+    items: List[PrefetchItem] = field(default_factory=list)
+
+    @property
+    def missing(self) -> List[PrefetchItem]:
+        return [item for item in self.items if item.status == STATUS_MISSING]
+
+    def preload_links(self, limit: int) -> List[str]:
+        """Link header values preloading the first `limit` ready clips"""
+        links: List[str] = []
+        for item in self.items:
+            if len(links) >= limit:
+                break
+            if item.status != STATUS_READY:
+                continue
+            link = f"<{quote(item.video_url, safe=_LINK_SAFE)}>; rel=preload; as=video"
+            if link not in links:
+                links.append(link)
+        return links
+
+    def to_dict(self) -> Dict[str, Any]:
+        ready = [item for item in self.items if item.status == STATUS_READY]
+        return {
+            "items": [item.to_dict() for item in self.items],
+            "ready": len(ready),
+            "generating": sum(item.status == STATUS_GENERATING for item in self.items),
+            "missing": len(self.missing),
+            "bytes": sum(item.size or 0 for item in ready),
+        }
+
+
+class Prefetcher:
+    """
+    Prefetch plans for the pages of a book, so a tapped phrase plays at once.
+
+    A page is planned into the phrases the translation pipeline would play
+    (local clips, then sign-sized phrases). Phrases whose clip already exists
+    (asset library, translation cache or a near-duplicate) are listed with
+    their URL and size; the others can be handed to generate(), which renders
+    them in the background with a bounded number pending. Phrases are ranked
+    by how soon the reader reaches them, boosted by how often their text was
+    translated before, so a client with a limited prefetch budget spends it
+    on the likeliest taps first.
+    """
+
+    def __init__(
+        self,
+        pipeline: TranslationPipeline,
+        store: Any = None,
+        assets_dir: Optional[str] = None,
+        blobs_dir: Optional[str] = None,
+        tap_weight: Optional[float] = None,
+        tap_rows: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        tap_cache_size: int = 10_000,
+    ):
+        self.pipeline = pipeline
+        self.store = store
+        # URL prefix -> directory served under it, longest prefix first
+        self.roots = [
+            ("/assets/blobs/", blobs_dir or settings.BLOB_STORE_DIR),
+            ("/assets/", assets_dir or settings.ASSETS_DIR),
+        ]
+        self.tap_weight = settings.PREFETCH_TAP_WEIGHT if tap_weight is None else tap_weight
+        self.tap_rows = tap_rows or settings.PREFETCH_TAP_ROWS
+        self.max_pending = (
+            settings.PREFETCH_MAX_PENDING if max_pending is None else max_pending
+        )
+        self._taps = MemoryCacheTier(max_entries=tap_cache_size, ttl=settings.PREFETCH_TAP_TTL)
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.plans = 0
+        self.phrases = 0
+        self.ready = 0
+        self.started = 0
+        self.generated = 0
+        self.failed = 0
+        self.busy = 0
+        self.deferred = 0
+        self.tap_errors = 0
+
+    def clip_bytes(self, url: str) -> Optional[int]:
+        """Size of a clip served from this app's asset or blob directories"""
+        path = unquote(urlsplit(url).path)
+        for prefix, directory in self.roots:
+            if not path.startswith(prefix):
+                continue
+            root = os.path.realpath(directory)
+            full_path = os.path.realpath(os.path.join(root, path[len(prefix) :]))
+            if os.path.commonpath([root, full_path]) != root:
+                return None
+            try:
+                return os.stat(full_path).st_size
+            except OSError:
+                return None
+        return None
+
+    async def _resolve(self, text: str, use_pixverse: bool) -> Optional[str]:
+        """URL a tap on a generated phrase would play right now, without rendering"""
+        client = self.pipeline.client
+        duration = self.pipeline.clip_duration
+        if use_pixverse:
+            return await client.cached_sign_language_video(text, duration=duration)
+        # Without PixVerse every phrase is served the local demo clip at once
+        return await client.generate_sign_language_video(
+            text, duration=duration, usePixverse=False
+        )
+
+    async def _tap_counts(self, phrases: Dict[str, str]) -> Dict[str, int]:
+        """Past translations of each phrase, by normalized text"""
+        counts: Dict[str, int] = {}
+        wanted: Dict[str, str] = {}
+        for key, text in phrases.items():
+            cached = self._taps.get(key)
+            if cached is None:
+                wanted[key] = text
+            else:
+                counts[key] = cached
+        if not wanted or self.store is None:
+            return counts
+
+        # Stored texts are as typed, so ask for the phrase as written and normalized
+        texts = sorted({value for key, text in wanted.items() for value in (text, key)})
+        try:
+            rows = await self.store.get_translations_of_texts(texts, self.tap_rows)
+        except Exception:
+            # Ranked by reading position alone until the database answers again
+            self.tap_errors += 1
+            return counts
+
+        found = Counter(normalize_text(row["text"]) for row in rows)
+        for key in wanted:
+            counts[key] = found[key]
+            self._taps.set(key, found[key])
+        return counts
+
+    async def plan(
+        self, text: str, position: int = 0, use_pixverse: Optional[bool] = None
+    ) -> PrefetchPlan:
+        """
+        Plan a page for a reader at word `position`. Phrases ahead of the
+        reader rank by distance; phrases already read rank after all of them.
+        """
+        if use_pixverse is None:
+            use_pixverse = settings.USE_PIXVERSE
+        self.plans += 1
+
+        # normalized text -> the phrase's item, first occurrence after the reader wins
+        items: Dict[str, PrefetchItem] = {}
+        word = 0
+        total_words = max(1, len(text.split()))
+        for segment in self.pipeline.plan(text):
+            key = normalize_text(segment.text)
+            length = len(segment.text.split())
+            # Distance to the reader, in words; the phrase being read is 0 away
+            if word + length > position:
+                distance = max(0, word - position)
+            else:
+                distance = total_words + position - word
+            reading = 1 - distance / (2 * total_words)
+            if key and (key not in items or reading > items[key].score):
+                items[key] = PrefetchItem(
+                    text=segment.text,
+                    word=word,
+                    source=segment.source,
+                    video_url=segment.video_url,
+                    score=reading,
+                )
+            word += length
+
+        generated = [item for item in items.values() if item.source == SOURCE_GENERATED]
+        urls, taps = await asyncio.gather(
+            asyncio.gather(*(self._resolve(item.text, use_pixverse) for item in generated)),
+            self._tap_counts({key: item.text for key, item in items.items()}),
+        )
+        for item, url in zip(generated, urls):
+            item.video_url = url
+
+        most_taps = max(taps.values(), default=0)
+        for key, item in items.items():
+            item.taps = taps.get(key, 0)
+            if most_taps:
+                item.score += self.tap_weight * math.log1p(item.taps) / math.log1p(most_taps)
+            if item.video_url:
+                item.status = STATUS_READY
+            elif key in self._pending:
+                item.status = STATUS_GENERATING
+
+        ready = [item for item in items.values() if item.status == STATUS_READY]
+        sizes = await asyncio.to_thread(lambda: [self.clip_bytes(i.video_url) for i in ready])
+        for item, size in zip(ready, sizes):
+            item.size = size
+
+        self.phrases += len(items)
+        self.ready += len(ready)
+        return PrefetchPlan(sorted(items.values(), key=lambda item: -item.score))
+
+    def generate(self, items: List[PrefetchItem]) -> int:
+        """
+        Start rendering missing phrases in the background, in the given order,
+        while fewer than `max_pending` are pending. Returns how many started.
+        """
+        started = 0
+        for item in items:
+            key = normalize_text(item.text)
+            if key in self._pending:
+                item.status = STATUS_GENERATING
+                continue
+            if len(self._pending) >= self.max_pending:
+                self.deferred += 1
+                continue
+            task = asyncio.create_task(self._generate(item.text))
+            # Also forgotten when cancelled before it ever ran
+            task.add_done_callback(lambda _, key=key: self._pending.pop(key, None))
+            self._pending[key] = task
+            item.status = STATUS_GENERATING
+            started += 1
+        self.started += started
+        return started
+
+    async def _generate(self, text: str):
+        try:
+            video_url = await self.pipeline.client.generate_sign_language_video(
+                text, duration=self.pipeline.clip_duration, usePixverse=True
+            )
+            # A local stand-in means the render failed; the next plan tries again
+            if video_url and not isinstance(video_url, FallbackVideo):
+                self.generated += 1
+            else:
+                self.failed += 1
+        except GenerationBusyError:
+            # Interactive translations have the upstream slots; a later plan retries
+            self.busy += 1
+        except Exception:
+            self.failed += 1
+
+    async def stop(self):
+        """Cancel background generations (shutdown)"""
+        tasks = list(self._pending.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "plans": self.plans,
+            "phrases": self.phrases,
+            "ready": self.ready,
+            "pending": len(self._pending),
+            "started": self.started,
+            "generated": self.generated,
+            "failed": self.failed,
+            "busy": self.busy,
+            "deferred": self.deferred,
+            "tap_errors": self.tap_errors,
+            "tap_cache_entries": len(self._taps),
+        }
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Pre-render sign videos for a corpus ahead of time.
+
+Reads plain text, EPUB or JSONL corpora, plans them into the same phrases
+the translation pipeline asks for at request time, skips phrases covered by
+local clips, already cached or already done in a previous run, and generates
+the rest through PixVerse with a rate-limited concurrent scheduler. Progress
+is checkpointed after every phrase, so an interrupted run resumes where it
+stopped. The result is a manifest mapping phrases to video URLs.
+
+Usage: cd backend && python prerender.py book.epub chapter2.txt [--rate 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterator, List, Optional
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from pipeline import SOURCE_GENERATED, TranslationPipeline
+from pixverse_api import FallbackVideo
+from rate_limit import TokenBucket
+from translation_cache import normalize_text
+
+STATUS_DONE = "done"
+STATUS_CACHED = "cached"
+STATUS_FAILED = "failed"
+COMPLETE_STATUSES = {STATUS_DONE, STATUS_CACHED}
+
+_SPACE_BEFORE_PUNCTUATION = re.compile(r"\s+([,.;:!?])")
+
+BLOCK_TAGS = ["p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote"]
+
+
+# Corpus readers ------------------------------------------------------------
+
+
+def read_text(path: str) -> Iterator[str]:
+    """Paragraphs of a plain text file, separated by blank lines"""
+    with open(path, encoding="utf-8") as f:
+        paragraph: List[str] = []
+        for line in f:
+            if line.strip():
+                paragraph.append(line.strip())
+            elif paragraph:
+                yield " ".join(paragraph)
+                paragraph = []
+        if paragraph:
+            yield " ".join(paragraph)
+
+
+def read_jsonl(path: str) -> Iterator[str]:
+    """One passage per line: a JSON string or an object with a "text" field"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record if isinstance(record, str) else record.get("text")
+            if text:
+                yield text
+
+
+def read_epub(path: str) -> Iterator[str]:
+    """Block-level passages of every chapter of an EPUB, in spine order"""
+    from bs4 import BeautifulSoup
+
+    with zipfile.ZipFile(path) as epub:
+        container = ET.fromstring(epub.read("META-INF/container.xml"))
+        opf_path = container.find(".//{*}rootfile").get("full-path")
+        opf = ET.fromstring(epub.read(opf_path))
+        base = posixpath.dirname(opf_path)
+
+        hrefs = {
+            item.get("id"): item.get("href")
+            for item in opf.iterfind(".//{*}manifest/{*}item")
+        }
+        for itemref in opf.iterfind(".//{*}spine/{*}itemref"):
+            href = hrefs.get(itemref.get("idref"))
+            if not href:
+                continue
+            soup = BeautifulSoup(epub.read(posixpath.join(base, href)), "html.parser")
+            blocks = soup.find_all(BLOCK_TAGS) or [soup]
+            for block in blocks:
+                # Nested blocks (e.g. <p> inside <li>) are read once, innermost
+                if block.find(BLOCK_TAGS):
+                    continue
+                text = " ".join(block.get_text(" ").split())
+                text = _SPACE_BEFORE_PUNCTUATION.sub(r"\1", text)
+                if text:
+                    yield text
+
+
+READERS = {".txt": read_text, ".jsonl": read_jsonl, ".epub": read_epub}
+
+
+def read_corpus(path: str, fmt: Optional[str] = None) -> Iterator[str]:
+    extension = f".{fmt}" if fmt else os.path.splitext(path)[1].lower()
+    reader = READERS.get(extension, read_text)
+    return reader(path)
+
+
+def plan_phrases(passages, pipeline: TranslationPipeline) -> List[str]:
+    """Distinct phrases the pipeline would generate for the passages, in order"""
+    phrases: Dict[str, str] = {}
+    for passage in passages:
+        for segment in pipeline.plan(passage):
+            key = normalize_text(segment.text)
+            if segment.source == SOURCE_GENERATED and key and key not in phrases:
+                phrases[key] = segment.text
+    return list(phrases.values())
+
+
+# Scheduler -----------------------------------------------------------------
+
+
+class Prerenderer:
+    """
+    Resumable, rate-limited generation of a list of phrases.
+
+    Every finished phrase is appended to a JSONL checkpoint (and fsynced), so
+    a restarted run skips completed phrases and retries failed ones. Starts of
+    PixVerse generations are paced by a token bucket; at most `concurrency`
+    generations are in flight. The manifest is rewritten atomically as
+    phrases complete and once more on exit, even when interrupted.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        manifest_path: str,
+        checkpoint_path: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        rate: Optional[float] = None,
+        clip_duration: int = 5,
+        report_interval: float = 10.0,
+        manifest_every: int = 25,
+    ):
+        self.client = client
+        self.manifest_path = manifest_path
+        self.checkpoint_path = checkpoint_path or f"{manifest_path}.checkpoint.jsonl"
+        self.concurrency = concurrency or settings.PRERENDER_CONCURRENCY
+        self.rate = rate or settings.PRERENDER_RATE
+        self.clip_duration = clip_duration
+        self.report_interval = report_interval
+        self.manifest_every = manifest_every
+
+        self.manifest: Dict[str, str] = {}
+        self.counts = {STATUS_DONE: 0, STATUS_CACHED: 0, STATUS_FAILED: 0}
+        self.resumed = 0
+        self.total = 0
+        self._since_manifest = 0
+        self._started = 0.0
+
+    def load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        """Latest checkpoint record per phrase key"""
+        records: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.checkpoint_path):
+            return records
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write
+                    continue
+                records[record["key"]] = record
+        return records
+
+    def write_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self._since_manifest = 0
+
+    def _record(self, checkpoint, key: str, text: str, status: str, video_url=None):
+        checkpoint.write(
+            json.dumps(
+                {"key": key, "text": text, "status": status,
+                 "video_url": video_url, "at": time.time()},
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+        checkpoint.flush()
+        os.fsync(checkpoint.fileno())
+
+        self.counts[status] += 1
+        if status in COMPLETE_STATUSES:
+            self.manifest[text] = video_url
+            self._since_manifest += 1
+            if self._since_manifest >= self.manifest_every:
+                self.write_manifest()
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        finished = sum(self.counts.values())
+        generated = self.counts[STATUS_DONE] + self.counts[STATUS_FAILED]
+        per_minute = generated / elapsed * 60 if elapsed > 0 else 0.0
+        remaining = self.total - self.resumed - finished
+        return {
+            "total": self.total,
+            "resumed": self.resumed,
+            **self.counts,
+            "remaining": remaining,
+            "elapsed_seconds": elapsed,
+            "phrases_per_minute": per_minute,
+            "eta_seconds": remaining / per_minute * 60 if per_minute else None,
+        }
+
+    def report(self):
+        p = self.progress()
+        complete = p["total"] - p["remaining"]
+        eta = f"{p['eta_seconds'] / 60:.1f}min" if p["eta_seconds"] is not None else "?"
+        print(
+            f"⏳ [{complete}/{p['total']}] {complete / max(p['total'], 1):6.1%}  "
+            f"generated {p['done']}  cached {p['cached']}  failed {p['failed']}  "
+            f"resumed {p['resumed']}  {p['phrases_per_minute']:.1f}/min  ETA {eta}",
+            flush=True,
+        )
+
+    async def run(self, phrases: List[str]) -> Dict[str, Any]:
+        self._started = time.monotonic()
+        self.total = len(phrases)
+        previous = self.load_checkpoint()
+
+        pending = []
+        for text in phrases:
+            key = normalize_text(text)
+            record = previous.get(key)
+            if record and record["status"] in COMPLETE_STATUSES:
+                self.manifest[text] = record["video_url"]
+                self.resumed += 1
+            else:
+                pending.append((key, text))
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        bucket = TokenBucket(self.rate, capacity=1)
+
+        with open(self.checkpoint_path, "a+", encoding="utf-8") as checkpoint:
+            # Terminate a torn last line so the next record starts cleanly
+            if checkpoint.tell() > 0:
+                checkpoint.seek(checkpoint.tell() - 1)
+                if checkpoint.read(1) != "\n":
+                    checkpoint.write("\n")
+
+            async def worker():
+                while True:
+                    try:
+                        key, text = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    # Exact hits only: a near-duplicate's video is another
+                    # sentence's, and checkpointing it would skip this render
+                    cached_url = await self.client.cached_sign_language_video(
+                        text, duration=self.clip_duration, similar=False
+                    )
+                    if cached_url:
+                        self._record(checkpoint, key, text, STATUS_CACHED, cached_url)
+                        continue
+
+                    await bucket.acquire()
+                    try:
+                        video_url = await self.client.generate_sign_language_video(
+                            text, duration=self.clip_duration, usePixverse=True, similar=False
+                        )
+                    except Exception as e:
+                        print(f"❌ {text!r}: {e}")
+                        video_url = None
+                    if isinstance(video_url, FallbackVideo):
+                        # A stand-in clip is not this phrase's render: retried next run
+                        video_url = None
+                    status = STATUS_DONE if video_url else STATUS_FAILED
+                    self._record(checkpoint, key, text, status, video_url)
+
+            async def reporter():
+                while True:
+                    await asyncio.sleep(self.report_interval)
+                    self.report()
+
+            reporting = asyncio.create_task(reporter())
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            finally:
+                reporting.cancel()
+                self.write_manifest()
+
+        return self.progress()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", nargs="+", help="Plain text, .epub or .jsonl files")
+    parser.add_argument("--format", choices=["txt", "epub", "jsonl"])
+    parser.add_argument("--manifest", default="prerender_manifest.json")
+    parser.add_argument("--checkpoint", help="Defaults to <manifest>.checkpoint.jsonl")
+    parser.add_argument("--concurrency", type=int, default=settings.PRERENDER_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=settings.PRERENDER_RATE,
+                        help="PixVerse generations started per second")
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("--dry-run", action="store_true", help="Only plan the phrases")
+    args = parser.parse_args()
+
+    from asset_index import asset_index
+    from pixverse_api import pixverse_client
+
+    asset_index.refresh()
+    pipeline = TranslationPipeline(pixverse_client, asset_index=asset_index)
+    passages = (p for path in args.corpus for p in read_corpus(path, args.format))
+    phrases = plan_phrases(passages, pipeline)
+
+    print("🎞️  Sign video pre-render")
+    print("=" * 50)
+    print(f"📚 {len(phrases)} distinct phrases to render "
+          f"({len(asset_index)} local clips in the asset index)")
+    if args.dry_run:
+        for phrase in phrases:
+            print(f"   {phrase}")
+        return
+    if not settings.PIXVERSE_API_KEY:
+        print("❌ PIXVERSE_API_KEY is not configured")
+        sys.exit(1)
+
+    prerenderer = Prerenderer(
+        pixverse_client,
+        args.manifest,
+        checkpoint_path=args.checkpoint,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        clip_duration=pipeline.clip_duration,
+        report_interval=args.report_interval,
+    )
+
+    async def run():
+        try:
+            return await prerenderer.run(phrases)
+        finally:
+            await pixverse_client.aclose()
+
+    try:
+        summary = asyncio.run(run())
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted; rerun the same command to resume from {prerenderer.checkpoint_path}")
+        sys.exit(130)
+
+    prerenderer.report()
+    print(f"✅ Manifest with {len(prerenderer.manifest)} phrases written to {args.manifest}")
+    if summary["failed"]:
+        print(f"⚠️  {summary['failed']} phrases failed; rerun to retry them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket: refills at `rate` tokens per second up to `capacity`.
+
+    `try_acquire` never blocks and returns how long the caller would have to
+    wait; `acquire` sleeps until tokens are available.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until tokens are available, without taking them"""
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; otherwise return the seconds until they are"""
+        wait = self.wait_time(tokens)
+        if wait == 0.0:
+            self.tokens -= tokens
+        return wait
+
+    async def acquire(self, tokens: float = 1.0):
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,275 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from config import settings
+
+T = TypeVar("T")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The upstream is failing; calls fail fast until the circuit half-opens"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Upstream unavailable, retrying in {retry_after:.0f}s")
+
+
+def is_transient(error: BaseException) -> bool:
+    """Errors that say the upstream is unhealthy, rather than that the request was wrong"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def is_unsent(error: BaseException) -> bool:
+    """Transient errors after which the upstream surely did not act on the request"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in (429, 503)
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+class RetryBudget:
+    """
+    Caps retries (and hedged requests) at a share of recent calls.
+
+    Every call deposits `ratio` tokens and every retry withdraws one, so an
+    upstream that fails everything sees at most (1 + ratio) times its normal
+    traffic instead of (1 + retries) times. A trickle of `min_per_second`
+    tokens keeps retries possible at low traffic. At most `burst` tokens are
+    saved up.
+    """
+
+    def __init__(
+        self,
+        ratio: Optional[float] = None,
+        min_per_second: Optional[float] = None,
+        burst: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ratio = settings.PIXVERSE_RETRY_BUDGET_RATIO if ratio is None else ratio
+        self.min_per_second = (
+            settings.PIXVERSE_RETRY_BUDGET_MIN_PER_SECOND
+            if min_per_second is None
+            else min_per_second
+        )
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+        self.withdrawn = 0
+        self.exhausted = 0
+
+    def _add(self, tokens: float):
+        now = self.clock()
+        tokens += (now - self.updated) * self.min_per_second
+        self.tokens = min(self.burst, self.tokens + tokens)
+        self.updated = now
+
+    def deposit(self):
+        self._add(self.ratio)
+
+    def try_withdraw(self) -> bool:
+        self._add(0.0)
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.withdrawn += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": round(self.tokens, 2),
+            "withdrawn": self.withdrawn,
+            "exhausted": self.exhausted,
+        }
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an upstream is down.
+
+    Closed, calls pass and consecutive transient failures are counted; at
+    `failure_threshold` the circuit opens and calls raise CircuitOpenError
+    for `reset_timeout` seconds. Then it half-opens: one probe call is let
+    through, and its success closes the circuit while its failure opens it
+    again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold or settings.PIXVERSE_BREAKER_FAILURES
+        self.reset_timeout = reset_timeout or settings.PIXVERSE_BREAKER_RESET
+        self.clock = clock
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.probe_started = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        if self.state == STATE_OPEN:
+            remaining = self.opened_at + self.reset_timeout - self.clock()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(remaining)
+            self.state = STATE_HALF_OPEN
+        if self.state == STATE_HALF_OPEN:
+            # A probe that never reported back (its caller was cancelled) expires
+            now = self.clock()
+            if self.probing and now - self.probe_started < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(self.probe_started + self.reset_timeout - now)
+            self.probing = True
+            self.probe_started = now
+
+    def record_success(self):
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                self.opened += 1
+            self.state = STATE_OPEN
+            self.opened_at = self.clock()
+        self.probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class Resilience:
+    """
+    Deadlines, retries and hedging for calls to one upstream.
+
+    Each attempt runs under its own deadline. Failed attempts that
+    `retryable` accepts are retried with full-jitter exponential backoff
+    while the shared retry budget allows; transient failures count towards
+    the circuit breaker, which fails later calls fast. With `hedge_after`, an
+    attempt still unanswered after that many seconds gets a second, parallel
+    request (also paid from the retry budget) and the first answer wins.
+    """
+
+    def __init__(
+        self,
+        breaker: Optional[CircuitBreaker] = None,
+        budget: Optional[RetryBudget] = None,
+        retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+    ):
+        self.breaker = breaker or CircuitBreaker()
+        self.budget = budget or RetryBudget()
+        self.retries = settings.PIXVERSE_RETRIES if retries is None else retries
+        self.base_delay = base_delay or settings.PIXVERSE_RETRY_BASE_DELAY
+        self.max_delay = max_delay or settings.PIXVERSE_RETRY_MAX_DELAY
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform up to the exponential delay of this attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def _hedged(self, operation: Callable[[], Awaitable[T]], hedge_after: float) -> T:
+        first = asyncio.ensure_future(operation())
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done and self.budget.try_withdraw():
+                self.hedged += 1
+                tasks.add(asyncio.ensure_future(operation()))
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(
+        self,
+        operation: Callable[[], Awaitable[T]],
+        timeout: float,
+        retryable: Callable[[BaseException], bool] = is_transient,
+        hedge_after: Optional[float] = None,
+    ) -> T:
+        """Run operation() under the breaker, deadline, retry and hedging policy"""
+        self.calls += 1
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                if hedge_after:
+                    attempt_result = self._hedged(operation, hedge_after)
+                else:
+                    attempt_result = operation()
+                result = await asyncio.wait_for(attempt_result, timeout)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                if is_transient(e):
+                    self.breaker.record_failure()
+                else:
+                    # The upstream answered; the request itself was refused
+                    self.breaker.record_success()
+                if (
+                    attempt >= self.retries
+                    or not retryable(e)
+                    or self.breaker.state == STATE_OPEN
+                    or not self.budget.try_withdraw()
+                ):
+                    self.failures += 1
+                    raise
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "retries": self.retried,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "circuit": self.breaker.stats(),
+            "retry_budget": self.budget.stats(),
+        }
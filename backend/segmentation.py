@@ -0,0 +1,54 @@
+import math
+import re
+from typing import List
+
+from config import settings
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;:])\s+|\s*\n+\s*")
+_CLAUSE_BREAK = re.compile(
+    r"(?<=,)\s+|\s+(?=(?:and|but|or|so|because|then|when|while|until)\b)",
+    re.IGNORECASE,
+)
+
+
+def _chunk_words(words: List[str], max_words: int) -> List[str]:
+    """Split a word list into evenly sized chunks of at most max_words"""
+    chunks = math.ceil(len(words) / max_words)
+    size = math.ceil(len(words) / chunks)
+    return [" ".join(words[i : i + size]) for i in range(0, len(words), size)]
+
+
+def split_phrases(text: str, max_words: int = settings.SEGMENT_MAX_WORDS) -> List[str]:
+    """
+    Split text into sign-sized phrases.
+
+    Sentences are split first, long sentences are split again at commas and
+    conjunctions, and anything still longer than max_words is cut into even
+    word chunks. Phrase order follows the input.
+    """
+    phrases = []
+    for sentence in _SENTENCE_BREAK.split(text):
+        words = sentence.split()
+        if not words:
+            continue
+        if len(words) <= max_words:
+            phrases.append(" ".join(words))
+            continue
+
+        # Merge neighbouring clauses back while they fit, and never leave a
+        # lone word (e.g. "and" before "then") as its own phrase
+        clauses: List[List[str]] = []
+        for clause in _CLAUSE_BREAK.split(sentence):
+            words = clause.split()
+            if not words:
+                continue
+            if clauses and (
+                len(clauses[-1]) < 2 or len(clauses[-1]) + len(words) <= max_words
+            ):
+                clauses[-1] = clauses[-1] + words
+            else:
+                clauses.append(words)
+
+        for words in clauses:
+            phrases.extend(_chunk_words(words, max_words))
+    return phrases
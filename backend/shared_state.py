@@ -0,0 +1,292 @@
+import asyncio
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from config import settings
+from translation_cache import MemoryCacheTier
+
+
+class MemoryStateStore:
+    """
+    Key/value state with expiry in process memory. The default: right for a
+    single worker, but every worker process has its own copy.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.entries = MemoryCacheTier(
+            max_entries or settings.SHARED_STATE_MAX_ENTRIES, ttl or settings.SHARED_STATE_TTL
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        self.entries.set(key, value, None if ttl is None else time.time() + ttl)
+
+    async def delete(self, key: str):
+        self.entries.delete(key)
+
+    def close(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "entries": len(self.entries)}
+
+
+class SQLiteFile:
+    """
+    One SQLite connection per process to a file shared by every worker on
+    the host. The connection is opened on first use in the process that uses
+    it, so a forked worker never inherits its parent's.
+    """
+
+    schema = ""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.SHARED_STATE_PATH
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            # Autocommit; multi-statement updates open their own transaction
+            conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(self.schema)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+class SQLiteStateStore(SQLiteFile):
+    """
+    Key/value state with expiry, stored as JSON in a shared SQLite file.
+    `prune()` drops expired entries and, beyond max_entries, the ones
+    closest to expiring.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS shared_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        super().__init__(path)
+        self.ttl = ttl or settings.SHARED_STATE_TTL
+        self.max_entries = max_entries or settings.SHARED_STATE_MAX_ENTRIES
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.connection().execute(
+                "SELECT value FROM shared_state WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self.connection().execute(
+                "INSERT OR REPLACE INTO shared_state VALUES (?, ?, ?)",
+                (key, json.dumps(value, separators=(",", ":")), expires_at),
+            )
+
+    def _delete(self, key: str):
+        with self._lock:
+            self.connection().execute("DELETE FROM shared_state WHERE key = ?", (key,))
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._delete, key)
+
+    def prune(self) -> int:
+        """Delete expired entries, then trim to max_entries; returns how many were removed"""
+        with self._lock:
+            conn = self.connection()
+            removed = conn.execute(
+                "DELETE FROM shared_state WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            removed += conn.execute(
+                """
+                DELETE FROM shared_state WHERE key IN (
+                    SELECT key FROM shared_state
+                    ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (entries,) = self.connection().execute(
+                "SELECT COUNT(*) FROM shared_state"
+            ).fetchone()
+        return {"backend": "sqlite", "path": self.path, "entries": entries}
+
+
+class SQLiteRateLimitBackend(SQLiteFile):
+    """
+    Token buckets shared by every worker on the host (RATE_LIMIT_BACKEND=sqlite).
+
+    Each acquire reads, refills and spends its buckets inside one
+    BEGIN IMMEDIATE transaction, so concurrent workers never spend the
+    same token twice. Like the memory backend, all limits of a request are
+    admitted or rejected together. Rows of buckets that have refilled
+    completely are pruned now and then (and by `prune()`): a missing row is a
+    full bucket.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            full_at REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        prune_every: int = 1000,
+    ):
+        super().__init__(path)
+        # Wall clock: monotonic clocks are not comparable across processes
+        self.clock = clock
+        self.prune_every = prune_every
+        self._calls = 0
+
+    def _acquire(self, limits: Sequence[Any]) -> Dict[str, float]:
+        now = self.clock()
+        keys = [limit.key for limit in limits]
+        with self._lock:
+            conn = self.connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = {
+                    key: (tokens, updated_at)
+                    for key, tokens, updated_at in conn.execute(
+                        "SELECT key, tokens, updated_at FROM rate_limits "
+                        f"WHERE key IN ({','.join('?' * len(keys))})",
+                        keys,
+                    )
+                }
+                levels, waits = {}, {}
+                for limit in limits:
+                    burst = max(1.0, limit.burst)
+                    tokens, updated_at = rows.get(limit.key, (burst, now))
+                    tokens = min(burst, tokens + max(0.0, now - updated_at) * limit.rate)
+                    levels[limit.key] = tokens
+                    if tokens < limit.cost:
+                        waits[limit.key] = (limit.cost - tokens) / limit.rate
+                if not waits:
+                    updates = []
+                    for limit in limits:
+                        tokens = levels[limit.key] - limit.cost
+                        full_at = now + (max(1.0, limit.burst) - tokens) / limit.rate
+                        updates.append((limit.key, tokens, now, full_at))
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?)", updates
+                    )
+                self._calls += 1
+                if self._calls % self.prune_every == 0:
+                    conn.execute("DELETE FROM rate_limits WHERE full_at <= ?", (now,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return waits
+
+    async def acquire(self, limits: Sequence[Any]) -> Dict[str, float]:
+        """Take every limit's tokens and return {}, or return the wait per exceeded limit"""
+        return await asyncio.to_thread(self._acquire, limits)
+
+    def prune(self) -> int:
+        """Delete the rows of buckets that have refilled completely"""
+        with self._lock:
+            return self.connection().execute(
+                "DELETE FROM rate_limits WHERE full_at <= ?", (self.clock(),)
+            ).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class StatePruner:
+    """
+    Prunes the shared SQLite tables from the lifespan: at startup and every
+    `interval` seconds. Stores without a prune() (memory ones bound
+    themselves) are skipped.
+    """
+
+    def __init__(self, stores: Sequence[Any], interval: Optional[float] = None):
+        self.stores = [store for store in stores if hasattr(store, "prune")]
+        self.interval = interval or settings.SHARED_STATE_PRUNE_INTERVAL
+        self.pruned = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.stores and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._prune_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _prune_periodically(self):
+        while True:
+            for store in self.stores:
+                try:
+                    self.pruned += await asyncio.to_thread(store.prune)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Shared state prune failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+STORES = {"memory": MemoryStateStore, "sqlite": SQLiteStateStore}
+
+
+def load_store(spec: str):
+    """Build a shared state store from a registered name or a "module:factory" path"""
+    if spec in STORES:
+        return STORES[spec]()
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+# Create a global instance
+shared_state = load_store(settings.SHARED_STATE_BACKEND)
@@ -0,0 +1,438 @@
+import asyncio
+import hashlib
+import math
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from config import settings
+from translation_cache import normalize_text
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+FINGERPRINT_BITS = 64
+# Fingerprints scanned per step: the XOR and popcount scratch stays in cache
+SCAN_CHUNK = 65536
+
+
+def fuzzy_text(text: str) -> str:
+    """Comparison form: normalized, punctuation and apostrophes dropped"""
+    return " ".join(_NON_WORD.sub("", normalize_text(text)).split())
+
+
+def trigrams(key: str) -> Counter:
+    """
+    Character trigram counts of a fuzzy_text key. Spaces are ignored: OCR
+    splits and joins words ("any more", "anymore") as often as it misreads
+    letters.
+    """
+    letters = key.replace(" ", "")
+    return Counter(letters[i:i + 3] for i in range(len(letters) - 2))
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance"""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+def typo_of(a: str, b: str) -> bool:
+    """
+    Whether two different words are plausibly one misread: a letter for words
+    of 5 to 8 letters, two for longer ones. Shorter words ("he", "she",
+    "mat", "hat") must match exactly, since one letter changes their meaning.
+    """
+    allowed = (max(len(a), len(b)) - 1) // 4
+    return allowed > 0 and abs(len(a) - len(b)) <= allowed and edit_distance(a, b) <= allowed
+
+
+def changed_words(a: str, b: str) -> Optional[int]:
+    """
+    Words of fuzzy_text key `a` that differ from `b`, aligned in order; None
+    when they do not align word for word. A word split or joined by OCR
+    ("any more", "anymore") aligns with its counterpart and counts as changed
+    only if it is also misread; any other changed word must be a typo_of its
+    counterpart.
+    """
+    x, y = a.split(), b.split()
+    # changes[i][j]: fewest changed words aligning x[:i] with y[:j]
+    changes = [[None] * (len(y) + 1) for _ in range(len(x) + 1)]
+    changes[0][0] = 0
+    for i in range(len(x) + 1):
+        for j in range(len(y) + 1):
+            done = changes[i][j]
+            if done is None:
+                continue
+            # One word for one, or a word for two written together
+            for di, dj in ((1, 1), (2, 1), (1, 2)):
+                if i + di > len(x) or j + dj > len(y):
+                    continue
+                left, right = "".join(x[i:i + di]), "".join(y[j:j + dj])
+                if left == right:
+                    step = 0
+                elif typo_of(left, right):
+                    step = 1
+                else:
+                    continue
+                best = changes[i + di][j + dj]
+                if best is None or done + step < best:
+                    changes[i + di][j + dj] = done + step
+    return changes[len(x)][len(y)]
+
+
+def cosine(a: Counter, b: Counter) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(c * c for c in a.values()) * sum(c * c for c in b.values()))
+    return dot / norm
+
+
+@dataclass
+class Match:
+    text: str
+    video_url: str
+    similarity: float
+
+
+class _Strings:
+    """Append-only UTF-8 strings packed into one buffer (no per-string objects)"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def append(self, value: str):
+        self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+class SimilarityIndex:
+    """
+    Near-duplicate lookup over previously translated texts, so noisy OCR text
+    ("wasnt hungrv anymore") reuses the video of a text it almost matches.
+
+    Texts are compared by cosine similarity of their character trigram
+    counts. Each entry is summarised by a 64-bit SimHash of its trigrams,
+    which preserves that similarity as Hamming distance. A query XORs its
+    fingerprint against every entry (NumPy popcount, in cache-sized chunks),
+    keeps the closest few within the Hamming radius implied by the threshold,
+    and verifies them by exact trigram cosine. Trigrams alone rate "he went to
+    the shop" close to "she went to the shop", so a reused video also needs
+    the texts to line up word for word with at most `max_changed_words`
+    typos (see changed_words). Besides the UTF-8 text and URL, an entry costs
+    its 8-byte fingerprint and two 8-byte offsets.
+
+    NumPy is imported on first use, keeping it out of cold starts.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        min_chars: Optional[int] = None,
+        candidates: Optional[int] = None,
+        max_changed_words: Optional[int] = None,
+    ):
+        self.threshold = settings.SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.max_changed_words = (
+            settings.SIMILARITY_MAX_CHANGED_WORDS
+            if max_changed_words is None
+            else max_changed_words
+        )
+        self.min_chars = settings.SIMILARITY_MIN_CHARS if min_chars is None else min_chars
+        self.candidates = candidates or settings.SIMILARITY_CANDIDATES
+        self.radius = self.hamming_radius(self.threshold)
+        self.texts = _Strings()
+        self.urls = _Strings()
+        self.hits = 0
+        self.misses = 0
+        self._fingerprints = None
+        self._size = 0
+        self._lock = threading.Lock()
+        # Scan scratch reused by match(), which runs on the event loop only
+        self._xor = None
+        self._distances = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def hamming_radius(threshold: float) -> int:
+        """Bits two fingerprints may differ by at the threshold, plus three standard deviations"""
+        p = math.acos(max(-1.0, min(1.0, threshold))) / math.pi
+        spread = 3 * math.sqrt(FINGERPRINT_BITS * p * (1 - p))
+        return min(FINGERPRINT_BITS // 2, math.ceil(FINGERPRINT_BITS * p + spread))
+
+    @staticmethod
+    def fingerprint(grams: Counter) -> int:
+        """SimHash of trigram counts"""
+        import numpy as np
+
+        digests = b"".join(
+            hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest() for gram in grams
+        )
+        bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1,
+                             bitorder="little")
+        weights = np.fromiter(grams.values(), dtype=np.float64, count=len(grams))
+        score = weights @ (bits.astype(np.float64) * 2 - 1)
+        packed = np.packbits(score > 0, bitorder="little")
+        return int.from_bytes(packed.tobytes(), "little")
+
+    def _append(self, key: str, video_url: str, fingerprint: int):
+        """Add an entry; the caller holds the lock"""
+        import numpy as np
+
+        if self._fingerprints is None or self._size == len(self._fingerprints):
+            grown = np.zeros(max(1024, self._size * 2), dtype=np.uint64)
+            if self._fingerprints is not None:
+                grown[:self._size] = self._fingerprints[:self._size]
+            self._fingerprints = grown
+        self._fingerprints[self._size] = fingerprint
+        self.texts.append(key)
+        self.urls.append(video_url)
+        self._size += 1
+
+    def _indexed(self, key: str, fingerprint: int) -> bool:
+        """Whether this text is indexed: same fingerprint, then same text"""
+        import numpy as np
+
+        if not self._size:
+            return False
+        same = np.flatnonzero(self._fingerprints[:self._size] == np.uint64(fingerprint))
+        return any(self.texts[int(i)] == key for i in same)
+
+    def add(self, text: str, video_url: str) -> bool:
+        """Index a translated text; False if too short or already indexed"""
+        key = fuzzy_text(text)
+        if len(key) < self.min_chars:
+            return False
+        fingerprint = self.fingerprint(trigrams(key))
+        with self._lock:
+            if self._indexed(key, fingerprint):
+                return False
+            self._append(key, video_url, fingerprint)
+        return True
+
+    def add_many(self, entries: Iterable[Tuple[str, str]]) -> int:
+        """
+        Bulk load (text, video_url) pairs, skipping texts that are too short
+        or already indexed (as add() does); returns how many were added. The
+        batch is checked against the index with one vectorized lookup, so
+        only fingerprint collisions are compared by text.
+        """
+        import numpy as np
+
+        batch: Dict[str, Tuple[str, int]] = {}
+        for text, video_url in entries:
+            key = fuzzy_text(text)
+            if len(key) >= self.min_chars and key not in batch:
+                batch[key] = (video_url, self.fingerprint(trigrams(key)))
+        if not batch:
+            return 0
+
+        fingerprints = np.fromiter(
+            (fingerprint for _, fingerprint in batch.values()), dtype=np.uint64, count=len(batch)
+        )
+        added = 0
+        with self._lock:
+            known = (
+                np.isin(fingerprints, self._fingerprints[:self._size]).tolist()
+                if self._size
+                else [False] * len(batch)
+            )
+            for (key, (video_url, fingerprint)), collides in zip(batch.items(), known):
+                if collides and self._indexed(key, fingerprint):
+                    continue
+                self._append(key, video_url, fingerprint)
+                added += 1
+        return added
+
+    def match(
+        self, text: str, threshold: Optional[float] = None, record: bool = True
+    ) -> Optional[Match]:
+        """
+        The most similar indexed text at or above the threshold that differs
+        by typos only. A lower `threshold` (fallbacks: the closest clip to play
+        as a stand-in) widens the scan, skips the word check and is left out
+        of hits/misses, as are lookups with `record=False` (cost probes ahead
+        of a generation that looks the text up again).
+        """
+        import numpy as np
+
+        key = fuzzy_text(text)
+        size, fingerprints = self._size, self._fingerprints
+        if len(key) < self.min_chars or not size:
+            return None
+
+        grams = trigrams(key)
+        query = np.uint64(self.fingerprint(grams))
+        if self._xor is None:
+            self._xor = np.empty(SCAN_CHUNK, dtype=np.uint64)
+            self._distances = np.empty(SCAN_CHUNK, dtype=np.uint8)
+
+        # Streaming top-k: once `candidates` entries are found, the radius
+        # shrinks to the farthest of them, so later chunks yield few hits
+        radius = self.radius if threshold is None else self.hamming_radius(threshold)
+        nearby = np.empty(0, dtype=np.int64)
+        nearby_distances = np.empty(0, dtype=np.uint8)
+        for start in range(0, size, SCAN_CHUNK):
+            count = min(SCAN_CHUNK, size - start)
+            xor, distances = self._xor[:count], self._distances[:count]
+            np.bitwise_xor(fingerprints[start:start + count], query, out=xor)
+            np.bitwise_count(xor, out=distances)
+            hits = np.flatnonzero(distances <= radius)
+            if not len(hits):
+                continue
+            nearby = np.concatenate((nearby, hits + start))
+            nearby_distances = np.concatenate((nearby_distances, distances[hits]))
+            if len(nearby) > self.candidates:
+                closest = np.argpartition(nearby_distances, self.candidates - 1)
+                closest = closest[:self.candidates]
+                nearby, nearby_distances = nearby[closest], nearby_distances[closest]
+                radius = int(nearby_distances.max())
+
+        minimum = self.threshold if threshold is None else threshold
+        best: Optional[Match] = None
+        for i in nearby.tolist():
+            candidate = self.texts[i]
+            similarity = 1.0 if candidate == key else cosine(grams, trigrams(candidate))
+            if similarity < minimum or (best is not None and similarity <= best.similarity):
+                continue
+            if threshold is None and similarity < 1.0:
+                changed = changed_words(key, candidate)
+                if changed is None or changed > self.max_changed_words:
+                    continue
+            best = Match(text=candidate, video_url=self.urls[i], similarity=similarity)
+
+        if threshold is None and record:
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        fingerprint_bytes = 0 if self._fingerprints is None else self._fingerprints.nbytes
+        return {
+            "entries": self._size,
+            "threshold": self.threshold,
+            "hamming_radius": self.radius,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "memory_bytes": fingerprint_bytes + self.texts.nbytes() + self.urls.nbytes(),
+        }
+
+
+class SimilarityLoader:
+    """
+    Fills a SimilarityIndex in the background after startup: the asset clip
+    phrases, then every text_translations row in id-ordered pages. Rows
+    pointing at an asset clip (the demo fallback video) are skipped.
+    Fingerprinting runs in a worker thread, so the event loop keeps serving;
+    until the load finishes, lookups simply see a partial index.
+    """
+
+    def __init__(
+        self,
+        index: SimilarityIndex,
+        store: Any = None,
+        assets: Any = None,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+    ):
+        self.index = index
+        self.store = store
+        self.assets = assets
+        self.limit = settings.SIMILARITY_PRELOAD_LIMIT if limit is None else limit
+        self.page_size = page_size or settings.SIMILARITY_PRELOAD_PAGE_SIZE
+        self.rows = 0
+        self.loaded = 0
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.load())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def load(self) -> int:
+        """Index the asset library and up to `limit` stored translations"""
+        started = time.perf_counter()
+        asset_urls: Set[str] = set()
+        if self.assets is not None:
+            clips = list(self.assets.clips())
+            asset_urls = {clip.url for clip in clips}
+            entries = [(clip.phrase, clip.url) for clip in clips]
+            self.loaded += await asyncio.to_thread(self.index.add_many, entries)
+
+        after_id = None
+        try:
+            while self.store is not None and self.rows < self.limit:
+                page = await self.store.get_translation_texts_page(
+                    min(self.page_size, self.limit - self.rows), after_id
+                )
+                if not page:
+                    break
+                self.rows += len(page)
+                after_id = page[-1]["id"]
+                entries = [
+                    (row["text"], row["video_url"])
+                    for row in page
+                    if row.get("text") and row.get("video_url")
+                    and row["video_url"] not in asset_urls
+                ]
+                self.loaded += await asyncio.to_thread(self.index.add_many, entries)
+        except Exception as e:
+            # A partial index still saves renders; the rest is picked up incrementally
+            self.error = str(e)
+            print(f"⚠️ Similarity index preload stopped after {self.rows} rows: {e}")
+
+        self.seconds = time.perf_counter() - started
+        print(
+            f"🔎 Similarity index: {len(self.index)} texts "
+            f"({self.loaded} loaded in {self.seconds:.1f}s)"
+        )
+        return self.loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows_scanned": self.rows,
+            "loaded": self.loaded,
+            "done": self.seconds is not None,
+            "seconds": self.seconds,
+            "error": self.error,
+        }
+
+
+# Create a global instance
+similarity_index = SimilarityIndex()
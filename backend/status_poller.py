@@ -0,0 +1,251 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from config import settings
+from metrics import (
+    PIXVERSE_COMPLETION_SECONDS,
+    PIXVERSE_POLLS_PER_VIDEO,
+    PIXVERSE_STATUS_POLLS,
+)
+
+STATUS_COMPLETED = 1
+# Terminal PixVerse statuses: the render will never complete
+STATUS_MODERATION = 7
+STATUS_FAILED = 8
+FAILED_STATUSES = {STATUS_MODERATION: "blocked by moderation", STATUS_FAILED: "failed"}
+
+
+class RenderFailedError(Exception):
+    """PixVerse reported that a render ended without a video"""
+
+    def __init__(self, video_id: str, status: int):
+        self.video_id = video_id
+        self.status = status
+        super().__init__(f"Video {video_id} {FAILED_STATUSES.get(status, 'failed')}")
+
+
+class _PollDeadline(Exception):
+    """The wait's deadline passed; resolves it with None rather than an error"""
+
+
+@dataclass
+class _PendingVideo:
+    video_id: str
+    future: asyncio.Future
+    deadline: float
+    interval: float
+    next_poll: float
+    started: float = field(default_factory=time.monotonic)
+    polls: int = 0
+    in_flight: bool = False
+    waiters: int = 0
+
+
+class StatusPoller:
+    """
+    Central scheduler that polls every pending PixVerse video from one loop.
+
+    Status checks for all pending videos share the client's connection pool
+    and a concurrency limit. Each video is polled on an adaptive schedule: the
+    first check is timed from the observed average render time, later checks
+    back off exponentially (with jitter) from a short initial interval. The
+    waiting future resolves as soon as a completed status is seen, and fails
+    with RenderFailedError on a terminal failure status. A video stops being
+    polled once its last waiter is cancelled.
+    """
+
+    def __init__(
+        self,
+        check_status: Callable[[str], Awaitable[Tuple[int, Optional[str]]]],
+        max_concurrency: Optional[int] = None,
+        initial_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        backoff: Optional[float] = None,
+        jitter: Optional[float] = None,
+    ):
+        self.check_status = check_status
+        self.max_concurrency = max_concurrency or settings.POLL_MAX_CONCURRENCY
+        self.initial_interval = initial_interval or settings.POLL_INITIAL_INTERVAL
+        self.max_interval = max_interval or settings.POLL_MAX_INTERVAL
+        self.backoff = backoff or settings.POLL_BACKOFF
+        self.jitter = settings.POLL_JITTER if jitter is None else jitter
+        self._pending: Dict[str, _PendingVideo] = {}
+        self._polls: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._avg_render_time: Optional[float] = None
+
+        self.status_calls = 0
+        self.completed = 0
+        self.failed = 0
+        self.abandoned = 0
+        self.completed_status_calls = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def wait(
+        self,
+        video_id: str,
+        timeout: Optional[float] = None,
+        initial_interval: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        Wait for a video to complete; None on timeout. A failed render raises
+        RenderFailedError, and a failed status check its error.
+        """
+        if timeout is None:
+            timeout = settings.PIXVERSE_POLL_TIMEOUT
+        self._ensure_running()
+        pending = self._pending.get(video_id)
+        if pending is None:
+            now = time.monotonic()
+            interval = initial_interval or self.initial_interval
+            first_poll = interval
+            if self._avg_render_time is not None:
+                first_poll = max(interval, 0.75 * self._avg_render_time)
+            future = asyncio.get_running_loop().create_future()
+            # Retrieved even when every waiter has gone
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            pending = _PendingVideo(
+                video_id=video_id,
+                future=future,
+                deadline=now + timeout,
+                interval=interval,
+                next_poll=now + self._jittered(first_poll),
+            )
+            self._pending[video_id] = pending
+            self._wakeup.set()
+
+        pending.waiters += 1
+        try:
+            return await asyncio.shield(pending.future)
+        finally:
+            pending.waiters -= 1
+            if not pending.waiters and not pending.future.done():
+                # Nobody is waiting any more: stop spending status calls on it
+                self._abandon(pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters used to verify upstream status call volume"""
+        return {
+            "pending": len(self._pending),
+            "completed": self.completed,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+            "status_calls": self.status_calls,
+            "status_calls_per_completed_video": (
+                self.completed_status_calls / self.completed if self.completed else 0.0
+            ),
+            "avg_render_seconds": self._avg_render_time,
+        }
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._task = asyncio.create_task(self._run())
+
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _run(self):
+        try:
+            while True:
+                now = time.monotonic()
+                next_due = None
+                for pending in list(self._pending.values()):
+                    if pending.in_flight:
+                        continue
+                    if now >= pending.deadline:
+                        self._resolve(pending, None, error=_PollDeadline())
+                    elif now >= pending.next_poll:
+                        pending.in_flight = True
+                        task = asyncio.create_task(self._poll(pending))
+                        self._polls.add(task)
+                        task.add_done_callback(self._polls.discard)
+                    else:
+                        due = min(pending.next_poll, pending.deadline)
+                        next_due = due if next_due is None else min(next_due, due)
+
+                self._wakeup.clear()
+                timeout = None if next_due is None else max(0.0, next_due - now)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in list(self._polls):
+                task.cancel()
+            for pending in list(self._pending.values()):
+                if not pending.future.done():
+                    pending.future.cancel()
+            self._pending.clear()
+
+    async def _poll(self, pending: _PendingVideo):
+        try:
+            async with self._semaphore:
+                if pending.future.done():
+                    # Abandoned while queued for a slot
+                    return
+                self.status_calls += 1
+                PIXVERSE_STATUS_POLLS.inc()
+                pending.polls += 1
+                status, url = await self.check_status(pending.video_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not pending.future.done():
+                self._resolve(pending, None, error=e)
+            return
+        finally:
+            pending.in_flight = False
+            self._wakeup.set()
+
+        if pending.future.done():
+            # Abandoned while the check was in flight
+            return
+        if status == STATUS_COMPLETED:
+            self._resolve(pending, url)
+            return
+        if status in FAILED_STATUSES:
+            self._resolve(pending, None, error=RenderFailedError(pending.video_id, status))
+            return
+
+        pending.next_poll = time.monotonic() + self._jittered(pending.interval)
+        pending.interval = min(pending.interval * self.backoff, self.max_interval)
+
+    def _abandon(self, pending: _PendingVideo):
+        if self._pending.get(pending.video_id) is pending:
+            del self._pending[pending.video_id]
+        self.abandoned += 1
+        pending.future.cancel()
+
+    def _resolve(
+        self, pending: _PendingVideo, url: Optional[str], error: Optional[Exception] = None
+    ):
+        self._pending.pop(pending.video_id, None)
+        render_time = time.monotonic() - pending.started
+        if error is not None:
+            self.failed += 1
+            PIXVERSE_COMPLETION_SECONDS.labels("failed").observe(render_time)
+        else:
+            self.completed += 1
+            self.completed_status_calls += pending.polls
+            PIXVERSE_COMPLETION_SECONDS.labels("completed").observe(render_time)
+            PIXVERSE_POLLS_PER_VIDEO.observe(pending.polls)
+            self._avg_render_time = (
+                render_time
+                if self._avg_render_time is None
+                else 0.8 * self._avg_render_time + 0.2 * render_time
+            )
+        if pending.future.done():
+            return
+        if error is None or isinstance(error, _PollDeadline):
+            pending.future.set_result(url)
+        else:
+            pending.future.set_exception(error)
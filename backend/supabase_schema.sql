@@ -24,14 +24,34 @@ CREATE TABLE IF NOT EXISTS text_translations (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Video generation jobs (submitted via /jobs/translate)
+CREATE TABLE IF NOT EXISTS translation_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    text TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    video_url VARCHAR(500),
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_text_translations_user_id ON text_translations(user_id);
 CREATE INDEX IF NOT EXISTS idx_text_translations_created_at ON text_translations(created_at);
+-- Backs keyset pagination of a user's history on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_text_translations_user_created_at ON text_translations(user_id, created_at DESC, id DESC);
+-- Backs lookups of a page's phrases across all users (prefetch tap counts).
+-- Hash, not B-tree: equality is all that is needed, and passages can exceed
+-- the B-tree entry size limit
+CREATE INDEX IF NOT EXISTS idx_text_translations_text ON text_translations USING hash (text);
+CREATE INDEX IF NOT EXISTS idx_translation_jobs_status ON translation_jobs(status);
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE text_translations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE translation_jobs ENABLE ROW LEVEL SECURITY;
 
 -- RLS Policies for users table
 CREATE POLICY "Users can view their own profile" ON users
@@ -53,6 +73,19 @@ CREATE POLICY "Users can update their own translations" ON text_translations
 CREATE POLICY "Users can delete their own translations" ON text_translations
     FOR DELETE USING (auth.uid()::text = user_id::text);
 
+-- RLS Policies for translation_jobs table. The backend records and advances
+-- jobs with the service-role key, which bypasses RLS, and checks job ownership
+-- in the API; Supabase-authenticated clients only see and change their own jobs
+CREATE POLICY "Users can view their own jobs" ON translation_jobs
+    FOR SELECT USING (auth.uid()::text = user_id::text);
+
+CREATE POLICY "Users can insert their own jobs" ON translation_jobs
+    FOR INSERT WITH CHECK (auth.uid()::text = user_id::text);
+
+CREATE POLICY "Users can update their own jobs" ON translation_jobs
+    FOR UPDATE USING (auth.uid()::text = user_id::text)
+    WITH CHECK (auth.uid()::text = user_id::text);
+
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -69,6 +102,9 @@ CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
 CREATE TRIGGER update_text_translations_updated_at BEFORE UPDATE ON text_translations
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_translation_jobs_updated_at BEFORE UPDATE ON translation_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 -- Insert some sample data (optional)
 -- INSERT INTO users (username, email, password_hash) VALUES 
 -- ('demo_user', 'demo@example.com', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj3bp.gSJgHy');
@@ -5,6 +5,7 @@
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- Drop existing tables if they exist
+DROP TABLE IF EXISTS translation_jobs CASCADE;
 DROP TABLE IF EXISTS text_translations CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
 
@@ -28,14 +29,30 @@ CREATE TABLE IF NOT EXISTS text_translations (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Video generation jobs (submitted via /jobs/translate)
+CREATE TABLE IF NOT EXISTS translation_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    text TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    video_url VARCHAR(500),
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_text_translations_user_id ON text_translations(user_id);
 CREATE INDEX IF NOT EXISTS idx_text_translations_created_at ON text_translations(created_at);
+-- Backs keyset pagination of a user's history on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_text_translations_user_created_at ON text_translations(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_translation_jobs_status ON translation_jobs(status);
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE text_translations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE translation_jobs ENABLE ROW LEVEL SECURITY;
 
 -- RLS Policies for users table (Custom Auth - Allow all operations for now)
 CREATE POLICY "Allow all operations on users" ON users
@@ -45,6 +62,10 @@ CREATE POLICY "Allow all operations on users" ON users
 CREATE POLICY "Allow all operations on text_translations" ON text_translations
     FOR ALL USING (true) WITH CHECK (true);
 
+-- RLS Policies for translation_jobs table (Custom Auth - Allow all operations for now)
+CREATE POLICY "Allow all operations on translation_jobs" ON translation_jobs
+    FOR ALL USING (true) WITH CHECK (true);
+
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -61,6 +82,9 @@ CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
 CREATE TRIGGER update_text_translations_updated_at BEFORE UPDATE ON text_translations
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_translation_jobs_updated_at BEFORE UPDATE ON translation_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 -- Grant necessary permissions
 GRANT USAGE ON SCHEMA public TO anon, authenticated;
 GRANT ALL ON ALL TABLES IN SCHEMA public TO anon, authenticated;
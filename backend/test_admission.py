@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tests for admission control: per-client token buckets and the global generation cap
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+import main
+from admission import (
+    AdmissionController,
+    GenerationBusyError,
+    GenerationGate,
+    Limit,
+    MemoryRateLimitBackend,
+    RateLimitedError,
+)
+from config import settings
+from pipeline import TranslationPipeline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CachingClient:
+    """Fake PixVerse client: phrases in `cached` are already generated"""
+
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+        self.generated = []
+
+    async def cached_sign_language_video(self, text, duration=5):
+        return f"https://media.stub/{text}.mp4" if text in self.cached else None
+
+    async def generate_sign_language_video(self, text, duration=5, usePixverse=False):
+        self.generated.append(text)
+        self.cached.add(text)
+        return f"https://media.stub/{text}.mp4"
+
+
+def test_memory_backend_token_buckets():
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(max_keys=3, clock=clock)
+    ip = Limit("ip:a", rate=1, burst=2)
+    generations = Limit("ip:a:generations", rate=0.1, burst=2, cost=2)
+
+    async def run():
+        assert await backend.acquire([ip, generations]) == {}
+        # Both generation tokens are gone: refused, and the IP token is not spent
+        waits = await backend.acquire([ip, generations])
+        assert list(waits) == ["ip:a:generations"]
+        assert abs(waits["ip:a:generations"] - 20.0) < 1e-6
+        assert await backend.acquire([ip]) == {}
+        assert abs((await backend.acquire([ip]))["ip:a"] - 1.0) < 1e-6
+
+        # Tokens refill with time
+        clock.now += 20
+        assert await backend.acquire([ip, generations]) == {}
+
+        # Idle keys are dropped beyond max_keys
+        for key in ("ip:b", "ip:c", "ip:d"):
+            await backend.acquire([Limit(key, rate=1, burst=1)])
+        assert len(backend) == 3
+
+    asyncio.run(run())
+
+    error = RateLimitedError(0.2, "ip")
+    assert error.retry_after == 1 and error.limit == "ip"
+    assert RateLimitedError(4.1, "generations").retry_after == 5
+
+
+def test_generation_gate_caps_concurrency():
+    gate = GenerationGate(max_concurrent=2, max_waiting=1)
+    peak = 0
+
+    async def render():
+        nonlocal peak
+        async with gate:
+            peak = max(peak, gate.active)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+    async def run():
+        return await asyncio.gather(*(render() for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    # Two run, one waits for a slot, two are refused outright
+    assert results.count("ok") == 3
+    assert sum(isinstance(r, GenerationBusyError) for r in results) == 2
+    assert peak == 2
+    stats = gate.stats()
+    assert (stats["active"], stats["waiting"], stats["rejected"]) == (0, 0, 2)
+
+
+def test_generation_gate_splits_the_cap_between_workers():
+    # Three workers at 2 renders each stay within a deployment cap of 8
+    gate = GenerationGate(max_concurrent=8, max_waiting=32, workers=3)
+    assert (gate.max_concurrent, gate.max_waiting) == (2, 10)
+    # More workers than slots still lets each worker render
+    gate = GenerationGate(max_concurrent=8, max_waiting=32, workers=16)
+    assert (gate.max_concurrent, gate.max_waiting) == (1, 2)
+
+
+def test_client_ip_behind_trusted_proxies():
+    class FakeRequest:
+        def __init__(self, forwarded):
+            self.headers = {"x-forwarded-for": forwarded}
+            self.client = type("Client", (), {"host": "10.0.0.1"})()
+
+    request = FakeRequest("203.0.113.9, 198.51.100.2")
+    assert AdmissionController(MemoryRateLimitBackend(), 0).client_ip(request) == "10.0.0.1"
+    assert AdmissionController(MemoryRateLimitBackend(), 1).client_ip(request) == "198.51.100.2"
+    assert AdmissionController(MemoryRateLimitBackend(), 2).client_ip(request) == "203.0.113.9"
+    # Fewer hops than configured: the header is spoofable, fall back to the peer
+    assert AdmissionController(MemoryRateLimitBackend(), 3).client_ip(request) == "10.0.0.1"
+
+
+ADMISSION_SETTINGS = {
+    "RATE_LIMIT_ENABLED": True,
+    "USE_PIXVERSE": True,
+    "RATE_LIMIT_IP_RPS": 0.001,
+    "RATE_LIMIT_IP_BURST": 4,
+    "RATE_LIMIT_GENERATIONS_PER_MINUTE": 0.06,
+    "RATE_LIMIT_GENERATION_BURST": 2,
+}
+
+
+def test_endpoints_reject_bursts_with_retry_after():
+    saved = {name: getattr(settings, name) for name in ADMISSION_SETTINGS}
+    original = (main.admission, main.translation_pipeline)
+    for name, value in ADMISSION_SETTINGS.items():
+        setattr(settings, name, value)
+    fake = CachingClient(cached={"cached phrase"})
+    main.admission = AdmissionController(MemoryRateLimitBackend(), trusted_proxy_hops=0)
+    main.translation_pipeline = TranslationPipeline(fake)
+
+    async def post(ip, text):
+        transport = httpx.ASGITransport(app=main.app, client=(ip, 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return await client.post("/api/translate", json={"text": text})
+
+    async def run():
+        # Two new renders fit the generation burst, the third is refused
+        assert (await post("1.2.3.4", "first")).status_code == 200
+        assert (await post("1.2.3.4", "second")).status_code == 200
+        refused = await post("1.2.3.4", "third")
+        assert refused.status_code == 429
+        assert int(refused.headers["Retry-After"]) >= 1
+        assert fake.generated == ["first", "second"]
+
+        # Cache hits cost no generation tokens and keep flowing
+        assert (await post("1.2.3.4", "cached phrase")).status_code == 200
+        assert (await post("1.2.3.4", "first")).status_code == 200
+
+        # Another client has its own budget
+        assert (await post("5.6.7.8", "third")).status_code == 200
+
+        # The IP bucket (4 requests) is exhausted for the first client
+        blocked = await post("1.2.3.4", "cached phrase")
+        assert blocked.status_code == 429 and "Retry-After" in blocked.headers
+
+    try:
+        asyncio.run(run())
+        stats = main.admission.stats()
+        assert stats["rejected"] == {"generations": 1, "ip": 1}
+        assert stats["admitted"] == 5
+    finally:
+        main.admission, main.translation_pipeline = original
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+if __name__ == "__main__":
+    test_memory_backend_token_buckets()
+    test_generation_gate_caps_concurrency()
+    test_generation_gate_splits_the_cap_between_workers()
+    test_client_ip_behind_trusted_proxies()
+    test_endpoints_reject_bursts_with_retry_after()
+    print("✅ Admission tests passed")
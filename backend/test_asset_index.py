@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for the local sign clip index and its use in the translation pipeline
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from asset_index import AssetIndex, mp4_duration
+from pipeline import SOURCE_ASSET, TranslationPipeline
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+class RecordingClient:
+    def __init__(self):
+        self.requested = []
+
+    async def generate_sign_language_video(self, text, duration=5, usePixverse=False):
+        self.requested.append(text)
+        return f"https://media.stub/{len(self.requested)}.mp4"
+
+
+def test_cover_prefers_longest_local_clip():
+    index = AssetIndex()
+    index.add("hungry", "/assets/hungry.mp4")
+    index.add("wasnt hungry anymore", "/assets/wasnt hungry anymore.mp4", 7.8)
+    index.add("what's your name", "/assets/what's your name.mp4")
+
+    spans = index.cover("Then he wasn't hungry anymore. What's your name? hungry")
+    assert [(s.text, s.clip.url if s.clip else None) for s in spans] == [
+        ("Then he", None),
+        ("wasn't hungry anymore.", "/assets/wasnt hungry anymore.mp4"),
+        ("What's your name?", "/assets/what's your name.mp4"),
+        ("hungry", "/assets/hungry.mp4"),
+    ]
+
+    assert index.remove("hungry")
+    assert index.lookup("hungry") is None
+    assert index.lookup("wasnt hungry anymore") is not None
+    assert len(index) == 2
+
+
+def test_lookup_stays_sub_millisecond_at_scale():
+    index = AssetIndex()
+    for i in range(30000):
+        index.add(f"phrase number {i} about thing {i % 97}", f"/assets/{i}.mp4")
+    index.add("the cat sat on the mat", "/assets/cat.mp4")
+
+    text = "once upon a time the cat sat on the mat and phrase number 12 about thing 12"
+    start = time.perf_counter()
+    for _ in range(1000):
+        spans = index.cover(text)
+    per_lookup = (time.perf_counter() - start) / 1000
+
+    assert [s.clip.url for s in spans if s.clip] == ["/assets/cat.mp4", "/assets/12.mp4"]
+    assert per_lookup < 0.001
+
+
+def test_directory_scan_is_incremental():
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(os.path.join(ASSETS_DIR, "what's your name.mp4"), tmp)
+        index = AssetIndex(tmp, refresh_interval=0)
+        assert index.refresh() == 1
+        assert index.lookup("whats your name").duration == mp4_duration(
+            os.path.join(ASSETS_DIR, "what's your name.mp4")
+        )
+
+        shutil.copy(
+            os.path.join(ASSETS_DIR, "wasnt hungry anymore.mp4"),
+            os.path.join(tmp, "clip-0001.mp4"),
+        )
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump({"no longer hungry": "clip-0001.mp4"}, f)
+        # Directory mtime granularity can be coarse; make the change visible
+        os.utime(tmp, (time.time() + 5, time.time() + 5))
+
+        assert index.refresh() == 1
+        assert index.lookup("no longer hungry").url == "/assets/clip-0001.mp4"
+        assert len(index) == 2
+
+        os.remove(os.path.join(tmp, "what's your name.mp4"))
+        os.utime(tmp, (time.time() + 10, time.time() + 10))
+        assert index.refresh() == 1
+        assert index.lookup("whats your name") is None
+
+
+def test_background_refresh_keeps_cover_free_of_io():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = AssetIndex(tmp, refresh_interval=0.02)
+        index.refresh()
+        shutil.copy(os.path.join(ASSETS_DIR, "what's your name.mp4"), tmp)
+        os.utime(tmp, (time.time() + 5, time.time() + 5))
+
+        # cover() never scans: the new clip appears once the background task runs
+        assert index.cover("whats your name")[0].clip is None
+
+        async def run():
+            index.start()
+            await asyncio.sleep(0.2)
+            await index.stop()
+
+        asyncio.run(run())
+        assert index.cover("whats your name")[0].clip.url == "/assets/what's your name.mp4"
+
+
+def test_pipeline_only_generates_uncovered_spans():
+    index = AssetIndex()
+    index.add("wasnt hungry anymore", "/assets/wasnt hungry anymore.mp4", 7.8)
+    client = RecordingClient()
+    pipeline = TranslationPipeline(client, asset_index=index)
+
+    result = asyncio.run(
+        pipeline.translate("The caterpillar ate. Now he wasnt hungry anymore", use_pixverse=True)
+    )
+
+    assert client.requested == ["The caterpillar ate.", "Now he"]
+    assert [s.source for s in result.segments] == ["generated", "generated", SOURCE_ASSET]
+    assert result.segments[2].start == 10
+    assert result.total_duration == 17.8
+
+
+if __name__ == "__main__":
+    test_cover_prefers_longest_local_clip()
+    test_lookup_stays_sub_millisecond_at_scale()
+    test_directory_scan_is_incremental()
+    test_background_refresh_keeps_cover_free_of_io()
+    test_pipeline_only_generates_uncovered_spans()
+    print("✅ Asset index tests passed")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Tests for token verification: verified-token cache, JWKS keys and the user lookup cache
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from fastapi.testclient import TestClient
+
+import main
+from auth import TokenVerifier
+from password_hasher import password_hasher
+from test_database import FakePostgrest, make_db
+
+
+def token(verifier, sub="user-1", ttl=60, **claims):
+    return verifier.sign({"sub": sub, "exp": int(time.time()) + ttl, **claims})
+
+
+def test_verified_tokens_are_cached_until_exp():
+    verifier = TokenVerifier(secret="s3cret", algorithm="HS256", max_entries=2)
+    first = token(verifier, ttl=120)
+
+    assert verifier.verify(first)["sub"] == "user-1"
+    assert verifier.verify(first)["sub"] == "user-1"
+    assert (verifier.hits, verifier.misses) == (1, 1)
+    # The entry expires exactly when the token does
+    (expires_at,) = [entry[1] for entry in verifier.cache._entries.values()]
+    assert expires_at == jwt.decode(first, options={"verify_signature": False})["exp"]
+
+    # Bounded: the least recently used token is evicted
+    verifier.verify(token(verifier, sub="user-2"))
+    verifier.verify(token(verifier, sub="user-3"))
+    assert len(verifier.cache) == 2 and verifier.cache.evictions == 1
+
+    # Rejected tokens raise and are not cached
+    tampered = first[:-2] + ("AA" if not first.endswith("AA") else "BB")
+    for bad in (tampered, token(verifier, ttl=-10), "not-a-token"):
+        try:
+            verifier.verify(bad)
+        except jwt.InvalidTokenError:
+            pass
+        else:
+            raise AssertionError("token should have been rejected")
+    assert len(verifier.cache) == 2
+
+    # A token signed with another secret is rejected even with the same claims
+    other = TokenVerifier(secret="other", algorithm="HS256")
+    try:
+        verifier.verify(token(other))
+    except jwt.InvalidSignatureError:
+        pass
+    else:
+        raise AssertionError("foreign token should have been rejected")
+
+
+def test_cached_token_expires():
+    verifier = TokenVerifier(secret="s3cret", algorithm="HS256")
+    short = token(verifier, ttl=1)
+    verifier.verify(short)
+    time.sleep(1.1)
+    try:
+        verifier.verify(short)
+    except jwt.ExpiredSignatureError:
+        pass
+    else:
+        raise AssertionError("expired token was served from the cache")
+
+
+def write_keys(tmp, private_key, algorithm_class, kid):
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    key_path = os.path.join(tmp, f"{kid}.pem")
+    with open(key_path, "wb") as f:
+        f.write(pem)
+    jwk = json.loads(algorithm_class.to_jwk(private_key.public_key()))
+    jwk["kid"] = kid
+    return key_path, jwk
+
+
+def test_asymmetric_tokens_verify_against_jwks():
+    with tempfile.TemporaryDirectory() as tmp:
+        rsa_key, rsa_jwk = write_keys(
+            tmp,
+            rsa.generate_private_key(public_exponent=65537, key_size=2048),
+            jwt.algorithms.RSAAlgorithm,
+            "rsa-1",
+        )
+        ed_key, ed_jwk = write_keys(
+            tmp, ed25519.Ed25519PrivateKey.generate(), jwt.algorithms.OKPAlgorithm, "ed-1"
+        )
+        jwks_path = os.path.join(tmp, "jwks.json")
+        with open(jwks_path, "w") as f:
+            json.dump({"keys": [rsa_jwk, ed_jwk]}, f)
+
+        for algorithm, key_path, kid in (("RS256", rsa_key, "rsa-1"), ("EdDSA", ed_key, "ed-1")):
+            issuer = TokenVerifier(algorithm=algorithm, private_key_path=key_path, key_id=kid)
+            # The verifying side only has the public JWKS, no secret or private key
+            verifier = TokenVerifier(secret="unused", algorithm=algorithm, jwks_path=jwks_path)
+            signed = token(issuer)
+            assert jwt.get_unverified_header(signed)["kid"] == kid
+            assert verifier.verify(signed)["sub"] == "user-1"
+
+        # A kid that is not in the JWKS is rejected
+        stranger = TokenVerifier(algorithm="EdDSA", private_key_path=ed_key, key_id="ed-9")
+        try:
+            verifier.verify(token(stranger))
+        except jwt.InvalidTokenError:
+            pass
+        else:
+            raise AssertionError("token with unknown kid should have been rejected")
+
+
+def test_broken_key_setup_fails_at_startup():
+    def refused(verifier, signing=True):
+        try:
+            verifier.load_keys(signing)
+        except ValueError as e:
+            return str(e)
+        raise AssertionError("load_keys accepted a broken key setup")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ed_key, ed_jwk = write_keys(
+            tmp, ed25519.Ed25519PrivateKey.generate(), jwt.algorithms.OKPAlgorithm, "ed-1"
+        )
+        jwks_path = os.path.join(tmp, "jwks.json")
+        with open(jwks_path, "w") as f:
+            json.dump({"keys": [ed_jwk]}, f)
+        missing = os.path.join(tmp, "missing.json")
+
+        assert "JWT_JWKS_PATH" in refused(TokenVerifier(algorithm="EdDSA", jwks_path=""))
+        assert "No such file" in refused(TokenVerifier(algorithm="EdDSA", jwks_path=missing))
+        with open(missing, "w") as f:
+            f.write("{not json")
+        refused(TokenVerifier(algorithm="EdDSA", jwks_path=missing))
+        # Verify-only services need no private key; the app itself signs too
+        verify_only = TokenVerifier(algorithm="EdDSA", jwks_path=jwks_path)
+        verify_only.load_keys(signing=False)
+        assert "JWT_PRIVATE_KEY_PATH" in refused(verify_only)
+        wrong_kid = TokenVerifier(
+            algorithm="EdDSA", jwks_path=jwks_path, private_key_path=ed_key, key_id="ed-9"
+        )
+        assert "ed-9" in refused(wrong_kid)
+
+        good = TokenVerifier(
+            algorithm="EdDSA", jwks_path=jwks_path, private_key_path=ed_key, key_id="ed-1"
+        )
+        good.load_keys()
+        assert good.verify(token(good))["sub"] == "user-1"
+
+        # The app's lifespan refuses to start instead of serving 500s
+        saved = main.token_verifier
+        main.token_verifier = TokenVerifier(algorithm="EdDSA", jwks_path=missing)
+        try:
+            with TestClient(main.app):
+                pass
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("the app started without its token keys")
+        finally:
+            main.token_verifier = saved
+
+
+def test_endpoints_use_the_token_cache():
+    original = main.db
+    main.db = make_db(FakePostgrest())
+    try:
+        client = TestClient(main.app)
+        headers = {"Authorization": f"Bearer {main.create_access_token({'sub': 'user-1'})}"}
+        hits = main.token_verifier.hits
+        for _ in range(3):
+            assert client.get("/texts", headers=headers).status_code == 200
+        assert main.token_verifier.hits >= hits + 2
+
+        expired = main.token_verifier.sign({"sub": "user-1", "exp": int(time.time()) - 5})
+        response = client.get("/texts", headers={"Authorization": f"Bearer {expired}"})
+        assert response.status_code == 401 and response.json()["detail"] == "Token expired"
+        response = client.get("/texts", headers={"Authorization": "Bearer garbage"})
+        assert response.status_code == 401 and response.json()["detail"] == "Invalid token"
+    finally:
+        main.db = original
+
+
+def test_user_lookups_are_cached_briefly():
+    fake = FakePostgrest()
+    database = make_db(fake)
+    rounds = password_hasher.rounds
+    password_hasher.rounds = 4
+
+    async def run():
+        assert await database.get_user_by_email("new@example.com") is None
+        assert fake.requests == 1
+
+        # A signup through another worker is seen at once: misses are not cached
+        fake.tables["users"] = [
+            {
+                "id": "u1",
+                "email": "new@example.com",
+                "username": "new",
+                "password_hash": await database.hash_password("secret"),
+                "created_at": "now",
+            }
+        ]
+        user = await database.get_user_by_email("new@example.com")
+        assert user["id"] == "u1" and "password_hash" not in user
+        assert (await database.get_user_by_email("new@example.com"))["id"] == "u1"
+        assert fake.requests == 2
+        assert "password_hash" not in database.users.get("new@example.com")
+
+        # Logins always check the stored hash
+        assert await database.authenticate_user("new@example.com", "secret")
+        fake.tables["users"][0]["password_hash"] = await database.hash_password("changed")
+        assert await database.authenticate_user("new@example.com", "secret") is None
+        assert fake.requests == 4
+
+    try:
+        asyncio.run(run())
+    finally:
+        password_hasher.rounds = rounds
+
+
+if __name__ == "__main__":
+    test_verified_tokens_are_cached_until_exp()
+    test_cached_token_expires()
+    test_asymmetric_tokens_verify_against_jwks()
+    test_broken_key_setup_fails_at_startup()
+    test_endpoints_use_the_token_cache()
+    test_user_lookups_are_cached_briefly()
+    print("✅ Auth tests passed")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for batch translation with deduplication, NDJSON streaming and bulk insert
+"""
+
+import asyncio
+import json
+import os
+import sys
+import uuid
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from batch import BatchTranslator
+from database import SupabaseDB
+from pipeline import Segment, SegmentedTranslation
+from test_database import FakePostgrest
+
+
+class FakePipeline:
+    """Translates after a delay proportional to text length"""
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def translate(self, text):
+        self.calls.append(text)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(len(text) * 0.002)
+            if "broken" in text:
+                raise RuntimeError("render failed")
+            if "offline" in text:
+                # PixVerse failed and nothing local is related
+                return SegmentedTranslation(text=text, segments=[Segment(0, text)])
+            if "two phrases" in text:
+                # One clip per phrase; the second render failed when "half" is in text
+                phrases = text.split(", ")
+                second = None if "half" in text else "/clips/second.mp4"
+                segments = [
+                    Segment(0, phrases[0], video_url="/clips/first.mp4", duration=5.0),
+                    Segment(1, phrases[1], video_url=second, duration=5.0),
+                ]
+                return SegmentedTranslation(text=text, segments=segments)
+            segment = Segment(0, text, video_url=f"/clips/{len(text)}.mp4", duration=5.0)
+            # PixVerse failed and a local clip stands in
+            segment.fallback = "stand-in" in text
+            return SegmentedTranslation(text=text, segments=[segment])
+        finally:
+            self.in_flight -= 1
+
+
+def make_store(fake: FakePostgrest) -> SupabaseDB:
+    return SupabaseDB(url="http://postgrest.test", key="anon", transport=fake.transport())
+
+
+def test_dedupes_streams_and_bulk_inserts():
+    pipeline = FakePipeline()
+    fake = FakePostgrest()
+    translator = BatchTranslator(pipeline, store=make_store(fake), concurrency=2)
+    texts = [
+        "The cat sat on the mat and looked out of the window.",
+        "Hi.",
+        "hi",
+        "A broken page",
+        "  ",
+        "He wasn't hungry anymore.",
+    ]
+    user_id = str(uuid.uuid4())
+
+    async def run():
+        return [item async for item in translator.run(texts, user_id=user_id)]
+
+    events = asyncio.run(run())
+    items, summary = events[:-1], events[-1]
+
+    # Every input is answered once; "Hi." and "hi" share one translation
+    assert sorted(item["index"] for item in items) == list(range(len(texts)))
+    assert len(pipeline.calls) == 4
+    assert pipeline.max_in_flight <= 2
+    # Short texts finish first: results stream in completion order
+    assert items[0]["index"] == 4 and {items[1]["index"], items[2]["index"]} == {1, 2}
+    assert items[-1]["index"] == 0
+
+    by_index = {item["index"]: item for item in items}
+    assert by_index[3]["status"] == "error" and by_index[4]["status"] == "error"
+    assert by_index[1]["video_url"] == by_index[2]["video_url"] == "/clips/3.mp4"
+
+    # One bulk insert holding the three distinct successful texts
+    assert fake.requests == 1
+    assert len(fake.tables["text_translations"]) == 3
+    assert summary["status"] == "complete"
+    assert (summary["count"], summary["unique"], summary["saved"]) == (6, 4, 3)
+    ids = summary["translation_ids"]
+    assert ids[1] == ids[2] and ids[3] is None and ids[4] is None
+    assert len({ids[0], ids[1], ids[5]}) == 3
+
+
+def test_fallbacks_are_reported_and_not_saved():
+    fake = FakePostgrest()
+    translator = BatchTranslator(FakePipeline(), store=make_store(fake))
+    texts = ["rendered fine", "a stand-in clip", "offline text", "broken text"]
+
+    async def run():
+        return [item async for item in translator.run(texts, user_id=str(uuid.uuid4()))]
+
+    *items, summary = asyncio.run(run())
+    by_index = {item["index"]: item for item in items}
+    assert by_index[0]["status"] == "success"
+    assert (by_index[1]["status"], by_index[1]["video_url"]) == ("fallback", "/clips/15.mp4")
+    assert (by_index[2]["status"], by_index[2]["video_url"]) == ("fallback", None)
+    assert (by_index[3]["status"], by_index[3]["video_url"]) == ("error", None)
+    # Only the rendered text is saved
+    assert summary["saved"] == 1
+    assert [row["text"] for row in fake.tables["text_translations"]] == ["rendered fine"]
+    assert summary["translation_ids"][1:] == [None, None, None]
+
+
+def test_multi_clip_passages_are_not_saved_with_their_first_clip():
+    fake = FakePostgrest()
+    translator = BatchTranslator(FakePipeline(), store=make_store(fake))
+    texts = ["one clip", "two phrases, both rendered", "two phrases, half rendered"]
+
+    async def run():
+        return [item async for item in translator.run(texts, user_id=str(uuid.uuid4()))]
+
+    *items, summary = asyncio.run(run())
+    by_index = {item["index"]: item for item in items}
+    assert [segment["video_url"] for segment in by_index[1]["segments"]] == [
+        "/clips/first.mp4", "/clips/second.mp4",
+    ]
+    # The first clip covers only "two phrases"; saving it would make it the passage's video
+    assert summary["saved"] == 1
+    assert [row["text"] for row in fake.tables["text_translations"]] == ["one clip"]
+    assert [row["video_url"] for row in fake.tables["text_translations"]] == ["/clips/8.mp4"]
+
+
+def test_batch_endpoint_streams_ndjson():
+    original = main.batch_translator
+    fake = FakePostgrest()
+    main.batch_translator = BatchTranslator(FakePipeline(), store=make_store(fake))
+    try:
+        client = TestClient(main.app)
+        anonymous = client.post("/api/translate/batch", json={"texts": ["one", "two", "One"]})
+        assert anonymous.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in anonymous.text.splitlines()]
+        assert len(lines) == 4
+        assert lines[-1]["saved"] == 0 and fake.requests == 0
+
+        token = main.create_access_token({"sub": str(uuid.uuid4())})
+        signed_in = client.post(
+            "/api/translate/batch",
+            json={"texts": ["one", "two"]},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert json.loads(signed_in.text.splitlines()[-1])["saved"] == 2
+
+        main.settings.BATCH_MAX_TEXTS, saved = 2, main.settings.BATCH_MAX_TEXTS
+        try:
+            too_many = client.post("/api/translate/batch", json={"texts": ["a", "b", "c"]})
+            assert too_many.status_code == 413
+        finally:
+            main.settings.BATCH_MAX_TEXTS = saved
+    finally:
+        main.batch_translator = original
+
+
+if __name__ == "__main__":
+    test_dedupes_streams_and_bulk_inserts()
+    test_fallbacks_are_reported_and_not_saved()
+    test_multi_clip_passages_are_not_saved_with_their_first_clip()
+    test_batch_endpoint_streams_ndjson()
+    print("✅ Batch translation tests passed")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed blob store that mirrors PixVerse results
+"""
+
+import asyncio
+import hashlib
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from blob_store import BlobFiles, BlobStore
+from config import settings
+from pixverse_api import PixVerseAPI
+from test_pixverse_load import StubServer
+
+CHUNK = 64 * 1024
+
+
+def video_bytes(seed: int, size: int = 512 * 1024) -> bytes:
+    block = hashlib.sha256(str(seed).encode()).digest()
+    return (block * (size // len(block) + 1))[:size]
+
+
+def create_stub_app(videos):
+    """PixVerse generate/result endpoints plus a CDN that streams the finished videos"""
+    stub = FastAPI()
+    ids = itertools.count(1)
+    prompts = {}
+    stub.state.media_requests = []
+
+    @stub.post("/video/text/generate")
+    async def generate(payload: dict):
+        video_id = next(ids)
+        prompts[video_id] = payload["prompt"]
+        return {"ErrCode": 0, "ErrMsg": "success", "Resp": {"video_id": video_id}}
+
+    @stub.get("/video/result/{video_id}")
+    async def result(video_id: int):
+        url = f"{stub.state.url}/media/{video_id}.mp4"
+        return {"ErrCode": 0, "ErrMsg": "success", "Resp": {"status": 1, "url": url}}
+
+    @stub.get("/media/{video_id}.mp4")
+    async def media(video_id: int):
+        stub.state.media_requests.append(video_id)
+        prompt = prompts[video_id]
+        data = next(body for word, body in videos.items() if word in prompt)
+
+        async def body():
+            for start in range(0, len(data), CHUNK):
+                yield data[start:start + CHUNK]
+
+        return StreamingResponse(body(), media_type="video/mp4")
+
+    return stub
+
+
+def make_client(url, blobs):
+    saved = (settings.PIXVERSE_API_KEY, settings.POLL_INITIAL_INTERVAL)
+    settings.PIXVERSE_API_KEY, settings.POLL_INITIAL_INTERVAL = "test-key", 0.01
+    try:
+        return PixVerseAPI(base_url=url, blobs=blobs)
+    finally:
+        settings.PIXVERSE_API_KEY, settings.POLL_INITIAL_INTERVAL = saved
+
+
+def test_mirrors_generated_videos_by_content_hash():
+    # "hello" and "hi" render to identical bytes, "bye" to different ones
+    videos = {"hello": video_bytes(1), "hi": video_bytes(1), "bye": video_bytes(2)}
+    stub = create_stub_app(videos)
+    with StubServer(stub) as server, tempfile.TemporaryDirectory() as root:
+        stub.state.url = server.url
+        store = BlobStore(root=root)
+        client = make_client(server.url, store)
+
+        async def run():
+            try:
+                return await asyncio.gather(
+                    *(client.generate_sign_language_video(t, usePixverse=True) for t in videos)
+                )
+            finally:
+                await client.aclose()
+                await store.aclose()
+
+        hello, hi, bye = asyncio.run(run())
+
+        digest = hashlib.sha256(videos["hello"]).hexdigest()
+        assert hello == hi == f"/assets/blobs/{digest[:2]}/{digest}.mp4"
+        assert bye != hello and bye.startswith("/assets/blobs/")
+        assert len(stub.state.media_requests) == 3
+        stats = store.stats()
+        assert (stats["blobs"], stats["downloads"], stats["deduplicated"]) == (2, 3, 1)
+        assert stats["bytes"] == len(videos["hello"]) + len(videos["bye"])
+
+        with open(store.get(digest).path, "rb") as f:
+            assert f.read() == videos["hello"]
+        # No partial downloads left behind
+        assert not [name for name in os.listdir(root) if name.startswith(".download-")]
+
+        # A restarted store finds the same blobs on disk
+        assert BlobStore(root=root).stats()["blobs"] == 2
+
+
+def test_evicts_least_recently_used_and_rejects_oversized():
+    videos = {f"v{i}": video_bytes(i, 100_000) for i in range(4)}
+    stub = FastAPI()
+
+    @stub.get("/{name}.mp4")
+    async def media(name: str):
+        return StreamingResponse(iter([videos[name]]), media_type="video/mp4")
+
+    with StubServer(stub) as server, tempfile.TemporaryDirectory() as root:
+        store = BlobStore(root=root, max_bytes=250_000, max_file_bytes=150_000)
+
+        async def run():
+            try:
+                first = await store.put_url(f"{server.url}/v0.mp4")
+                second = await store.put_url(f"{server.url}/v1.mp4")
+                store.touch(first.digest)
+                third = await store.put_url(f"{server.url}/v2.mp4")
+                return first, second, third
+            finally:
+                await store.aclose()
+
+        first, second, third = asyncio.run(run())
+        # v1 was the least recently used when v2 pushed the store over its budget
+        assert store.get(second.digest) is None and not os.path.exists(second.path)
+        assert store.get(first.digest) and store.get(third.digest)
+        assert store.stats()["bytes"] == 200_000 and store.evictions == 1
+
+        videos["big"] = video_bytes(9, 200_000)
+
+        async def oversized():
+            try:
+                return await store.mirror(f"{server.url}/big.mp4")
+            finally:
+                await store.aclose()
+
+        assert asyncio.run(oversized()) is None
+        big = hashlib.sha256(videos["big"]).hexdigest()
+        assert big[:2] not in os.listdir(root)
+        assert not [name for name in os.listdir(root) if name.startswith(".download-")]
+
+        # The evicted blob is still referenced: serving it mirrors it again
+        client = TestClient(Starlette(routes=[Mount("/assets/blobs", BlobFiles(store))]))
+        restored = client.get(second.url)
+        assert restored.status_code == 200 and restored.content == videos["v1"]
+        assert store.restored == 1 and store.get(second.digest) is not None
+        # A blob the store never had stays a 404
+        assert client.get(f"/assets/blobs/00/{'0' * 64}.mp4").status_code == 404
+
+
+def test_corrupt_blobs_are_not_served():
+    videos = {"a": video_bytes(3, 4096)}
+    stub = FastAPI()
+
+    @stub.get("/a.mp4")
+    async def media():
+        return StreamingResponse(iter([videos["a"]]), media_type="video/mp4")
+
+    with StubServer(stub) as server, tempfile.TemporaryDirectory() as root:
+        store = BlobStore(root=root)
+
+        async def put():
+            try:
+                return await store.put_url(f"{server.url}/a.mp4")
+            finally:
+                await store.aclose()
+
+        blob = asyncio.run(put())
+        app = Starlette(routes=[Mount("/assets/blobs", BlobFiles(store))])
+        client = TestClient(app)
+
+        ok = client.get(blob.url)
+        assert ok.status_code == 200 and ok.content == videos["a"]
+        assert ok.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert client.get(blob.url, headers={"Range": "bytes=0-9"}).status_code == 206
+
+        # Flip a byte on disk: the next read rehashes, drops the blob and
+        # serves a fresh copy from the source instead of the corrupt bytes
+        time.sleep(0.01)
+        with open(blob.path, "r+b") as f:
+            f.seek(100)
+            f.write(bytes([videos["a"][100] ^ 0xFF]))
+        again = client.get(blob.url)
+        assert again.status_code == 200 and again.content == videos["a"]
+        assert store.corrupt == 1 and store.restored == 1
+
+        # Without a source to fetch from, a corrupt blob is a 404
+        os.remove(store.path_for(blob.digest, blob.digest + ".source"))
+        fresh = BlobStore(root=root)
+        client = TestClient(Starlette(routes=[Mount("/assets/blobs", BlobFiles(fresh))]))
+        time.sleep(0.01)
+        with open(blob.path, "r+b") as f:
+            f.seek(100)
+            f.write(bytes([videos["a"][100] ^ 0xFF]))
+        assert client.get(blob.url).status_code == 404
+        assert fresh.corrupt == 1 and not os.path.exists(blob.path)
+        assert fresh.stats()["blobs"] == 0
+
+
+if __name__ == "__main__":
+    test_mirrors_generated_videos_by_content_hash()
+    test_evicts_least_recently_used_and_rejects_oversized()
+    test_corrupt_blobs_are_not_served()
+    print("✅ Blob store tests passed")
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Tests for the async Supabase data layer against an in-memory PostgREST fake
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from config import settings
+from database import SupabaseDB
+from metrics import DB_QUERY_SECONDS
+from password_hasher import password_hasher
+
+
+class FakePostgrest:
+    """
+    Minimal in-memory PostgREST: comparison and in filters with or/and trees,
+    order, limit, column selection, insert and update, each answered after an
+    injected latency.
+    """
+
+    OPERATORS = {
+        "eq": lambda a, b: a == b,
+        "lt": lambda a, b: a < b,
+        "lte": lambda a, b: a <= b,
+        "gt": lambda a, b: a > b,
+        "gte": lambda a, b: a >= b,
+    }
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables = {}
+        self.requests = 0
+        self.fail = False
+        # (table, apikey) of every request
+        self.keys = []
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def _split(self, expression):
+        # Split "a.eq.1,and(b.lt.2,c.gt.3)" at top-level commas
+        parts, depth, quoted, current = [], 0, False, ""
+        for char in expression:
+            if char == '"':
+                quoted = not quoted
+            elif not quoted and char in "()":
+                depth += 1 if char == "(" else -1
+            elif not quoted and char == "," and depth == 0:
+                parts.append(current)
+                current = ""
+                continue
+            current += char
+        return parts + [current]
+
+    def _condition(self, row, expression):
+        for logic in ("and", "or"):
+            if expression.startswith(logic + "("):
+                inner = expression[len(logic) + 1 : -1]
+                terms = [self._condition(row, term) for term in self._split(inner)]
+                return all(terms) if logic == "and" else any(terms)
+        column, operator, value = expression.split(".", 2)
+        if operator == "in":
+            return str(row.get(column)) in [v.strip('"') for v in self._split(value[1:-1])]
+        return self.OPERATORS[operator](str(row.get(column)), value.strip('"'))
+
+    def _matches(self, row, filters):
+        return all(self._condition(row, expression) for expression in filters)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            return httpx.Response(
+                500, json={"message": "database unavailable", "code": "XX000"}
+            )
+
+        table = request.url.path.rsplit("/", 1)[-1]
+        self.keys.append((table, request.headers["apikey"]))
+        rows = self.tables.setdefault(table, [])
+        params = request.url.params
+        filters = [
+            f"{column}{value}" if column in ("and", "or") else f"{column}.{value}"
+            for column, value in params.multi_items()
+            if column not in ("select", "order", "limit")
+        ]
+
+        if request.method == "POST":
+            payload = json.loads(request.content)
+            created = []
+            for item in payload if isinstance(payload, list) else [payload]:
+                row = {
+                    "id": str(uuid.uuid4()),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    **item,
+                }
+                rows.append(row)
+                created.append(row)
+            return httpx.Response(201, json=created)
+
+        matched = [row for row in rows if self._matches(row, filters)]
+        if request.method == "PATCH":
+            for row in matched:
+                row.update(json.loads(request.content))
+            return httpx.Response(200, json=matched)
+
+        orders = params["order"].split(",") if "order" in params else []
+        for order in reversed(orders):
+            column, _, direction = order.partition(".")
+            matched.sort(key=lambda row: row[column], reverse=direction == "desc")
+        if "limit" in params:
+            matched = matched[: int(params["limit"])]
+        columns = params.get("select", "*").split(",")
+        if columns != ["*"]:
+            matched = [{column: row.get(column) for column in columns} for row in matched]
+        return httpx.Response(200, json=matched)
+
+
+def make_db(fake: FakePostgrest) -> SupabaseDB:
+    return SupabaseDB(
+        url="http://postgrest.test",
+        key="anon",
+        transport=fake.transport(),
+        service_key="service",
+    )
+
+
+def query_stat(database: SupabaseDB, method: str, field: str = "count") -> float:
+    """One figure from database.stats(); the metrics behind it are process wide"""
+    return database.stats().get(method, {}).get(field, 0)
+
+
+def test_crud_round_trip():
+    fake = FakePostgrest()
+    database = make_db(fake)
+    rounds = password_hasher.rounds
+    password_hasher.rounds = 4
+    lookups = query_stat(database, "get_user_by_email")
+    inserts = query_stat(database, "create_text_translation")
+
+    async def run():
+        user = await database.create_user("reader", "reader@example.com", "secret")
+        assert "password_hash" not in user
+        assert (await database.get_user_by_email("reader@example.com"))["id"] == user["id"]
+        assert await database.authenticate_user("reader@example.com", "secret")
+        assert await database.authenticate_user("reader@example.com", "wrong") is None
+
+        first = await database.create_text_translation(user["id"], "hello", "/a.mp4")
+        await asyncio.sleep(0.001)
+        second = await database.create_text_translation(user["id"], "bye", "/b.mp4")
+        history = await database.get_user_translations(user["id"])
+        assert [row["id"] for row in history] == [second["id"], first["id"]]
+        assert (await database.get_translation_by_id(first["id"]))["text"] == "hello"
+
+        await database.create_job("job-1", "hello", user["id"])
+        updated = await database.update_job("job-1", status="completed", video_url="/a.mp4")
+        assert updated["status"] == "completed"
+        assert (await database.get_job("job-1"))["video_url"] == "/a.mp4"
+        await database.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        password_hasher.rounds = rounds
+
+    # Repeat lookups of the same email are served from the user cache
+    assert query_stat(database, "get_user_by_email") == lookups + 1
+    assert query_stat(database, "create_text_translation") == inserts + 2
+    stats = database.stats()
+    assert "create_user" in stats and "update_job" in stats
+    # Job rows use the service-role key (RLS admits no anon writes there)
+    assert {key for table, key in fake.keys if table == "translation_jobs"} == {"service"}
+    assert {key for table, key in fake.keys if table != "translation_jobs"} == {"anon"}
+
+
+def test_queries_do_not_block_the_event_loop():
+    fake = FakePostgrest(latency=0.05)
+    database = make_db(fake)
+    timings = DB_QUERY_SECONDS.labels("get_user_by_email")
+    before = (timings.count, timings.sum)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(database.get_user_by_email(f"user{i}@example.com") for i in range(20))
+        )
+        elapsed = time.perf_counter() - start
+        ticking.cancel()
+        await database.aclose()
+        return elapsed, ticks
+
+    elapsed, ticks = asyncio.run(run())
+    # Twenty 50 ms round trips overlap instead of taking a second back to back
+    assert elapsed < 0.5
+    assert ticks >= 5
+    assert fake.requests == 20
+    # Each query is timed once, over its full round trip
+    assert timings.count == before[0] + 20
+    assert (timings.sum - before[1]) / 20 >= 0.05
+
+
+def test_text_lookups_are_split_into_short_queries():
+    fake = FakePostgrest()
+    fake.tables["text_translations"] = [
+        {"id": str(i), "text": f"phrase {i % 5}", "video_url": "/a.mp4"} for i in range(10)
+    ]
+    database = make_db(fake)
+    chunk_size = settings.DB_IN_CHUNK_SIZE
+    settings.DB_IN_CHUNK_SIZE = 2
+
+    async def run():
+        texts = [f"phrase {i}" for i in range(5)] + ["never translated"]
+        return (
+            await database.get_translations_of_texts(texts, 100),
+            await database.get_translations_of_texts(texts, 3),
+        )
+
+    try:
+        rows, limited = asyncio.run(run())
+    finally:
+        settings.DB_IN_CHUNK_SIZE = chunk_size
+    # Three queries of two texts each, per call
+    assert fake.requests == 6
+    assert sorted(row["text"] for row in rows) == sorted(f"phrase {i % 5}" for i in range(10))
+    assert len(limited) == 3
+
+
+def test_errors_are_wrapped_and_counted():
+    fake = FakePostgrest()
+    fake.fail = True
+    database = make_db(fake)
+    errors = query_stat(database, "get_translation_by_id", "errors")
+
+    async def run():
+        try:
+            await database.get_translation_by_id("missing")
+        except Exception as e:
+            assert str(e).startswith("Error getting translation:")
+        else:
+            raise AssertionError("expected the query to fail")
+        await database.aclose()
+
+    asyncio.run(run())
+    assert query_stat(database, "get_translation_by_id", "errors") == errors + 1
+
+
+if __name__ == "__main__":
+    test_crud_round_trip()
+    test_queries_do_not_block_the_event_loop()
+    test_text_lookups_are_split_into_short_queries()
+    test_errors_are_wrapped_and_counted()
+    print("✅ Database tests passed")
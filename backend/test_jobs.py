@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the background video generation job queue
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from jobs import JOB_COMPLETED, JOB_FAILED, JOB_FALLBACK, JobManager, QueueFullError
+from pixverse_api import FallbackVideo
+
+
+class FakeStore:
+    """In-memory stand-in for the translation_jobs/text_translations tables"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.translations = []
+
+    async def create_job(self, job_id, text, user_id=None):
+        self.jobs[job_id] = {"id": job_id, "text": text, "status": "queued"}
+        return self.jobs[job_id]
+
+    async def update_job(self, job_id, **fields):
+        self.jobs[job_id].update(fields)
+        return self.jobs[job_id]
+
+    async def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def create_text_translation(self, user_id, text, video_url):
+        self.translations.append((user_id, text, video_url))
+
+
+async def fake_generate(text):
+    await asyncio.sleep(0.05)
+    if text == "fail":
+        return None
+    if text == "offline":
+        return FallbackVideo("/assets/closest.mp4")
+    return f"https://media.stub/{text}.mp4"
+
+
+def test_job_lifecycle_and_events():
+    store = FakeStore()
+
+    async def run():
+        manager = JobManager(fake_generate, store=store, workers=2, queue_size=10)
+        manager.start()
+        job = await manager.submit("hello", user_id="user-1")
+        failed = await manager.submit("fail")
+        stand_in = await manager.submit("offline", user_id="user-1")
+
+        statuses = [state["status"] async for state in manager.watch(job.id) if state]
+        await manager.queue.join()
+        await manager.stop()
+        return manager, job, failed, stand_in, statuses
+
+    manager, job, failed, stand_in, statuses = asyncio.run(run())
+
+    assert statuses == ["queued", "running", "completed"]
+    assert job.status == JOB_COMPLETED
+    assert job.video_url == "https://media.stub/hello.mp4"
+    assert failed.status == JOB_FAILED
+    assert store.jobs[job.id]["status"] == JOB_COMPLETED
+    assert store.jobs[failed.id]["status"] == JOB_FAILED
+    # A local stand-in finishes the job but is not saved to the user's history
+    assert (stand_in.status, stand_in.video_url) == (JOB_FALLBACK, "/assets/closest.mp4")
+    assert store.translations == [("user-1", "hello", "https://media.stub/hello.mp4")]
+
+
+def test_full_queue_rejects_with_retry_after():
+    async def run():
+        # Workers are not started, so the queue only fills up
+        manager = JobManager(fake_generate, workers=1, queue_size=2)
+        await manager.submit("one")
+        await manager.submit("two")
+        try:
+            await manager.submit("three")
+        except QueueFullError as e:
+            return e.retry_after
+        return None
+
+    retry_after = asyncio.run(run())
+    assert retry_after is not None and retry_after >= 1
+
+
+def test_lookup_falls_back_to_store():
+    store = FakeStore()
+    store.jobs["old"] = {"id": "old", "text": "hi", "status": "completed", "video_url": "u"}
+    store.jobs["mine"] = {"id": "mine", "user_id": "user-1", "text": "hi", "status": "queued"}
+
+    async def run():
+        manager = JobManager(fake_generate, store=store)
+        queued = await manager.submit("private", user_id="user-1")
+        return (
+            await manager.lookup("old"),
+            await manager.lookup("missing"),
+            [await manager.lookup(job_id) for job_id in ("mine", queued.id)],
+            [await manager.lookup(job_id, "user-2") for job_id in ("mine", queued.id)],
+            [await manager.lookup(job_id, "user-1") for job_id in ("mine", queued.id)],
+        )
+
+    found, missing, anonymous, other_user, owner = asyncio.run(run())
+    assert found["status"] == "completed"
+    assert missing is None
+    # A signed-in user's jobs are only visible to that user
+    assert anonymous == other_user == [None, None]
+    assert [state["status"] for state in owner] == ["queued", "queued"]
+
+
+if __name__ == "__main__":
+    test_job_lifecycle_and_events()
+    test_full_queue_rejects_with_retry_after()
+    test_lookup_falls_back_to_store()
+    print("✅ Job queue tests passed")
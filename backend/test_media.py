@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for range, ETag and cache-header aware media serving
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from media import IMMUTABLE_CACHE_CONTROL, MediaFiles
+
+CONTENT = bytes(range(256)) * 400
+
+
+def make_client(directory):
+    app = Starlette(routes=[Mount("/assets", MediaFiles(directory=directory))])
+    return TestClient(app)
+
+
+def test_full_and_conditional_get():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "hello there.mp4"), "wb") as f:
+            f.write(CONTENT)
+        client = make_client(tmp)
+
+        response = client.get("/assets/hello there.mp4")
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["etag"] == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["cache-control"] != IMMUTABLE_CACHE_CONTROL
+
+        cached = client.get(
+            "/assets/hello there.mp4",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+
+def test_byte_ranges():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "clip.mp4"), "wb") as f:
+            f.write(CONTENT)
+        client = make_client(tmp)
+        etag = client.head("/assets/clip.mp4").headers["etag"]
+
+        partial = client.get("/assets/clip.mp4", headers={"Range": "bytes=100-199"})
+        assert partial.status_code == 206
+        assert partial.content == CONTENT[100:200]
+        assert partial.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+        suffix = client.get("/assets/clip.mp4", headers={"Range": "bytes=-10"})
+        assert suffix.status_code == 206
+        assert suffix.content == CONTENT[-10:]
+
+        beyond = client.get("/assets/clip.mp4", headers={"Range": f"bytes={len(CONTENT)}-"})
+        assert beyond.status_code == 416
+
+        # A stale If-Range validator falls back to the full body
+        stale = client.get(
+            "/assets/clip.mp4", headers={"Range": "bytes=0-9", "If-Range": '"stale"'}
+        )
+        assert stale.status_code == 200
+        fresh = client.get("/assets/clip.mp4", headers={"Range": "bytes=0-9", "If-Range": etag})
+        assert fresh.status_code == 206
+
+
+def test_content_addressed_names_are_immutable():
+    digest = hashlib.sha256(CONTENT).hexdigest()
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, f"{digest}.mp4"), "wb") as f:
+            f.write(CONTENT)
+        response = make_client(tmp).get(f"/assets/{digest}.mp4")
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers["etag"] == f'"{digest}"'
+
+
+if __name__ == "__main__":
+    test_full_and_conditional_get()
+    test_byte_ranges()
+    test_content_addressed_names_are_immutable()
+    print("✅ Media serving tests passed")
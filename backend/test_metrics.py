@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics surface, stage timings and the /health readiness check
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+
+import main
+from metrics import LoopLagMonitor, Registry, registry
+from test_database import FakePostgrest, make_db
+
+
+def sample(text, line_prefix):
+    """Value of the first exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_exposition_format():
+    reg = Registry()
+    counter = reg.counter("jobs_total", "Jobs by kind", ["kind"])
+    gauge = reg.gauge("depth", "Queue depth")
+    histogram = reg.histogram("work_seconds", "Work time", buckets=(0.1, 1.0))
+
+    counter.labels('say "hi"\n').inc()
+    counter.labels("plain").inc(2)
+    gauge.set_function(lambda: 7)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    text = reg.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="say \\"hi\\"\\n"} 1' in text
+    assert 'jobs_total{kind="plain"} 2' in text
+    assert "depth 7" in text
+    # Buckets are cumulative and upper-inclusive
+    assert 'work_seconds_bucket{le="0.1"} 2' in text
+    assert 'work_seconds_bucket{le="1"} 3' in text
+    assert 'work_seconds_bucket{le="+Inf"} 4' in text
+    assert sample(text, "work_seconds_sum") == 3.65
+    assert sample(text, "work_seconds_count") == 4
+    assert text.endswith("\n")
+
+    # Quantiles interpolate within the bucket holding the rank
+    child = histogram.labels()
+    assert child.quantile(0.5) == 0.1
+    assert abs(child.quantile(0.75) - 1.0) < 1e-9
+    assert child.quantile(0.99) == 1.0
+
+
+def test_requests_are_recorded_per_route_template():
+    client = TestClient(main.app)
+    before = client.get("/metrics").text
+    route = 'http_requests_total{method="GET",route="/cache/stats",status="200"}'
+    start = sample(before, route) or 0
+
+    client.get("/cache/stats")
+    client.get("/cache/stats")
+    client.get("/assets/no-such-clip.mp4")
+    client.get("/no/such/path")
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert sample(text, route) == start + 2
+    assert sample(text, 'http_requests_total{method="GET",route="/assets/{path}",status="404"}')
+    assert sample(text, 'http_requests_total{method="GET",route="unmatched",status="404"}')
+    assert sample(
+        text, 'http_request_duration_seconds_count{method="GET",route="/cache/stats"}'
+    ) >= 2
+    # The scrape itself is in flight while it renders
+    assert sample(text, "http_requests_in_flight") == 1
+    assert sample(text, 'work_in_flight{pool="bcrypt"}') == 0
+
+
+def test_stage_and_query_timings():
+    token = main.create_access_token({"sub": "user-1"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    stage_count = 'stage_duration_seconds_count{stage="jwt_verify"}'
+    before = sample(registry.render(), stage_count) or 0
+    main.token_verifier.cache.clear()
+    assert asyncio.run(main.verify_token(credentials)) == "user-1"
+    assert sample(registry.render(), stage_count) == before + 1
+
+    database = make_db(FakePostgrest())
+    asyncio.run(database.get_user_by_email("nobody@example.com"))
+    queries = 'db_query_duration_seconds_count{method="get_user_by_email"}'
+    assert sample(registry.render(), queries) >= 1
+
+
+def test_stats_endpoints_require_the_metrics_token_when_set():
+    client = TestClient(main.app)
+    saved, main.settings.METRICS_TOKEN = main.settings.METRICS_TOKEN, "scrape-secret"
+    try:
+        for path in ("/metrics", "/db/stats", "/cache/stats"):
+            assert client.get(path).status_code == 401
+            wrong = {"Authorization": "Bearer nope"}
+            assert client.get(path, headers=wrong).status_code == 401
+            right = {"Authorization": "Bearer scrape-secret"}
+            assert client.get(path, headers=right).status_code == 200
+    finally:
+        main.settings.METRICS_TOKEN = saved
+    assert client.get("/db/stats").status_code == 200
+
+
+def test_health_probes_the_database():
+    original = main.db
+    fake = FakePostgrest(latency=0.01)
+    main.db = make_db(fake)
+    try:
+        client = TestClient(main.app)
+        healthy = client.get("/health")
+        assert healthy.status_code == 200
+        body = healthy.json()
+        assert body["database"] == "connected" and body["database_latency_ms"] >= 10
+        assert fake.requests == 1
+
+        fake.fail = True
+        down = client.get("/health")
+        assert down.status_code == 503 and down.json()["database"] == "unreachable"
+
+        fake.fail, fake.latency = False, 0.5
+        main.settings.HEALTH_DB_TIMEOUT, saved = 0.05, main.settings.HEALTH_DB_TIMEOUT
+        try:
+            slow = client.get("/health")
+        finally:
+            main.settings.HEALTH_DB_TIMEOUT = saved
+        assert slow.status_code == 503 and "0.05s" in slow.json()["error"]
+    finally:
+        main.db = original
+
+
+def test_loop_lag_monitor_sees_blocking_work():
+    monitor = LoopLagMonitor(interval=0.01)
+
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # blocks the loop
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+    asyncio.run(run())
+    text = registry.render()
+    assert sample(text, "event_loop_lag_seconds_count") >= 2
+    assert sample(text, 'event_loop_lag_seconds_bucket{le="0.05"}') < sample(
+        text, "event_loop_lag_seconds_count"
+    )
+
+
+if __name__ == "__main__":
+    test_exposition_format()
+    test_requests_are_recorded_per_route_template()
+    test_stage_and_query_timings()
+    test_stats_endpoints_require_the_metrics_token_when_set()
+    test_health_probes_the_database()
+    test_loop_lag_monitor_sees_blocking_work()
+    print("✅ Metrics tests passed")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the OCR preprocessing pipeline, worker pool and /api/ocr
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image
+
+from ocr import OCRBusyError, OCRPool, OCRUnavailableError
+from ocr_image import (
+    binarize,
+    decode_image,
+    downscale,
+    estimate_skew,
+    frame_thumbnail,
+    preprocess,
+)
+
+
+class FakeEngine:
+    """Reports how many dark text rows the preprocessed page contains"""
+
+    def recognize(self, pixels):
+        dark_rows = (pixels == 0).any(axis=1)
+        lines = int(np.count_nonzero(dark_rows[1:] & ~dark_rows[:-1]))
+        return f"{lines} lines {pixels.shape[1]}x{pixels.shape[0]}", 0.9
+
+
+class BrokenEngine:
+    def __init__(self):
+        raise RuntimeError("model files missing")
+
+
+def striped_page(width=600, height=400, lines=6, angle=0.0, mode="L") -> Image.Image:
+    pixels = np.full((height, width), 235, np.uint8)
+    for i in range(lines):
+        top = 60 + i * 45
+        pixels[top : top + 12, 50 : width - 50] = 20
+    image = Image.fromarray(pixels).rotate(angle, expand=True, fillcolor=235)
+    return image.convert(mode)
+
+
+def encode(image: Image.Image, format="PNG") -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def test_preprocessing_stages():
+    for angle in (-7.0, -2.5, 0.0, 4.0):
+        assert abs(estimate_skew(np.asarray(striped_page(angle=angle))) - angle) <= 0.5
+
+    image = downscale(striped_page(width=3200, height=2000), 1600)
+    assert max(image.size) == 1600
+
+    # Light text on a dark background comes out as dark text on white
+    inverted = Image.fromarray(255 - np.asarray(striped_page()))
+    binary = binarize(inverted)
+    assert set(np.unique(binary)) == {0, 255}
+    assert binary.mean() > 127
+
+    pixels, timings = preprocess(encode(striped_page(angle=5, mode="RGB"), "JPEG"), 1600, 10)
+    assert list(timings) == ["decode", "grayscale", "downscale", "deskew", "binarize"]
+    assert abs(estimate_skew(pixels)) <= 0.5
+    assert FakeEngine().recognize(pixels)[0].startswith("6 lines")
+
+
+def test_oversized_images_are_rejected():
+    data = encode(striped_page(width=200, height=100))
+    limit = Image.MAX_IMAGE_PIXELS
+    # Pillow refuses images over twice the limit as decompression bombs
+    Image.MAX_IMAGE_PIXELS = 5000
+    try:
+        for decode in (decode_image, frame_thumbnail):
+            try:
+                decode(data)
+                raise AssertionError("decompression bomb was decoded")
+            except ValueError as e:
+                assert str(e).startswith("Unsupported image")
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def test_pool_recognizes_and_bounds_admission():
+    pool = OCRPool(engine="test_ocr:FakeEngine", workers=1, max_queue=0)
+
+    async def run():
+        # Started in the background, as the lifespan does
+        pool.start_warming()
+        await pool._warming
+        assert pool.warmed
+        page = encode(striped_page(angle=3))
+        return await asyncio.gather(*(pool.recognize(page) for _ in range(3)), return_exceptions=True)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    done = [r for r in results if not isinstance(r, Exception)]
+    assert len(done) == 1 and pool.rejected == 2
+    assert all(isinstance(r, OCRBusyError) for r in results if r not in done)
+    assert done[0].text.startswith("6 lines")
+    assert {"queue", "decode", "deskew", "recognize", "total"} <= set(done[0].timings)
+
+
+def test_pool_reports_unavailable_engine():
+    pool = OCRPool(engine="test_ocr:BrokenEngine", workers=1)
+
+    async def run():
+        await pool.recognize(encode(striped_page()))
+
+    try:
+        asyncio.run(run())
+    except OCRUnavailableError as e:
+        assert "model files missing" in str(e)
+    else:
+        raise AssertionError("expected OCRUnavailableError")
+    finally:
+        pool.shutdown()
+
+
+def test_ocr_endpoint():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    original_pool, original_limit = main.ocr_pool, main.settings.OCR_MAX_UPLOAD_BYTES
+    main.ocr_pool = OCRPool(engine="test_ocr:FakeEngine", workers=1)
+    try:
+        client = TestClient(main.app)
+        page = encode(striped_page(angle=-4))
+
+        response = client.post("/api/ocr", files={"file": ("capture.png", page, "image/png")})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["text"].startswith("6 lines") and body["confidence"] == 0.9
+        assert body["timings_ms"]["total"] > 0
+
+        raw = client.post("/api/ocr", content=page, headers={"Content-Type": "image/png"})
+        assert raw.json()["text"] == body["text"]
+
+        bad = client.post("/api/ocr", files={"file": ("capture.png", b"not an image", "image/png")})
+        assert bad.status_code == 400
+
+        main.settings.OCR_MAX_UPLOAD_BYTES = len(page) // 2
+        too_large = client.post("/api/ocr", files={"file": ("capture.png", page, "image/png")})
+        assert too_large.status_code == 413
+    finally:
+        main.ocr_pool.shutdown()
+        main.ocr_pool = original_pool
+        main.settings.OCR_MAX_UPLOAD_BYTES = original_limit
+
+
+if __name__ == "__main__":
+    test_preprocessing_stages()
+    test_oversized_images_are_rejected()
+    test_pool_recognizes_and_bounds_admission()
+    test_pool_reports_unavailable_engine()
+    test_ocr_endpoint()
+    print("✅ OCR tests passed")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming OCR sessions: frame differencing, band OCR and stable text deltas
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image
+
+from ocr import OCRPool
+from ocr_image import changed_bands, frame_thumbnail
+from ocr_stream import OCRSession, TextStabilizer, text_delta
+
+LINE_TOPS = [40, 100, 160, 220, 280, 340, 400]
+
+
+class LineEngine:
+    """Reads each dark stripe as a line named after its length, with its position"""
+
+    def recognize_lines(self, pixels):
+        dark = pixels == 0
+        rows = dark.any(axis=1)
+        lines, top = [], None
+        for y, is_dark in enumerate(list(rows) + [False]):
+            if is_dark and top is None:
+                top = y
+            elif not is_dark and top is not None:
+                length = int(dark[top:y].any(axis=0).sum())
+                lines.append((top / len(rows), y / len(rows), f"stripe {round(length / 40)}"))
+                top = None
+        return lines, 0.9
+
+
+def camera_frame(lengths, seed=0, brightness=0) -> bytes:
+    """JPEG of a page of stripes with a little sensor noise"""
+    rng = np.random.default_rng(seed)
+    pixels = np.full((480, 640), 225.0)
+    for top, length in zip(LINE_TOPS, lengths):
+        pixels[top : top + 14, 40 : 40 + length] = 30
+    pixels += rng.normal(0, 3, pixels.shape) + brightness
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def apply_delta(lines, ops):
+    lines = list(lines)
+    for op in ops:
+        lines[op["at"] : op["at"] + op["delete"]] = op["insert"]
+    return lines
+
+
+PAGE = [400, 520, 360, 480, 560, 320, 440]
+
+
+def test_frame_differencing():
+    reference = frame_thumbnail(camera_frame(PAGE, seed=1))
+    assert changed_bands(None, reference, 12, 0.6) == [(0.0, 1.0)]
+    # Sensor noise and an exposure change are not changes
+    assert changed_bands(reference, frame_thumbnail(camera_frame(PAGE, seed=2)), 12, 0.6) == []
+    assert changed_bands(
+        reference, frame_thumbnail(camera_frame(PAGE, seed=3, brightness=-20)), 12, 0.6
+    ) == []
+
+    edited = PAGE[:3] + [160] + PAGE[4:]
+    bands = changed_bands(reference, frame_thumbnail(camera_frame(edited, seed=4)), 12, 0.6)
+    assert len(bands) == 1
+    top, bottom = bands[0]
+    assert top <= 220 / 480 and bottom >= 234 / 480 and bottom - top < 0.3
+
+    other_page = [560, 200, 600, 240, 520, 280, 600]
+    assert changed_bands(
+        reference, frame_thumbnail(camera_frame(other_page, seed=5)), 12, 0.6
+    ) == [(0.0, 1.0)]
+
+
+def test_text_delta_and_stabilizer():
+    old, new = ["a", "b", "c", "d"], ["a", "x", "c", "d", "e"]
+    assert apply_delta(old, text_delta(old, new)) == new
+    assert apply_delta([], text_delta([], new)) == new
+    assert text_delta(new, new) == []
+
+    stabilizer = TextStabilizer(frames=3)
+    assert [stabilizer.observe(t) for t in ["a", "b", "b", "a", "a", "a", "a"]] == [
+        None, None, None, None, None, "a", None,
+    ]
+
+
+def test_session_reads_only_changed_bands_and_emits_deltas():
+    pool = OCRPool(engine="test_ocr_stream:LineEngine", workers=1)
+    session = OCRSession(pool, diff_threshold=12, full_frame_ratio=0.6, stable_frames=2)
+    edited = PAGE[:3] + [160] + PAGE[4:]
+    frames = [camera_frame(PAGE, seed=i) for i in range(4)]
+    frames += [camera_frame(edited, seed=10 + i) for i in range(3)]
+
+    async def run():
+        return [await session.process(frame) for frame in frames]
+
+    try:
+        messages = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    deltas = [m for m in messages if m is not None]
+    assert [messages.index(m) for m in deltas] == [1, 5]
+    lines = apply_delta([], deltas[0]["ops"])
+    assert lines == [f"stripe {round(length / 40)}" for length in PAGE]
+    # One line changed: one op, the rest of the page untouched
+    assert deltas[1]["ops"] == [{"at": 3, "delete": 1, "insert": ["stripe 4"]}]
+    assert apply_delta(lines, deltas[1]["ops"]) == session.text.splitlines()
+
+    assert session.ocr_calls == 2 and session.skipped == 5
+    # A full frame plus a band well under half of one
+    assert 1.0 < session.ocr_area < 1.4
+
+
+def test_websocket_session():
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+
+    import main
+
+    original_pool = main.ocr_pool
+    main.ocr_pool = OCRPool(engine="test_ocr_stream:LineEngine", workers=1)
+    try:
+        client = TestClient(main.app)
+        with client.websocket_connect("/ws/ocr") as websocket:
+            ready = websocket.receive_json()
+            assert ready["type"] == "ready" and ready["stable_frames"] >= 1
+
+            def send(frame):
+                """Messages answering a frame: a stats request is answered after it"""
+                websocket.send_bytes(frame)
+                websocket.send_text('{"type": "stats"}')
+                received = [websocket.receive_json()]
+                while received[-1]["type"] != "stats":
+                    received.append(websocket.receive_json())
+                return received
+
+            messages = []
+            for seed in range(ready["stable_frames"]):
+                messages += send(camera_frame(PAGE, seed=seed))
+            assert [m["type"] for m in messages][-2:] == ["delta", "stats"]
+            assert [m["type"] for m in messages].count("delta") == 1
+            assert len(apply_delta([], messages[-2]["ops"])) == len(PAGE)
+            assert messages[-1]["frames"] == ready["stable_frames"]
+            assert messages[-1]["ocr_calls"] == 1
+
+            assert [m["type"] for m in send(b"not an image")] == ["error", "stats"]
+
+        stats = client.get("/ocr/stats").json()["sessions"]
+        assert stats["opened"] >= 1 and stats["active"] == 0
+        assert stats["ocr_calls"] >= 1 and stats["bytes_out"] > 0
+
+        original_max, main.ocr_sessions.max_sessions = main.ocr_sessions.max_sessions, 0
+        try:
+            with client.websocket_connect("/ws/ocr") as websocket:
+                websocket.receive_json()
+        except WebSocketDisconnect as e:
+            assert e.code == 1013
+        else:
+            raise AssertionError("expected the session to be refused")
+        finally:
+            main.ocr_sessions.max_sessions = original_max
+    finally:
+        main.ocr_pool.shutdown()
+        main.ocr_pool = original_pool
+
+
+if __name__ == "__main__":
+    test_frame_differencing()
+    test_text_delta_and_stabilizer()
+    test_session_reads_only_changed_bands_and_emits_deltas()
+    test_websocket_session()
+    print("✅ OCR stream tests passed")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded bcrypt hashing pool
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from password_hasher import HasherBusyError, PasswordHasher
+
+
+def test_hash_and_verify_off_the_event_loop():
+    hasher = PasswordHasher(workers=2, max_queue=4, rounds=4)
+
+    async def run():
+        hashed = await hasher.hash("secret")
+        return hashed, await hasher.verify("secret", hashed), await hasher.verify("nope", hashed)
+
+    hashed, ok, wrong = asyncio.run(run())
+    hasher.shutdown()
+    assert hashed.startswith("$2b$04$")
+    assert ok and not wrong
+
+
+def test_rejects_beyond_capacity():
+    hasher = PasswordHasher(workers=1, max_queue=1, rounds=4)
+    hasher._hash = lambda password: time.sleep(0.1) or "hashed"
+
+    async def run():
+        return await asyncio.gather(
+            *(hasher.hash("secret") for _ in range(5)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    hasher.shutdown()
+    assert results.count("hashed") == 2
+    assert sum(isinstance(r, HasherBusyError) for r in results) == 3
+    assert hasher.rejected == 3
+    assert hasher.in_flight == 0
+
+
+if __name__ == "__main__":
+    test_hash_and_verify_off_the_event_loop()
+    test_rejects_beyond_capacity()
+    print("✅ Password hasher tests passed")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for phrase segmentation and the per-segment translation pipeline
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import TranslationPipeline
+from segmentation import split_phrases
+
+
+class SlowClient:
+    """Fake PixVerse client that records how many clips render at once"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.rendered = []
+
+    async def generate_sign_language_video(self, text, duration=5, usePixverse=False):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        self.rendered.append(text)
+        if text.rstrip(".") == "broken":
+            return None
+        return f"https://media.stub/{text.replace(' ', '_')}.mp4"
+
+
+def test_split_phrases():
+    assert split_phrases("Hello there. How are you?") == ["Hello there.", "How are you?"]
+    assert split_phrases("line one\nline two") == ["line one", "line two"]
+    assert split_phrases("") == []
+
+    long_sentence = (
+        "The very hungry caterpillar ate through one apple, "
+        "and then he ate through two pears but he was still hungry"
+    )
+    phrases = split_phrases(long_sentence, max_words=6)
+    assert all(len(phrase.split()) <= 6 for phrase in phrases)
+    assert " ".join(phrases).split() == long_sentence.split()
+    assert phrases[0] == "The very hungry caterpillar"
+    assert "and" not in phrases
+
+
+def test_pipeline_renders_segments_concurrently_in_order():
+    client = SlowClient()
+    pipeline = TranslationPipeline(client, concurrency=3, clip_duration=5)
+    text = "One fish. Two fish. Red fish. Blue fish. broken. Old fish."
+
+    result = asyncio.run(pipeline.translate(text, use_pixverse=True))
+
+    assert [s.text for s in result.segments] == [
+        "One fish.", "Two fish.", "Red fish.", "Blue fish.", "broken.", "Old fish.",
+    ]
+    assert client.max_active == 3
+    assert result.video_url == result.segments[0].video_url
+    assert [s.start for s in result.segments] == [0, 5, 10, 15, 20, 20]
+    assert result.segments[4].video_url is None
+    assert result.total_duration == 25
+    assert result.playlist()[1]["video_url"].endswith("Two_fish..mp4")
+
+
+if __name__ == "__main__":
+    test_split_phrases()
+    test_pipeline_renders_segments_concurrently_in_order()
+    print("✅ Pipeline tests passed")
@@ -4,6 +4,7 @@ Standalone test script for PixVerse API integration
 This tests the API directly without going through FastAPI
 """
 
+import asyncio
 import sys
 import os
 
@@ -28,15 +29,15 @@ def test_pixverse_api():
 
     try:
         print("🚀 Testing with usePixverse=False (local asset)...")
-        video_url = pixverse_client.generate_sign_language_video(
-            test_text, usePixverse=False
+        video_url = asyncio.run(
+            pixverse_client.generate_sign_language_video(test_text, usePixverse=False)
         )
         print(f"✅ Local asset URL: {video_url}")
         print(f"📁 Asset should be accessible at: {video_url}")
 
         print("\n🚀 Testing with usePixverse=True (PixVerse API)...")
-        video_url = pixverse_client.generate_sign_language_video(
-            test_text, usePixverse=True
+        video_url = asyncio.run(
+            pixverse_client.generate_sign_language_video(test_text, usePixverse=True)
         )
         if video_url:
             print(f"✅ PixVerse API URL: {video_url}")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Load test for the async PixVerse client.
+
+Starts a local stub PixVerse server that takes a few seconds to "render" each
+video, fires a burst of /api/translate requests at the app and checks that
+/health keeps answering quickly while the generations are still pending.
+"""
+
+import asyncio
+import itertools
+import os
+import socket
+import sys
+import threading
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from config import settings
+
+RENDER_SECONDS = 1.5
+CONCURRENT_TRANSLATIONS = 20
+HEALTH_PROBES = 20
+
+
+def create_stub_pixverse_app(render_seconds: float = RENDER_SECONDS) -> FastAPI:
+    """Minimal stand-in for the PixVerse text-to-video and result endpoints"""
+    stub = FastAPI()
+    started = {}
+    ids = itertools.count(1)
+    stub.state.generate_calls = 0
+    stub.state.status_calls = 0
+
+    @stub.post("/video/text/generate")
+    async def generate(payload: dict):
+        stub.state.generate_calls += 1
+        video_id = next(ids)
+        started[video_id] = time.monotonic()
+        return {"ErrCode": 0, "ErrMsg": "success", "Resp": {"video_id": video_id}}
+
+    @stub.get("/video/result/{video_id}")
+    async def result(video_id: int):
+        stub.state.status_calls += 1
+        if video_id not in started:
+            return {"ErrCode": 400, "ErrMsg": "unknown video id"}
+        done = time.monotonic() - started[video_id] >= render_seconds
+        return {
+            "ErrCode": 0,
+            "ErrMsg": "success",
+            "Resp": {
+                "id": video_id,
+                "status": 1 if done else 5,
+                "url": f"https://media.stub/{video_id}.mp4" if done else None,
+            },
+        }
+
+    return stub
+
+
+class StubServer:
+    """Runs an ASGI app with uvicorn on a background thread"""
+
+    def __init__(self, app: FastAPI):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+TEST_SETTINGS = {
+    "SUPABASE_URL": settings.SUPABASE_URL or "http://localhost:54321",
+    "SUPABASE_ANON_KEY": settings.SUPABASE_ANON_KEY or "test-anon-key",
+    "PIXVERSE_API_KEY": "test-key",
+    "USE_PIXVERSE": True,
+    "POLL_INITIAL_INTERVAL": 0.1,
+    # Twenty distinct generations from one client would exceed its generation budget
+    "RATE_LIMIT_ENABLED": False,
+}
+
+
+def load_app(pixverse_url: str):
+    """Import the FastAPI app wired to the stub PixVerse server"""
+    for name, value in TEST_SETTINGS.items():
+        setattr(settings, name, value)
+
+    import main
+    from pipeline import TranslationPipeline
+    from test_database import FakePostgrest, make_db
+    from pixverse_api import PixVerseAPI
+
+    original = (main.pixverse_client, main.translation_pipeline, main.db)
+    main.pixverse_client = PixVerseAPI(base_url=pixverse_url)
+    main.translation_pipeline = TranslationPipeline(main.pixverse_client)
+    # /health probes the database
+    main.db = make_db(FakePostgrest())
+    return main, original
+
+
+async def run_load(app, client_module) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        start = time.monotonic()
+        translations = [
+            asyncio.create_task(
+                client.post("/api/translate", json={"text": f"sentence {i}"})
+            )
+            for i in range(CONCURRENT_TRANSLATIONS)
+        ]
+
+        health_latencies = []
+        await asyncio.sleep(0.1)
+        for _ in range(HEALTH_PROBES):
+            probe_start = time.monotonic()
+            response = await client.get("/health")
+            assert response.status_code == 200
+            health_latencies.append(time.monotonic() - probe_start)
+            await asyncio.sleep(0.02)
+        health_done = time.monotonic() - start
+        pending_during_health = sum(not task.done() for task in translations)
+
+        responses = await asyncio.gather(*translations)
+        total = time.monotonic() - start
+
+    await client_module.pixverse_client.aclose()
+    return {
+        "responses": responses,
+        "health_latencies": health_latencies,
+        "health_done": health_done,
+        "pending_during_health": pending_during_health,
+        "total": total,
+    }
+
+
+def run_load_test() -> dict:
+    stub = create_stub_pixverse_app()
+    saved = {name: getattr(settings, name) for name in TEST_SETTINGS}
+    try:
+        with StubServer(stub) as server:
+            main, original = load_app(server.url)
+            try:
+                result = asyncio.run(run_load(main.app, main))
+            finally:
+                main.pixverse_client, main.translation_pipeline, main.db = original
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+    result["generate_calls"] = stub.state.generate_calls
+    return result
+
+
+def test_translate_does_not_block_event_loop():
+    result = run_load_test()
+
+    for response in result["responses"]:
+        assert response.status_code == 200
+        assert response.json()["video_url"].startswith("https://media.stub/")
+
+    # /health was answered while every translation was still rendering
+    assert result["pending_during_health"] == CONCURRENT_TRANSLATIONS
+    assert max(result["health_latencies"]) < 0.25
+    # The renders overlap instead of running back to back
+    assert result["total"] < RENDER_SECONDS * 3
+    assert result["generate_calls"] == CONCURRENT_TRANSLATIONS
+
+
+if __name__ == "__main__":
+    print("🧪 Load testing /api/translate against a stub PixVerse server")
+    print("=" * 50)
+    result = run_load_test()
+    latencies = sorted(result["health_latencies"])
+    print(f"📨 Concurrent translations: {CONCURRENT_TRANSLATIONS}")
+    print(f"⏱️  All translations finished in {result['total']:.2f}s")
+    print(f"💓 /health p50: {latencies[len(latencies) // 2] * 1000:.1f}ms")
+    print(f"💓 /health max: {latencies[-1] * 1000:.1f}ms")
+    print(f"⏳ Translations still pending during probes: {result['pending_during_health']}")
+    print("\n🏁 Load test completed!")
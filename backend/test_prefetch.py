@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Tests for book page prefetch plans: ranking, clip sizes, preload links and background renders
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+import main
+from asset_index import AssetIndex
+from config import settings
+from pipeline import TranslationPipeline
+from pixverse_api import FallbackVideo
+from prefetch import Prefetcher
+from test_database import FakePostgrest, make_db
+
+PAGE = "The cat sat. It was warm. Where is the dog? See you soon."
+BLOB_URL = "/assets/blobs/ab/ab12.mp4"
+
+
+class RenderingClient:
+    """Fake PixVerse client: `cached` phrases have a blob, others render after `delay`"""
+
+    def __init__(self, cached=(), delay=0.0, offline=False):
+        self.cached = set(cached)
+        self.delay = delay
+        self.offline = offline
+        self.generated = []
+
+    async def cached_sign_language_video(self, text, duration=5):
+        return BLOB_URL if text in self.cached else None
+
+    async def generate_sign_language_video(self, text, duration=5, usePixverse=False):
+        assert usePixverse
+        await asyncio.sleep(self.delay)
+        if self.offline:
+            return FallbackVideo("/assets/the cat sat.mp4")
+        self.generated.append(text)
+        self.cached.add(text)
+        return BLOB_URL
+
+
+def make_library(tmp):
+    """An asset clip for "the cat sat" and a 2 KiB mirrored blob"""
+    assets = os.path.join(tmp, "assets")
+    os.makedirs(os.path.join(assets, "blobs", "ab"))
+    with open(os.path.join(assets, "the cat sat.mp4"), "wb") as f:
+        f.write(b"\0" * 1000)
+    with open(os.path.join(assets, "blobs", "ab", "ab12.mp4"), "wb") as f:
+        f.write(b"\0" * 2048)
+    index = AssetIndex(directory=assets)
+    index.refresh()
+    return assets, index
+
+
+def make_prefetcher(tmp, client, store=None, **kwargs):
+    assets, index = make_library(tmp)
+    pipeline = TranslationPipeline(client, asset_index=index)
+    return Prefetcher(
+        pipeline,
+        store=store,
+        assets_dir=assets,
+        blobs_dir=os.path.join(assets, "blobs"),
+        **kwargs,
+    )
+
+
+def test_plan_ranks_by_reading_position_and_taps():
+    fake = FakePostgrest()
+    fake.tables["text_translations"] = [
+        {"text": text}
+        for text in ["Where is the dog?"] * 4 + ["where is the dog", "it was warm", "Hello"]
+    ]
+    client = RenderingClient(cached={"It was warm."})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prefetcher = make_prefetcher(tmp, client, store=make_db(fake), tap_weight=1.0)
+
+        plan = asyncio.run(prefetcher.plan(PAGE, position=0, use_pixverse=True))
+        items = {item.text: item for item in plan.items}
+        # Past taps put the dog, then the warmth, ahead of the page's first phrase
+        assert [item.text for item in plan.items] == [
+            "Where is the dog?", "It was warm.", "The cat sat.", "See you soon.",
+        ]
+        assert items["Where is the dog?"].taps == 5 and items["It was warm."].taps == 1
+        assert items["The cat sat."].source == "asset"
+        assert (items["The cat sat."].status, items["The cat sat."].size) == ("ready", 1000)
+        assert (items["It was warm."].video_url, items["It was warm."].size) == (BLOB_URL, 2048)
+        assert [item.text for item in plan.missing] == ["Where is the dog?", "See you soon."]
+
+        summary = plan.to_dict()
+        assert (summary["ready"], summary["missing"], summary["bytes"]) == (2, 2, 3048)
+        assert plan.preload_links(1) == [f"<{BLOB_URL}>; rel=preload; as=video"]
+        assert plan.preload_links(4)[1] == "</assets/the%20cat%20sat.mp4>; rel=preload; as=video"
+        assert len(plan.preload_links(4)) == 2
+
+        # Past "The cat sat.": it ranks last. Tap counts come from the cache
+        requests = fake.requests
+        plan = asyncio.run(prefetcher.plan(PAGE, position=4, use_pixverse=True))
+        assert plan.items[-1].text == "The cat sat."
+        assert plan.items[0].text == "Where is the dog?"
+        assert fake.requests == requests
+
+        # Without tap counts the plan follows the reader
+        fake.fail = True
+        prefetcher = make_prefetcher(tmp + "/again", client, store=make_db(fake))
+        plan = asyncio.run(prefetcher.plan(PAGE, position=4, use_pixverse=True))
+        assert [item.text for item in plan.items] == [
+            "It was warm.", "Where is the dog?", "See you soon.", "The cat sat.",
+        ]
+        assert prefetcher.stats()["tap_errors"] == 1
+
+
+def test_missing_phrases_render_in_the_background():
+    client = RenderingClient(delay=0.05)
+
+    async def run(prefetcher):
+        plan = await prefetcher.plan(PAGE, use_pixverse=True)
+        assert len(plan.missing) == 3
+        assert prefetcher.generate(plan.missing) == 2
+        assert [item.status for item in plan.items if item.source == "generated"] == [
+            "generating", "generating", "missing",
+        ]
+
+        # Pending renders are reported, not started twice
+        plan = await prefetcher.plan(PAGE, use_pixverse=True)
+        assert [item.status for item in plan.missing] == ["missing"]
+        assert prefetcher.generate(plan.items[1:3]) == 0
+
+        await asyncio.sleep(0.1)
+        plan = await prefetcher.plan(PAGE, use_pixverse=True)
+        assert [item.text for item in plan.missing] == ["See you soon."]
+
+        # Shutdown cancels what is still rendering
+        prefetcher.generate(plan.missing)
+        await prefetcher.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prefetcher = make_prefetcher(tmp, client, max_pending=2)
+        asyncio.run(run(prefetcher))
+        assert sorted(client.generated) == ["It was warm.", "Where is the dog?"]
+        stats = prefetcher.stats()
+        assert (stats["started"], stats["generated"], stats["deferred"]) == (3, 2, 1)
+        assert stats["pending"] == 0
+
+
+def test_local_stand_ins_are_not_counted_as_generated():
+    client = RenderingClient(offline=True)
+
+    async def run(prefetcher):
+        plan = await prefetcher.plan(PAGE, use_pixverse=True)
+        prefetcher.generate(plan.missing)
+        await asyncio.sleep(0.05)
+        # Still missing: the next plan tries the render again
+        plan = await prefetcher.plan(PAGE, use_pixverse=True)
+        assert len(plan.missing) == 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prefetcher = make_prefetcher(tmp, client)
+        asyncio.run(run(prefetcher))
+        stats = prefetcher.stats()
+        assert (stats["started"], stats["generated"], stats["failed"]) == (3, 0, 3)
+
+
+def test_prefetch_endpoint():
+    saved = {name: getattr(settings, name) for name in ("USE_PIXVERSE", "RATE_LIMIT_ENABLED")}
+    original = main.prefetcher
+    settings.USE_PIXVERSE, settings.RATE_LIMIT_ENABLED = True, False
+    client = RenderingClient(cached={"It was warm."}, delay=0.01)
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+            response = await http.post("/api/prefetch", json={"text": PAGE})
+            assert response.status_code == 200
+            assert response.headers["Link"] == (
+                "</assets/the%20cat%20sat.mp4>; rel=preload; as=video, "
+                f"<{BLOB_URL}>; rel=preload; as=video"
+            )
+            plan = response.json()
+            assert (plan["ready"], plan["generating"], plan["missing"]) == (2, 2, 0)
+            assert plan["items"][0]["bytes"] == 1000
+
+            too_long = await http.post("/api/prefetch", json={"text": "word " * 5000})
+            assert too_long.status_code == 413
+
+            await asyncio.sleep(0.05)
+            stats = (await http.get("/prefetch/stats")).json()
+            assert stats["generated"] == 2 and stats["pending"] == 0
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            main.prefetcher = make_prefetcher(tmp, client)
+            asyncio.run(run())
+        assert sorted(client.generated) == ["See you soon.", "Where is the dog?"]
+    finally:
+        main.prefetcher = original
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+if __name__ == "__main__":
+    test_plan_ranks_by_reading_position_and_taps()
+    test_missing_phrases_render_in_the_background()
+    test_local_stand_ins_are_not_counted_as_generated()
+    test_prefetch_endpoint()
+    print("✅ Prefetch tests passed")
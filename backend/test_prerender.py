@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-render CLI: corpus readers, resumable scheduling and manifest
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from asset_index import AssetIndex
+from pipeline import TranslationPipeline
+from pixverse_api import FallbackVideo
+from prerender import Prerenderer, plan_phrases, read_corpus
+
+CONTAINER = """<?xml version="1.0"?>
+<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container" version="1.0">
+  <rootfiles><rootfile full-path="OEBPS/content.opf"/></rootfiles>
+</container>"""
+
+OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0">
+  <manifest>
+    <item id="ch2" href="text/ch2.xhtml" media-type="application/xhtml+xml"/>
+    <item id="ch1" href="text/ch1.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine><itemref idref="ch1"/><itemref idref="ch2"/></spine>
+</package>"""
+
+
+def chapter(*paragraphs):
+    body = "".join(f"<p>{p}</p>" for p in paragraphs)
+    return f"<html><body><h1>Chapter</h1>{body}</body></html>"
+
+
+class FakeClient:
+    def __init__(self, cached=(), fail=(), delay=0.0, stand_in=()):
+        self.cached = set(cached)
+        self.fail = set(fail)
+        self.stand_in = set(stand_in)
+        self.delay = delay
+        self.generated = []
+        self.started = []
+
+    async def cached_sign_language_video(self, text, duration=5, similar=True):
+        assert not similar
+        return f"https://cdn/cached/{text}.mp4" if text in self.cached else None
+
+    async def generate_sign_language_video(
+        self, text, duration=5, usePixverse=False, similar=True
+    ):
+        assert usePixverse and not similar
+        self.started.append(time.monotonic())
+        await asyncio.sleep(self.delay)
+        if text in self.fail:
+            return None
+        if text in self.stand_in:
+            return FallbackVideo("/assets/closest.mp4")
+        self.generated.append(text)
+        return f"https://cdn/{text}.mp4"
+
+
+def test_corpus_readers():
+    with tempfile.TemporaryDirectory() as tmp:
+        txt = os.path.join(tmp, "book.txt")
+        with open(txt, "w") as f:
+            f.write("The cat sat.\nIt was warm.\n\n\nThe dog ran.\n")
+        assert list(read_corpus(txt)) == ["The cat sat. It was warm.", "The dog ran."]
+
+        jsonl = os.path.join(tmp, "pages.jsonl")
+        with open(jsonl, "w") as f:
+            f.write('{"page": 1, "text": "Hello there."}\n\n"Just a string."\n')
+        assert list(read_corpus(jsonl)) == ["Hello there.", "Just a string."]
+
+        epub = os.path.join(tmp, "book.epub")
+        with zipfile.ZipFile(epub, "w") as z:
+            z.writestr("mimetype", "application/epub+zip")
+            z.writestr("META-INF/container.xml", CONTAINER)
+            z.writestr("OEBPS/content.opf", OPF)
+            z.writestr("OEBPS/text/ch1.xhtml", chapter("Once upon a time.", "The <em>end</em>?"))
+            z.writestr("OEBPS/text/ch2.xhtml", chapter("Part two."))
+        assert list(read_corpus(epub)) == [
+            "Chapter", "Once upon a time.", "The end?", "Chapter", "Part two.",
+        ]
+
+
+def test_plan_skips_local_clips_and_duplicates():
+    with tempfile.TemporaryDirectory() as tmp:
+        open(os.path.join(tmp, "what's your name.mp4"), "wb").close()
+        index = AssetIndex(tmp)
+        index.refresh()
+        pipeline = TranslationPipeline(FakeClient(), asset_index=index)
+        phrases = plan_phrases(
+            ["What's your name?", "The dog ran home.", "the dog ran home"], pipeline
+        )
+        assert phrases == ["The dog ran home."]
+
+
+def test_resumes_from_checkpoint_and_writes_manifest():
+    phrases = [f"phrase {i}" for i in range(12)]
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = os.path.join(tmp, "manifest.json")
+
+        # First run is interrupted after a few phrases
+        first = FakeClient(cached={"phrase 0"}, fail={"phrase 3"}, delay=0.02)
+        prerenderer = Prerenderer(first, manifest_path, concurrency=2, rate=1000, manifest_every=2)
+
+        async def interrupted():
+            task = asyncio.create_task(prerenderer.run(phrases))
+            await asyncio.sleep(0.07)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(interrupted())
+        with open(manifest_path) as f:
+            partial = json.load(f)
+        assert "phrase 0" in partial and 0 < len(partial) < len(phrases)
+
+        # Simulate a crash in the middle of writing a checkpoint line
+        with open(prerenderer.checkpoint_path, "a") as f:
+            f.write('{"key": "phrase 11", "sta')
+
+        second = FakeClient(cached={"phrase 0"}, delay=0.001)
+        resumed = Prerenderer(second, manifest_path, concurrency=3, rate=1000)
+        summary = asyncio.run(resumed.run(phrases))
+
+        # Nothing finished in the first run is generated again; the failure is retried
+        assert not set(first.generated) & set(second.generated)
+        assert "phrase 3" in second.generated
+        assert summary["resumed"] == len(partial)
+        assert summary["remaining"] == 0 and summary["failed"] == 0
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        assert set(manifest) == set(phrases)
+        assert manifest["phrase 0"] == "https://cdn/cached/phrase 0.mp4"
+        assert manifest["phrase 5"] == "https://cdn/phrase 5.mp4"
+
+
+def test_local_stand_ins_are_not_checkpointed():
+    phrases = ["phrase 0", "phrase 1"]
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = os.path.join(tmp, "manifest.json")
+        first = Prerenderer(FakeClient(stand_in={"phrase 1"}), manifest_path, rate=1000)
+        summary = asyncio.run(first.run(phrases))
+        assert (summary["done"], summary["failed"]) == (1, 1)
+        with open(manifest_path) as f:
+            assert set(json.load(f)) == {"phrase 0"}
+
+        # The next run renders it for real
+        client = FakeClient()
+        asyncio.run(Prerenderer(client, manifest_path, rate=1000).run(phrases))
+        assert client.generated == ["phrase 1"]
+
+
+def test_generation_starts_are_rate_limited():
+    client = FakeClient()
+    with tempfile.TemporaryDirectory() as tmp:
+        prerenderer = Prerenderer(
+            client, os.path.join(tmp, "manifest.json"), concurrency=4, rate=20
+        )
+        asyncio.run(prerenderer.run([f"p{i}" for i in range(5)]))
+    gaps = [b - a for a, b in zip(client.started, client.started[1:])]
+    # A bucket of one token at 20/s: starts are about 50 ms apart
+    assert min(gaps) >= 0.04
+
+
+if __name__ == "__main__":
+    test_corpus_readers()
+    test_plan_skips_local_clips_and_duplicates()
+    test_resumes_from_checkpoint_and_writes_manifest()
+    test_local_stand_ins_are_not_checkpointed()
+    test_generation_starts_are_rate_limited()
+    print("✅ Pre-render tests passed")
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Tests for the PixVerse resilience layer against a fault-injecting PixVerse
+simulator: deadlines, retries under a budget, the circuit breaker, hedged
+status checks and the local fallback
+"""
+
+import asyncio
+import itertools
+import os
+import sys
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+import main
+from asset_index import AssetIndex
+from config import settings
+from pixverse_api import FallbackVideo, PixVerseAPI, PixVerseError
+from resilience import CircuitBreaker, CircuitOpenError, Resilience, RetryBudget
+from similarity_index import SimilarityIndex
+from status_poller import StatusPoller
+from test_database import FakePostgrest, make_db
+
+TIMEOUTS = ("PIXVERSE_GENERATE_TIMEOUT", "PIXVERSE_STATUS_TIMEOUT", "PIXVERSE_HEDGE_DELAY")
+
+
+def create_faulty_pixverse_app(render_seconds: float = 0.05) -> FastAPI:
+    """
+    PixVerse simulator with fault knobs on app.state: `generate_errors` and
+    `status_errors` (status codes returned by the next calls), `down` (every
+    call fails with a 500), `hang_generate` (generate never answers),
+    `slow_first_status` (seconds the first status check of each video takes)
+    and `err_code` (a refusal in the JSON body).
+    """
+    sim = FastAPI()
+    started = {}
+    ids = itertools.count(1)
+    sim.state.generate_errors = []
+    sim.state.status_errors = []
+    sim.state.down = False
+    sim.state.hang_generate = False
+    sim.state.slow_first_status = 0.0
+    sim.state.err_code = 0
+    sim.state.generate_calls = 0
+    sim.state.status_calls = 0
+
+    def fault(errors):
+        if sim.state.down:
+            return JSONResponse({"ErrMsg": "internal error"}, status_code=500)
+        if errors:
+            return JSONResponse({"ErrMsg": "injected"}, status_code=errors.pop(0))
+        return None
+
+    @sim.post("/video/text/generate")
+    async def generate(payload: dict):
+        sim.state.generate_calls += 1
+        failure = fault(sim.state.generate_errors)
+        if failure is not None:
+            return failure
+        if sim.state.hang_generate:
+            await asyncio.sleep(3600)
+        if sim.state.err_code:
+            return {"ErrCode": sim.state.err_code, "ErrMsg": "prompt rejected"}
+        video_id = next(ids)
+        started[video_id] = time.monotonic()
+        return {"ErrCode": 0, "ErrMsg": "success", "Resp": {"video_id": video_id}}
+
+    @sim.get("/video/result/{video_id}")
+    async def result(video_id: int):
+        sim.state.status_calls += 1
+        failure = fault(sim.state.status_errors)
+        if failure is not None:
+            return failure
+        if video_id not in started:
+            return {"ErrCode": 400, "ErrMsg": "unknown video id"}
+        if sim.state.slow_first_status and sim.state.status_calls == 1:
+            await asyncio.sleep(sim.state.slow_first_status)
+        done = time.monotonic() - started[video_id] >= render_seconds
+        return {
+            "ErrCode": 0,
+            "ErrMsg": "success",
+            "Resp": {
+                "id": video_id,
+                "status": 1 if done else 5,
+                "url": f"https://media.sim/{video_id}.mp4" if done else None,
+            },
+        }
+
+    return sim
+
+
+def make_client(sim: FastAPI, budget: RetryBudget = None, **kwargs) -> PixVerseAPI:
+    """PixVerse client talking to the simulator in-process, with fast backoff and polling"""
+    client = PixVerseAPI(
+        base_url="http://pixverse.sim",
+        transport=httpx.ASGITransport(app=sim),
+        resilience=Resilience(
+            breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.2),
+            budget=budget or RetryBudget(ratio=0.2, min_per_second=0),
+            retries=2,
+            base_delay=0.01,
+            max_delay=0.02,
+        ),
+        **kwargs,
+    )
+    client.api_key = "test-key"
+    client.poller = StatusPoller(client.check_status, initial_interval=0.01, max_interval=0.05)
+    return client
+
+
+def with_timeouts(generate: float = 1.0, status: float = 1.0, hedge: float = 0.0):
+    """Override the per-operation deadlines; returns the values to restore"""
+    saved = {name: getattr(settings, name) for name in TIMEOUTS}
+    settings.PIXVERSE_GENERATE_TIMEOUT = generate
+    settings.PIXVERSE_STATUS_TIMEOUT = status
+    settings.PIXVERSE_HEDGE_DELAY = hedge
+    return saved
+
+
+def restore(saved):
+    for name, value in saved.items():
+        setattr(settings, name, value)
+
+
+def test_retry_budget_and_breaker_states():
+    now = [0.0]
+    budget = RetryBudget(ratio=0.5, min_per_second=1.0, burst=2.0, clock=lambda: now[0])
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+    # Two calls earn one retry; so does a second of low traffic
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_withdraw() and not budget.try_withdraw()
+    now[0] += 1.0
+    assert budget.try_withdraw()
+    assert budget.stats()["withdrawn"] == 4 and budget.stats()["exhausted"] == 2
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    try:
+        breaker.before_call()
+        raise AssertionError("open circuit let a call through")
+    except CircuitOpenError as e:
+        assert e.retry_after == 10.0
+
+    # After the reset timeout one probe goes through; a failed probe reopens
+    now[0] += 10.0
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    try:
+        breaker.before_call()
+        raise AssertionError("second probe let through")
+    except CircuitOpenError:
+        pass
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] += 10.0
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats()["opened"] == 2 and breaker.stats()["rejected"] == 2
+
+
+def test_unsent_generations_are_retried_within_budget():
+    sim = create_faulty_pixverse_app()
+    client = make_client(sim, budget=RetryBudget(ratio=0.0, min_per_second=0, burst=3.0))
+
+    async def run():
+        # Two 503s: PixVerse never started a job, so retrying is safe
+        sim.state.generate_errors = [503, 503]
+        result = await client.generate_video("hello")
+        assert result["Resp"]["video_id"] == 1
+        assert sim.state.generate_calls == 3
+
+        # A 500 may have started a render: not retried, so never paid twice
+        sim.state.generate_errors = [500]
+        try:
+            await client.generate_video("hello")
+            raise AssertionError("500 was swallowed")
+        except httpx.HTTPStatusError:
+            pass
+        assert sim.state.generate_calls == 4
+        assert (await client.check_status("1"))[0] in (1, 5)
+
+        # Status checks retry transient errors, until the budget runs out
+        sim.state.status_errors = [502, 502]
+        try:
+            await client.check_status("1")
+            raise AssertionError("budget did not stop the retries")
+        except httpx.HTTPStatusError:
+            pass
+        assert sim.state.status_calls == 3
+        await client.aclose()
+
+    saved = with_timeouts()
+    try:
+        asyncio.run(run())
+    finally:
+        restore(saved)
+    stats = client.stats()
+    assert (stats["retries"], stats["retry_budget"]["exhausted"]) == (3, 1)
+    assert stats["failures"] == 2
+
+
+def test_breaker_fails_fast_while_upstream_is_down():
+    sim = create_faulty_pixverse_app()
+    client = make_client(sim)
+
+    async def run():
+        await client.generate_video("hello")
+        sim.state.down = True
+        # Three failed attempts (the call and its two retries) open the circuit
+        try:
+            await client.check_status("1")
+            raise AssertionError("500 was swallowed")
+        except httpx.HTTPStatusError:
+            pass
+        calls = sim.state.status_calls
+        assert calls == 3
+
+        # Open: calls fail at once, without reaching PixVerse
+        started = time.monotonic()
+        try:
+            await client.check_status("1")
+            raise AssertionError("open circuit called upstream")
+        except CircuitOpenError:
+            pass
+        assert time.monotonic() - started < 0.05
+        assert sim.state.status_calls == calls
+
+        # Half-open after the reset timeout: a successful probe closes it
+        sim.state.down = False
+        await asyncio.sleep(0.25)
+        assert await client.check_status("1") == (1, "https://media.sim/1.mp4")
+        await client.aclose()
+
+    saved = with_timeouts()
+    try:
+        asyncio.run(run())
+    finally:
+        restore(saved)
+    circuit = client.stats()["circuit"]
+    assert (circuit["state"], circuit["opened"], circuit["rejected"]) == ("closed", 1, 1)
+
+
+def test_hedged_status_check_cuts_tail_latency():
+    sim = create_faulty_pixverse_app(render_seconds=0.0)
+    client = make_client(sim)
+
+    async def run():
+        await client.generate_video("hello")
+        sim.state.slow_first_status = 2.0
+        started = time.monotonic()
+        result = await client.check_status("1")
+        elapsed = time.monotonic() - started
+        await client.aclose()
+        return result, elapsed
+
+    saved = with_timeouts(status=5.0, hedge=0.05)
+    try:
+        result, elapsed = asyncio.run(run())
+    finally:
+        restore(saved)
+    assert result == (1, "https://media.sim/1.mp4")
+    assert elapsed < 0.5
+    stats = client.stats()
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_failed_generation_falls_back_to_closest_local_video():
+    sim = create_faulty_pixverse_app()
+    assets = AssetIndex()
+    assets.add("wasnt hungry anymore", "/assets/wasnt hungry anymore.mp4")
+    client = make_client(sim, similar=SimilarityIndex(min_chars=8), assets=assets)
+    client.similar.add("The very hungry caterpillar ate", "/assets/blobs/ca/caterpillar.mp4")
+
+    async def run():
+        # Rendered normally while PixVerse is healthy
+        assert await client.generate_sign_language_video(
+            "Where is the library", usePixverse=True
+        ) == "https://media.sim/1.mp4"
+
+        # generate hangs: the deadline cuts it short and a loose match plays
+        sim.state.hang_generate = True
+        started = time.monotonic()
+        similar = await client.generate_sign_language_video(
+            "The hungry caterpilar ate an apple", usePixverse=True
+        )
+        assert time.monotonic() - started < 1.0
+
+        # PixVerse refuses: the asset clip covering the most words plays
+        sim.state.hang_generate, sim.state.err_code = False, 1
+        try:
+            await client.generate_video("anything")
+            raise AssertionError("refusal was swallowed")
+        except PixVerseError:
+            pass
+        covered = await client.generate_sign_language_video(
+            "Now he wasnt hungry anymore", usePixverse=True
+        )
+
+        # Nothing related locally: no video rather than a wrong one
+        unrelated = await client.generate_sign_language_video(
+            "Zorblax quintessential flumph", usePixverse=True
+        )
+        await client.aclose()
+        return similar, covered, unrelated
+
+    saved = with_timeouts(generate=0.1)
+    try:
+        similar, covered, unrelated = asyncio.run(run())
+    finally:
+        restore(saved)
+    assert similar == "/assets/blobs/ca/caterpillar.mp4"
+    assert covered == "/assets/wasnt hungry anymore.mp4"
+    # Stand-ins are marked so callers play them without saving them
+    assert isinstance(similar, FallbackVideo) and isinstance(covered, FallbackVideo)
+    assert unrelated is None
+    stats = client.stats()
+    assert (stats["fallbacks"], stats["timeouts"]) == (3, 1)
+
+
+def test_translate_endpoint_reports_fallback():
+    sim = create_faulty_pixverse_app()
+    sim.state.down = True
+    assets = AssetIndex()
+    assets.add("zorblax quintessential", "/assets/zorblax.mp4")
+    client = make_client(sim, assets=assets)
+    fake = FakePostgrest()
+    saved = {name: getattr(settings, name) for name in ("USE_PIXVERSE", "RATE_LIMIT_ENABLED")}
+    original = main.pixverse_client, main.translation_pipeline.client, main.db
+    settings.USE_PIXVERSE, settings.RATE_LIMIT_ENABLED = True, False
+    main.pixverse_client = main.translation_pipeline.client = client
+    main.db = make_db(fake)
+    token = main.create_access_token({"sub": "user-1"})
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as http:
+            response = await http.post("/api/translate", json={"text": "Flumph blorf quux"})
+            assert response.status_code == 200
+            body = response.json()
+            assert (body["status"], body["video_url"]) == ("fallback", None)
+
+            # A stand-in clip is played and reported as such
+            body = (
+                await http.post("/api/translate", json={"text": "Zorblax quintessential flumph"})
+            ).json()
+            assert (body["status"], body["video_url"]) == ("fallback", "/assets/zorblax.mp4")
+            assert body["segments"][0]["fallback"]
+
+            # ...and never saved as the text's translation
+            signed_in = await http.post(
+                "/translate",
+                json={"text": "Zorblax quintessential flumph"},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            assert signed_in.status_code == 200
+            assert signed_in.json()["status"] == "fallback" and signed_in.json()["id"] is None
+            assert not fake.tables.get("text_translations")
+
+            stats = (await http.get("/pixverse/stats")).json()
+            assert stats["fallbacks"] == 3
+        await client.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        main.pixverse_client, main.translation_pipeline.client, main.db = original
+        restore(saved)
+
+
+if __name__ == "__main__":
+    test_retry_budget_and_breaker_states()
+    test_unsent_generations_are_retried_within_budget()
+    test_breaker_fails_fast_while_upstream_is_down()
+    test_hedged_status_check_cuts_tail_latency()
+    test_failed_generation_falls_back_to_closest_local_video()
+    test_translate_endpoint_reports_fallback()
+    print("✅ Resilience tests passed")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tests for state shared between worker processes: SQLite key/value store,
+SQLite token buckets, cross-worker job status and the app lifespan
+"""
+
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from admission import Limit, load_backend
+from config import settings
+from jobs import JOB_COMPLETED, JOB_RUNNING, JobManager
+from shared_state import MemoryStateStore, SQLiteRateLimitBackend, SQLiteStateStore, StatePruner
+
+
+def test_state_stores_share_entries_with_expiry():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        # Two stores on one file stand in for two worker processes
+        first, second = SQLiteStateStore(path), SQLiteStateStore(path)
+        memory = MemoryStateStore(max_entries=10, ttl=60)
+
+        async def run():
+            for writer, reader in ((first, second), (memory, memory)):
+                await writer.set("job:1", {"status": "running"})
+                assert await reader.get("job:1") == {"status": "running"}
+                await writer.set("job:2", {"status": "queued"}, ttl=-1)
+                assert await reader.get("job:2") is None
+                await writer.delete("job:1")
+                assert await reader.get("job:1") is None
+
+        asyncio.run(run())
+        assert first.prune() == 1
+        assert second.stats()["entries"] == 0
+        first.close()
+        second.close()
+
+
+def spend_tokens(path: str, attempts: int, admitted):
+    backend = SQLiteRateLimitBackend(path)
+    limit = Limit("ip:203.0.113.9", rate=0.001, burst=12)
+    for _ in range(attempts):
+        if not asyncio.run(backend.acquire([limit])):
+            with admitted.get_lock():
+                admitted.value += 1
+
+
+def test_sqlite_buckets_are_shared_across_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        context = multiprocessing.get_context("spawn")
+        admitted = context.Value("i", 0)
+        workers = [
+            context.Process(target=spend_tokens, args=(path, 10, admitted)) for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            assert worker.exitcode == 0
+        # 40 attempts from four processes, exactly the burst of 12 admitted
+        assert admitted.value == 12
+
+
+def test_sqlite_buckets_refill_and_reject_together():
+    with tempfile.TemporaryDirectory() as tmp:
+        now = [1000.0]
+        backend = SQLiteRateLimitBackend(os.path.join(tmp, "state.db"), clock=lambda: now[0])
+        ip = Limit("ip:a", rate=1, burst=2)
+        generations = Limit("ip:a:generations", rate=0.1, burst=1)
+
+        async def run():
+            assert await backend.acquire([ip, generations]) == {}
+            waits = await backend.acquire([ip, generations])
+            assert list(waits) == ["ip:a:generations"]
+            assert abs(waits["ip:a:generations"] - 10.0) < 1e-6
+            # The refused request did not spend its IP token
+            assert await backend.acquire([ip]) == {}
+            assert "ip:a" in await backend.acquire([ip])
+            now[0] += 10
+            assert await backend.acquire([ip, generations]) == {}
+
+        asyncio.run(run())
+        assert isinstance(load_backend("sqlite"), SQLiteRateLimitBackend)
+
+
+def test_jobs_are_visible_from_other_workers():
+    saved = settings.JOB_SHARED_POLL_INTERVAL
+    settings.JOB_SHARED_POLL_INTERVAL = 0.02
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.db")
+            release = None
+
+            async def generate(text):
+                await release.wait()
+                return f"/clips/{text}.mp4"
+
+            async def run():
+                nonlocal release
+                release = asyncio.Event()
+                # The job runs in "worker A"; "worker B" only shares the store
+                worker_a = JobManager(generate, workers=1, shared=SQLiteStateStore(path))
+                worker_b = JobManager(generate, workers=1, shared=SQLiteStateStore(path))
+                worker_a.start()
+                job = await worker_a.submit("hello")
+                await asyncio.sleep(0.05)
+                assert (await worker_b.lookup(job.id))["status"] == JOB_RUNNING
+
+                async def follow():
+                    return [state async for state in worker_b.watch(job.id, heartbeat=10)]
+
+                watcher = asyncio.create_task(follow())
+                await asyncio.sleep(0.1)
+                release.set()
+                states = await asyncio.wait_for(watcher, timeout=5)
+                await worker_a.stop()
+                return states
+
+            states = asyncio.run(run())
+    finally:
+        settings.JOB_SHARED_POLL_INTERVAL = saved
+    assert [state["status"] for state in states] == [JOB_RUNNING, JOB_COMPLETED]
+    assert states[-1]["video_url"] == "/clips/hello.mp4"
+
+
+def test_sqlite_tables_are_pruned_and_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        now = [1000.0]
+        store = SQLiteStateStore(path, max_entries=3)
+        buckets = SQLiteRateLimitBackend(path, clock=lambda: now[0])
+        pruner = StatePruner([store, buckets, MemoryStateStore()], interval=60)
+        assert pruner.stores == [store, buckets]
+
+        async def run():
+            for i in range(5):
+                await store.set(f"job:{i}", {"status": "completed"}, ttl=100 + i)
+            await store.set("job:expired", {"status": "failed"}, ttl=-1)
+            await buckets.acquire([Limit("ip:a", rate=1, burst=2)])
+            now[0] += 10
+            pruner.start()
+            await asyncio.sleep(0.05)
+            await pruner.stop()
+
+        asyncio.run(run())
+        # The expired entry, the two closest to expiring and the refilled bucket
+        assert pruner.pruned == 4
+        assert store.stats()["entries"] == 3 and len(buckets) == 0
+        assert asyncio.run(store.get("job:4")) is not None
+        assert asyncio.run(store.get("job:0")) is None
+        store.close()
+        buckets.close()
+
+
+def test_uvicorn_workers_refuse_memory_state():
+    env = {**os.environ, "WEB_CONCURRENCY": "2", "SHARED_STATE_BACKEND": "memory"}
+    result = subprocess.run(
+        [sys.executable, "main.py"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode != 0
+    assert "SHARED_STATE_BACKEND=memory cannot be shared by 2 workers" in result.stderr
+
+
+def test_lifespan_starts_and_stops_worker_pools():
+    with TestClient(main.app) as client:
+        assert client.get("/").status_code == 200
+        assert main.job_manager._tasks
+        assert main.loop_lag_monitor._task is not None
+    assert not main.job_manager._tasks
+    assert main.loop_lag_monitor._task is None
+
+
+if __name__ == "__main__":
+    test_state_stores_share_entries_with_expiry()
+    test_sqlite_buckets_are_shared_across_processes()
+    test_sqlite_buckets_refill_and_reject_together()
+    test_jobs_are_visible_from_other_workers()
+    test_sqlite_tables_are_pruned_and_bounded()
+    test_uvicorn_workers_refuse_memory_state()
+    test_lifespan_starts_and_stops_worker_pools()
+    print("✅ Shared state tests passed")
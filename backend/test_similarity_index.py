@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for fuzzy near-duplicate matching of translated texts
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from asset_index import AssetIndex
+from similarity_index import SimilarityIndex, SimilarityLoader, changed_words, fuzzy_text
+from test_database import FakePostgrest, make_db
+from test_singleflight import FakePixVerse
+
+
+def test_ocr_noise_matches_and_unrelated_text_does_not():
+    index = SimilarityIndex(threshold=0.8, min_chars=8)
+    assert index.add("wasn't hungry any more.", "/videos/hungry.mp4")
+    assert index.add("the cat sat on the mat", "/videos/cat.mp4")
+    assert index.add("see you tomorrow morning", "/videos/tomorrow.mp4")
+
+    for noisy in ["wasnt hungry anymore", "Wasnt hungry any more", "wasnt hungrv anymore"]:
+        match = index.match(noisy)
+        assert match is not None, noisy
+        assert match.video_url == "/videos/hungry.mp4"
+        assert match.similarity >= 0.8
+
+    # Different meaning, different words, or too short to judge
+    assert index.add("good morning everyone", "/videos/morning.mp4")
+    assert index.match("good evening everyone") is None
+    assert index.match("i am still hungry") is None
+    assert index.match("the dog ran in the park") is None
+    assert index.match("cat") is None
+    assert index.hits == 3 and index.misses == 3
+
+
+def test_different_subjects_and_nouns_do_not_match():
+    index = SimilarityIndex(threshold=0.8, min_chars=8)
+    assert index.add("He went to the shop", "/videos/he.mp4")
+    assert index.add("the cat sat on the mat", "/videos/mat.mp4")
+    assert index.add("I wasn't hungry any more", "/videos/hungry.mp4")
+
+    # Trigram cosine rates these 0.96 and 0.82, but one short word changes the meaning
+    assert index.match("She went to the shop") is None
+    assert index.match("the cat sat on the hat") is None
+    assert index.match("He went to the ship") is None
+    assert index.match("They went to the shop") is None
+    # A misread letter in a longer word, or OCR spacing, is still the same text
+    assert index.match("he went to the shop!").video_url == "/videos/he.mp4"
+    assert index.match("i wasnt hungrv anymore").video_url == "/videos/hungry.mp4"
+    # A loose fallback lookup is not held to the word check
+    assert index.match("She went to the shop", threshold=0.5).video_url == "/videos/he.mp4"
+
+    assert changed_words("wasnt hungrv anymore", "wasnt hungry any more") == 1
+    assert changed_words("he went to the shop", "she went to the shop") is None
+    assert changed_words("see you tomorrow", "see you tomorrow morning") is None
+
+
+def test_incremental_adds_are_deduplicated():
+    index = SimilarityIndex(min_chars=8)
+    assert index.add("good morning everyone", "/a.mp4")
+    assert not index.add("Good morning, everyone!", "/b.mp4")
+    assert not index.add("hi", "/c.mp4")
+    assert len(index) == 1
+
+    added = index.add_many(
+        [(f"sentence number {i}", f"/{i}.mp4") for i in range(3000)] * 2
+    )
+    assert added == 3000
+    # Later batches and single adds see what earlier ones indexed, in any spelling
+    assert index.add_many([("Sentence number 7!", "/again.mp4")]) == 0
+    assert index.add_many([("good morning everyone", "/d.mp4"), ("new text here", "/e.mp4")]) == 1
+    assert not index.add("sentence number 12", "/f.mp4")
+    assert len(index) == 3002
+    # Growth beyond the initial capacity keeps earlier entries reachable
+    assert index.match("sentence number 2999").video_url == "/2999.mp4"
+    assert index.match("good morning everyone").video_url == "/a.mp4"
+    assert index.stats()["memory_bytes"] < 3002 * 80
+
+
+def test_near_duplicate_reuses_video_without_rendering():
+    client = FakePixVerse(render_seconds=0.01)
+    client.similar = SimilarityIndex(min_chars=8)
+
+    async def run():
+        first = await client.generate_sign_language_video(
+            "I wasn't hungry any more.", usePixverse=True
+        )
+        noisy = await client.generate_sign_language_video(
+            "I wasnt hungrv anymore", usePixverse=True
+        )
+        cached = await client.cached_sign_language_video("i wasnt hungry anymore")
+        other = await client.generate_sign_language_video(
+            "where is the library", usePixverse=True
+        )
+        return first, noisy, cached, other
+
+    first, noisy, cached, other = asyncio.run(run())
+    assert noisy == cached == first
+    assert other != first
+    assert len(client.generate_calls) == 2
+    assert len(client.similar) == 2
+    # One count per generation request against a non-empty index; the cached
+    # lookup is not a request
+    assert (client.similar.hits, client.similar.misses) == (1, 1)
+
+    async def exact():
+        cached = await client.cached_sign_language_video(
+            "i wasnt hungry anymore", similar=False
+        )
+        rendered = await client.generate_sign_language_video(
+            "I wasnt hungrv anymore", usePixverse=True, similar=False
+        )
+        return cached, rendered
+
+    # Exact lookups (pre-rendering) render the text itself
+    cached, rendered = asyncio.run(exact())
+    assert cached is None
+    assert rendered != first and len(client.generate_calls) == 3
+
+
+def test_loader_indexes_assets_and_stored_translations():
+    fake = FakePostgrest()
+    fake.tables["text_translations"] = [
+        {"id": f"{i:04d}", "text": f"stored translation {i}", "video_url": f"/blobs/{i}.mp4"}
+        for i in range(25)
+    ] + [
+        # Demo fallback rows point at an asset clip and must not be indexed
+        {"id": "0100", "text": "some unrelated sentence", "video_url": "/assets/hungry.mp4"},
+    ]
+    assets = AssetIndex()
+    assets.add("wasn't hungry anymore", "/assets/hungry.mp4")
+    assets.add("thank you very much", "/assets/thanks.mp4")
+    index = SimilarityIndex(min_chars=8)
+    loader = SimilarityLoader(index, store=make_db(fake), assets=assets, page_size=10)
+
+    assert asyncio.run(loader.load()) == 27
+    assert loader.rows == 26 and loader.error is None
+    assert index.match("thank you very much!").video_url == "/assets/thanks.mp4"
+    assert index.match("stored translation 24").video_url == "/blobs/24.mp4"
+    assert index.match("some unrelated sentence") is None
+
+    # The row limit bounds the preload; database errors leave a partial index
+    limited = SimilarityLoader(SimilarityIndex(min_chars=8), store=make_db(fake), limit=5)
+    assert asyncio.run(limited.load()) == 5
+    fake.fail = True
+    broken = SimilarityLoader(SimilarityIndex(min_chars=8), store=make_db(fake), assets=assets)
+    assert asyncio.run(broken.load()) == 2
+    assert broken.error
+
+
+def test_fuzzy_text_drops_punctuation():
+    assert fuzzy_text("  Wasn't   hungry, any-more! ") == "wasnt hungry anymore"
+
+
+if __name__ == "__main__":
+    test_ocr_noise_matches_and_unrelated_text_does_not()
+    test_different_subjects_and_nouns_do_not_match()
+    test_incremental_adds_are_deduplicated()
+    test_near_duplicate_reuses_video_without_rendering()
+    test_loader_indexes_assets_and_stored_translations()
+    test_fuzzy_text_drops_punctuation()
+    print("✅ Similarity index tests passed")
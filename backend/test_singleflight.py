@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Concurrency tests for single-flight deduplication of video generations
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pixverse_api import PixVerseAPI
+from singleflight import SingleFlight
+
+
+class FakePixVerse(PixVerseAPI):
+    """PixVerse client backed by an in-memory fake that takes a while to render"""
+
+    def __init__(self, render_seconds: float = 0.2, fail: bool = False):
+        super().__init__(base_url="http://pixverse.invalid")
+        self.api_key = "test-key"
+        self.render_seconds = render_seconds
+        self.fail = fail
+        self.generate_calls = []
+
+    async def generate_video(self, prompt, **kwargs):
+        self.generate_calls.append(prompt)
+        if self.fail:
+            raise RuntimeError("upstream exploded")
+        return {"Resp": {"video_id": len(self.generate_calls)}}
+
+    async def wait_for_completion(self, video_id, check_interval=None, timeout=None):
+        await asyncio.sleep(self.render_seconds)
+        return f"https://media.stub/{video_id}.mp4"
+
+
+def test_one_upstream_generate_per_distinct_text():
+    client = FakePixVerse()
+    texts = ["The cat sat.", "the cat sat", "THE CAT SAT!", "A dog ran.", "a dog ran"]
+
+    async def classroom():
+        # 30 children scanning the same pages at the same moment
+        return await asyncio.gather(
+            *(
+                client.generate_sign_language_video(texts[i % len(texts)], usePixverse=True)
+                for i in range(30)
+            )
+        )
+
+    urls = asyncio.run(classroom())
+
+    assert len(client.generate_calls) == 2
+    assert len(set(urls)) == 2
+    assert client.inflight.started == 2
+    assert client.inflight.coalesced == 28
+    assert len(client.inflight) == 0
+
+
+def test_errors_propagate_to_every_waiter():
+    client = FakePixVerse(fail=True)
+
+    async def run():
+        return await asyncio.gather(
+            *(client.generate_sign_language_video("boom", usePixverse=True) for _ in range(5)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert len(client.generate_calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        assert first.cancelled()
+        return result
+
+    assert asyncio.run(run()) == "done"
+    assert len(calls) == 1
+
+
+def test_work_cancelled_when_all_waiters_leave():
+    flight = SingleFlight()
+
+    async def run():
+        state = {"cancelled": False}
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        waiters = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert state["cancelled"]
+        assert len(flight) == 0
+
+        # A later caller starts a fresh run rather than joining the dead one
+        async def quick():
+            return "fresh"
+
+        assert await flight.do("k", quick) == "fresh"
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_one_upstream_generate_per_distinct_text()
+    test_errors_propagate_to_every_waiter()
+    test_cancelled_waiter_does_not_cancel_others()
+    test_work_cancelled_when_all_waiters_leave()
+    print("✅ Single-flight tests passed")
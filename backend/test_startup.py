@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for cold start: heavy dependencies and connections are deferred until first use
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from translation_cache import TranslationCache
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFERRED_MODULES = ["numpy", "PIL", "postgrest", "pytesseract", "ocr_image"]
+
+
+def test_importing_main_defers_heavy_work():
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            TRANSLATION_CACHE_PATH=os.path.join(tmp, "translation_cache.db"),
+            SHARED_STATE_PATH=os.path.join(tmp, "shared_state.db"),
+            BLOB_STORE_DIR=os.path.join(tmp, "blobs"),
+        )
+        code = (
+            "import json, sys, main; "
+            f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules])); "
+            "print(main.IMPORT_SECONDS)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        loaded, import_seconds = result.stdout.splitlines()[-2:]
+        assert json.loads(loaded) == []
+        assert float(import_seconds) > 0
+        # Nothing touched the disk: SQLite files and directories appear on first use
+        assert os.listdir(tmp) == []
+
+
+def test_translation_cache_opens_sqlite_on_first_use():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        cache = TranslationCache(max_entries=10, ttl=60, path=path)
+        assert not os.path.exists(path)
+
+        async def run():
+            assert await cache.get("missing") is None
+            await cache.set("key", "hello", "/clips/hello.mp4")
+
+        asyncio.run(run())
+        assert os.path.exists(path)
+        # A second instance (another worker) reads what the first one wrote
+        other = TranslationCache(max_entries=10, ttl=60, path=path)
+        assert asyncio.run(other.get("key")) == "/clips/hello.mp4"
+        cache.persistent.close()
+        other.persistent.close()
+
+
+if __name__ == "__main__":
+    test_importing_main_defers_heavy_work()
+    test_translation_cache_opens_sqlite_on_first_use()
+    print("✅ Startup tests passed")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared PixVerse status polling scheduler
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from status_poller import RenderFailedError, StatusPoller
+
+RENDER_SECONDS = 0.4
+
+
+class FakeRenderFarm:
+    """Fake check_status: every video completes RENDER_SECONDS after submission"""
+
+    def __init__(self):
+        self.submitted = {}
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    def submit(self, video_id):
+        self.submitted[video_id] = time.monotonic()
+
+    async def check_status(self, video_id):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.005)
+            if time.monotonic() - self.submitted[video_id] >= RENDER_SECONDS:
+                return 1, f"https://media.stub/{video_id}.mp4"
+            return 5, None
+        finally:
+            self.active -= 1
+
+
+def test_adaptive_polling_resolves_all_videos():
+    farm = FakeRenderFarm()
+    poller = StatusPoller(
+        farm.check_status, max_concurrency=8, initial_interval=0.02, max_interval=0.1
+    )
+
+    async def wave(prefix, count=50):
+        async def one(i):
+            video_id = f"{prefix}-{i}"
+            farm.submit(video_id)
+            url = await poller.wait(video_id, timeout=5)
+            lag = time.monotonic() - farm.submitted[video_id] - RENDER_SECONDS
+            return url, lag
+
+        return await asyncio.gather(*(one(i) for i in range(count)))
+
+    async def run():
+        first = await wave("a")
+        calls_first = farm.calls
+        second = await wave("b")
+        return first, second, calls_first, farm.calls - calls_first
+
+    first, second, calls_first, calls_second = asyncio.run(run())
+
+    for url, lag in first + second:
+        assert url is not None
+        # Completion is noticed within roughly one backed-off interval
+        assert lag < 0.25
+
+    assert farm.max_active <= 8
+    # Once the render time is learned, the first poll is deferred
+    assert calls_second < calls_first
+    stats = poller.stats()
+    assert stats["completed"] == 100
+    assert stats["pending"] == 0
+    assert stats["status_calls_per_completed_video"] == farm.calls / 100
+
+
+def test_timeout_resolves_none_and_errors_propagate():
+    async def broken(video_id):
+        raise RuntimeError("boom")
+
+    async def never(video_id):
+        return 5, None
+
+    async def run():
+        failing = StatusPoller(broken, initial_interval=0.01)
+        stuck = StatusPoller(never, initial_interval=0.01)
+        try:
+            await failing.wait("x", timeout=1)
+            raise AssertionError("status error was swallowed")
+        except RuntimeError as e:
+            assert str(e) == "boom"
+        assert failing.stats()["failed"] == 1
+
+        # A status check's own timeout is an error too, not the poll deadline
+        async def slow(video_id):
+            raise asyncio.TimeoutError()
+
+        try:
+            await StatusPoller(slow, initial_interval=0.01).wait("z", timeout=1)
+            raise AssertionError("status check timeout was swallowed")
+        except asyncio.TimeoutError:
+            pass
+        return await stuck.wait("y", timeout=0.1)
+
+    assert asyncio.run(run()) is None
+
+
+def test_terminal_failure_status_ends_the_wait():
+    async def moderated(video_id):
+        return 7, None
+
+    async def run():
+        poller = StatusPoller(moderated, initial_interval=0.01)
+        started = time.monotonic()
+        try:
+            await poller.wait("x", timeout=30)
+            raise AssertionError("failed render kept polling")
+        except RenderFailedError as e:
+            assert e.status == 7
+        return time.monotonic() - started, poller.stats()
+
+    elapsed, stats = asyncio.run(run())
+    assert elapsed < 1.0
+    assert (stats["failed"], stats["status_calls"]) == (1, 1)
+
+
+def test_polling_stops_when_every_waiter_leaves():
+    farm = FakeRenderFarm()
+    poller = StatusPoller(farm.check_status, initial_interval=0.01, max_interval=0.01)
+
+    async def run():
+        farm.submit("x")
+        waiters = [asyncio.create_task(poller.wait("x", timeout=30)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        waiters[0].cancel()
+        await asyncio.sleep(0.05)
+        # One waiter left: still polled
+        assert len(poller) == 1
+
+        try:
+            await asyncio.wait_for(waiters[1], timeout=0.05)
+            raise AssertionError("wait outlived its caller's timeout")
+        except asyncio.TimeoutError:
+            pass
+        calls = farm.calls
+        await asyncio.sleep(0.1)
+        return calls, poller.stats()
+
+    calls, stats = asyncio.run(run())
+    assert farm.calls == calls
+    assert (stats["pending"], stats["abandoned"], stats["failed"]) == (0, 1, 0)
+
+
+if __name__ == "__main__":
+    test_adaptive_polling_resolves_all_videos()
+    test_timeout_resolves_none_and_errors_propagate()
+    test_terminal_failure_status_ends_the_wait()
+    test_polling_stops_when_every_waiter_leaves()
+    print("✅ Status poller tests passed")
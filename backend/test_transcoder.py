@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Tests for the HLS transcoding stage: ladder, renditions record and pipeline hookup
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from media import MediaFiles
+from pipeline import Segment, SegmentedTranslation, TranslationPipeline
+from transcoder import (
+    MASTER_PLAYLIST,
+    RENDITIONS_FILE,
+    Renditions,
+    Transcoder,
+    codec_string,
+    h264_level,
+    plan_ladder,
+    probe,
+)
+
+
+def find_ffmpeg():
+    """ffmpeg from FFMPEG_PATH or PATH, else the binary bundled with imageio-ffmpeg"""
+    path = shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+    except ImportError:
+        return None
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+FFMPEG = find_ffmpeg()
+
+
+def make_clip(path, size="640x360", seconds=3):
+    subprocess.run(
+        [FFMPEG, "-hide_banner", "-loglevel", "error", "-y",
+         "-f", "lavfi", "-i", f"testsrc=size={size}:rate=25:duration={seconds}",
+         "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+         "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+         "-c:a", "aac", "-shortest", path],
+        check=True,
+    )
+
+
+class FakeClient:
+    async def generate_sign_language_video(self, text, duration=5, usePixverse=False):
+        return "/assets/clip.mp4"
+
+
+def test_plan_ladder():
+    assert [r[0] for r in plan_ladder(1280, 720)] == ["240p", "360p", "480p", "720p"]
+    assert plan_ladder(640, 360)[-1] == ("360p", 640, 360, 800_000)
+    # Odd widths are rounded to even, small sources still get one rung
+    assert plan_ladder(720, 406)[0][1] % 2 == 0
+    assert [r[0] for r in plan_ladder(320, 180)] == ["180p"]
+
+
+def test_each_rung_advertises_its_own_level():
+    ladder = plan_ladder(1920, 1080)
+    levels = [h264_level(w, h, 30, int(bitrate * 1.1)) for _, w, h, bitrate in ladder]
+    assert levels == [21, 30, 31, 31, 40]
+    # Higher frame rates need higher levels at the same size
+    assert h264_level(1920, 1080, 60, 5_500_000) == 42
+    assert codec_string(31, True) == "avc1.4d401f,mp4a.40.2"
+    assert codec_string(40, False) == "avc1.4d4028"
+
+
+def test_multi_segment_passage_has_a_manifest_per_segment():
+    one = SegmentedTranslation(
+        text="hi", segments=[Segment(0, "hi", video_url="/a.mp4", manifest_url="/a/master.m3u8")]
+    )
+    assert one.manifest_url == "/a/master.m3u8"
+
+    two = SegmentedTranslation(
+        text="hi there you",
+        segments=[
+            Segment(0, "hi", video_url="/a.mp4", manifest_url="/a/master.m3u8"),
+            Segment(1, "there"),
+            Segment(2, "you", video_url="/b.mp4"),
+        ],
+    )
+    assert two.manifest_url is None
+    assert two.manifest_urls == ["/a/master.m3u8", None]
+
+
+def test_transcodes_local_clip_once():
+    if FFMPEG is None:
+        print("⚠️  ffmpeg not available, skipping transcode test")
+        return
+    with tempfile.TemporaryDirectory() as assets:
+        make_clip(os.path.join(assets, "clip.mp4"))
+        assert probe(FFMPEG, os.path.join(assets, "clip.mp4")) == (640, 360, True)
+
+        transcoder = Transcoder(assets_dir=assets, ffmpeg=FFMPEG, workers=1)
+
+        async def run():
+            try:
+                return await asyncio.gather(
+                    transcoder.transcode("/assets/clip.mp4"),
+                    transcoder.transcode("/assets/clip.mp4"),
+                )
+            finally:
+                await transcoder.aclose()
+
+        first, second = asyncio.run(run())
+        assert first is second and transcoder.transcoded == 1
+        assert [r.name for r in first.renditions] == ["240p", "360p"]
+        assert first.manifest_url == f"/assets/renditions/{first.key}/{MASTER_PLAYLIST}"
+
+        out_dir = os.path.join(assets, "renditions", first.key)
+        files = set(os.listdir(out_dir))
+        assert {"master.m3u8", "poster.jpg", "240p.mp4", "360p.m3u8", "240p_init.mp4"} <= files
+        assert any(name.endswith(".m4s") for name in files)
+        # No half-written work directories are left behind
+        assert os.listdir(os.path.join(assets, "renditions")) == [first.key]
+
+        with open(os.path.join(out_dir, "master.m3u8")) as f:
+            master = f.read()
+        assert "RESOLUTION=426x240" in master and "360p.m3u8" in master
+
+        # faststart: the moov box precedes the media data
+        with open(os.path.join(out_dir, "360p.mp4"), "rb") as f:
+            head = f.read(4096)
+        assert head.find(b"moov") < head.find(b"mdat") or b"mdat" not in head
+
+        # A fresh instance (e.g. after a restart) picks up the record from disk
+        restarted = Transcoder(assets_dir=assets, ffmpeg=FFMPEG)
+        assert asyncio.run(restarted.lookup("/assets/clip.mp4")) == first
+
+        # Renditions are served with streaming content types and cached for good
+        client = TestClient(Starlette(routes=[Mount("/assets", MediaFiles(directory=assets))]))
+        playlist = client.get(first.manifest_url)
+        assert playlist.headers["content-type"].startswith("application/vnd.apple.mpegurl")
+        assert "immutable" in playlist.headers["cache-control"]
+        segment = next(name for name in files if name.endswith(".m4s"))
+        assert client.get(f"/assets/renditions/{first.key}/{segment}").headers[
+            "content-type"
+        ] == "video/iso.segment"
+
+
+def test_downloads_remote_source_and_backs_off_after_failure():
+    if FFMPEG is None:
+        print("⚠️  ffmpeg not available, skipping transcode test")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        make_clip(source, size="320x240", seconds=2)
+        with open(source, "rb") as f:
+            data = f.read()
+        downloads = []
+
+        def handler(request):
+            downloads.append(str(request.url))
+            if request.url.path == "/missing.mp4":
+                return httpx.Response(404)
+            return httpx.Response(200, content=data)
+
+        assets = os.path.join(tmp, "assets")
+        transcoder = Transcoder(
+            assets_dir=assets, ffmpeg=FFMPEG, transport=httpx.MockTransport(handler)
+        )
+
+        async def run():
+            try:
+                ok = await transcoder.transcode("https://cdn.test/clip.mp4")
+                again = await transcoder.transcode("https://cdn.test/clip.mp4")
+                missing = await transcoder.transcode("https://cdn.test/missing.mp4")
+                # A failed source is not retried on every request
+                transcoder.schedule("https://cdn.test/missing.mp4")
+                await asyncio.sleep(0)
+                return ok, again, missing
+            finally:
+                await transcoder.aclose()
+
+        ok, again, missing = asyncio.run(run())
+        assert ok is again and missing is None
+        assert downloads == ["https://cdn.test/clip.mp4", "https://cdn.test/missing.mp4"]
+        assert [r.name for r in ok.renditions] == ["240p"]
+        assert transcoder.stats()["failures"] == 1
+
+
+def test_records_and_failures_are_bounded():
+    with tempfile.TemporaryDirectory() as assets:
+        transcoder = Transcoder(assets_dir=assets, retry_after=0.05, cache_size=2)
+        urls = [f"/assets/clip-{i}.mp4" for i in range(3)]
+        for url in urls:
+            key = transcoder.key_for(url)
+            os.makedirs(os.path.join(transcoder.output_dir, key))
+            record = Renditions(key, url, f"/{key}/master.m3u8", "", "")
+            with open(os.path.join(transcoder.output_dir, key, RENDITIONS_FILE), "w") as f:
+                json.dump(record.to_dict(), f)
+
+        async def run():
+            found = [await transcoder.lookup(url) for url in urls]
+            # The source is missing: the failure holds off retries until it expires
+            failed = await transcoder.transcode("/assets/missing.mp4")
+            transcoder.schedule("/assets/missing.mp4")
+            held_off = len(transcoder._tasks)
+            await asyncio.sleep(0.06)
+            transcoder.schedule("/assets/missing.mp4")
+            retried = len(transcoder._tasks)
+            await asyncio.gather(*transcoder._tasks.values())
+            return found, failed, held_off, retried
+
+        found, failed, held_off, retried = asyncio.run(run())
+        assert [r.source_url for r in found] == urls
+        assert transcoder.stats()["ready"] == 2
+        assert (failed, held_off, retried) == (None, 0, 1)
+        assert transcoder.stats()["failures"] == 2
+
+
+def test_pipeline_attaches_manifest_once_ready():
+    if FFMPEG is None:
+        print("⚠️  ffmpeg not available, skipping transcode test")
+        return
+    with tempfile.TemporaryDirectory() as assets:
+        make_clip(os.path.join(assets, "clip.mp4"), seconds=2)
+        transcoder = Transcoder(assets_dir=assets, ffmpeg=FFMPEG)
+        pipeline = TranslationPipeline(FakeClient(), transcoder=transcoder)
+
+        async def run():
+            try:
+                # The first request is served from the original file and queues a transcode
+                first = await pipeline.translate("Hello", use_pixverse=False)
+                assert first.video_url == "/assets/clip.mp4" and first.manifest_url is None
+                assert transcoder.stats()["in_progress"] == 1
+                await asyncio.gather(*transcoder._tasks.values())
+                return await pipeline.translate("Hello", use_pixverse=False)
+            finally:
+                await transcoder.aclose()
+
+        second = asyncio.run(run())
+        assert second.manifest_url.endswith("/master.m3u8")
+        assert second.playlist()[0]["poster_url"].endswith("/poster.jpg")
+        assert isinstance(second.segments[0], Segment)
+
+
+if __name__ == "__main__":
+    test_plan_ladder()
+    test_each_rung_advertises_its_own_level()
+    test_multi_segment_passage_has_a_manifest_per_segment()
+    test_transcodes_local_clip_once()
+    test_downloads_remote_source_and_backs_off_after_failure()
+    test_records_and_failures_are_bounded()
+    test_pipeline_attaches_manifest_once_ready()
+    print("✅ Transcoder tests passed")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the two-tier translation cache in front of generate_sign_language_video
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the current directory to Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pixverse_api import PixVerseAPI
+from translation_cache import (
+    MemoryCacheTier,
+    SQLiteCacheTier,
+    TranslationCache,
+    normalize_text,
+)
+
+
+class CountingPixVerse(PixVerseAPI):
+    """PixVerse client whose upstream calls are faked and counted"""
+
+    def __init__(self, cache):
+        super().__init__(base_url="http://pixverse.invalid", cache=cache)
+        self.api_key = "test-key"
+        self.generate_calls = 0
+        self.status_calls = 0
+
+    async def generate_video(self, prompt, **kwargs):
+        self.generate_calls += 1
+        return {"Resp": {"video_id": self.generate_calls}}
+
+    async def check_status(self, video_id):
+        self.status_calls += 1
+        return 1, f"https://media.stub/{video_id}.mp4"
+
+
+def test_normalize_text():
+    assert normalize_text("  Wasn’t   hungry\nANY more. ") == "wasn't hungry any more"
+    assert normalize_text("Hello!") == normalize_text("hello")
+
+
+def test_memory_tier_lru_and_ttl():
+    tier = MemoryCacheTier(max_entries=2, ttl=60)
+    tier.set("a", "1")
+    tier.set("b", "2")
+    tier.get("a")
+    tier.set("c", "3")
+    assert tier.get("b") is None
+    assert tier.get("a") == "1"
+    assert tier.evictions == 1
+
+    tier = MemoryCacheTier(max_entries=2, ttl=60)
+    tier.set("expired", "x", expires_at=time.time() - 1)
+    assert tier.get("expired") is None
+    assert tier.evictions == 1
+
+
+def test_cache_hit_skips_generation():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        client = CountingPixVerse(TranslationCache(max_entries=10, ttl=60, path=path))
+
+        async def run():
+            first = await client.generate_sign_language_video("Hello there.", usePixverse=True)
+            second = await client.generate_sign_language_video("hello   THERE", usePixverse=True)
+            other = await client.generate_sign_language_video(
+                "hello there", usePixverse=True, duration=8
+            )
+            return first, second, other
+
+        first, second, other = asyncio.run(run())
+        assert first == second
+        assert other != first
+        assert client.generate_calls == 2
+        assert client.status_calls == 2
+        assert client.cache.stats()["hits"] == 1
+
+        # A fresh process only has the persistent tier to go on
+        restarted = CountingPixVerse(TranslationCache(max_entries=10, ttl=60, path=path))
+        url = asyncio.run(restarted.generate_sign_language_video("Hello there", usePixverse=True))
+        assert url == first
+        assert restarted.generate_calls == 0
+        assert restarted.cache.stats()["persistent_hits"] == 1
+        client.cache.persistent.close()
+        restarted.cache.persistent.close()
+
+
+def test_persistent_tier_is_pruned_and_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        tier = SQLiteCacheTier(os.path.join(tmp, "cache.db"), ttl=60, max_rows=3)
+        for i in range(5):
+            tier.set(f"k{i}", f"text {i}", f"/{i}.mp4")
+        with tier._lock, tier._conn:
+            tier._conn.execute("UPDATE translation_cache SET expires_at = 0 WHERE key = 'k4'")
+
+        # The expired row, then the oldest beyond max_rows
+        assert tier.prune() == 2
+        assert len(tier) == 3
+        assert tier.get("k0") is None and tier.get("k4") is None
+        assert tier.get("k3") == ("/3.mp4", tier.get("k3")[1])
+        tier.close()
+
+        # The cache prunes on start, without waiting for a read
+        cache = TranslationCache(max_entries=10, ttl=60, path=os.path.join(tmp, "cache.db"))
+        cache.persistent.max_rows = 1
+
+        async def run():
+            cache.start()
+            await asyncio.sleep(0.1)
+            await cache.stop()
+
+        asyncio.run(run())
+        assert len(cache.persistent) == 1
+        assert cache.stats()["pruned"] == 2
+        cache.persistent.close()
+
+
+if __name__ == "__main__":
+    test_normalize_text()
+    test_memory_tier_lru_and_ttl()
+    test_cache_hit_skips_generation()
+    test_persistent_tier_is_pruned_and_bounded()
+    print("✅ Translation cache tests passed")
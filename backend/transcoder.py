@@ -0,0 +1,424 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import httpx
+
+from config import settings
+from translation_cache import MemoryCacheTier
+
+RENDITIONS_FILE = "renditions.json"
+MASTER_PLAYLIST = "master.m3u8"
+POSTER = "poster.jpg"
+
+# (name, height, video bitrate) from smallest to largest; rungs taller than
+# the source are dropped rather than upscaled
+LADDER: List[Tuple[str, int, int]] = [
+    ("240p", 240, 400_000),
+    ("360p", 360, 800_000),
+    ("480p", 480, 1_400_000),
+    ("720p", 720, 2_800_000),
+    ("1080p", 1080, 5_000_000),
+]
+AUDIO_BITRATE = 96_000
+# Frame rate assumed when the input banner does not state one
+DEFAULT_FPS = 30.0
+
+# H.264 levels as (level_idc, max macroblocks/s, max frame macroblocks,
+# max Main profile bitrate in bit/s), from Table A-1 of the spec
+H264_LEVELS: List[Tuple[int, int, int, int]] = [
+    (21, 19_800, 792, 4_000_000),
+    (22, 20_250, 1_620, 4_000_000),
+    (30, 40_500, 1_620, 10_000_000),
+    (31, 108_000, 3_600, 14_000_000),
+    (32, 216_000, 5_120, 20_000_000),
+    (40, 245_760, 8_192, 20_000_000),
+    (41, 245_760, 8_192, 50_000_000),
+    (42, 522_240, 8_704, 50_000_000),
+    (50, 589_824, 22_080, 135_000_000),
+    (51, 983_040, 36_864, 240_000_000),
+]
+
+_VIDEO_SIZE = re.compile(r"Stream #\S+.*Video: .*?, (\d{2,5})x(\d{2,5})[\s,\[]")
+_FRAME_RATE = re.compile(r"Stream #\S+.*Video: .*?, ([\d.]+) fps")
+_HAS_AUDIO = re.compile(r"Stream #\S+.*Audio: ")
+
+
+@dataclass
+class Rendition:
+    name: str
+    width: int
+    height: int
+    bandwidth: int
+    playlist_url: str
+    mp4_url: str
+
+
+@dataclass
+class Renditions:
+    """Adaptive renditions of one source clip"""
+
+    key: str
+    source_url: str
+    manifest_url: str
+    poster_url: str
+    fallback_url: str
+    renditions: List[Rendition] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Renditions":
+        renditions = [Rendition(**r) for r in data.get("renditions", [])]
+        return cls(**{**data, "renditions": renditions})
+
+
+# ffmpeg work, run in pool worker processes ---------------------------------
+
+
+def _run(command: List[str], timeout: float) -> subprocess.CompletedProcess:
+    result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({result.returncode}): {result.stderr[-500:]}")
+    return result
+
+
+def _input_banner(ffmpeg: str, source: str, timeout: float) -> str:
+    # Without an output ffmpeg exits non-zero, but still describes the input
+    result = subprocess.run(
+        [ffmpeg, "-hide_banner", "-i", source], capture_output=True, text=True, timeout=timeout
+    )
+    if not _VIDEO_SIZE.search(result.stderr):
+        raise RuntimeError(f"No video stream in {source}")
+    return result.stderr
+
+
+def _parse_banner(banner: str) -> Tuple[int, int, bool, float]:
+    match = _VIDEO_SIZE.search(banner)
+    fps = _FRAME_RATE.search(banner)
+    return (
+        int(match.group(1)),
+        int(match.group(2)),
+        bool(_HAS_AUDIO.search(banner)),
+        float(fps.group(1)) if fps else DEFAULT_FPS,
+    )
+
+
+def probe(ffmpeg: str, source: str, timeout: float = 30) -> Tuple[int, int, bool]:
+    """Width, height and whether there is an audio stream, from ffmpeg's input banner"""
+    return _parse_banner(_input_banner(ffmpeg, source, timeout))[:3]
+
+
+def h264_level(width: int, height: int, fps: float, max_bitrate: int) -> int:
+    """Lowest H.264 level_idc (31 for 3.1) whose limits fit a rung"""
+    frame = ((width + 15) // 16) * ((height + 15) // 16)
+    for level, max_rate, max_frame, max_bits in H264_LEVELS:
+        if frame <= max_frame and frame * fps <= max_rate and max_bitrate <= max_bits:
+            return level
+    return H264_LEVELS[-1][0]
+
+
+def codec_string(level: int, has_audio: bool) -> str:
+    """RFC 6381 CODECS value: H.264 Main profile at `level`, plus AAC-LC audio"""
+    video = f"avc1.4d40{level:02x}"
+    return f"{video},mp4a.40.2" if has_audio else video
+
+
+def plan_ladder(width: int, height: int) -> List[Tuple[str, int, int, int]]:
+    """(name, width, height, bitrate) rungs for a source of the given size"""
+    rungs = [(name, h, bitrate) for name, h, bitrate in LADDER if h <= height]
+    if not rungs:
+        rungs = [(f"{height}p", height, LADDER[0][2])]
+    # Even widths keep x264 happy
+    return [(name, 2 * round(width * h / height / 2), h, bitrate) for name, h, bitrate in rungs]
+
+
+def transcode_file(
+    ffmpeg: str, source: str, out_dir: str, timeout: float, segment_seconds: float = 2.0
+) -> List[Dict[str, Any]]:
+    """
+    Encode every rung of the ladder in one ffmpeg pass (the source is decoded
+    once and split), as faststart MP4s. Each MP4 is then packaged as HLS
+    without re-encoding, and a poster frame is taken from the smallest rung.
+    """
+    width, height, has_audio, fps = _parse_banner(_input_banner(ffmpeg, source, 30))
+    rungs = plan_ladder(width, height)
+    # Each rung is encoded at, and advertised with, the level its size needs
+    levels = [h264_level(w, h, fps, int(bitrate * 1.1)) for _, w, h, bitrate in rungs]
+
+    split = f"[0:v]split={len(rungs)}" + "".join(f"[s{i}]" for i in range(len(rungs)))
+    scales = [f"[s{i}]scale={w}:{h}[v{i}]" for i, (_, w, h, _) in enumerate(rungs)]
+    command = [ffmpeg, "-hide_banner", "-y", "-i", source,
+               "-filter_complex", ";".join([split, *scales])]
+    for i, (name, _, _, bitrate) in enumerate(rungs):
+        command += [
+            "-map", f"[v{i}]", "-c:v", "libx264", "-preset", "veryfast",
+            "-profile:v", "main", "-level:v", f"{levels[i] / 10:.1f}",
+            "-pix_fmt", "yuv420p",
+            "-b:v", str(bitrate), "-maxrate", str(int(bitrate * 1.1)),
+            "-bufsize", str(bitrate * 2),
+            # Keyframes on segment boundaries so HLS can cut without re-encoding
+            "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})",
+        ]
+        if has_audio:
+            command += ["-map", "0:a:0", "-c:a", "aac", "-b:a", str(AUDIO_BITRATE)]
+        command += ["-movflags", "+faststart", os.path.join(out_dir, f"{name}.mp4")]
+    _run(command, timeout)
+
+    for name, _, _, _ in rungs:
+        _run(
+            [ffmpeg, "-hide_banner", "-y", "-i", os.path.join(out_dir, f"{name}.mp4"),
+             "-c", "copy", "-f", "hls", "-hls_time", str(segment_seconds),
+             "-hls_playlist_type", "vod", "-hls_segment_type", "fmp4",
+             "-hls_fmp4_init_filename", f"{name}_init.mp4",
+             "-hls_segment_filename", os.path.join(out_dir, f"{name}_%03d.m4s"),
+             os.path.join(out_dir, f"{name}.m3u8")],
+            timeout,
+        )
+
+    _run(
+        [ffmpeg, "-hide_banner", "-y", "-i", os.path.join(out_dir, f"{rungs[0][0]}.mp4"),
+         "-frames:v", "1", "-q:v", "3", os.path.join(out_dir, POSTER)],
+        timeout,
+    )
+
+    audio = AUDIO_BITRATE if has_audio else 0
+    lines = ["#EXTM3U", "#EXT-X-VERSION:7", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for (name, w, h, bitrate), level in zip(rungs, levels):
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={int((bitrate + audio) * 1.1)},"
+            f"AVERAGE-BANDWIDTH={bitrate + audio},RESOLUTION={w}x{h},"
+            f'CODECS="{codec_string(level, has_audio)}"'
+        )
+        lines.append(f"{name}.m3u8")
+    with open(os.path.join(out_dir, MASTER_PLAYLIST), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    return [
+        {"name": name, "width": w, "height": h, "bandwidth": bitrate + audio}
+        for name, w, h, bitrate in rungs
+    ]
+
+
+class Transcoder:
+    """
+    Post-generation stage that turns each finished clip into an HLS ladder.
+
+    Every source URL (a PixVerse result or a local /assets clip) is fetched
+    once and transcoded by ffmpeg in a background process pool into a few
+    renditions with faststart MP4 fallbacks, a master playlist and a poster.
+    Outputs live under <ASSETS_DIR>/renditions/<key>/ next to a
+    renditions.json record, so finished work survives restarts. Lookups are
+    non-blocking: records are read off the event loop, and a clip that is
+    not ready yet is scheduled and served as its original file in the
+    meantime. Records and recent failures are remembered in bounded LRUs.
+    """
+
+    def __init__(
+        self,
+        output_dir: Optional[str] = None,
+        url_prefix: str = "/assets/renditions",
+        ffmpeg: Optional[str] = None,
+        workers: Optional[int] = None,
+        assets_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+        retry_after: float = 600.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.assets_dir = assets_dir or settings.ASSETS_DIR
+        self.output_dir = output_dir or os.path.join(self.assets_dir, "renditions")
+        self.url_prefix = url_prefix.rstrip("/")
+        self.ffmpeg = ffmpeg or settings.FFMPEG_PATH
+        self.workers = workers or settings.TRANSCODE_WORKERS
+        self.timeout = timeout or settings.TRANSCODE_TIMEOUT
+        self.retry_after = retry_after
+        self.transport = transport
+
+        cache_size = cache_size or settings.TRANSCODE_CACHE_SIZE
+        # Records never go stale, only out of the LRU; failures expire after
+        # retry_after, when the clip may be scheduled again
+        self._ready = MemoryCacheTier(cache_size, float("inf"))
+        self._failed = MemoryCacheTier(cache_size, retry_after)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self.transcoded = 0
+        self.failures = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=settings.PIXVERSE_REQUEST_TIMEOUT,
+                follow_redirects=True,
+                transport=self.transport,
+            )
+        return self._client
+
+    @staticmethod
+    def key_for(source_url: str) -> str:
+        return hashlib.sha256(source_url.encode("utf-8")).hexdigest()[:32]
+
+    async def lookup(self, source_url: str) -> Optional[Renditions]:
+        """Finished renditions of a clip, from memory or a previous run's record"""
+        key = self.key_for(source_url)
+        renditions = self._ready.get(key)
+        if renditions is not None:
+            return renditions
+        renditions = await asyncio.to_thread(self._read_record, key)
+        if renditions is not None:
+            self._ready.set(key, renditions)
+        return renditions
+
+    def _read_record(self, key: str) -> Optional[Renditions]:
+        record = os.path.join(self.output_dir, key, RENDITIONS_FILE)
+        try:
+            with open(record) as f:
+                return Renditions.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    async def resolve(self, source_url: str) -> Optional[Renditions]:
+        """Renditions if ready; otherwise schedule the clip and return None"""
+        renditions = await self.lookup(source_url)
+        if renditions is None:
+            self.schedule(source_url)
+        return renditions
+
+    def schedule(self, source_url: str):
+        """Start transcoding in the background unless done, running or recently failed"""
+        key = self.key_for(source_url)
+        if self._ready.get(key) is not None or self._failed.get(key) is not None:
+            return
+        self._start(key, source_url)
+
+    async def transcode(self, source_url: str) -> Optional[Renditions]:
+        """Transcode a clip, sharing the work with concurrent callers for the same URL"""
+        renditions = await self.lookup(source_url)
+        if renditions is not None:
+            return renditions
+        return await asyncio.shield(self._start(self.key_for(source_url), source_url))
+
+    def _start(self, key: str, source_url: str) -> asyncio.Task:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._transcode(key, source_url))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return task
+
+    async def _transcode(self, key: str, source_url: str) -> Optional[Renditions]:
+        work_dir = await asyncio.to_thread(self._work_dir, key)
+        try:
+            source = await self._fetch(source_url, work_dir)
+            loop = asyncio.get_running_loop()
+            rungs = await loop.run_in_executor(
+                self.executor, transcode_file, self.ffmpeg, source, work_dir, self.timeout
+            )
+
+            base = f"{self.url_prefix}/{key}"
+            renditions = Renditions(
+                key=key,
+                source_url=source_url,
+                manifest_url=f"{base}/{MASTER_PLAYLIST}",
+                poster_url=f"{base}/{POSTER}",
+                # The middle rung is a safe single-file fallback
+                fallback_url=f"{base}/{rungs[(len(rungs) - 1) // 2]['name']}.mp4",
+                renditions=[
+                    Rendition(
+                        playlist_url=f"{base}/{r['name']}.m3u8",
+                        mp4_url=f"{base}/{r['name']}.mp4",
+                        **r,
+                    )
+                    for r in rungs
+                ],
+            )
+            await asyncio.to_thread(self._publish, work_dir, source, renditions)
+
+            self._ready.set(key, renditions)
+            self._failed.delete(key)
+            self.transcoded += 1
+            return renditions
+
+        except Exception as e:
+            print(f"Error transcoding {source_url}: {e}")
+            self._failed.set(key, True)
+            self.failures += 1
+            return None
+        finally:
+            await asyncio.to_thread(shutil.rmtree, work_dir, ignore_errors=True)
+
+    def _work_dir(self, key: str) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        return tempfile.mkdtemp(prefix=f".{key}.", dir=self.output_dir)
+
+    def _publish(self, work_dir: str, source: str, renditions: Renditions):
+        if source.startswith(work_dir):
+            os.remove(source)
+        with open(os.path.join(work_dir, RENDITIONS_FILE), "w") as f:
+            json.dump(renditions.to_dict(), f, indent=2)
+        # Publish the finished directory in one step
+        out_dir = os.path.join(self.output_dir, renditions.key)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(work_dir, out_dir)
+
+    async def _fetch(self, source_url: str, work_dir: str) -> str:
+        """Local path of the source: an /assets file as is, remote URLs streamed to disk"""
+        if source_url.startswith("/assets/"):
+            path = os.path.join(self.assets_dir, unquote(source_url[len("/assets/"):]))
+            if not await asyncio.to_thread(os.path.isfile, path):
+                raise FileNotFoundError(path)
+            return path
+
+        path = os.path.join(work_dir, "source")
+        async with self.client.stream("GET", source_url) as response:
+            response.raise_for_status()
+            f = await asyncio.to_thread(open, path, "wb")
+            try:
+                async for chunk in response.aiter_bytes(1024 * 1024):
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": len(self._ready),
+            "in_progress": len(self._tasks),
+            "transcoded": self.transcoded,
+            "failures": self.failures,
+        }
+
+    async def aclose(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Create a global instance
+transcoder = Transcoder()
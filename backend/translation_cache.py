@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Hashable, Tuple
+
+from config import settings
+from metrics import CACHE_LOOKUPS
+
+
+_QUOTES = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"'})
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.,;:!?\"'()[]{}-"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry"""
+    text = unicodedata.normalize("NFKC", text).translate(_QUOTES)
+    text = _WHITESPACE.sub(" ", text.casefold())
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def cache_key(text: str, **params: Any) -> str:
+    """Content address for a translation: normalized text plus generation parameters"""
+    material = json.dumps(
+        {"text": normalize_text(text), **params}, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheTier:
+    """In-process LRU cache with per-entry TTL and a maximum entry count"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.evictions += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        if expires_at is None:
+            expires_at = time.time() + self.ttl
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SQLiteCacheTier:
+    """
+    Persistent cache tier stored in a local SQLite file, opened on first use.
+    prune() keeps it bounded: expired rows go first, then the oldest rows
+    beyond `max_rows`.
+    """
+
+    def __init__(self, path: str, ttl: float, max_rows: Optional[int] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows or settings.TRANSLATION_CACHE_MAX_ROWS
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Callers hold self._lock
+        if self._db is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS translation_cache (
+                        key TEXT PRIMARY KEY,
+                        text TEXT NOT NULL,
+                        video_url TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS translation_cache_created "
+                    "ON translation_cache (created_at)"
+                )
+            self._db = conn
+        return self._db
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_url, expires_at FROM translation_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                with self._conn:
+                    self._conn.execute(
+                        "DELETE FROM translation_cache WHERE key = ?", (key,)
+                    )
+                self.evictions += 1
+                return None
+            return row[0], row[1]
+
+    def set(self, key: str, text: str, video_url: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translation_cache VALUES (?, ?, ?, ?, ?)",
+                (key, text, video_url, now, now + self.ttl),
+            )
+
+    def prune(self) -> int:
+        """Delete expired rows and the oldest beyond max_rows, returning how many"""
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM translation_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            removed += self._conn.execute(
+                """
+                DELETE FROM translation_cache WHERE key IN (
+                    SELECT key FROM translation_cache
+                    ORDER BY created_at DESC, rowid DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_rows,),
+            ).rowcount
+        self.evictions += removed
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translation_cache").fetchone()[0]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class TranslationCache:
+    """Two-tier (memory LRU + SQLite) cache of generated sign language video URLs"""
+
+    def __init__(
+        self,
+        max_entries: int = settings.TRANSLATION_CACHE_MAX_ENTRIES,
+        ttl: float = settings.TRANSLATION_CACHE_TTL,
+        path: Optional[str] = settings.TRANSLATION_CACHE_PATH,
+        prune_interval: float = settings.TRANSLATION_CACHE_PRUNE_INTERVAL,
+    ):
+        self.memory = MemoryCacheTier(max_entries, ttl)
+        self.persistent = SQLiteCacheTier(path, ttl) if path else None
+        self.prune_interval = prune_interval
+        self.pruned = 0
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.persistent_hits = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a video URL, promoting persistent hits into memory"""
+        video_url = self.memory.get(key)
+        if video_url is not None:
+            self.hits += 1
+            self.memory_hits += 1
+            CACHE_LOOKUPS.labels("memory_hit").inc()
+            return video_url
+
+        if self.persistent is not None:
+            row = await asyncio.to_thread(self.persistent.get, key)
+            if row is not None:
+                video_url, expires_at = row
+                self.memory.set(key, video_url, expires_at)
+                self.hits += 1
+                self.persistent_hits += 1
+                CACHE_LOOKUPS.labels("persistent_hit").inc()
+                return video_url
+
+        self.misses += 1
+        CACHE_LOOKUPS.labels("miss").inc()
+        return None
+
+    async def set(self, key: str, text: str, video_url: str):
+        """Store a generated video URL in both tiers"""
+        self.memory.set(key, video_url)
+        if self.persistent is not None:
+            await asyncio.to_thread(self.persistent.set, key, text, video_url)
+
+    def start(self):
+        """Prune the persistent tier now and every prune_interval seconds"""
+        if self.persistent is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._prune_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _prune_periodically(self):
+        while True:
+            try:
+                self.pruned += await asyncio.to_thread(self.persistent.prune)
+            except sqlite3.Error as e:
+                print(f"⚠️ Translation cache prune failed: {e}")
+            await asyncio.sleep(self.prune_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.memory.evictions
+            + (self.persistent.evictions if self.persistent else 0),
+            "memory_entries": len(self.memory),
+            "pruned": self.pruned,
+        }
+
+
+# Create a global instance
+translation_cache = TranslationCache()
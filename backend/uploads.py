@@ -0,0 +1,47 @@
+from typing import AsyncIterator
+
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartParser
+from starlette.requests import Request
+
+
+class UploadTooLargeError(Exception):
+    """Raised when a request body exceeds the configured size limit"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the {limit} byte limit")
+        self.limit = limit
+
+
+async def _limited(stream: AsyncIterator[bytes], limit: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in stream:
+        received += len(chunk)
+        if received > limit:
+            raise UploadTooLargeError(limit)
+        yield chunk
+
+
+async def read_upload(request: Request, limit: int, field: str = "file") -> bytes:
+    """
+    Read an uploaded file from a multipart form field or a raw request body.
+
+    The body is consumed as it streams in and rejected as soon as it passes
+    `limit` bytes, so an oversized upload is never buffered in full.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise UploadTooLargeError(limit)
+
+    stream = _limited(request.stream(), limit)
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await MultiPartParser(request.headers, stream, max_files=1).parse()
+        try:
+            upload = form.get(field)
+            if not isinstance(upload, UploadFile):
+                raise ValueError(f"Missing '{field}' file field")
+            return await upload.read()
+        finally:
+            await form.close()
+
+    return b"".join([chunk async for chunk in stream])